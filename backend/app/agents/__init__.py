@@ -1,3 +1,26 @@
-from app.agents.investment import register_investment_agent
+from app.platform.registry import AgentRegistry, agent_registry
 
-__all__ = ["register_investment_agent"]
+# 内置 agent 的延迟加载入口：只有被启用的 agent 才会 import 其 jobs/routes/crawlers
+BUILTIN_AGENT_LOADERS: dict[str, str] = {
+    "investment": "app.agents.investment:register_investment_agent",
+    "tech_info": "app.agents.tech_info:register_tech_info_agent",
+    "cs2_market": "app.agents.cs2_market:register_cs2_market_agent",
+}
+
+
+def register_builtin_agents(registry: AgentRegistry | None = None) -> AgentRegistry:
+    target = registry or agent_registry
+    for key, loader_path in BUILTIN_AGENT_LOADERS.items():
+        target.register_lazy(key, loader_path)
+    return target
+
+
+def __getattr__(name: str):
+    # 兼容旧的 `from app.agents import register_investment_agent`，按需导入
+    if name == "register_investment_agent":
+        from app.agents.investment import register_investment_agent
+        return register_investment_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["BUILTIN_AGENT_LOADERS", "register_builtin_agents", "register_investment_agent"]
@@ -1,4 +1,5 @@
 from app.agents.cs2_market.defaults import BUILTIN_SKILLS
+from app.agents.cs2_market.items_catalog import seed_initial_items
 from app.agents.cs2_market.jobs import register_cs2_jobs
 from app.agents.cs2_market.routes import router
 from app.platform.manifest import AgentManifest
@@ -16,6 +17,7 @@ def register_cs2_market_agent(
         router=router,
         job_registrar=register_cs2_jobs,
         builtin_skills=BUILTIN_SKILLS,
+        initializer=seed_initial_items,
     )
     return target.register(manifest)
 
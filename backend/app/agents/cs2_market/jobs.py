@@ -1,9 +1,12 @@
 import logging
+from collections.abc import AsyncIterator
 from datetime import datetime, timedelta
 
 from sqlalchemy import select, delete, desc, func
+from sqlalchemy.exc import IntegrityError
 
-from app.ai.client import chat_completion
+from app.ai.client import chat_completion, chat_completion_stream
+from app.ai.usage import scoped_stream, usage_meter, usage_scope
 from app.crawlers.steam_market import SteamMarketCrawler
 from app.crawlers.cs2_patchnotes import CS2PatchNotesCrawler
 from app.database import async_session
@@ -12,6 +15,7 @@ from app.models.cs2_price import CS2PriceSnapshot
 from app.models.cs2_prediction import CS2Prediction
 from app.models.cs2_watchlist import CS2Watchlist
 from app.models.report import DailyReport
+from app.platform.response_cache import response_cache
 from app.platform.scheduler import SchedulerKernel
 
 logger = logging.getLogger(__name__)
@@ -19,6 +23,16 @@ logger = logging.getLogger(__name__)
 AGENT_KEY = "cs2_market"
 
 
+async def _broadcast_prices(snapshots: list[CS2PriceSnapshot]) -> None:
+    if not snapshots:
+        return
+    try:
+        from app.api.ws import broadcast_cs2_prices
+        await broadcast_cs2_prices([s.to_dict() for s in snapshots])
+    except Exception as e:
+        logger.debug(f"WebSocket broadcast skipped: {e}")
+
+
 async def _fetch_via_buff() -> int:
     """从 BUFF 拉取真实市场价（需 cookies）。返回保存条数；无 cookies 时返回 -1。"""
     from app.crawlers.buff import BuffCrawler
@@ -44,6 +58,7 @@ async def _fetch_via_buff() -> int:
         name_to_item = {item.market_hash_name: item for item in items}
 
     saved = 0
+    snapshots: list[CS2PriceSnapshot] = []
     async with async_session() as session:
         for row in all_items:
             mhn = row.get("market_hash_name")
@@ -57,7 +72,7 @@ async def _fetch_via_buff() -> int:
                 price = float(sell_price)
             except (TypeError, ValueError):
                 continue
-            session.add(CS2PriceSnapshot(
+            snapshots.append(CS2PriceSnapshot(
                 item_id=item.id,
                 platform="buff",
                 price=price,
@@ -66,7 +81,10 @@ async def _fetch_via_buff() -> int:
                 listings=int(row.get("sell_num", 0) or 0),
             ))
             saved += 1
+        session.add_all(snapshots)
         await session.commit()
+    await response_cache.invalidate("cs2:prices")
+    await _broadcast_prices(snapshots)
 
     logger.info(f"CS2 via BUFF: saved {saved} snapshots")
     return saved
@@ -88,6 +106,7 @@ async def _fetch_via_csqaq() -> int:
         name_to_item = {item.market_hash_name: item for item in items}
 
     saved = 0
+    snapshots: list[CS2PriceSnapshot] = []
     async with async_session() as session:
         for row in rank_data:
             # csqaq 用 market_hash_name 字段
@@ -102,7 +121,7 @@ async def _fetch_via_csqaq() -> int:
             buff_vol = row.get("buff_volume_day") or row.get("volume") or 0
 
             if buff_sell and buff_sell > 0:
-                session.add(CS2PriceSnapshot(
+                snapshots.append(CS2PriceSnapshot(
                     item_id=item.id, platform="buff",
                     price=float(buff_sell), currency="CNY",
                     volume=int(buff_vol), listings=int(row.get("buff_sell_count", 0) or 0),
@@ -112,7 +131,7 @@ async def _fetch_via_csqaq() -> int:
             # 悠悠有品价格
             yyyp_sell = row.get("yyyp_sell_price")
             if yyyp_sell and yyyp_sell > 0:
-                session.add(CS2PriceSnapshot(
+                snapshots.append(CS2PriceSnapshot(
                     item_id=item.id, platform="youpin",
                     price=float(yyyp_sell), currency="CNY",
                     volume=int(row.get("yyyp_volume_day", 0) or 0),
@@ -120,7 +139,10 @@ async def _fetch_via_csqaq() -> int:
                 ))
                 saved += 1
 
+        session.add_all(snapshots)
         await session.commit()
+    await response_cache.invalidate("cs2:prices")
+    await _broadcast_prices(snapshots)
 
     logger.info(f"CS2 via CSQAQ: saved {saved} snapshots (BUFF + 悠悠有品)")
     return saved
@@ -142,18 +164,22 @@ async def _fetch_via_steam() -> int:
     name_to_item = {item.market_hash_name: item for item in items}
 
     saved = 0
+    snapshots: list[CS2PriceSnapshot] = []
     async with async_session() as session:
         for result in results:
             item = name_to_item.get(result["market_hash_name"])
             if not item or result.get("price") is None:
                 continue
-            session.add(CS2PriceSnapshot(
+            snapshots.append(CS2PriceSnapshot(
                 item_id=item.id, platform="steam",
                 price=result["price"], currency="CNY",
                 volume=result.get("volume", 0), listings=0,
             ))
             saved += 1
+        session.add_all(snapshots)
         await session.commit()
+    await response_cache.invalidate("cs2:prices")
+    await _broadcast_prices(snapshots)
 
     logger.info(f"CS2 via Steam: saved {saved}/{len(results)} snapshots")
     return saved
@@ -195,11 +221,24 @@ async def job_fetch_patchnotes():
         logger.error(f"CS2 patchnotes error: {e}")
 
 
+async def _broadcast_predictions(predictions: list[CS2Prediction]) -> None:
+    if not predictions:
+        return
+    try:
+        from app.api.ws import broadcast_cs2_predictions
+        await broadcast_cs2_predictions([p.to_dict() for p in predictions])
+    except Exception as e:
+        logger.debug(f"WebSocket broadcast skipped: {e}")
+
+
 async def job_generate_predictions():
     """每日为 Top 热门饰品批量生成 LLM 预测（批量调用，省 90%+ token）"""
+    if await usage_meter.budget_exhausted(AGENT_KEY):
+        logger.info("CS2: daily token budget exhausted, predictions deferred to next run")
+        return
     logger.info("⏰ CS2: generating predictions (batch mode)")
     try:
-        from app.agents.cs2_market.predictor import predict_batch, PREDICTION_BATCH_SIZE
+        from app.agents.cs2_market.predictor import predict_batch
         async with async_session() as session:
             items = (await session.execute(
                 select(CS2Item).where(CS2Item.is_tracked == True).limit(50)  # noqa: E712
@@ -208,14 +247,15 @@ async def job_generate_predictions():
         item_ids = [item.id for item in items]
         total_preds = 0
         for period in ["7d", "14d", "30d"]:
-            # 分批，每批 PREDICTION_BATCH_SIZE 个
-            for i in range(0, len(item_ids), PREDICTION_BATCH_SIZE):
-                batch_ids = item_ids[i:i + PREDICTION_BATCH_SIZE]
-                try:
-                    preds = await predict_batch(batch_ids, period)
-                    total_preds += len(preds)
-                except Exception as e:
-                    logger.warning(f"Batch predict {period} batch {i} failed: {e}")
+            # 批大小由 predict_batch 内的自适应批处理决定
+            try:
+                # 低优先级：运行中预算用尽时剩余周期直接跳过
+                with usage_scope(priority="low"):
+                    preds = await predict_batch(item_ids, period)
+                total_preds += len(preds)
+                await _broadcast_predictions(preds)
+            except Exception as e:
+                logger.warning(f"Batch predict {period} failed: {e}")
 
         logger.info(f"CS2: generated {total_preds} predictions (batch mode)")
     except Exception as e:
@@ -276,133 +316,183 @@ async def job_cleanup_snapshots():
                 delete(CS2PriceSnapshot).where(CS2PriceSnapshot.snapshot_time < cutoff)
             )
             await session.commit()
-            logger.info("CS2: cleaned up old snapshots")
+        await response_cache.invalidate("cs2:prices")
+        logger.info("CS2: cleaned up old snapshots")
     except Exception as e:
         logger.error(f"CS2 cleanup error: {e}")
 
 
-async def job_cs2_daily_report():
+async def _find_cs2_report(session, today) -> DailyReport | None:
+    return (await session.execute(
+        select(DailyReport).where(
+            DailyReport.agent_key == AGENT_KEY,
+            DailyReport.report_type == "morning",
+            DailyReport.report_date == today,
+        )
+    )).scalar_one_or_none()
+
+
+async def _cs2_report_prompt(session) -> tuple[list[dict], list[dict]] | None:
+    """汇总 24h 行情与高置信预测，返回 (messages, key_events)；无价格数据时返回 None。"""
+    # 收集市场数据
+    since = datetime.now() - timedelta(hours=24)
+
+    # 涨幅/跌幅 Top 5
+    items = (await session.execute(
+        select(CS2Item).where(CS2Item.is_tracked == True).limit(100)  # noqa: E712
+    )).scalars().all()
+
+    ranked = []
+    for item in items:
+        latest = (await session.execute(
+            select(CS2PriceSnapshot)
+            .where(CS2PriceSnapshot.item_id == item.id)
+            .order_by(desc(CS2PriceSnapshot.snapshot_time))
+            .limit(1)
+        )).scalar_one_or_none()
+        earliest = (await session.execute(
+            select(CS2PriceSnapshot)
+            .where(CS2PriceSnapshot.item_id == item.id, CS2PriceSnapshot.snapshot_time >= since)
+            .order_by(CS2PriceSnapshot.snapshot_time.asc())
+            .limit(1)
+        )).scalar_one_or_none()
+        if latest and earliest and earliest.price > 0:
+            pct = (latest.price - earliest.price) / earliest.price * 100
+            ranked.append((item.display_name, latest.price, pct, latest.volume))
+
+    if not ranked:
+        return None
+
+    ranked.sort(key=lambda x: x[2], reverse=True)
+    gainers = ranked[:5]
+    losers = ranked[-5:][::-1]
+
+    # 收集最近预测
+    predictions = (await session.execute(
+        select(CS2Prediction)
+        .where(CS2Prediction.period == "7d", CS2Prediction.generated_at >= since)
+        .order_by(desc(CS2Prediction.confidence))
+        .limit(5)
+    )).scalars().all()
+
+    pred_items_map = {}
+    if predictions:
+        pred_item_ids = [p.item_id for p in predictions]
+        pred_items = (await session.execute(
+            select(CS2Item).where(CS2Item.id.in_(pred_item_ids))
+        )).scalars().all()
+        pred_items_map = {i.id: i for i in pred_items}
+
+    # 构建 LLM prompt
+    market_text = f"24h 数据：{len(ranked)} 个饰品追踪中\n\n"
+    market_text += "涨幅 Top 5：\n"
+    for name, price, pct, vol in gainers:
+        market_text += f"- {name}: ¥{price:.0f} ({pct:+.1f}%) 成交量={vol}\n"
+    market_text += "\n跌幅 Top 5：\n"
+    for name, price, pct, vol in losers:
+        market_text += f"- {name}: ¥{price:.0f} ({pct:+.1f}%) 成交量={vol}\n"
+
+    if predictions:
+        market_text += "\nAI 高置信预测：\n"
+        for p in predictions:
+            item_name = pred_items_map.get(p.item_id)
+            name = item_name.display_name if item_name else f"Item#{p.item_id}"
+            market_text += f"- {name}: {p.direction} ({p.confidence:.0%}) → ¥{p.predicted_price or '?'}\n"
+
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "你是 CS2 饰品市场分析师。根据以下 24h 市场数据生成简洁的每日行情日报。\n"
+                "用 Markdown 格式，包含：\n"
+                "## 市场概览（1-2段总结）\n"
+                "## 涨幅榜（Top 5 + 简评）\n"
+                "## 跌幅榜（Top 5 + 简评）\n"
+                "## AI 预测信号（如有）\n"
+                "## 操作建议（简短 2-3 条）\n"
+                "中文撰写，专业但简洁，500-800 字。"
+            ),
+        },
+        {"role": "user", "content": market_text},
+    ]
+    key_events = [{"gainers": [g[0] for g in gainers], "losers": [l[0] for l in losers]}]
+    return messages, key_events
+
+
+async def _save_cs2_report(today, content: str, key_events: list[dict]) -> DailyReport:
+    async with async_session() as session:
+        report = DailyReport(
+            agent_key=AGENT_KEY,
+            report_type="morning",
+            report_date=today,
+            title=f"{today.isoformat()} CS2 饰品市场日报",
+            content=content,
+            key_events=key_events,
+        )
+        session.add(report)
+        try:
+            await session.commit()
+            await response_cache.invalidate("reports")
+        except IntegrityError:
+            # 定时任务与手动触发同时生成，保留先写入的一份
+            await session.rollback()
+            return await _find_cs2_report(session, today) or report
+        logger.info(f"CS2: daily report generated ({len(content)} chars)")
+        return report
+
+
+async def job_cs2_daily_report(hedge: bool = False):
     """每日生成 CS2 饰品市场日报，写入 daily_reports 表"""
     logger.info("⏰ CS2: generating daily market report")
     try:
         today = datetime.now().date()
         async with async_session() as session:
-            existing = (await session.execute(
-                select(DailyReport).where(
-                    DailyReport.agent_key == AGENT_KEY,
-                    DailyReport.report_type == "morning",
-                    DailyReport.report_date == today,
-                )
-            )).scalar_one_or_none()
-            if existing:
+            if await _find_cs2_report(session, today):
                 logger.info("CS2 daily report already exists, skipping")
                 return
+            prepared = await _cs2_report_prompt(session)
+        if prepared is None:
+            logger.info("CS2: no price data for daily report")
+            return
+        messages, key_events = prepared
 
-            # 收集市场数据
-            since = datetime.now() - timedelta(hours=24)
-
-            # 涨幅/跌幅 Top 5
-            items = (await session.execute(
-                select(CS2Item).where(CS2Item.is_tracked == True).limit(100)  # noqa: E712
-            )).scalars().all()
-
-            ranked = []
-            for item in items:
-                latest = (await session.execute(
-                    select(CS2PriceSnapshot)
-                    .where(CS2PriceSnapshot.item_id == item.id)
-                    .order_by(desc(CS2PriceSnapshot.snapshot_time))
-                    .limit(1)
-                )).scalar_one_or_none()
-                earliest = (await session.execute(
-                    select(CS2PriceSnapshot)
-                    .where(CS2PriceSnapshot.item_id == item.id, CS2PriceSnapshot.snapshot_time >= since)
-                    .order_by(CS2PriceSnapshot.snapshot_time.asc())
-                    .limit(1)
-                )).scalar_one_or_none()
-                if latest and earliest and earliest.price > 0:
-                    pct = (latest.price - earliest.price) / earliest.price * 100
-                    ranked.append((item.display_name, latest.price, pct, latest.volume))
-
-            if not ranked:
-                logger.info("CS2: no price data for daily report")
-                return
-
-            ranked.sort(key=lambda x: x[2], reverse=True)
-            gainers = ranked[:5]
-            losers = ranked[-5:][::-1]
-
-            # 收集最近预测
-            predictions = (await session.execute(
-                select(CS2Prediction)
-                .where(CS2Prediction.period == "7d", CS2Prediction.generated_at >= since)
-                .order_by(desc(CS2Prediction.confidence))
-                .limit(5)
-            )).scalars().all()
-
-            pred_items_map = {}
-            if predictions:
-                pred_item_ids = [p.item_id for p in predictions]
-                pred_items = (await session.execute(
-                    select(CS2Item).where(CS2Item.id.in_(pred_item_ids))
-                )).scalars().all()
-                pred_items_map = {i.id: i for i in pred_items}
-
-        # 构建 LLM prompt
-        market_text = f"24h 数据：{len(ranked)} 个饰品追踪中\n\n"
-        market_text += "涨幅 Top 5：\n"
-        for name, price, pct, vol in gainers:
-            market_text += f"- {name}: ¥{price:.0f} ({pct:+.1f}%) 成交量={vol}\n"
-        market_text += "\n跌幅 Top 5：\n"
-        for name, price, pct, vol in losers:
-            market_text += f"- {name}: ¥{price:.0f} ({pct:+.1f}%) 成交量={vol}\n"
-
-        if predictions:
-            market_text += "\nAI 高置信预测：\n"
-            for p in predictions:
-                item_name = pred_items_map.get(p.item_id)
-                name = item_name.display_name if item_name else f"Item#{p.item_id}"
-                market_text += f"- {name}: {p.direction} ({p.confidence:.0%}) → ¥{p.predicted_price or '?'}\n"
-
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "你是 CS2 饰品市场分析师。根据以下 24h 市场数据生成简洁的每日行情日报。\n"
-                    "用 Markdown 格式，包含：\n"
-                    "## 市场概览（1-2段总结）\n"
-                    "## 涨幅榜（Top 5 + 简评）\n"
-                    "## 跌幅榜（Top 5 + 简评）\n"
-                    "## AI 预测信号（如有）\n"
-                    "## 操作建议（简短 2-3 条）\n"
-                    "中文撰写，专业但简洁，500-800 字。"
-                ),
-            },
-            {"role": "user", "content": market_text},
-        ]
-
-        content = await chat_completion(messages, max_tokens=1500, temperature=0.4)
+        with usage_scope(agent_key=AGENT_KEY, skill="cs2_daily_report"):
+            content = await chat_completion(messages, max_tokens=1500, temperature=0.4, hedge=hedge)
         if not content:
             logger.warning("CS2 daily report: LLM returned empty")
             return
-
-        async with async_session() as session:
-            report = DailyReport(
-                agent_key=AGENT_KEY,
-                report_type="morning",
-                report_date=today,
-                title=f"{today.isoformat()} CS2 饰品市场日报",
-                content=content,
-                key_events=[{"gainers": [g[0] for g in gainers], "losers": [l[0] for l in losers]}],
-            )
-            session.add(report)
-            await session.commit()
-            logger.info(f"CS2: daily report generated ({len(content)} chars)")
+        await _save_cs2_report(today, content, key_events)
 
     except Exception as e:
         logger.error(f"CS2 daily report error: {e}")
 
 
+async def stream_cs2_daily_report() -> AsyncIterator[dict]:
+    """流式生成 CS2 日报：逐段产出 delta 事件，完成后落库并产出 done 事件。"""
+    today = datetime.now().date()
+    async with async_session() as session:
+        existing = await _find_cs2_report(session, today)
+        if existing:
+            yield {"event": "done", **existing.to_dict()}
+            return
+        prepared = await _cs2_report_prompt(session)
+    if prepared is None:
+        yield {"event": "error", "detail": "暂无 24h 价格数据，无法生成日报"}
+        return
+    messages, key_events = prepared
+
+    parts: list[str] = []
+    stream = chat_completion_stream(messages, max_tokens=1500, temperature=0.4)
+    async for text in scoped_stream(stream, agent_key=AGENT_KEY, skill="cs2_daily_report"):
+        parts.append(text)
+        yield {"event": "delta", "text": text}
+    if not parts:
+        yield {"event": "error", "detail": "日报生成失败，请检查 AI 配置"}
+        return
+    report = await _save_cs2_report(today, "".join(parts), key_events)
+    yield {"event": "done", **report.to_dict()}
+
+
 def register_cs2_jobs(kernel: SchedulerKernel) -> None:
     kernel.add_agent_job(AGENT_KEY, "fetch_prices", job_fetch_prices, "interval", minutes=5)
     kernel.add_agent_job(AGENT_KEY, "fetch_csgoskins", job_fetch_csgoskins, "interval", minutes=30)
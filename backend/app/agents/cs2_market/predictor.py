@@ -6,7 +6,9 @@ from typing import Optional
 
 from sqlalchemy import select, desc
 
-from app.ai.client import chat_completion_json
+from app.ai.batching import AdaptiveBatcher, estimate_tokens
+from app.ai.client import chat_completion_json, get_model_limits
+from app.ai.usage import usage_scope
 from app.database import async_session
 from app.models.cs2_item import CS2Item
 from app.models.cs2_prediction import CS2Prediction
@@ -117,14 +119,74 @@ def _build_batch_prompt(
     ]
 
 
-PREDICTION_BATCH_SIZE = 10  # 每批最多 10 个饰品
+PREDICTION_BATCH_SIZE = 10  # 初始每批饰品数，运行中按模型自适应调整
+MAX_PREDICTION_BATCH_SIZE = 25
+PREDICTION_OUTPUT_TOKENS_PER_ITEM = 100
+
+prediction_batcher: AdaptiveBatcher[tuple[CS2Item, dict], dict] = AdaptiveBatcher(
+    "cs2 prediction",
+    default_size=PREDICTION_BATCH_SIZE,
+    max_size=MAX_PREDICTION_BATCH_SIZE,
+    output_tokens_per_item=PREDICTION_OUTPUT_TOKENS_PER_ITEM,
+    prompt_overhead_tokens=400,
+)
+
+
+def _parse_batch_entry(entry: dict) -> Optional[dict]:
+    """把 LLM 返回的一条预测转成 CS2Prediction 字段；格式不对返回 None（计为缺失，会被拆批重试）。"""
+    try:
+        up = float(entry.get("up_prob", 0.33))
+        flat = float(entry.get("flat_prob", 0.34))
+        down = float(entry.get("down_prob", 0.33))
+        total = up + flat + down
+        if total > 0:
+            up, flat, down = up / total, flat / total, down / total
+        return {
+            "direction": entry.get("direction", "neutral"),
+            "up_prob": up,
+            "flat_prob": flat,
+            "down_prob": down,
+            "confidence": float(entry.get("confidence", 0.5)),
+            "predicted_price": float(entry["predicted_price"]) if entry.get("predicted_price") else None,
+            "reasoning": str(entry.get("reasoning", ""))[:500],
+            "factors": entry.get("factors", []) if isinstance(entry.get("factors"), list) else [],
+        }
+    except (ValueError, TypeError) as e:
+        logger.debug(f"Parse batch entry failed: {e}")
+        return None
+
+
+async def _predict_chunk(chunk: list[tuple[CS2Item, dict]], period: str) -> dict[int, dict]:
+    """一次 LLM 调用预测一批饰品，返回 {item.id: 预测字段}。"""
+    messages = _build_batch_prompt(chunk, period)
+    token_budget = PREDICTION_OUTPUT_TOKENS_PER_ITEM * len(chunk)
+    with usage_scope(agent_key="cs2_market", skill="cs2_prediction"):
+        result = await chat_completion_json(messages, max_tokens=max(token_budget, 600))
+    if not result or not isinstance(result.get("results"), list):
+        logger.warning("Invalid batch prediction LLM result")
+        return {}
+
+    out: dict[int, dict] = {}
+    for entry in result["results"]:
+        idx = entry.get("index") if isinstance(entry, dict) else None
+        if not isinstance(idx, int) or not (1 <= idx <= len(chunk)):
+            continue
+        fields = _parse_batch_entry(entry)
+        if fields is not None:
+            out[chunk[idx - 1][0].id] = fields
+    return out
+
+
+def _item_tokens(item_with_indicators: tuple[CS2Item, dict]) -> int:
+    item, _ = item_with_indicators
+    return 60 + estimate_tokens(f"{item.display_name}{item.category}{item.subcategory or ''}")
 
 
 async def predict_batch(
     item_ids: list[int],
     period: str = "7d",
 ) -> list[CS2Prediction]:
-    """批量预测：N 个饰品一次 LLM 调用。返回成功写入的预测列表。"""
+    """批量预测：由 prediction_batcher 把饰品合并成尽量少的 LLM 调用。返回成功写入的预测列表。"""
     items_with_indicators: list[tuple[CS2Item, dict]] = []
 
     async with async_session() as session:
@@ -157,52 +219,27 @@ async def predict_batch(
     if not items_with_indicators:
         return []
 
-    messages = _build_batch_prompt(items_with_indicators, period)
-    token_budget = 100 * len(items_with_indicators)  # ~100 tokens per item output
-
     try:
-        result = await chat_completion_json(messages, max_tokens=max(token_budget, 600))
+        results = await prediction_batcher.run(
+            items_with_indicators,
+            call=lambda chunk: _predict_chunk(chunk, period),
+            key=lambda pair: pair[0].id,
+            estimate=_item_tokens,
+            **await get_model_limits(),
+        )
     except Exception as e:
         logger.error(f"Batch prediction LLM failed: {e}")
         return []
 
-    if not result or not isinstance(result.get("results"), list):
-        logger.warning("Invalid batch prediction LLM result")
-        return []
-
     predictions: list[CS2Prediction] = []
     async with async_session() as session:
-        for entry in result["results"]:
-            idx = entry.get("index")
-            if not isinstance(idx, int) or not (1 <= idx <= len(items_with_indicators)):
-                continue
-
-            item, _ = items_with_indicators[idx - 1]
-            try:
-                up = float(entry.get("up_prob", 0.33))
-                flat = float(entry.get("flat_prob", 0.34))
-                down = float(entry.get("down_prob", 0.33))
-                total = up + flat + down
-                if total > 0:
-                    up, flat, down = up / total, flat / total, down / total
-
-                pred = CS2Prediction(
-                    item_id=item.id,
-                    period=period,
-                    direction=entry.get("direction", "neutral"),
-                    up_prob=up,
-                    flat_prob=flat,
-                    down_prob=down,
-                    confidence=float(entry.get("confidence", 0.5)),
-                    predicted_price=float(entry["predicted_price"]) if entry.get("predicted_price") else None,
-                    reasoning=str(entry.get("reasoning", ""))[:500],
-                    factors=entry.get("factors", []) if isinstance(entry.get("factors"), list) else [],
-                )
-                session.add(pred)
-                predictions.append(pred)
-            except (ValueError, TypeError) as e:
-                logger.debug(f"Parse batch entry {idx} failed: {e}")
+        for item, _ in items_with_indicators:
+            fields = results.get(item.id)
+            if fields is None:
                 continue
+            pred = CS2Prediction(item_id=item.id, period=period, **fields)
+            session.add(pred)
+            predictions.append(pred)
 
         if predictions:
             await session.commit()
@@ -210,7 +247,7 @@ async def predict_batch(
     return predictions
 
 
-async def predict_item(item_id: int, period: str = "7d") -> Optional[CS2Prediction]:
+async def predict_item(item_id: int, period: str = "7d", hedge: bool = False) -> Optional[CS2Prediction]:
     """对单个饰品进行 LLM 预测，结果写入 cs2_predictions 表"""
     async with async_session() as session:
         item = (await session.execute(
@@ -242,7 +279,8 @@ async def predict_item(item_id: int, period: str = "7d") -> Optional[CS2Predicti
     messages = _build_prompt(item, indicators, period)
 
     try:
-        result = await chat_completion_json(messages, max_tokens=600)
+        with usage_scope(agent_key="cs2_market", skill="cs2_prediction"):
+            result = await chat_completion_json(messages, max_tokens=600, hedge=hedge)
     except Exception as e:
         logger.error(f"LLM call failed for item {item_id}: {e}")
         return None
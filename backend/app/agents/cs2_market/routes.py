@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select, func, desc, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.sse import sse_response
 from app.auth import get_current_user
 from app.database import get_session
 from app.models.cs2_item import CS2Item
@@ -13,6 +14,8 @@ from app.models.cs2_price import CS2PriceSnapshot
 from app.models.cs2_prediction import CS2Prediction
 from app.models.cs2_watchlist import CS2Watchlist
 from app.models.user import User
+from app.platform.response_cache import response_cache
+from app.platform.serialization import FastJSONResponse
 
 router = APIRouter(prefix="/api/cs2", tags=["cs2"])
 
@@ -20,6 +23,7 @@ router = APIRouter(prefix="/api/cs2", tags=["cs2"])
 # ======================== Market Overview ========================
 
 @router.get("/market/overview")
+@response_cache.cached("cs2:prices")
 async def market_overview(
     period: str = "24h",
     session: AsyncSession = Depends(get_session),
@@ -105,12 +109,21 @@ async def generate_daily_report(
     """手动触发 CS2 日报生成"""
     from app.agents.cs2_market.jobs import job_cs2_daily_report
     try:
-        await job_cs2_daily_report()
+        await job_cs2_daily_report(hedge=True)
         return {"ok": True, "message": "日报生成完成"}
     except Exception as e:
         raise HTTPException(500, f"日报生成失败: {e}")
 
 
+@router.post("/market/daily-report/stream")
+async def generate_daily_report_stream(
+    _user: User = Depends(get_current_user),
+):
+    """流式生成 CS2 日报（SSE），生成完毕落库后推送 done"""
+    from app.agents.cs2_market.jobs import stream_cs2_daily_report
+    return sse_response(stream_cs2_daily_report())
+
+
 @router.post("/predictions/generate-all")
 async def generate_all_predictions(
     period: str = "7d",
@@ -183,6 +196,7 @@ async def hot_items(
 # ======================== Rankings ========================
 
 @router.get("/rankings")
+@response_cache.cached("cs2:prices")
 async def rankings(
     period: str = "24h",
     direction: str = "gainers",  # gainers/losers
@@ -371,24 +385,17 @@ async def item_kline(
     hours = {"1d": 24, "7d": 24 * 7, "30d": 24 * 30, "90d": 24 * 90, "1y": 24 * 365}.get(period, 24 * 7)
     since = datetime.now() - timedelta(hours=hours)
 
-    snapshots = (await session.execute(
-        select(CS2PriceSnapshot)
+    rows = (await session.execute(
+        select(CS2PriceSnapshot.snapshot_time, CS2PriceSnapshot.price, CS2PriceSnapshot.volume)
         .where(CS2PriceSnapshot.item_id == item_id)
         .where(CS2PriceSnapshot.snapshot_time >= since)
         .order_by(CS2PriceSnapshot.snapshot_time.asc())
-    )).scalars().all()
+    )).all()
 
-    return {
+    return FastJSONResponse({
         "period": period,
-        "points": [
-            {
-                "time": s.snapshot_time.isoformat() if s.snapshot_time else None,
-                "price": s.price,
-                "volume": s.volume,
-            }
-            for s in snapshots
-        ],
-    }
+        "points": [{"time": t, "price": price, "volume": volume} for t, price, volume in rows],
+    })
 
 
 # ======================== Predictions ========================
@@ -454,7 +461,7 @@ async def regenerate_prediction(
 ):
     from app.agents.cs2_market.predictor import predict_item
     try:
-        prediction = await predict_item(item_id, period)
+        prediction = await predict_item(item_id, period, hedge=True)
         if not prediction:
             raise HTTPException(400, "Prediction failed (insufficient data or LLM error)")
         return prediction.to_dict()
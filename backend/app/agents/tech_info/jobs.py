@@ -8,8 +8,14 @@ from app.crawlers.manager import CrawlerManager
 from app.database import async_session
 from app.models.article import Article
 from app.models.report import DailyReport
+from app.platform.response_cache import response_cache
 from app.platform.scheduler import SchedulerKernel
+from app.skills import rollup
 from app.skills.engine import run_importance_scoring
+from app.skills.burst import burst_detector
+from app.skills.keywords import keyword_tracker
+from app.skills.scoring_queue import enqueue_articles
+from app.skills.sentiment import sentiment_aggregator, SNAPSHOT_INTERVAL_MINUTES
 from app.sources.base import NewsItem
 from app.agents.tech_info.defaults import CRAWLER_KEYS
 
@@ -20,6 +26,7 @@ AGENT_KEY = "tech_info"
 
 async def _save_tech_items(items: list[NewsItem]) -> int:
     saved = 0
+    added: list[Article] = []
     async with async_session() as session:
         for item in items:
             if not item.title or not item.url:
@@ -43,9 +50,27 @@ async def _save_tech_items(items: list[NewsItem]) -> int:
                 importance=item.importance,
             )
             session.add(article)
+            added.append(article)
             saved += 1
         if saved > 0:
+            await session.flush()
+            enqueue_articles(session, added)
+            await rollup.record_articles(session, added)
             await session.commit()
+            await response_cache.invalidate(f"articles:{AGENT_KEY}")
+            try:
+                await keyword_tracker.observe(AGENT_KEY, added)
+            except Exception as e:
+                logger.warning(f"Keyword tracking failed: {e}")
+            try:
+                await burst_detector.observe(AGENT_KEY, added)
+            except Exception as e:
+                logger.error(f"Burst detection failed: {e}")
+            try:
+                from app.api.ws import broadcast_new_articles
+                await broadcast_new_articles([a.to_dict() for a in added])
+            except Exception as e:
+                logger.debug(f"WebSocket broadcast skipped: {e}")
     return saved
 
 
@@ -62,6 +87,20 @@ async def job_fetch_tech():
         logger.error(f"Tech fetch job error: {e}")
 
 
+async def job_score_tech_queue():
+    try:
+        await run_importance_scoring(agent_key=AGENT_KEY)
+    except Exception as e:
+        logger.error(f"Tech scoring queue job error: {e}")
+
+
+async def job_tech_sentiment_snapshot():
+    try:
+        await sentiment_aggregator.emit(AGENT_KEY)
+    except Exception as e:
+        logger.error(f"Tech sentiment snapshot job error: {e}")
+
+
 async def job_tech_daily_report():
     """每日生成技术日报。复用 engine.generate_daily_report，agent_key=tech_info。
     内置去重：同一天只生成一次。"""
@@ -79,8 +118,10 @@ async def job_tech_daily_report():
 
 def register_tech_jobs(kernel: SchedulerKernel) -> None:
     kernel.add_agent_job("tech_info", "fetch_tech", job_fetch_tech, "interval", minutes=30)
+    kernel.add_agent_job("tech_info", "score_queue", job_score_tech_queue, "interval", minutes=1)
+    kernel.add_agent_job("tech_info", "sentiment_snapshot", job_tech_sentiment_snapshot, "interval", minutes=SNAPSHOT_INTERVAL_MINUTES)
     # 早上 9:00 生成技术日报（投研 7:30、CS2 9:30，错开 LLM 调用）
     kernel.add_agent_job("tech_info", "daily_report", job_tech_daily_report, "cron", hour=9, minute=0)
 
 
-__all__ = ["register_tech_jobs", "job_fetch_tech", "job_tech_daily_report"]
+__all__ = ["register_tech_jobs", "job_fetch_tech", "job_score_tech_queue", "job_tech_sentiment_snapshot", "job_tech_daily_report"]
@@ -7,7 +7,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_session
-from app.models.article import Article
+from app.models.article import ARTICLE_ROW_COLUMNS, Article, ArticleRow
+from app.models.article_rollup import ArticleHourlyRollup
+from app.platform.response_cache import response_cache
+from app.platform.serialization import FastJSONResponse
+from app.skills import rollup
 
 router = APIRouter(prefix="/api/tech", tags=["tech"])
 
@@ -25,7 +29,7 @@ async def list_tech_articles(
     session: AsyncSession = Depends(get_session),
     _user=Depends(get_current_user),
 ):
-    q = select(Article).where(Article.agent_key == AGENT_KEY)
+    q = select(*ARTICLE_ROW_COLUMNS).where(Article.agent_key == AGENT_KEY)
     count_q = select(func.count(Article.id)).where(Article.agent_key == AGENT_KEY)
 
     if source:
@@ -44,68 +48,63 @@ async def list_tech_articles(
         count_q = count_q.where(Article.fetched_at >= cutoff)
 
     total = (await session.execute(count_q)).scalar() or 0
-    articles = (
+    rows = (
         await session.execute(
             q.order_by(desc(Article.fetched_at))
             .offset((page - 1) * page_size)
             .limit(page_size)
         )
-    ).scalars().all()
+    ).all()
 
-    return {
-        "items": [a.to_dict() for a in articles],
+    return FastJSONResponse({
+        "items": [ArticleRow.from_row(row) for row in rows],
         "total": total,
         "page": page,
         "pages": math.ceil(total / page_size) if total else 0,
-    }
+    })
 
 
 @router.get("/dashboard")
+@response_cache.cached("articles:tech_info")
 async def tech_dashboard(
     session: AsyncSession = Depends(get_session),
     _user=Depends(get_current_user),
 ):
-    now = datetime.now()
-    h24 = now - timedelta(hours=24)
-
-    total = (await session.execute(
-        select(func.count(Article.id)).where(Article.agent_key == AGENT_KEY)
-    )).scalar() or 0
-    today = (await session.execute(
-        select(func.count(Article.id)).where(Article.agent_key == AGENT_KEY, Article.fetched_at >= h24)
-    )).scalar() or 0
-    high_importance = (await session.execute(
-        select(func.count(Article.id)).where(
-            Article.agent_key == AGENT_KEY, Article.importance >= 3, Article.fetched_at >= h24
+    # 按整点汇总，24h 取最近 24 个整点时段（含当前时段）
+    h24 = rollup.hour_of(datetime.now()) - timedelta(hours=23)
+    recent = ArticleHourlyRollup.hour >= h24
+    rows = (await session.execute(
+        select(
+            ArticleHourlyRollup.source,
+            func.sum(ArticleHourlyRollup.count),
+            func.coalesce(func.sum(ArticleHourlyRollup.count).filter(recent), 0),
+            func.coalesce(func.sum(ArticleHourlyRollup.important_count).filter(recent), 0),
         )
-    )).scalar() or 0
+        .where(ArticleHourlyRollup.agent_key == AGENT_KEY)
+        .group_by(ArticleHourlyRollup.source)
+    )).all()
 
     # Top sources
-    sources = (await session.execute(
-        select(Article.source, func.count(Article.id).label("cnt"))
-        .where(Article.agent_key == AGENT_KEY, Article.fetched_at >= h24)
-        .group_by(Article.source)
-        .order_by(desc("cnt"))
-        .limit(8)
-    )).all()
+    sources = sorted((r for r in rows if r[2]), key=lambda r: r[2], reverse=True)[:8]
 
     return {
-        "total_articles": total,
-        "articles_24h": today,
-        "high_importance_24h": high_importance,
-        "top_sources": [{"source": s, "count": c} for s, c in sources],
+        "total_articles": sum(r[1] for r in rows),
+        "articles_24h": sum(r[2] for r in rows),
+        "high_importance_24h": sum(r[3] for r in rows),
+        "top_sources": [{"source": r[0], "count": r[2]} for r in sources],
     }
 
 
 @router.get("/sources")
+@response_cache.cached("articles:tech_info")
 async def tech_sources(
     session: AsyncSession = Depends(get_session),
     _user=Depends(get_current_user),
 ):
     result = await session.execute(
-        select(Article.source, func.count(Article.id).label("cnt"))
-        .where(Article.agent_key == AGENT_KEY)
-        .group_by(Article.source)
+        select(ArticleHourlyRollup.source, func.sum(ArticleHourlyRollup.count).label("cnt"))
+        .where(ArticleHourlyRollup.agent_key == AGENT_KEY)
+        .group_by(ArticleHourlyRollup.source)
         .order_by(desc("cnt"))
     )
-    return [{"source": s, "count": c} for s, c in result.all()]
+    return [{"source": s, "count": c} for s, c in result.all() if c]
@@ -0,0 +1,171 @@
+"""自适应 LLM 批处理：按 token 预算切批、失败对半拆分重试、按模型学习批大小。"""
+import asyncio
+import logging
+import re
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日文约 1 字 1 token，其余约 4 字符 1 token。"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@dataclass
+class BatchSizeStats:
+    size: int
+    calls: int = 0
+    complete: int = 0  # 结果数量齐全的调用次数
+    items_ok: int = 0
+    items_failed: int = 0
+    by_size: dict[int, list[int]] = field(default_factory=dict)  # 批大小 -> [调用次数, 完整次数]
+
+    def to_dict(self) -> dict:
+        return {
+            "size": self.size,
+            "calls": self.calls,
+            "success_rate": round(self.complete / self.calls, 3) if self.calls else None,
+            "items_ok": self.items_ok,
+            "items_failed": self.items_failed,
+            "by_size": {
+                s: round(ok / n, 3) for s, (n, ok) in sorted(self.by_size.items()) if n
+            },
+        }
+
+
+class AdaptiveBatcher(Generic[T, R]):
+    """把待处理条目切成若干批并发调用 LLM。
+
+    - 每批条数不超过按模型学到的批大小，同时受上下文窗口和输出 token 上限约束
+    - 某批解析失败或结果不全时，只把缺失的条目对半拆分重试，直到定位到出错的单条；
+      若两个半批都一条结果没有（更像是服务商故障而非内容问题），停止继续拆分
+    - 批大小按模型做加性增/乘性减：首轮整批完整成功 +1，失败或不全减半
+    """
+
+    def __init__(
+        self,
+        name: str,
+        default_size: int,
+        max_size: int,
+        output_tokens_per_item: int,
+        prompt_overhead_tokens: int = 800,
+        min_size: int = 1,
+    ):
+        self.name = name
+        self.default_size = default_size
+        self.max_size = max_size
+        self.min_size = min_size
+        self.output_tokens_per_item = output_tokens_per_item
+        self.prompt_overhead_tokens = prompt_overhead_tokens
+        self._stats: dict[str, BatchSizeStats] = {}
+
+    def _model_stats(self, model: str) -> BatchSizeStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = BatchSizeStats(size=self.default_size)
+        return stats
+
+    def batch_size(self, model: str) -> int:
+        return self._model_stats(model).size
+
+    def plan(
+        self,
+        items: list[T],
+        model: str,
+        context_tokens: int,
+        max_output_tokens: int,
+        estimate: Callable[[T], int],
+    ) -> list[list[T]]:
+        """按批大小和 token 预算把 items 顺序切批。"""
+        size = min(self.batch_size(model), max(1, max_output_tokens // self.output_tokens_per_item))
+        input_budget = context_tokens - self.prompt_overhead_tokens - size * self.output_tokens_per_item
+
+        batches: list[list[T]] = []
+        current: list[T] = []
+        used = 0
+        for item in items:
+            cost = estimate(item)
+            if current and (len(current) >= size or used + cost > input_budget):
+                batches.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def record(self, model: str, batch_len: int, ok: int, adjust: bool = True) -> None:
+        """记录一次调用结果；adjust=False 时只统计不调整批大小（拆批重试的子批）。"""
+        stats = self._model_stats(model)
+        stats.calls += 1
+        stats.items_ok += ok
+        stats.items_failed += batch_len - ok
+        counts = stats.by_size.setdefault(batch_len, [0, 0])
+        counts[0] += 1
+        if ok == batch_len:
+            stats.complete += 1
+            counts[1] += 1
+            # 只有在当前批大小附近成功才继续试探更大的批
+            if adjust and batch_len >= stats.size:
+                stats.size = min(self.max_size, stats.size + 1)
+        elif adjust and batch_len > 1:
+            stats.size = max(self.min_size, min(stats.size, batch_len) // 2)
+
+    async def run(
+        self,
+        items: list[T],
+        call: Callable[[list[T]], Awaitable[dict[Hashable, R]]],
+        key: Callable[[T], Hashable],
+        model: str,
+        context_tokens: int,
+        max_output_tokens: int,
+        estimate: Callable[[T], int],
+    ) -> dict[Hashable, R]:
+        """处理全部 items，返回 {key(item): 结果}；最终仍失败的条目不在结果中。"""
+        results: dict[Hashable, R] = {}
+
+        async def attempt(batch: list[T], adjust: bool = False) -> tuple[list[T], bool]:
+            """调用一次，返回 (缺失的条目, 是否拿到任何结果)。"""
+            try:
+                out = await call(batch)
+            except Exception as e:
+                logger.error(f"{self.name} batch of {len(batch)} failed: {e}")
+                out = {}
+            got = {key(item): out[key(item)] for item in batch if key(item) in out}
+            results.update(got)
+            self.record(model, len(batch), len(got), adjust)
+            return [item for item in batch if key(item) not in got], bool(got)
+
+        async def split(missing: list[T]) -> None:
+            if len(missing) == 1:
+                await attempt(missing)
+                return
+            mid = len(missing) // 2
+            outcomes = await asyncio.gather(attempt(missing[:mid]), attempt(missing[mid:]))
+            if not any(got for _, got in outcomes):
+                logger.warning(f"{self.name}: both halves failed, giving up on {len(missing)} items")
+                return
+            await asyncio.gather(*(split(rest) for rest, _ in outcomes if rest))
+
+        async def process(batch: list[T]) -> None:
+            missing, _ = await attempt(batch, adjust=True)
+            if missing and len(batch) > 1:
+                await split(missing)
+
+        batches = self.plan(items, model, context_tokens, max_output_tokens, estimate)
+        await asyncio.gather(*(process(batch) for batch in batches))
+        return results
+
+    def stats(self) -> dict:
+        return {model: s.to_dict() for model, s in self._stats.items()}
@@ -0,0 +1,135 @@
+"""LLM 响应缓存：按请求内容哈希持久化到数据库，带 TTL、条数上限淘汰和命中率统计。"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+
+from app.config import settings
+from app.database import async_session
+from app.models.llm_cache import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    model: str,
+    messages: list[dict],
+    temperature: float,
+    max_tokens: int,
+    api_format: str,
+    response_format: Optional[dict] = None,
+    provider: Optional[str] = None,
+    api_base: Optional[str] = None,
+) -> str:
+    """请求内容哈希；服务商与 api_base 计入 key，同名模型在不同服务商 / 代理上的结果互不复用。"""
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "api_base": (api_base or "").rstrip("/"),
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "api_format": api_format,
+            "response_format": response_format,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # 进程内命中统计（自启动以来）
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        now = datetime.utcnow()
+        async with async_session() as session:
+            entry = (await session.execute(
+                select(LLMCacheEntry).where(LLMCacheEntry.cache_key == key)
+            )).scalar_one_or_none()
+            if entry is None or entry.expires_at <= now:
+                self.misses += 1
+                return None
+            entry.hit_count += 1
+            entry.last_used_at = now
+            response = entry.response
+            await session.commit()
+        self.hits += 1
+        return response
+
+    async def set(self, key: str, model: str, response: str, ttl_seconds: Optional[int] = None) -> None:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        async with async_session() as session:
+            entry = (await session.execute(
+                select(LLMCacheEntry).where(LLMCacheEntry.cache_key == key)
+            )).scalar_one_or_none()
+            if entry is None:
+                session.add(LLMCacheEntry(
+                    cache_key=key, model=model, response=response,
+                    created_at=now, last_used_at=now, expires_at=expires_at,
+                ))
+            else:
+                entry.response = response
+                entry.last_used_at = now
+                entry.expires_at = expires_at
+            await session.flush()
+            await self._evict(session, now)
+            await session.commit()
+
+    async def _evict(self, session, now: datetime) -> None:
+        await session.execute(delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= now))
+        count = await session.scalar(select(func.count(LLMCacheEntry.id)))
+        overflow = (count or 0) - self.max_entries
+        if overflow > 0:
+            oldest = (
+                select(LLMCacheEntry.id)
+                .order_by(LLMCacheEntry.last_used_at.asc())
+                .limit(overflow)
+            )
+            await session.execute(delete(LLMCacheEntry).where(LLMCacheEntry.id.in_(oldest)))
+
+    async def discard(self, key: str) -> None:
+        async with async_session() as session:
+            await session.execute(delete(LLMCacheEntry).where(LLMCacheEntry.cache_key == key))
+            await session.commit()
+
+    async def clear(self) -> int:
+        async with async_session() as session:
+            result = await session.execute(delete(LLMCacheEntry))
+            await session.commit()
+        self.hits = 0
+        self.misses = 0
+        return result.rowcount or 0
+
+    async def stats(self) -> dict:
+        async with async_session() as session:
+            entries, total_hits = (await session.execute(
+                select(func.count(LLMCacheEntry.id), func.coalesce(func.sum(LLMCacheEntry.hit_count), 0))
+            )).one()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "lifetime_hits": total_hits,
+        }
+
+
+llm_cache = LLMResponseCache(
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+)
@@ -1,20 +1,21 @@
 import asyncio
 import json
 import logging
-from typing import Optional
+import time
+from typing import AsyncIterator, Callable, Optional
 
 import httpx
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import async_session
-from app.models.setting import SystemSetting
+from app.ai.batching import estimate_tokens
+from app.ai.cache import llm_cache, make_cache_key
+from app.ai.router import RETRYABLE_STATUS, ProviderError, ProviderRouter  # noqa: F401
+from app.ai.usage import usage_meter
+from app.platform.settings_cache import settings_cache
 
 logger = logging.getLogger(__name__)
 
 MAX_RETRIES = 3
-RETRY_BACKOFF = [2, 5, 15]  # seconds
-RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRY_BACKOFF = [2, 5, 15]  # seconds，服务商池整轮失败后的退避
 
 # 预设服务商配置
 PROVIDER_PRESETS = {
@@ -22,43 +23,101 @@ PROVIDER_PRESETS = {
         "api_base": "https://generativelanguage.googleapis.com/v1beta/openai",
         "default_model": "gemini-2.0-flash",
         "api_format": "openai",
+        "context_tokens": 1_000_000,
+        "max_output_tokens": 8_192,
     },
     "openrouter": {
         "api_base": "https://openrouter.ai/api/v1",
         "default_model": "google/gemini-2.0-flash-exp:free",
         "api_format": "openai",
+        "context_tokens": 128_000,
+        "max_output_tokens": 8_192,
     },
     "dashscope": {
         "api_base": "https://dashscope.aliyuncs.com/compatible-mode/v1",
         "default_model": "qwen-plus",
         "api_format": "openai",
+        "context_tokens": 131_072,
+        "max_output_tokens": 8_192,
     },
     "deepseek": {
         "api_base": "https://api.deepseek.com/v1",
         "default_model": "deepseek-chat",
         "api_format": "openai",
+        "context_tokens": 64_000,
+        "max_output_tokens": 8_192,
     },
     "openai": {
         "api_base": "https://api.openai.com/v1",
         "default_model": "gpt-4o-mini",
         "api_format": "openai",
+        "context_tokens": 128_000,
+        "max_output_tokens": 16_384,
     },
     "minimax": {
         "api_base": "https://api.minimax.io/anthropic",
         "default_model": "MiniMax-Text-01",
         "api_format": "anthropic",
+        "context_tokens": 245_760,
+        "max_output_tokens": 8_192,
     },
 }
 
 
-async def _get_ai_config() -> dict:
-    async with async_session() as session:
-        keys = ["ai_enabled", "ai_provider", "ai_api_key", "ai_api_base", "ai_model", "ai_api_format"]
-        result = await session.execute(
-            select(SystemSetting).where(SystemSetting.key.in_(keys))
-        )
-        settings = {s.key: s.value for s in result.scalars().all()}
+# 自定义服务商未知模型时的保守上限
+DEFAULT_CONTEXT_TOKENS = 32_000
+DEFAULT_MAX_OUTPUT_TOKENS = 4096
+
+AI_SETTING_KEYS = (
+    "ai_enabled", "ai_provider", "ai_api_key", "ai_api_base", "ai_model", "ai_api_format",
+    "ai_max_concurrency", "ai_fallback_providers", "ai_fallback_api_keys",
+)
+DEFAULT_MAX_CONCURRENCY = 4
+
+# 每个服务商（按 api_base 区分）同时在途的请求上限：api_base -> (上限, 信号量)
+_provider_limits: dict[str, tuple[int, asyncio.Semaphore]] = {}
+
+# 由 AI 相关设置派生的配置，仅在这些 key 变化时重建
+_ai_config: Optional[dict] = None
+
+
+def _reset_ai_config(_changed: set[str]) -> None:
+    global _ai_config
+    _ai_config = None
+
 
+settings_cache.subscribe(AI_SETTING_KEYS, _reset_ai_config)
+
+
+def _parse_fallbacks(settings: dict, primary: str, max_concurrency: int) -> list[dict]:
+    """ai_fallback_providers（逗号分隔的预设名）+ ai_fallback_api_keys（{预设名: key}）→ 备用服务商配置。"""
+    names = [n.strip() for n in (settings.get("ai_fallback_providers") or "").split(",") if n.strip()]
+    try:
+        keys = json.loads(settings.get("ai_fallback_api_keys") or "{}")
+    except json.JSONDecodeError:
+        logger.warning("ai_fallback_api_keys is not valid JSON, fallbacks disabled")
+        keys = {}
+
+    fallbacks = []
+    for name in names:
+        preset = PROVIDER_PRESETS.get(name)
+        if preset is None:
+            logger.warning(f"Unknown fallback AI provider: {name}")
+            continue
+        if name == primary or not keys.get(name):
+            continue
+        fallbacks.append({
+            "name": name,
+            "api_key": keys[name],
+            "api_base": preset["api_base"],
+            "model": preset["default_model"],
+            "api_format": preset.get("api_format", "openai"),
+            "max_concurrency": max_concurrency,
+        })
+    return fallbacks
+
+
+def _build_ai_config(settings: dict) -> dict:
     provider = settings.get("ai_provider", "custom")
     preset = PROVIDER_PRESETS.get(provider)
 
@@ -74,16 +133,69 @@ async def _get_ai_config() -> dict:
         if not api_format:
             api_format = preset.get("api_format", "openai")
 
+    try:
+        max_concurrency = max(1, int(settings.get("ai_max_concurrency") or DEFAULT_MAX_CONCURRENCY))
+    except ValueError:
+        max_concurrency = DEFAULT_MAX_CONCURRENCY
+
     return {
+        "name": provider,
         "enabled": settings.get("ai_enabled", "true") == "true",
         "api_key": settings.get("ai_api_key", ""),
         "api_base": api_base or "https://api.openai.com/v1",
         "model": model or "gpt-4o-mini",
         "api_format": api_format or "openai",
+        "max_concurrency": max_concurrency,
+        "context_tokens": (preset or {}).get("context_tokens", DEFAULT_CONTEXT_TOKENS),
+        "max_output_tokens": (preset or {}).get("max_output_tokens", DEFAULT_MAX_OUTPUT_TOKENS),
+        "fallbacks": _parse_fallbacks(settings, provider, max_concurrency),
+    }
+
+
+async def _get_ai_config() -> dict:
+    global _ai_config
+    await settings_cache.refresh()
+    if _ai_config is None:
+        _ai_config = _build_ai_config(await settings_cache.get_many(AI_SETTING_KEYS))
+    return dict(_ai_config)
+
+
+async def ai_configured() -> bool:
+    """AI 已启用且配置了 API Key。"""
+    config = await _get_ai_config()
+    return bool(config["enabled"] and config["api_key"])
+
+
+async def get_model_limits() -> dict:
+    """当前模型名及其上下文/输出 token 上限，供批处理切分使用。"""
+    config = await _get_ai_config()
+    return {
+        "model": config["model"],
+        "context_tokens": config["context_tokens"],
+        "max_output_tokens": config["max_output_tokens"],
     }
 
 
-async def _call_openai_format(config: dict, messages: list[dict], temperature: float, max_tokens: int, response_format: Optional[dict]) -> Optional[str]:
+def _provider_semaphore(config: dict) -> asyncio.Semaphore:
+    """同一服务商共享一个信号量；上限配置变化后新请求使用新的信号量。"""
+    key = config["api_base"]
+    limit = config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+    entry = _provider_limits.get(key)
+    if entry is None or entry[0] != limit:
+        entry = (limit, asyncio.Semaphore(limit))
+        _provider_limits[key] = entry
+    return entry[1]
+
+
+provider_router = ProviderRouter(_provider_semaphore, max_rounds=MAX_RETRIES, backoff=tuple(RETRY_BACKOFF))
+
+
+def _provider_pool(config: dict) -> list[dict]:
+    """首选服务商在前，其后为配置的备用服务商。"""
+    return [config] + config.get("fallbacks", [])
+
+
+def _openai_request(config: dict, messages: list[dict], temperature: float, max_tokens: int, response_format: Optional[dict]) -> tuple[str, dict, dict]:
     url = f"{config['api_base'].rstrip('/')}/chat/completions"
     payload: dict = {
         "model": config["model"],
@@ -97,26 +209,10 @@ async def _call_openai_format(config: dict, messages: list[dict], temperature: f
         "Authorization": f"Bearer {config['api_key']}",
         "Content-Type": "application/json",
     }
-    async with httpx.AsyncClient(timeout=120) as client:
-        for attempt in range(MAX_RETRIES):
-            resp = await client.post(url, json=payload, headers=headers)
-            if resp.status_code == 200:
-                break
-            if resp.status_code in RETRYABLE_STATUS and attempt < MAX_RETRIES - 1:
-                wait = RETRY_BACKOFF[min(attempt, len(RETRY_BACKOFF) - 1)]
-                logger.warning(f"AI API {resp.status_code}, retry {attempt + 1}/{MAX_RETRIES} in {wait}s")
-                await asyncio.sleep(wait)
-                continue
-            logger.error(f"AI API error {resp.status_code}: {resp.text[:200]}")
-            return None
-    data = resp.json()
-    content = data.get("choices", [{}])[0].get("message", {}).get("content")
-    if not content:
-        logger.error(f"AI API returned empty content: {str(data)[:200]}")
-    return content
+    return url, payload, headers
 
 
-async def _call_anthropic_format(config: dict, messages: list[dict], temperature: float, max_tokens: int) -> Optional[str]:
+def _anthropic_request(config: dict, messages: list[dict], max_tokens: int) -> tuple[str, dict, dict]:
     """兼容 Anthropic Messages API 格式（MiniMax 等）。"""
     # 将 system 消息单独提取
     system_prompt: Optional[str] = None
@@ -141,19 +237,37 @@ async def _call_anthropic_format(config: dict, messages: list[dict], temperature
         "anthropic-version": "2023-06-01",
         "Content-Type": "application/json",
     }
+    return url, payload, headers
+
+
+async def _call_openai_format(config: dict, messages: list[dict], temperature: float, max_tokens: int, response_format: Optional[dict], usage: Optional[dict] = None) -> Optional[str]:
+    url, payload, headers = _openai_request(config, messages, temperature, max_tokens, response_format)
     async with httpx.AsyncClient(timeout=120) as client:
-        for attempt in range(MAX_RETRIES):
-            resp = await client.post(url, json=payload, headers=headers)
-            if resp.status_code == 200:
-                break
-            if resp.status_code in RETRYABLE_STATUS and attempt < MAX_RETRIES - 1:
-                wait = RETRY_BACKOFF[min(attempt, len(RETRY_BACKOFF) - 1)]
-                logger.warning(f"AI API {resp.status_code}, retry {attempt + 1}/{MAX_RETRIES} in {wait}s")
-                await asyncio.sleep(wait)
-                continue
-            logger.error(f"AI API error {resp.status_code}: {resp.text[:200]}")
-            return None
+        resp = await client.post(url, json=payload, headers=headers)
+    if resp.status_code != 200:
+        logger.error(f"AI API error {resp.status_code}: {resp.text[:200]}")
+        raise ProviderError(resp.status_code, resp.text[:200])
     data = resp.json()
+    if usage is not None and data.get("usage"):
+        usage["prompt_tokens"] = data["usage"].get("prompt_tokens", 0)
+        usage["completion_tokens"] = data["usage"].get("completion_tokens", 0)
+    content = data.get("choices", [{}])[0].get("message", {}).get("content")
+    if not content:
+        logger.error(f"AI API returned empty content: {str(data)[:200]}")
+    return content
+
+
+async def _call_anthropic_format(config: dict, messages: list[dict], temperature: float, max_tokens: int, usage: Optional[dict] = None) -> Optional[str]:
+    url, payload, headers = _anthropic_request(config, messages, max_tokens)
+    async with httpx.AsyncClient(timeout=120) as client:
+        resp = await client.post(url, json=payload, headers=headers)
+    if resp.status_code != 200:
+        logger.error(f"AI API error {resp.status_code}: {resp.text[:200]}")
+        raise ProviderError(resp.status_code, resp.text[:200])
+    data = resp.json()
+    if usage is not None and data.get("usage"):
+        usage["prompt_tokens"] = data["usage"].get("input_tokens", 0)
+        usage["completion_tokens"] = data["usage"].get("output_tokens", 0)
     # Anthropic 格式：content 是列表，取第一个 text block
     content_blocks = data.get("content", [])
     for block in content_blocks:
@@ -163,24 +277,181 @@ async def _call_anthropic_format(config: dict, messages: list[dict], temperature
     return None
 
 
-async def chat_completion(
+async def _sse_events(resp: httpx.Response) -> AsyncIterator[dict]:
+    """逐条解析服务商 SSE 响应的 data 行（JSON），遇到 [DONE] 结束。"""
+    async for line in resp.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if not data:
+            continue
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            logger.warning(f"AI stream: unparseable event {data[:100]}")
+
+
+async def _stream_openai_format(config: dict, messages: list[dict], temperature: float, max_tokens: int, response_format: Optional[dict], usage: dict) -> AsyncIterator[str]:
+    url, payload, headers = _openai_request(config, messages, temperature, max_tokens, response_format)
+    payload["stream"] = True
+    payload["stream_options"] = {"include_usage": True}
+    async with httpx.AsyncClient(timeout=httpx.Timeout(120, read=60)) as client:
+        async with client.stream("POST", url, json=payload, headers=headers) as resp:
+            if resp.status_code != 200:
+                body = (await resp.aread()).decode("utf-8", "replace")[:200]
+                logger.error(f"AI API error {resp.status_code}: {body}")
+                raise ProviderError(resp.status_code, body)
+            async for event in _sse_events(resp):
+                if event.get("usage"):
+                    usage["prompt_tokens"] = event["usage"].get("prompt_tokens", 0)
+                    usage["completion_tokens"] = event["usage"].get("completion_tokens", 0)
+                for choice in event.get("choices") or []:
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        yield text
+
+
+async def _stream_anthropic_format(config: dict, messages: list[dict], temperature: float, max_tokens: int, usage: dict) -> AsyncIterator[str]:
+    url, payload, headers = _anthropic_request(config, messages, max_tokens)
+    payload["stream"] = True
+    async with httpx.AsyncClient(timeout=httpx.Timeout(120, read=60)) as client:
+        async with client.stream("POST", url, json=payload, headers=headers) as resp:
+            if resp.status_code != 200:
+                body = (await resp.aread()).decode("utf-8", "replace")[:200]
+                logger.error(f"AI API error {resp.status_code}: {body}")
+                raise ProviderError(resp.status_code, body)
+            async for event in _sse_events(resp):
+                kind = event.get("type")
+                if kind == "message_start":
+                    usage["prompt_tokens"] = (event.get("message", {}).get("usage") or {}).get("input_tokens", 0)
+                elif kind == "message_delta":
+                    usage["completion_tokens"] = (event.get("usage") or {}).get("output_tokens", 0)
+                elif kind == "content_block_delta":
+                    delta = event.get("delta") or {}
+                    if delta.get("type") == "text_delta" and delta.get("text"):
+                        yield delta["text"]
+                elif kind == "error":
+                    raise ProviderError(None, str(event.get("error"))[:200])
+
+
+async def _cache_lookup(key: str) -> Optional[str]:
+    try:
+        return await llm_cache.get(key)
+    except Exception as e:
+        logger.warning(f"LLM cache lookup failed: {e}")
+        return None
+
+
+async def _cache_store(key: str, model: str, content: str, ttl: Optional[int]) -> None:
+    try:
+        await llm_cache.set(key, model, content, ttl_seconds=ttl)
+    except Exception as e:
+        logger.warning(f"LLM cache store failed: {e}")
+
+
+async def _complete(
     messages: list[dict],
-    temperature: float = 0.3,
-    max_tokens: int = 1000,
-    response_format: Optional[dict] = None,
+    temperature: float,
+    max_tokens: int,
+    response_format: Optional[dict],
+    use_cache: bool,
+    cache_ttl: Optional[int],
+    is_cacheable: Optional[Callable[[str], bool]] = None,
+    hedge: bool = False,
 ) -> Optional[str]:
     config = await _get_ai_config()
     if not config["enabled"] or not config["api_key"]:
         return None
 
+    cache_key = make_cache_key(
+        config["model"], messages, temperature, max_tokens, config["api_format"], response_format,
+        provider=config["name"], api_base=config.get("api_base"),
+    )
+    if use_cache:
+        cached = await _cache_lookup(cache_key)
+        if cached is not None and (is_cacheable is None or is_cacheable(cached)):
+            usage_meter.record(config["name"], config["model"], "cache_hit")
+            return cached
+
+    if await usage_meter.should_degrade():
+        usage_meter.record(config["name"], config["model"], "budget_exceeded")
+        logger.info("AI daily token budget exhausted, skipping low-priority call")
+        return None
+
+    async def attempt(provider: dict) -> Optional[str]:
+        usage: dict = {}
+        started = time.monotonic()
+        outcome = "error"
+        content: Optional[str] = None
+        try:
+            if provider["api_format"] == "anthropic":
+                content = await _call_anthropic_format(provider, messages, temperature, max_tokens, usage=usage)
+            else:
+                content = await _call_openai_format(provider, messages, temperature, max_tokens, response_format, usage=usage)
+            outcome = "ok" if content else "empty"
+            return content
+        except asyncio.CancelledError:
+            outcome = "cancelled"  # 对冲请求中落后的一方
+            raise
+        finally:
+            _record_usage(provider, messages, content, usage, outcome, started)
+
     try:
-        if config["api_format"] == "anthropic":
-            return await _call_anthropic_format(config, messages, temperature, max_tokens)
-        else:
-            return await _call_openai_format(config, messages, temperature, max_tokens, response_format)
+        content = await provider_router.call(_provider_pool(config), attempt, hedge=hedge)
     except Exception as e:
         logger.error(f"AI API call failed: {e}")
         return None
+    finally:
+        await usage_meter.maybe_flush()
+
+    if content and (is_cacheable is None or is_cacheable(content)):
+        await _cache_store(cache_key, config["model"], content, cache_ttl)
+    return content
+
+
+def _record_usage(
+    provider: dict,
+    messages: list[dict],
+    content: Optional[str],
+    usage: dict,
+    outcome: str,
+    started: float,
+) -> None:
+    """记录一次服务商请求；服务商未返回 usage 时按字数估算 token。"""
+    estimated = not usage and outcome != "error"
+    if estimated:
+        usage = {
+            "prompt_tokens": sum(estimate_tokens(m.get("content") or "") for m in messages),
+            "completion_tokens": estimate_tokens(content or ""),
+        }
+    usage_meter.record(
+        provider.get("name"),
+        provider.get("model"),
+        outcome,
+        prompt_tokens=int(usage.get("prompt_tokens") or 0),
+        completion_tokens=int(usage.get("completion_tokens") or 0),
+        latency_ms=int((time.monotonic() - started) * 1000),
+        estimated=estimated,
+    )
+
+
+async def chat_completion(
+    messages: list[dict],
+    temperature: float = 0.3,
+    max_tokens: int = 1000,
+    response_format: Optional[dict] = None,
+    use_cache: bool = True,
+    cache_ttl: Optional[int] = None,
+    hedge: bool = False,
+) -> Optional[str]:
+    """调用 LLM。相同请求命中持久化缓存时直接返回；
+    use_cache=False 跳过缓存读取、强制请求服务商，并用新结果刷新缓存。
+    hedge=True 用于手动触发等延迟敏感的调用：首选服务商超过 p95 未返回时并行请求备用服务商。"""
+    return await _complete(
+        messages, temperature, max_tokens, response_format, use_cache, cache_ttl, hedge=hedge,
+    )
 
 
 def _extract_json_text(text: str) -> str:
@@ -194,16 +465,32 @@ def _extract_json_text(text: str) -> str:
     return text
 
 
+def _is_json_text(text: str) -> bool:
+    try:
+        json.loads(_extract_json_text(text))
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
 async def chat_completion_json(
     messages: list[dict],
     temperature: float = 0.3,
     max_tokens: int = 1000,
+    use_cache: bool = True,
+    cache_ttl: Optional[int] = None,
+    hedge: bool = False,
 ) -> Optional[dict]:
-    result = await chat_completion(
+    # 只缓存能解析的 JSON，避免把一次格式错误的响应固化下来
+    result = await _complete(
         messages,
-        temperature=temperature,
-        max_tokens=max_tokens,
-        response_format={"type": "json_object"},
+        temperature,
+        max_tokens,
+        {"type": "json_object"},
+        use_cache,
+        cache_ttl,
+        is_cacheable=_is_json_text,
+        hedge=hedge,
     )
     if result:
         try:
@@ -211,3 +498,83 @@ async def chat_completion_json(
         except json.JSONDecodeError:
             logger.error(f"Failed to parse AI JSON response: {result[:300]}")
     return None
+
+
+async def chat_completion_stream(
+    messages: list[dict],
+    temperature: float = 0.3,
+    max_tokens: int = 1000,
+    response_format: Optional[dict] = None,
+    use_cache: bool = True,
+    cache_ttl: Optional[int] = None,
+    is_cacheable: Optional[Callable[[str], bool]] = None,
+) -> AsyncIterator[str]:
+    """流式调用 LLM，逐段产出文本。
+
+    首个 token 之前失败会按服务商池顺序切换；已开始输出后失败则抛出 ProviderError，
+    由调用方决定如何处理已收到的部分。命中缓存时一次性产出完整结果；
+    AI 未配置或预算降级时不产出任何内容。完整结果写入缓存，与 chat_completion 共用缓存 key
+    （use_cache=False 同样只跳过读取）。
+    """
+    config = await _get_ai_config()
+    if not config["enabled"] or not config["api_key"]:
+        return
+
+    cache_key = make_cache_key(
+        config["model"], messages, temperature, max_tokens, config["api_format"], response_format,
+        provider=config["name"], api_base=config.get("api_base"),
+    )
+    if use_cache:
+        cached = await _cache_lookup(cache_key)
+        if cached is not None and (is_cacheable is None or is_cacheable(cached)):
+            usage_meter.record(config["name"], config["model"], "cache_hit")
+            yield cached
+            return
+
+    if await usage_meter.should_degrade():
+        usage_meter.record(config["name"], config["model"], "budget_exceeded")
+        logger.info("AI daily token budget exhausted, skipping low-priority call")
+        return
+
+    last_error: Optional[ProviderError] = None
+    try:
+        for provider in provider_router.order(_provider_pool(config)):
+            stats = provider_router.stats_for(provider["name"])
+            usage: dict = {}
+            parts: list[str] = []
+            outcome = "error"
+            started = time.monotonic()
+            try:
+                async with _provider_semaphore(provider):
+                    if provider["api_format"] == "anthropic":
+                        chunks = _stream_anthropic_format(provider, messages, temperature, max_tokens, usage)
+                    else:
+                        chunks = _stream_openai_format(provider, messages, temperature, max_tokens, response_format, usage)
+                    async for text in chunks:
+                        parts.append(text)
+                        yield text
+                outcome = "ok" if parts else "empty"
+            except ProviderError as e:
+                last_error = e
+            except (httpx.HTTPError, OSError) as e:
+                last_error = ProviderError(None, f"{type(e).__name__}: {e}")
+            except (asyncio.CancelledError, GeneratorExit):
+                outcome = "cancelled"  # 客户端断开
+                raise
+            finally:
+                content = "".join(parts)
+                _record_usage(provider, messages, content, usage, outcome, started)
+
+            if outcome == "ok":
+                stats.record_success(time.monotonic() - started)
+                if is_cacheable is None or is_cacheable(content):
+                    await _cache_store(cache_key, config["model"], content, cache_ttl)
+                return
+            stats.record_failure(last_error if outcome == "error" else ProviderError(200, "empty content"))
+            if parts:
+                # 已经向调用方输出过内容，不能再换服务商重头开始
+                raise last_error or ProviderError(None, "stream interrupted")
+            logger.warning(f"AI provider {provider['name']} stream failed ({last_error}), trying next")
+    finally:
+        await usage_meter.maybe_flush()
+    logger.error(f"AI stream failed on all providers: {last_error}")
@@ -0,0 +1,208 @@
+"""多服务商路由：按配置顺序组成服务商池，记录各自延迟/错误率，
+429/5xx 时切换到下一家，延迟敏感的调用可在首选服务商超过 p95 后对冲请求备用服务商。"""
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+LATENCY_WINDOW = 100  # 每个服务商保留最近 N 次成功请求的耗时
+OUTCOME_WINDOW = 50  # 错误率按最近 N 次请求计算
+MIN_LATENCY_SAMPLES = 10  # 样本不足时使用默认对冲延迟
+DEFAULT_HEDGE_DELAY = 8.0  # 秒
+COOLDOWN_BASE = 30.0  # 429/5xx 后暂时降级，连续失败指数递增
+COOLDOWN_MAX = 300.0
+
+
+class ProviderError(Exception):
+    """服务商返回非 200 或网络异常。status 为 None 表示网络层错误。"""
+
+    def __init__(self, status: Optional[int], message: str = ""):
+        super().__init__(f"{status}: {message}" if status else message)
+        self.status = status
+        self.retryable = status is None or status in RETRYABLE_STATUS
+
+
+class ProviderStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.outcomes: deque[bool] = deque(maxlen=OUTCOME_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        self.last_error: Optional[str] = None
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def in_cooldown(self, now: float) -> bool:
+        return now < self.cooldown_until
+
+    def record_success(self, latency: float) -> None:
+        self.requests += 1
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+
+    def record_failure(self, error: ProviderError) -> None:
+        self.requests += 1
+        self.errors += 1
+        self.outcomes.append(False)
+        self.last_error = str(error)[:200]
+        if error.retryable:
+            self.consecutive_errors += 1
+            backoff = min(COOLDOWN_MAX, COOLDOWN_BASE * 2 ** (self.consecutive_errors - 1))
+            self.cooldown_until = time.monotonic() + backoff
+
+    def to_dict(self) -> dict:
+        p95 = self.p95()
+        now = time.monotonic()
+        return {
+            "name": self.name,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 3),
+            "p95_latency": round(p95, 2) if p95 is not None else None,
+            "cooldown_seconds": round(self.cooldown_until - now, 1) if self.in_cooldown(now) else 0,
+            "last_error": self.last_error,
+        }
+
+
+class ProviderRouter:
+    def __init__(
+        self,
+        limiter: Callable[[dict], asyncio.Semaphore],
+        max_rounds: int = 3,
+        backoff: tuple[float, ...] = (2, 5, 15),
+    ):
+        self._limiter = limiter
+        self.max_rounds = max_rounds
+        self.backoff = backoff
+        self._stats: dict[str, ProviderStats] = {}
+
+    def stats_for(self, name: str) -> ProviderStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = ProviderStats(name)
+        return stats
+
+    def order(self, pool: list[dict]) -> list[dict]:
+        """健康的服务商保持配置顺序在前，冷却中的按冷却结束时间排在后面。"""
+        now = time.monotonic()
+        healthy = [c for c in pool if not self.stats_for(c["name"]).in_cooldown(now)]
+        cooling = sorted(
+            (c for c in pool if self.stats_for(c["name"]).in_cooldown(now)),
+            key=lambda c: self.stats_for(c["name"]).cooldown_until,
+        )
+        return healthy + cooling
+
+    def hedge_delay(self, name: str) -> float:
+        p95 = self.stats_for(name).p95()
+        return p95 if p95 is not None else DEFAULT_HEDGE_DELAY
+
+    async def _timed(self, config: dict, attempt: Callable[[dict], Awaitable[Optional[str]]]) -> Optional[str]:
+        stats = self.stats_for(config["name"])
+        async with self._limiter(config):
+            started = time.monotonic()
+            try:
+                content = await attempt(config)
+            except ProviderError as e:
+                stats.record_failure(e)
+                raise
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = ProviderError(None, f"{type(e).__name__}: {e}")
+                stats.record_failure(error)
+                raise error from e
+        if content:
+            stats.record_success(time.monotonic() - started)
+        else:
+            stats.record_failure(ProviderError(200, "empty content"))
+        return content
+
+    async def _hedged(
+        self,
+        providers: list[dict],
+        attempt: Callable[[dict], Awaitable[Optional[str]]],
+    ) -> tuple[Optional[str], bool, list[dict]]:
+        """首选服务商超过其 p95 仍未返回时，并行请求第二家，取先成功的结果。
+
+        返回 (结果, 是否遇到可重试错误, 仍可尝试的服务商)。
+        """
+        primary, backup = providers[0], providers[1]
+        tasks = {asyncio.create_task(self._timed(primary, attempt))}
+        done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(primary["name"]))
+        remaining = providers[1:]
+        if not done:
+            logger.info(f"AI hedge: {primary['name']} slower than p95, also asking {backup['name']}")
+            tasks.add(asyncio.create_task(self._timed(backup, attempt)))
+            remaining = providers[2:]
+
+        retryable = False
+        pending = tasks
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    content = task.result()
+                except ProviderError as e:
+                    retryable = retryable or e.retryable
+                    continue
+                if content:
+                    for other in pending:
+                        other.cancel()
+                    return content, retryable, []
+        return None, retryable, remaining
+
+    async def call(
+        self,
+        pool: list[dict],
+        attempt: Callable[[dict], Awaitable[Optional[str]]],
+        hedge: bool = False,
+    ) -> Optional[str]:
+        """依次尝试池中服务商；一轮全部失败且存在可重试错误时退避后再来一轮。"""
+        for round_no in range(self.max_rounds):
+            providers = self.order(pool)
+            retryable = False
+            if hedge and len(providers) >= 2 and round_no == 0:
+                content, retryable, providers = await self._hedged(providers, attempt)
+                if content:
+                    return content
+
+            for config in providers:
+                try:
+                    content = await self._timed(config, attempt)
+                except ProviderError as e:
+                    retryable = retryable or e.retryable
+                    logger.warning(f"AI provider {config['name']} failed ({e}), trying next")
+                    continue
+                if content:
+                    return content
+
+            if not retryable or round_no == self.max_rounds - 1:
+                break
+            wait = self.backoff[min(round_no, len(self.backoff) - 1)]
+            logger.warning(f"All AI providers failed, retry {round_no + 1}/{self.max_rounds} in {wait}s")
+            await asyncio.sleep(wait)
+        return None
+
+    def stats(self) -> list[dict]:
+        return [s.to_dict() for s in self._stats.values()]
@@ -0,0 +1,196 @@
+"""LLM 用量计量：每次调用按 agent/job/skill 打标签记录 token、耗时和结果，
+并按 agent 执行每日 token 预算——超出后低优先级调用（摘要、预测等）直接降级。
+
+调用方通过 usage_scope() 声明当前上下文（见 app.platform.call_context）。
+"""
+import json
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.llm_usage import LLMUsage
+from app.platform.call_context import current_scope, scoped_stream, usage_scope  # noqa: F401
+from app.platform.settings_cache import settings_cache
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SIZE = 50  # 缓冲满 N 条或距上次写入超过 FLUSH_INTERVAL 秒时批量落库
+FLUSH_INTERVAL = 30.0
+MAX_BUFFER = 2000  # 数据库持续不可用时最多保留的条数
+
+
+def parse_budgets(raw: Optional[str]) -> dict[str, int]:
+    """ai_daily_token_budgets：{"investment": 500000, ...}，未配置的 agent 不限额。"""
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+        return {k: int(v) for k, v in data.items() if int(v) > 0}
+    except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+        logger.warning("ai_daily_token_budgets is not valid JSON, budgets disabled")
+        return {}
+
+
+class UsageMeter:
+    def __init__(self):
+        self._buffer: list[LLMUsage] = []
+        self._last_flush = time.monotonic()
+        # 当日各 agent 已用 token，进程启动后首次检查预算时从数据库补齐
+        self._day: Optional[date] = None
+        self._today: dict[str, int] = {}
+
+    def record(
+        self,
+        provider: Optional[str],
+        model: Optional[str],
+        outcome: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency_ms: int = 0,
+        estimated: bool = False,
+    ) -> None:
+        scope = current_scope()
+        agent_key = scope.get("agent_key")
+        self._buffer.append(LLMUsage(
+            created_at=datetime.now(),
+            agent_key=agent_key,
+            job=scope.get("job"),
+            skill=scope.get("skill"),
+            provider=provider,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_ms=latency_ms,
+            outcome=outcome,
+            estimated=estimated,
+        ))
+        if len(self._buffer) > MAX_BUFFER:
+            del self._buffer[: len(self._buffer) - MAX_BUFFER]
+        if agent_key and self._day == date.today():
+            self._today[agent_key] = self._today.get(agent_key, 0) + prompt_tokens + completion_tokens
+
+    async def maybe_flush(self) -> None:
+        if len(self._buffer) >= FLUSH_SIZE or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            await self.flush()
+
+    async def flush(self) -> int:
+        if not self._buffer:
+            return 0
+        rows, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        try:
+            async with async_session() as session:
+                session.add_all(rows)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"LLM usage flush failed: {e}")
+            self._buffer = rows + self._buffer
+            return 0
+        return len(rows)
+
+    async def _ensure_today(self) -> None:
+        today = date.today()
+        if self._day == today:
+            return
+        self._day = today
+        self._today = {}
+        since = datetime.combine(today, datetime.min.time())
+        try:
+            async with async_session() as session:
+                result = await session.execute(
+                    select(LLMUsage.agent_key, func.sum(LLMUsage.prompt_tokens + LLMUsage.completion_tokens))
+                    .where(LLMUsage.created_at >= since)
+                    .where(LLMUsage.agent_key != None)  # noqa: E711
+                    .group_by(LLMUsage.agent_key)
+                )
+                self._today = {key: int(total or 0) for key, total in result.all()}
+        except Exception as e:
+            logger.warning(f"LLM usage totals load failed: {e}")
+        # 尚未落库的记录
+        for row in self._buffer:
+            if row.agent_key and row.created_at >= since:
+                self._today[row.agent_key] = self._today.get(row.agent_key, 0) + row.prompt_tokens + row.completion_tokens
+
+    async def tokens_used_today(self, agent_key: str) -> int:
+        await self._ensure_today()
+        return self._today.get(agent_key, 0)
+
+    async def get_budgets(self) -> dict[str, int]:
+        try:
+            return parse_budgets(await settings_cache.get("ai_daily_token_budgets"))
+        except Exception:
+            return {}
+
+    async def budget_exhausted(self, agent_key: Optional[str]) -> bool:
+        if not agent_key:
+            return False
+        budget = (await self.get_budgets()).get(agent_key)
+        return budget is not None and await self.tokens_used_today(agent_key) >= budget
+
+    async def should_degrade(self) -> bool:
+        """当前上下文为低优先级且所属 agent 今日预算已用尽。"""
+        scope = current_scope()
+        return scope.get("priority") == "low" and await self.budget_exhausted(scope.get("agent_key"))
+
+    async def budget_status(self) -> dict[str, dict]:
+        budgets = await self.get_budgets()
+        await self._ensure_today()
+        keys = set(budgets) | set(self._today)
+        return {
+            key: {
+                "used": self._today.get(key, 0),
+                "budget": budgets.get(key),
+                "exhausted": key in budgets and self._today.get(key, 0) >= budgets[key],
+            }
+            for key in sorted(keys)
+        }
+
+
+async def daily_usage(session: AsyncSession, days: int = 7, agent_key: Optional[str] = None) -> list[dict]:
+    """按 日期 × agent × skill 汇总调用次数、token、错误数和平均耗时。"""
+    since = datetime.combine(date.today() - timedelta(days=days - 1), datetime.min.time())
+    day = func.date(LLMUsage.created_at)
+    query = (
+        select(
+            day,
+            LLMUsage.agent_key,
+            LLMUsage.skill,
+            func.count(LLMUsage.id),
+            func.sum(LLMUsage.prompt_tokens),
+            func.sum(LLMUsage.completion_tokens),
+            func.sum(case((LLMUsage.outcome == "error", 1), else_=0)),
+            func.sum(case((LLMUsage.outcome == "cache_hit", 1), else_=0)),
+            func.sum(case((LLMUsage.outcome == "budget_exceeded", 1), else_=0)),
+            func.avg(LLMUsage.latency_ms).filter(LLMUsage.outcome == "ok"),
+        )
+        .where(LLMUsage.created_at >= since)
+        .group_by(day, LLMUsage.agent_key, LLMUsage.skill)
+        .order_by(day.desc(), LLMUsage.agent_key, LLMUsage.skill)
+    )
+    if agent_key:
+        query = query.where(LLMUsage.agent_key == agent_key)
+
+    rows = []
+    for d, agent, skill, calls, prompt, completion, errors, cache_hits, degraded, latency in (await session.execute(query)).all():
+        rows.append({
+            "date": d,
+            "agent_key": agent,
+            "skill": skill,
+            "calls": calls,
+            "prompt_tokens": int(prompt or 0),
+            "completion_tokens": int(completion or 0),
+            "total_tokens": int(prompt or 0) + int(completion or 0),
+            "errors": int(errors or 0),
+            "cache_hits": int(cache_hits or 0),
+            "budget_exceeded": int(degraded or 0),
+            "avg_latency_ms": int(latency) if latency is not None else None,
+        })
+    return rows
+
+
+usage_meter = UsageMeter()
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth import get_current_user
 from app.database import get_session
 from app.models.alert import Alert
+from app.platform.response_cache import response_cache
 
 router = APIRouter()
 
@@ -58,4 +59,5 @@ async def resolve_alert(
     alert.is_active = False
     alert.resolved_at = datetime.now()
     await session.commit()
+    await response_cache.invalidate(f"alerts:{alert.agent_key}")
     return alert.to_dict()
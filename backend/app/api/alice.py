@@ -3,12 +3,11 @@ import logging
 import httpx
 from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_session
-from app.models.setting import SystemSetting
+from app.platform.settings_cache import settings_cache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -16,13 +15,11 @@ logger = logging.getLogger(__name__)
 
 async def _get_alice_config(session: AsyncSession) -> dict:
     config = {"enabled": False, "base_url": "http://localhost:3002"}
-    for key in ("openalice_enabled", "openalice_base_url"):
-        row = await session.scalar(select(SystemSetting).where(SystemSetting.key == key))
-        if row and row.value:
-            if key == "openalice_enabled":
-                config["enabled"] = row.value == "true"
-            else:
-                config["base_url"] = row.value.rstrip("/")
+    values = await settings_cache.get_many(("openalice_enabled", "openalice_base_url"), session=session)
+    if values.get("openalice_enabled"):
+        config["enabled"] = values["openalice_enabled"] == "true"
+    if values.get("openalice_base_url"):
+        config["base_url"] = values["openalice_base_url"].rstrip("/")
     return config
 
 
@@ -7,7 +7,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_session
-from app.models.article import Article
+from app.models.article import ARTICLE_ROW_COLUMNS, Article, ArticleRow
+from app.platform.response_cache import response_cache
+from app.platform.serialization import FastJSONResponse
 
 router = APIRouter()
 
@@ -24,7 +26,7 @@ async def list_articles(
     session: AsyncSession = Depends(get_session),
     _=Depends(get_current_user),
 ):
-    query = select(Article).where(Article.agent_key == "investment").order_by(desc(Article.published_at), desc(Article.fetched_at))
+    query = select(*ARTICLE_ROW_COLUMNS).where(Article.agent_key == "investment").order_by(desc(Article.published_at), desc(Article.fetched_at))
     count_query = select(func.count(Article.id)).where(Article.agent_key == "investment")
 
     since = datetime.now() - timedelta(hours=hours)
@@ -47,18 +49,19 @@ async def list_articles(
     total = (await session.execute(count_query)).scalar() or 0
     offset = (page - 1) * page_size
     result = await session.execute(query.offset(offset).limit(page_size))
-    items = [a.to_dict() for a in result.scalars().all()]
+    items = [ArticleRow.from_row(row) for row in result.all()]
 
-    return {
+    return FastJSONResponse({
         "items": items,
         "total": total,
         "page": page,
         "page_size": page_size,
         "pages": (total + page_size - 1) // page_size,
-    }
+    })
 
 
 @router.get("/trending")
+@response_cache.cached("articles:investment")
 async def trending_articles(
     limit: int = Query(10, ge=1, le=50),
     session: AsyncSession = Depends(get_session),
@@ -119,6 +122,7 @@ async def ai_industry_news(
 
 
 @router.get("/sources")
+@response_cache.cached("articles:investment")
 async def list_sources(
     session: AsyncSession = Depends(get_session),
     _=Depends(get_current_user),
@@ -132,6 +136,7 @@ async def list_sources(
 
 
 @router.get("/categories")
+@response_cache.cached("articles:investment")
 async def list_categories(
     session: AsyncSession = Depends(get_session),
     _=Depends(get_current_user),
@@ -3,7 +3,13 @@ from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth import verify_password, hash_password, create_access_token, get_current_user
+from app.auth import (
+    create_access_token,
+    get_current_user,
+    hash_password_async,
+    invalidate_user_cache,
+    verify_password_async,
+)
 from app.database import get_session
 from app.models.user import User
 
@@ -27,7 +33,7 @@ async def login(body: LoginRequest, session: AsyncSession = Depends(get_session)
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(body.password, user.hashed_password):
+    if not user or not await verify_password_async(body.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="用户名或密码错误")
 
     if not user.is_active:
@@ -52,12 +58,15 @@ async def change_password(
     user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    if not verify_password(body.old_password, user.hashed_password):
+    if not await verify_password_async(body.old_password, user.hashed_password):
         raise HTTPException(status_code=400, detail="原密码错误")
 
     if len(body.new_password) < 6:
         raise HTTPException(status_code=400, detail="新密码不能少于 6 位")
 
-    user.hashed_password = hash_password(body.new_password)
+    # get_current_user 返回的是缓存快照，需在当前 session 中重新加载后修改
+    db_user = await session.get(User, user.id)
+    db_user.hashed_password = await hash_password_async(body.new_password)
     await session.commit()
+    invalidate_user_cache(user.username)
     return {"ok": True, "message": "密码修改成功"}
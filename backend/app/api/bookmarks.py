@@ -8,12 +8,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_session
-from app.models.article import Article
+from app.models.article import ARTICLE_ROW_COLUMNS, Article, ArticleRow
 from app.models.bookmark import ArticleBookmark
 from app.models.user import User
+from app.platform.serialization import FastJSONResponse
 
 router = APIRouter()
 
+# 与 ArticleBookmark.to_dict() 的字段顺序一致
+BOOKMARK_COLUMNS = (
+    ArticleBookmark.id, ArticleBookmark.article_id, ArticleBookmark.user_id, ArticleBookmark.note,
+    ArticleBookmark.tags.label("bookmark_tags"), ArticleBookmark.created_at, ArticleBookmark.updated_at,
+)
+
 MAX_TAGS_PER_BOOKMARK = 10
 MAX_TAG_LENGTH = 20
 MAX_NOTE_LENGTH = 2000
@@ -105,8 +112,9 @@ async def list_bookmarks(
 ):
     user_id = current_user.id
 
+    # 只取列；文章行和 ai_analysis 只对当前页解析
     query = (
-        select(ArticleBookmark, Article)
+        select(*BOOKMARK_COLUMNS, *ARTICLE_ROW_COLUMNS)
         .join(Article, ArticleBookmark.article_id == Article.id)
         .where(ArticleBookmark.user_id == user_id)
     )
@@ -118,24 +126,33 @@ async def list_bookmarks(
 
     # Filter by tag in Python (tags stored as JSON list)
     if tag:
-        rows = [(bm, art) for bm, art in rows if tag in (bm.tags or [])]
+        rows = [row for row in rows if tag in (row.bookmark_tags or [])]
 
     total = len(rows)
     offset = (page - 1) * page_size
     page_rows = rows[offset: offset + page_size]
 
+    split = len(BOOKMARK_COLUMNS)
     items = []
-    for bm, art in page_rows:
-        item = bm.to_dict()
-        item["article"] = art.to_dict()
-        items.append(item)
-
-    return {
+    for row in page_rows:
+        bm_id, article_id, bm_user_id, note, tags, created_at, updated_at = row[:split]
+        items.append({
+            "id": bm_id,
+            "article_id": article_id,
+            "user_id": bm_user_id,
+            "note": note,
+            "tags": tags or [],
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "article": ArticleRow.from_row(row[split:]),
+        })
+
+    return FastJSONResponse({
         "items": items,
         "total": total,
         "page": page,
         "pages": (total + page_size - 1) // page_size,
-    }
+    })
 
 
 # POST /bookmarks/
@@ -1,19 +1,26 @@
 from datetime import datetime, timedelta
+from typing import Optional
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import select, func
+from sqlalchemy import desc, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_session
-from app.models.article import Article
 from app.models.alert import Alert
+from app.models.article_rollup import ArticleHourlyRollup
 from app.models.sentiment import SentimentSnapshot
+from app.platform.response_cache import response_cache
+from app.skills import rollup
+from app.skills.keywords import keyword_tracker
+from app.skills.prescorer import get_prescore_config, prescore_report
+from app.skills.scoring_queue import queue_stats, requeue_dead
 
 router = APIRouter()
 
 
 @router.get("/overview")
+@response_cache.cached("articles:investment", "alerts:investment", "sentiment:investment")
 async def get_overview(
     session: AsyncSession = Depends(get_session),
     _=Depends(get_current_user),
@@ -21,11 +28,19 @@ async def get_overview(
     now = datetime.now()
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
-    today_articles = (
+    # 文章数来自小时汇总表，一次范围读取
+    category_counts = (
         await session.execute(
-            select(func.count(Article.id)).where(Article.agent_key == "investment", Article.fetched_at >= today_start)
+            select(
+                ArticleHourlyRollup.category,
+                func.sum(ArticleHourlyRollup.count),
+                func.sum(ArticleHourlyRollup.important_count),
+            )
+            .where(ArticleHourlyRollup.agent_key == "investment")
+            .where(ArticleHourlyRollup.hour >= today_start)
+            .group_by(ArticleHourlyRollup.category)
         )
-    ).scalar() or 0
+    ).all()
 
     active_alerts = (
         await session.execute(
@@ -35,93 +50,124 @@ async def get_overview(
 
     latest_sentiment = (
         await session.execute(
-            select(SentimentSnapshot).order_by(SentimentSnapshot.snapshot_time.desc()).limit(1)
+            select(SentimentSnapshot)
+            .where(SentimentSnapshot.agent_key == "investment")
+            .order_by(SentimentSnapshot.snapshot_time.desc())
+            .limit(1)
         )
     ).scalar_one_or_none()
 
-    important_today = (
-        await session.execute(
-            select(func.count(Article.id))
-            .where(Article.agent_key == "investment")
-            .where(Article.fetched_at >= today_start)
-            .where(Article.importance >= 3)
-        )
-    ).scalar() or 0
-
-    category_counts = (
-        await session.execute(
-            select(Article.category, func.count(Article.id))
-            .where(Article.agent_key == "investment")
-            .where(Article.fetched_at >= today_start)
-            .group_by(Article.category)
-        )
-    ).all()
-
     return {
-        "today_articles": today_articles,
+        "today_articles": sum(row[1] for row in category_counts),
         "active_alerts": active_alerts,
-        "important_today": important_today,
+        "important_today": sum(row[2] for row in category_counts),
         "sentiment": latest_sentiment.to_dict() if latest_sentiment else {
             "overall_score": 50,
             "label": "neutral",
         },
-        "category_breakdown": {row[0]: row[1] for row in category_counts},
+        "category_breakdown": {row[0]: row[1] for row in category_counts if row[1]},
     }
 
 
 @router.get("/sentiment/history")
 async def sentiment_history(
     days: int = 7,
+    agent_key: str = "investment",
     session: AsyncSession = Depends(get_session),
     _=Depends(get_current_user),
 ):
     since = datetime.now() - timedelta(days=days)
     result = await session.execute(
         select(SentimentSnapshot)
+        .where(SentimentSnapshot.agent_key == agent_key)
         .where(SentimentSnapshot.snapshot_time >= since)
         .order_by(SentimentSnapshot.snapshot_time.asc())
     )
     return [s.to_dict() for s in result.scalars().all()]
 
 
+@router.get("/trending")
+async def trending_topics(
+    agent_key: str = "investment",
+    category: Optional[str] = None,
+    hours: int = 24,
+    limit: int = 20,
+    _=Depends(get_current_user),
+):
+    """入库资讯热词 Top-K（来自内存热词统计，不扫描文章表）。"""
+    return {
+        "agent_key": agent_key,
+        "category": category,
+        "hours": hours,
+        "items": await keyword_tracker.top(agent_key, category=category, hours=hours, limit=min(limit, 50)),
+    }
+
+
 @router.get("/stats")
+@response_cache.cached("articles:investment")
 async def get_stats(
     session: AsyncSession = Depends(get_session),
     _=Depends(get_current_user),
 ):
-    total_articles = (
-        await session.execute(select(func.count(Article.id)).where(Article.agent_key == "investment"))
-    ).scalar() or 0
-
     source_stats = (
         await session.execute(
-            select(Article.source, func.count(Article.id))
-            .where(Article.agent_key == "investment")
-            .group_by(Article.source)
-            .order_by(func.count(Article.id).desc())
+            select(ArticleHourlyRollup.source, func.sum(ArticleHourlyRollup.count).label("cnt"))
+            .where(ArticleHourlyRollup.agent_key == "investment")
+            .group_by(ArticleHourlyRollup.source)
+            .order_by(desc("cnt"))
         )
     ).all()
 
-    hours_data = []
-    now = datetime.now()
-    for i in range(23, -1, -1):
-        start = now - timedelta(hours=i + 1)
-        end = now - timedelta(hours=i)
-        count = (
+    # 最近 24 个整点时段（含当前时段）
+    current = rollup.hour_of(datetime.now())
+    hours = [current - timedelta(hours=i) for i in range(23, -1, -1)]
+    hourly = dict(
+        (
             await session.execute(
-                select(func.count(Article.id))
-                .where(Article.agent_key == "investment")
-                .where(Article.fetched_at >= start)
-                .where(Article.fetched_at < end)
+                select(ArticleHourlyRollup.hour, func.sum(ArticleHourlyRollup.count))
+                .where(ArticleHourlyRollup.agent_key == "investment")
+                .where(ArticleHourlyRollup.hour >= hours[0])
+                .group_by(ArticleHourlyRollup.hour)
             )
-        ).scalar() or 0
-        hours_data.append({
-            "hour": end.strftime("%H:00"),
-            "count": count,
-        })
+        ).all()
+    )
 
     return {
-        "total_articles": total_articles,
-        "sources": [{"source": s[0], "count": s[1]} for s in source_stats],
-        "hourly_volume": hours_data,
+        "total_articles": sum(s[1] for s in source_stats),
+        "sources": [{"source": s[0], "count": s[1]} for s in source_stats if s[1]],
+        "hourly_volume": [{"hour": h.strftime("%H:00"), "count": hourly.get(h, 0)} for h in hours],
     }
+
+
+@router.get("/scoring-queue")
+async def get_scoring_queue(
+    agent_key: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """评分队列深度、最久等待时长及累计处理量"""
+    return await queue_stats(session, agent_key)
+
+
+@router.post("/scoring-queue/requeue")
+async def requeue_scoring_dead_letters(
+    agent_key: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """重试次数用尽的评分任务重新排队（修复 AI 配置或服务商恢复后使用）"""
+    requeued = await requeue_dead(session, agent_key)
+    await session.commit()
+    return {"requeued": requeued}
+
+
+@router.get("/prescore")
+async def get_prescore_report(
+    agent_key: Optional[str] = None,
+    days: int = 7,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """本地预评分占比及相对 AI 评分的准确率（基于抽检样本）"""
+    config = await get_prescore_config()
+    return await prescore_report(session, agent_key, days, max_importance=config["max_importance"])
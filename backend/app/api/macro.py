@@ -1,6 +1,8 @@
 import csv
 import io
+import json
 import logging
+from collections.abc import AsyncIterator
 from datetime import date, datetime, timedelta
 from typing import Optional
 
@@ -9,10 +11,14 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.ai.client import chat_completion_json
+from app.ai.client import _extract_json_text, _is_json_text, ai_configured, chat_completion_json, chat_completion_stream
+from app.api.sse import sse_response
+from app.ai.usage import scoped_stream, usage_scope
 from app.auth import get_current_user
 from app.database import get_session
 from app.models.macro_indicator import MacroDataPoint
+from app.platform.response_cache import response_cache
+from app.platform.serialization import FastJSONResponse
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -86,15 +92,21 @@ async def _fetch_and_store_series(series_id: str, session: AsyncSession) -> int:
 
 
 @router.get("/indicators", dependencies=[Depends(get_current_user)])
+@response_cache.cached("macro:indicators")
 async def get_indicators(session: AsyncSession = Depends(get_session)):
+    series: dict[str, list] = {series_id: [] for series_id in FRED_SERIES}
+    points = (await session.execute(
+        select(MacroDataPoint.series_id, MacroDataPoint.data_date, MacroDataPoint.value,
+               MacroDataPoint.mom, MacroDataPoint.yoy)
+        .where(MacroDataPoint.series_id.in_(FRED_SERIES))
+        .order_by(MacroDataPoint.series_id, MacroDataPoint.data_date.asc())
+    )).all()
+    for point in points:
+        series[point.series_id].append(point)
+
     result = []
     for series_id, meta in FRED_SERIES.items():
-        rows = (await session.scalars(
-            select(MacroDataPoint)
-            .where(MacroDataPoint.series_id == series_id)
-            .order_by(MacroDataPoint.data_date.asc())
-        )).all()
-
+        rows = series[series_id]
         if not rows:
             result.append({
                 "series_id": series_id,
@@ -118,22 +130,21 @@ async def get_indicators(session: AsyncSession = Depends(get_session)):
         else:
             trend = "flat"
 
-        history = [{"data_date": r.data_date.isoformat(), "value": r.value}
-                   for r in rows if r.value is not None]
+        history = [{"data_date": r.data_date, "value": r.value} for r in rows if r.value is not None]
 
         result.append({
             "series_id": series_id,
             "label": meta["label"],
             "unit": meta["unit"],
             "latest_value": latest.value,
-            "latest_date": latest.data_date.isoformat() if latest.data_date else None,
+            "latest_date": latest.data_date,
             "mom": latest.mom,
             "yoy": latest.yoy,
             "trend": trend,
             "history": history,
         })
 
-    return result
+    return FastJSONResponse(result)
 
 
 @router.post("/refresh", dependencies=[Depends(get_current_user)])
@@ -146,6 +157,7 @@ async def refresh_indicators(session: AsyncSession = Depends(get_session)):
         except Exception as e:
             logger.error(f"FRED fetch failed for {series_id}: {e}")
             totals[series_id] = 0
+    await response_cache.invalidate("macro:indicators")
 
     return {"updated": sum(totals.values()), "series": totals}
 
@@ -169,15 +181,8 @@ _ANALYSIS_PROMPT = """你是专业的宏观经济分析师。根据以下最新
 }}"""
 
 
-@router.get("/analysis", dependencies=[Depends(get_current_user)])
-async def get_analysis(force: bool = False, session: AsyncSession = Depends(get_session)):
-    global _analysis_cache
-    cached_result, expires_at = _analysis_cache
-
-    if not force and cached_result and expires_at and datetime.now() < expires_at:
-        return {**cached_result, "cached": True}
-
-    # Gather latest values from DB
+async def _analysis_prompt(session: AsyncSession) -> Optional[str]:
+    """用各指标最新值构建分析 prompt；暂无数据时返回 None。"""
     lines = []
     for series_id, meta in FRED_SERIES.items():
         row = await session.scalar(
@@ -192,32 +197,103 @@ async def get_analysis(force: bool = False, session: AsyncSession = Depends(get_
             lines.append(f"- {meta['label']}（{series_id}）: {row.value}{meta['unit']} [{date_str}]{mom_str}")
 
     if not lines:
-        return {"error": "暂无宏观数据，请先刷新数据", "cached": False}
+        return None
+    return _ANALYSIS_PROMPT.format(indicators_text="\n".join(lines))
+
+
+def _cached_analysis(force: bool) -> Optional[dict]:
+    cached_result, expires_at = _analysis_cache
+    if not force and cached_result and expires_at and datetime.now() < expires_at:
+        return {**cached_result, "cached": True}
+    return None
 
-    indicators_text = "\n".join(lines)
-    prompt = _ANALYSIS_PROMPT.format(indicators_text=indicators_text)
+
+def _accept_analysis(result: Optional[dict]) -> dict:
+    """校验 AI 结果并写入进程内缓存，返回接口响应。"""
+    global _analysis_cache
+    if not result:
+        return {"error": "AI 调用失败或返回空响应，请检查 API Key 是否有效、模型是否支持 JSON 输出", "cached": False}
+    if "impacts" not in result:
+        logger.warning(f"Macro analysis missing 'impacts' key: {result}")
+        return {"error": f"AI 返回格式异常（缺少 impacts 字段），原始响应已记录到日志", "cached": False}
+
+    result["generated_at"] = datetime.now().isoformat()
+    _analysis_cache = (result, datetime.now() + timedelta(hours=6))
+    return {**result, "cached": False}
+
+
+_NO_DATA = {"error": "暂无宏观数据，请先刷新数据", "cached": False}
+_NO_AI = {"error": "AI 未配置或未启用，请前往「系统设置」配置 AI 服务商和 API Key", "cached": False}
+
+
+@router.get("/analysis", dependencies=[Depends(get_current_user)])
+async def get_analysis(force: bool = False, session: AsyncSession = Depends(get_session)):
+    cached = _cached_analysis(force)
+    if cached:
+        return cached
+
+    prompt = await _analysis_prompt(session)
+    if prompt is None:
+        return _NO_DATA
 
     # Check AI config before calling
-    from app.ai.client import _get_ai_config
-    config = await _get_ai_config()
-    if not config.get("enabled") or not config.get("api_key"):
-        return {"error": "AI 未配置或未启用，请前往「系统设置」配置 AI 服务商和 API Key", "cached": False}
+    if not await ai_configured():
+        return _NO_AI
 
     try:
-        result = await chat_completion_json(
-            [{"role": "user", "content": prompt}],
-            max_tokens=800,
-            temperature=0.3,
-        )
-        if not result:
-            return {"error": "AI 调用失败或返回空响应，请检查 API Key 是否有效、模型是否支持 JSON 输出", "cached": False}
-        if "impacts" not in result:
-            logger.warning(f"Macro analysis missing 'impacts' key: {result}")
-            return {"error": f"AI 返回格式异常（缺少 impacts 字段），原始响应已记录到日志", "cached": False}
-
-        result["generated_at"] = datetime.now().isoformat()
-        _analysis_cache = (result, datetime.now() + timedelta(hours=6))
-        return {**result, "cached": False}
+        with usage_scope(agent_key="investment", job="api", skill="macro_analysis"):
+            result = await chat_completion_json(
+                [{"role": "user", "content": prompt}],
+                max_tokens=800,
+                temperature=0.3,
+                use_cache=not force,
+                hedge=True,
+            )
+        return _accept_analysis(result)
     except Exception as e:
         logger.error(f"Macro analysis failed: {e}", exc_info=True)
         return {"error": f"AI 分析异常: {str(e)}", "cached": False}
+
+
+async def _single_event(event: dict) -> AsyncIterator[dict]:
+    yield event
+
+
+async def _stream_analysis(prompt: str, force: bool) -> AsyncIterator[dict]:
+    parts: list[str] = []
+    # 与 chat_completion_json 相同的参数，共用 LLM 响应缓存
+    stream = chat_completion_stream(
+        [{"role": "user", "content": prompt}],
+        max_tokens=800,
+        temperature=0.3,
+        response_format={"type": "json_object"},
+        use_cache=not force,
+        is_cacheable=_is_json_text,
+    )
+    async for text in scoped_stream(stream, agent_key="investment", job="api", skill="macro_analysis"):
+        parts.append(text)
+        yield {"event": "delta", "text": text}
+
+    result = None
+    if parts:
+        try:
+            result = json.loads(_extract_json_text("".join(parts)))
+        except json.JSONDecodeError:
+            logger.error(f"Failed to parse AI JSON response: {''.join(parts)[:300]}")
+    response = _accept_analysis(result)
+    yield {"event": "error", "detail": response["error"]} if "error" in response else {"event": "done", **response}
+
+
+@router.get("/analysis/stream", dependencies=[Depends(get_current_user)])
+async def stream_analysis(force: bool = False, session: AsyncSession = Depends(get_session)):
+    """流式生成宏观分析（SSE）：推送 JSON 文本增量，完成后推送解析后的结果"""
+    cached = _cached_analysis(force)
+    if cached:
+        return sse_response(_single_event({"event": "done", **cached}))
+
+    prompt = await _analysis_prompt(session)
+    if prompt is None:
+        return sse_response(_single_event({"event": "error", "detail": _NO_DATA["error"]}))
+    if not await ai_configured():
+        return sse_response(_single_event({"event": "error", "detail": _NO_AI["error"]}))
+    return sse_response(_stream_analysis(prompt, force))
@@ -5,9 +5,11 @@ from pydantic import BaseModel
 from sqlalchemy import select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.sse import sse_response
 from app.auth import get_current_user
 from app.database import get_session
 from app.models.report import DailyReport
+from app.platform.response_cache import response_cache
 
 router = APIRouter()
 
@@ -30,6 +32,7 @@ async def list_reports(
 
 
 @router.get("/latest")
+@response_cache.cached("reports")
 async def latest_report(
     report_type: Optional[str] = None,
     session: AsyncSession = Depends(get_session),
@@ -57,7 +60,7 @@ async def generate_report(
         raise HTTPException(status_code=400, detail="report_type 必须是 morning 或 evening")
     try:
         from app.skills.engine import generate_daily_report
-        report = await generate_daily_report(body.report_type)
+        report = await generate_daily_report(body.report_type, hedge=True)
         if report:
             return report.to_dict()
         raise HTTPException(status_code=500, detail="日报生成失败，请检查 AI 配置和新闻数据是否充足")
@@ -67,6 +70,18 @@ async def generate_report(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/generate/stream")
+async def generate_report_stream(
+    body: GenerateRequest,
+    _=Depends(get_current_user),
+):
+    """流式生成 AI 日报（SSE）：逐段推送 delta，生成完毕落库后推送 done（报告内容）"""
+    if body.report_type not in ("morning", "evening"):
+        raise HTTPException(status_code=400, detail="report_type 必须是 morning 或 evening")
+    from app.skills.engine import stream_daily_report
+    return sse_response(stream_daily_report(body.report_type))
+
+
 @router.post("/generate-twitter-digest")
 async def generate_twitter_digest_report(
     session: AsyncSession = Depends(get_session),
@@ -75,7 +90,7 @@ async def generate_twitter_digest_report(
     """手动触发生成 Twitter 博主观点日报"""
     try:
         from app.skills.engine import generate_twitter_digest
-        ok = await generate_twitter_digest()
+        ok = await generate_twitter_digest(hedge=True)
         if not ok:
             raise HTTPException(status_code=400, detail="近24小时无推特数据，请先确保推特追踪已启用并有采集记录")
         from datetime import datetime as dt
@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth import get_current_user
 from app.database import get_session
 from app.models.setting import SystemSetting, DEFAULT_SETTINGS
+from app.platform.settings_cache import settings_cache
 
 router = APIRouter()
 
@@ -136,6 +137,7 @@ async def update_setting(
         setting.value = body.value
         setting.updated_at = datetime.now()
         await session.commit()
+        settings_cache.invalidate()
     return setting.to_dict()
 
 
@@ -156,6 +158,8 @@ async def batch_update_settings(
             setting.updated_at = datetime.now()
             updated.append(key)
     await session.commit()
+    if updated:
+        settings_cache.invalidate()
     return {"updated": updated}
 
 
@@ -171,6 +175,54 @@ async def ai_providers(_=Depends(get_current_user)):
     return {"providers": providers}
 
 
+@router.get("/ai-providers/health")
+async def ai_provider_health(_=Depends(get_current_user)):
+    """各 AI 服务商的请求数、错误率、p95 延迟与冷却状态"""
+    from app.ai.client import provider_router
+    return {"providers": provider_router.stats()}
+
+
+@router.get("/ai-usage")
+async def ai_usage(
+    days: int = 7,
+    agent_key: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """LLM 每日用量（按 agent × skill 汇总）及各 agent 今日预算消耗"""
+    from app.ai.usage import daily_usage, usage_meter
+    await usage_meter.flush()
+    return {
+        "daily": await daily_usage(session, days=days, agent_key=agent_key),
+        "budgets": await usage_meter.budget_status(),
+    }
+
+
+@router.get("/notification-outbox")
+async def notification_outbox(
+    agent_key: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    _=Depends(get_current_user),
+):
+    """推送发件箱：各渠道待发送、重试中、已发送与放弃的条数"""
+    from app.notifiers.outbox import outbox_stats
+    return await outbox_stats(session, agent_key)
+
+
+@router.get("/ai-cache")
+async def ai_cache_stats(_=Depends(get_current_user)):
+    """LLM 响应缓存统计（条目数、命中率）"""
+    from app.ai.cache import llm_cache
+    return await llm_cache.stats()
+
+
+@router.delete("/ai-cache")
+async def clear_ai_cache(_=Depends(get_current_user)):
+    """清空 LLM 响应缓存"""
+    from app.ai.cache import llm_cache
+    return {"deleted": await llm_cache.clear()}
+
+
 @router.get("/categories")
 async def setting_categories(
     session: AsyncSession = Depends(get_session),
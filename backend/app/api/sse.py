@@ -0,0 +1,41 @@
+"""Server-Sent Events 工具：把生成过程中的事件流转成 text/event-stream 响应。
+
+事件约定：
+- start：已开始生成（立即发送，首字节不必等 LLM）
+- delta：{"text": ...} 增量文本
+- done：最终结果（已落库的报告或分析结果）
+- error：{"detail": ...}
+"""
+import json
+import logging
+from collections.abc import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # 关闭 Nginx 缓冲，逐段下发
+}
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _encode(events: AsyncIterator[dict]) -> AsyncIterator[str]:
+    yield sse_event("start", {})
+    try:
+        async for item in events:
+            event = item.pop("event")
+            yield sse_event(event, item)
+    except Exception as e:
+        logger.error(f"SSE stream failed: {e}", exc_info=True)
+        yield sse_event("error", {"detail": str(e)})
+
+
+def sse_response(events: AsyncIterator[dict]) -> StreamingResponse:
+    """events 产出 {"event": 名称, ...数据}。"""
+    return StreamingResponse(_encode(events), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth import get_current_user
 from app.database import get_session
 from app.models.setting import SystemSetting
+from app.platform.settings_cache import settings_cache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -43,6 +44,7 @@ async def _save_handles(session: AsyncSession, handles: list[str]):
     if setting:
         setting.value = json.dumps(handles)
         await session.commit()
+        settings_cache.invalidate()
 
 
 @router.get("/handles")
@@ -1,48 +1,78 @@
-import asyncio
 import json
 import logging
-from typing import Set
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from app.realtime.backplane import backplane
+from app.realtime.broadcaster import broadcaster
+from app.realtime.subscriptions import Subscription
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-connected_clients: Set[WebSocket] = set()
+ARTICLES_PER_FRAME = 100
 
 
 @router.websocket("/ws/news")
 async def news_websocket(websocket: WebSocket):
+    """客户端可随时发送订阅消息替换当前订阅：
+    {"type": "subscribe", "topics": [...], "agent_keys": [...], "categories": [...],
+     "sources": [...], "min_importance": 3, "item_ids": [...], "last_seq": 123}
+
+    每帧带 seq；重连时带上收到的最后一个 seq（last_seq），只补发之后的事件，
+    无法补齐时收到 resync，应整体刷新后从其中的 seq 继续。
+    """
     await websocket.accept()
-    connected_clients.add(websocket)
-    logger.info(f"WebSocket client connected. Total: {len(connected_clients)}")
+    client = broadcaster.connect(websocket)
     try:
         while True:
-            await websocket.receive_text()
+            raw = await websocket.receive_text()
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(message, dict) or message.get("type") != "subscribe":
+                continue
+            try:
+                subscription = Subscription.parse(message)
+            except ValueError as e:
+                broadcaster.send(client, "error", {"message": str(e)})
+                continue
+            broadcaster.subscribe(client, subscription)
+            broadcaster.send(client, "subscribed", {**subscription.to_dict(), "seq": broadcaster.seq})
+            last_seq = message.get("last_seq")
+            if isinstance(last_seq, int) and last_seq > 0:
+                await broadcaster.resume(client, last_seq)
     except WebSocketDisconnect:
-        connected_clients.discard(websocket)
-        logger.info(f"WebSocket client disconnected. Total: {len(connected_clients)}")
+        pass
     except Exception:
-        connected_clients.discard(websocket)
+        pass
+    finally:
+        await broadcaster.disconnect(client)
 
 
-async def broadcast_news(event_type: str, data: dict):
-    if not connected_clients:
-        return
-    message = json.dumps({"type": event_type, "data": data}, ensure_ascii=False, default=str)
-    disconnected = set()
-    for ws in connected_clients:
-        try:
-            await ws.send_text(message)
-        except Exception:
-            disconnected.add(ws)
-    connected_clients.difference_update(disconnected)
+async def broadcast_news(event_type: str, data, policy: str = "keep", agent_key: str | None = None):
+    """发布到事件通道，由各进程推送给自己的客户端；不等待发送，慢客户端不会拖住调用方。"""
+    await backplane.publish(event_type, data, policy, agent_key)
 
 
 async def broadcast_new_articles(articles: list[dict]):
-    for article in articles:
-        await broadcast_news("new_article", article)
+    """一批新文章合成 new_articles 帧（每帧最多 ARTICLES_PER_FRAME 篇）。
+
+    客户端积压时合并为 articles_skipped。
+    """
+    for i in range(0, len(articles), ARTICLES_PER_FRAME):
+        await broadcast_news("new_articles", articles[i:i + ARTICLES_PER_FRAME], policy="merge")
 
 
 async def broadcast_alert(alert: dict):
     await broadcast_news("new_alert", alert)
+
+
+async def broadcast_cs2_prices(ticks: list[dict]):
+    """CS2 价格快照；积压时丢弃旧的价格帧。"""
+    await broadcast_news("cs2_price_ticks", ticks, policy="drop", agent_key="cs2_market")
+
+
+async def broadcast_cs2_predictions(predictions: list[dict]):
+    await broadcast_news("cs2_predictions", predictions, policy="merge", agent_key="cs2_market")
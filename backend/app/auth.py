@@ -1,3 +1,6 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -5,19 +8,29 @@ from fastapi import Depends, HTTPException, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.database import get_session
+from app.models.user import User
 
 SECRET_KEY = settings.JWT_SECRET
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_DAYS = 7
 
+# 已认证用户缓存：token subject(username) -> (User 快照, 过期时间)
+USER_CACHE_TTL_SECONDS = 30
+USER_CACHE_MAX_SIZE = 1024
+# bcrypt 约 100ms/次，放到独立线程池执行，并限制同时运行的数量
+PASSWORD_HASH_WORKERS = 2
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer(auto_error=False)
 
+_user_cache: dict[str, tuple[User, float]] = {}
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash")
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -27,6 +40,49 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
 
+async def hash_password_async(password: str) -> str:
+    """hash_password 的非阻塞版本，供事件循环内调用。"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """verify_password 的非阻塞版本，供事件循环内调用。"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, plain, hashed)
+
+
+def invalidate_user_cache(username: Optional[str] = None) -> None:
+    if username is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(username, None)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _on_user_changed(_mapper, _connection, target: User) -> None:
+    # 用户被修改/禁用/删除后立即失效；username 本身也可能被改，直接清空
+    invalidate_user_cache()
+
+
+def _cache_user(user: User) -> None:
+    if len(_user_cache) >= USER_CACHE_MAX_SIZE:
+        _user_cache.clear()
+    _user_cache[user.username] = (user, time.monotonic() + USER_CACHE_TTL_SECONDS)
+
+
+def _get_cached_user(username: str) -> Optional[User]:
+    entry = _user_cache.get(username)
+    if entry is None:
+        return None
+    user, expires_at = entry
+    if time.monotonic() >= expires_at:
+        _user_cache.pop(username, None)
+        return None
+    return user
+
+
 def create_access_token(username: str, expires_delta: Optional[timedelta] = None) -> str:
     expire = datetime.utcnow() + (expires_delta or timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS))
     return jwt.encode({"sub": username, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
@@ -50,9 +106,14 @@ async def get_current_user(
     except JWTError:
         raise HTTPException(status_code=401, detail="Token 无效或已过期")
 
-    from app.models.user import User
-    result = await session.execute(select(User).where(User.username == username))
-    user = result.scalar_one_or_none()
+    user = _get_cached_user(username)
+    if user is None:
+        result = await session.execute(select(User).where(User.username == username))
+        user = result.scalar_one_or_none()
+        if user is not None:
+            # 脱离 session 后缓存，后续请求直接复用；需要修改时请在自己的 session 中重新加载
+            session.expunge(user)
+            _cache_user(user)
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="用户不存在或已禁用")
     return user
@@ -13,6 +13,22 @@ class Settings(BaseSettings):
     AI_API_BASE: str = "https://api.openai.com/v1"
     AI_MODEL: str = "gpt-4o-mini"
 
+    # LLM 响应缓存：默认保留 6 小时，超过条数上限时淘汰最久未使用的记录
+    LLM_CACHE_TTL_SECONDS: int = 6 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 5000
+
+    # WebSocket 补发：内存中保留最近的事件数；落盘后进程重启也能补发，保留若干小时
+    WS_REPLAY_BUFFER: int = 1000
+    WS_REPLAY_SPILL: bool = True
+    WS_REPLAY_RETENTION_HOURS: int = 24
+    # WebSocket 事件通道：memory 仅单进程；sqlite 经 ws_events 表在多个 worker / 任务进程间分发
+    WS_BACKPLANE: str = "memory"
+
+    # 接口响应缓存：写入方提交后按标签失效，TTL 兜底其他进程的写入；可选落盘到 SQLite
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_PERSIST: bool = False
+
     TELEGRAM_BOT_TOKEN: Optional[str] = None
     TELEGRAM_CHAT_ID: Optional[str] = None
     PUSHPLUS_TOKEN: Optional[str] = None
@@ -23,6 +39,13 @@ class Settings(BaseSettings):
 
     FRONTEND_URL: str = "http://localhost:5173"
 
+    # 启用的 agent（逗号分隔），未列出的 agent 不会被 import，也不挂载路由和定时任务
+    ENABLED_AGENTS: str = "investment,tech_info,cs2_market"
+
+    @property
+    def enabled_agent_keys(self) -> list[str]:
+        return [k.strip() for k in self.ENABLED_AGENTS.split(",") if k.strip()]
+
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
 
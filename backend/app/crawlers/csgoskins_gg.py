@@ -5,10 +5,7 @@
 import logging
 
 import httpx
-from sqlalchemy import select
-
-from app.database import async_session
-from app.models.setting import SystemSetting
+from app.platform.settings_cache import settings_cache
 
 logger = logging.getLogger(__name__)
 
@@ -16,12 +13,7 @@ CSGOSKINS_API = "https://csgoskins.gg/api/v1/prices"
 
 
 async def _get_api_key() -> str:
-    async with async_session() as session:
-        result = await session.execute(
-            select(SystemSetting).where(SystemSetting.key == "source_csgoskins_api_key")
-        )
-        s = result.scalar_one_or_none()
-        return s.value if s and s.value else ""
+    return await settings_cache.get("source_csgoskins_api_key") or ""
 
 
 class CSGOSkinsGGCrawler:
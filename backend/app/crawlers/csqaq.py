@@ -14,10 +14,7 @@ import logging
 from typing import Optional
 
 import httpx
-from sqlalchemy import select
-
-from app.database import async_session
-from app.models.setting import SystemSetting
+from app.platform.settings_cache import settings_cache
 
 logger = logging.getLogger(__name__)
 
@@ -26,12 +23,7 @@ RATE_LIMIT_INTERVAL = 1.1  # 秒，略高于 1 避免 429
 
 
 async def _get_api_token() -> str:
-    async with async_session() as session:
-        result = await session.execute(
-            select(SystemSetting).where(SystemSetting.key == "csqaq_api_token")
-        )
-        s = result.scalar_one_or_none()
-        return s.value if s and s.value else ""
+    return await settings_cache.get("csqaq_api_token") or ""
 
 
 class CSQAQCrawler:
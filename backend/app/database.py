@@ -65,14 +65,64 @@ async def init_db():
     from app.models.sentiment import SentimentSnapshot  # noqa: F401
     from app.models.setting import SystemSetting  # noqa: F401
     from app.models.bookmark import ArticleBookmark  # noqa: F401
+    from app.models.calendar_event import CalendarEvent  # noqa: F401
+    from app.models.macro_indicator import MacroDataPoint  # noqa: F401
+    from app.models.historical_event import HistoricalEvent  # noqa: F401
     from app.models.cs2_item import CS2Item  # noqa: F401
     from app.models.cs2_price import CS2PriceSnapshot  # noqa: F401
     from app.models.cs2_prediction import CS2Prediction  # noqa: F401
     from app.models.cs2_watchlist import CS2Watchlist  # noqa: F401
+    from app.models.llm_cache import LLMCacheEntry  # noqa: F401
+    from app.models.scoring_task import ScoringTask  # noqa: F401
+    from app.models.llm_usage import LLMUsage  # noqa: F401
+    from app.models.notification import NotificationDelivery  # noqa: F401
+    from app.models.broadcast_event import BroadcastEvent  # noqa: F401
+    from app.models.article_rollup import ArticleHourlyRollup  # noqa: F401
+    from app.models.response_cache import ResponseCacheEntry  # noqa: F401
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     await _migrate_agent_key()
+    await _migrate_columns()
+    await _backfill_article_rollup()
+
+
+# 已有表上新增的列：table -> [(列名, 列定义)]，以及随列新增的索引
+_ADDED_COLUMNS = {
+    "alerts": [("fingerprint", "VARCHAR(64)")],
+    "notification_outbox": [("importance", "INTEGER DEFAULT 0"), ("group_key", "VARCHAR(50)")],
+}
+_ADDED_INDEXES = [
+    ("ix_alerts_fingerprint", "alerts", "fingerprint"),
+]
+
+
+async def _migrate_columns():
+    """create_all 不会给已有表加列，这里补齐（幂等）。"""
+    async with engine.begin() as conn:
+        for table, columns in _ADDED_COLUMNS.items():
+            cols = await conn.execute(text(f"PRAGMA table_info({table})"))
+            col_names = [row[1] for row in cols.fetchall()]
+            for name, ddl in columns:
+                if name not in col_names:
+                    await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                    logger.info(f"Migration: added {name} to {table}")
+        for index, table, columns in _ADDED_INDEXES:
+            await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({columns})"))
+
+
+async def _backfill_article_rollup():
+    """首次创建小时汇总表时从已有文章回填（幂等：汇总表非空时跳过）。"""
+    from app.skills import rollup
+
+    async with async_session() as session:
+        if (await session.execute(text("SELECT 1 FROM article_hourly_rollup LIMIT 1"))).first():
+            return
+        if not (await session.execute(text("SELECT 1 FROM articles LIMIT 1"))).first():
+            return
+        await rollup.rebuild(session)
+        await session.commit()
+        logger.info("Migration: backfilled article_hourly_rollup")
 
 
 _AGENT_KEY_TABLES = {
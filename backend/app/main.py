@@ -5,28 +5,20 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import select
 
-from app.agents.investment import register_investment_agent
-from app.agents.investment.defaults import BUILTIN_SKILLS
-from app.agents.tech_info import register_tech_info_agent
-from app.agents.tech_info.defaults import BUILTIN_SKILLS as TECH_BUILTIN_SKILLS
-from app.agents.cs2_market import register_cs2_market_agent
-from app.agents.cs2_market.defaults import BUILTIN_SKILLS as CS2_BUILTIN_SKILLS
-from app.agents.cs2_market.items_catalog import seed_initial_items
+from app.agents import register_builtin_agents
 from app.config import settings
-from app.auth import hash_password
+from app.auth import hash_password_async
 from app.database import init_db, async_session
 from app.models.user import User
 from app.models.setting import SystemSetting, DEFAULT_SETTINGS
 from app.models.skill import Skill
-from app.models.bookmark import ArticleBookmark  # noqa: F401
-from app.models.calendar_event import CalendarEvent  # noqa: F401
-from app.models.macro_indicator import MacroDataPoint  # noqa: F401
-from app.models.historical_event import HistoricalEvent  # noqa: F401
+from app.models.historical_event import HistoricalEvent
 from app.api.historical_events import _BUILTIN_EVENTS
 from app.api.router import api_router
+from app.platform.manifest import AgentManifest
 from app.platform.registry import agent_registry
 from app.platform.scheduler import SchedulerKernel
-from app.scheduler import scheduler as _apscheduler
+from app.platform.settings_cache import settings_cache
 
 logging.basicConfig(
     level=logging.INFO,
@@ -41,7 +33,7 @@ async def _init_admin_user():
         if result.scalar_one_or_none() is None:
             admin = User(
                 username=settings.DEFAULT_ADMIN_USER,
-                hashed_password=hash_password(settings.DEFAULT_ADMIN_PASS),
+                hashed_password=await hash_password_async(settings.DEFAULT_ADMIN_PASS),
             )
             session.add(admin)
             await session.commit()
@@ -80,31 +72,19 @@ async def _init_settings():
                     s.value = env_val
 
         await session.commit()
+    settings_cache.invalidate()
 
 
-async def _init_builtin_skills():
+async def _init_builtin_skills(agents: list[AgentManifest]):
     async with async_session() as session:
-        for skill_data in BUILTIN_SKILLS:
-            existing = await session.execute(
-                select(Skill).where(Skill.agent_key == "investment", Skill.slug == skill_data["slug"])
-            )
-            if not existing.scalar_one_or_none():
-                skill = Skill(agent_key="investment", is_builtin=True, **skill_data)
-                session.add(skill)
-        for skill_data in TECH_BUILTIN_SKILLS:
-            existing = await session.execute(
-                select(Skill).where(Skill.agent_key == "tech_info", Skill.slug == skill_data["slug"])
-            )
-            if not existing.scalar_one_or_none():
-                skill = Skill(agent_key="tech_info", is_builtin=True, **skill_data)
-                session.add(skill)
-        for skill_data in CS2_BUILTIN_SKILLS:
-            existing = await session.execute(
-                select(Skill).where(Skill.agent_key == "cs2_market", Skill.slug == skill_data["slug"])
-            )
-            if not existing.scalar_one_or_none():
-                skill = Skill(agent_key="cs2_market", is_builtin=True, **skill_data)
-                session.add(skill)
+        for agent in agents:
+            for skill_data in agent.builtin_skills:
+                existing = await session.execute(
+                    select(Skill).where(Skill.agent_key == agent.key, Skill.slug == skill_data["slug"])
+                )
+                if not existing.scalar_one_or_none():
+                    skill = Skill(agent_key=agent.key, is_builtin=True, **skill_data)
+                    session.add(skill)
         await session.commit()
 
 
@@ -123,25 +103,56 @@ async def _init_historical_events():
         await session.commit()
 
 
+_mounted_agents: set[str] = set()
+
+
+def _load_agents(app: FastAPI) -> list[AgentManifest]:
+    """按 ENABLED_AGENTS 加载 agent 并挂载其路由。
+
+    放在 lifespan 而不是模块顶层：`import app.main` 不再拖入各 agent 的
+    jobs/crawlers/routes，未启用的 agent 永远不会被 import。
+    """
+    register_builtin_agents(agent_registry)
+    agents = agent_registry.load_enabled(settings.enabled_agent_keys)
+    for agent in agents:
+        # investment 复用全局 api_router，已在下方挂载
+        if agent.router is None or agent.router is api_router or agent.key in _mounted_agents:
+            continue
+        app.include_router(agent.router)
+        _mounted_agents.add(agent.key)
+    return agents
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("🚀 Starting News Agent...")
-    register_investment_agent(agent_registry)
-    register_tech_info_agent(agent_registry)
-    register_cs2_market_agent(agent_registry)
+    agents = _load_agents(app)
     await init_db()
-    await seed_initial_items()
+    for agent in agents:
+        if agent.initializer is not None:
+            await agent.initializer()
     await _init_admin_user()
     await _init_settings()
-    await _init_builtin_skills()
+    await _init_builtin_skills(agents)
     await _init_historical_events()
+    from app.scheduler import scheduler as _apscheduler
     kernel = SchedulerKernel(_apscheduler)
-    for agent in agent_registry.list_agents():
+    for agent in agents:
         kernel.register_agent(agent)
     kernel.start()
-    logger.info(f"✅ News Agent is ready ({len(agent_registry.list_agents())} agents)")
+    from app.notifiers.manager import outbox_drainer
+    outbox_drainer.start()
+    from app.realtime.backplane import backplane
+    await backplane.start()
+    logger.info(f"✅ News Agent is ready ({len(agents)} agents: {', '.join(a.key for a in agents)})")
     yield
     kernel.shutdown()
+    await outbox_drainer.stop()
+    await backplane.stop()
+    from app.ai.usage import usage_meter
+    await usage_meter.flush()
+    from app.notifiers.base import close_http_client
+    await close_http_client()
     logger.info("👋 News Agent stopped")
 
 
@@ -162,14 +173,6 @@ app.add_middleware(
 
 app.include_router(api_router)
 
-# Tech Info Agent routes
-from app.agents.tech_info.routes import router as tech_router  # noqa: E402
-app.include_router(tech_router)
-
-# CS2 Market Agent routes
-from app.agents.cs2_market.routes import router as cs2_router  # noqa: E402
-app.include_router(cs2_router)
-
 
 @app.get("/health")
 async def health():
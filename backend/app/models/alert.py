@@ -16,6 +16,8 @@ class Alert(Base):
     description: Mapped[str] = mapped_column(Text, nullable=False)
     skill_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
     trigger_data: Mapped[dict | None] = mapped_column(JSONField, nullable=True)
+    # 去重指纹：同一事件只生成一条预警
+    fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
     historical_reference: Mapped[str | None] = mapped_column(Text, nullable=True)
     suggestion: Mapped[str | None] = mapped_column(Text, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -25,6 +27,7 @@ class Alert(Base):
 
     __table_args__ = (
         Index("ix_alerts_agent_key", "agent_key"),
+        Index("ix_alerts_fingerprint", "fingerprint"),
     )
 
     def to_dict(self) -> dict:
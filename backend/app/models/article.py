@@ -1,9 +1,12 @@
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, Optional
 
-from sqlalchemy import String, Text, DateTime, Boolean, Integer, Index, UniqueConstraint
+from sqlalchemy import String, Text, DateTime, Boolean, Integer, Index, UniqueConstraint, type_coerce
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base, JSONField
+from app.platform.serialization import loads
 
 
 class Article(Base):
@@ -53,3 +56,41 @@ class Article(Base):
             "ai_analysis": self.ai_analysis,
             "tags": self.tags.split(",") if self.tags else [],
         }
+
+
+@dataclass(slots=True)
+class ArticleRow:
+    """列表接口用的轻量行：只读 ARTICLE_ROW_COLUMNS（不含正文），字段与 Article.to_dict() 一致。
+
+    配合 FastJSONResponse 使用：时间字段保留 datetime，由 orjson 直接输出。
+    """
+
+    id: int
+    agent_key: str
+    title: str
+    url: str
+    source: str
+    category: Optional[str]
+    summary: Optional[str]
+    image_url: Optional[str]
+    published_at: Optional[datetime]
+    fetched_at: Optional[datetime]
+    is_pushed: bool
+    importance: int
+    sentiment: Optional[str]
+    ai_analysis: Optional[dict]
+    tags: list[str]
+
+    @classmethod
+    def from_row(cls, row: Any) -> "ArticleRow":
+        *head, ai_analysis, tags = row
+        return cls(*head, loads(ai_analysis) if ai_analysis else None, tags.split(",") if tags else [])
+
+
+# 与 ArticleRow 字段一一对应；ai_analysis 取原始文本交给 orjson 解析，不经过 JSONField
+ARTICLE_ROW_COLUMNS = (
+    Article.id, Article.agent_key, Article.title, Article.url, Article.source, Article.category,
+    Article.summary, Article.image_url, Article.published_at, Article.fetched_at, Article.is_pushed,
+    Article.importance, Article.sentiment,
+    type_coerce(Article.ai_analysis, Text).label("ai_analysis"), Article.tags,
+)
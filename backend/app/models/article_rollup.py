@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import String, DateTime, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ArticleHourlyRollup(Base):
+    """文章数按 小时 × 来源 × 分类 汇总，入库和评分时增量维护，仪表盘只读这张表。"""
+
+    __tablename__ = "article_hourly_rollup"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    agent_key: Mapped[str] = mapped_column(String(50), nullable=False)
+    hour: Mapped[datetime] = mapped_column(DateTime, nullable=False)  # fetched_at 截断到整点
+    source: Mapped[str] = mapped_column(String(100), nullable=False, default="")
+    category: Mapped[str] = mapped_column(String(50), nullable=False, default="")
+    count: Mapped[int] = mapped_column(Integer, default=0)
+    important_count: Mapped[int] = mapped_column(Integer, default=0)  # importance >= 3
+
+    __table_args__ = (
+        # 唯一约束同时作为 (agent_key, hour) 范围读取的索引
+        UniqueConstraint("agent_key", "hour", "source", "category", name="uq_article_rollup_key"),
+    )
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import String, Text, DateTime, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class BroadcastEvent(Base):
+    """WebSocket 广播事件的落盘副本，供断线重连的客户端补发（含进程重启之后）。"""
+
+    __tablename__ = "ws_events"
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    agent_key: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    policy: Mapped[str] = mapped_column(String(10), default="keep")
+    data: Mapped[str] = mapped_column(Text, nullable=False)  # 已序列化的 JSON
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_ws_events_created_at", "created_at"),
+    )
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, DateTime, Boolean, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class LLMUsage(Base):
+    """每次 LLM 调用（含缓存命中、预算拦截）的 token 用量与耗时。"""
+
+    __tablename__ = "llm_usage"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    agent_key: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    job: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    skill: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    provider: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    model: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    prompt_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    latency_ms: Mapped[int] = mapped_column(Integer, default=0)
+    # ok / empty / error / cancelled / cache_hit / budget_exceeded
+    outcome: Mapped[str] = mapped_column(String(20), nullable=False)
+    estimated: Mapped[bool] = mapped_column(Boolean, default=False)  # 服务商未返回 usage 时按字数估算
+
+    __table_args__ = (
+        Index("ix_llm_usage_created_at", "created_at"),
+        Index("ix_llm_usage_agent_created", "agent_key", "created_at"),
+    )
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "agent_key": self.agent_key,
+            "job": self.job,
+            "skill": self.skill,
+            "provider": self.provider,
+            "model": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": self.latency_ms,
+            "outcome": self.outcome,
+            "estimated": self.estimated,
+        }
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import String, Text, DateTime, Boolean, Integer, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class NotificationDelivery(Base):
+    """推送发件箱：每条消息在每个渠道上一行，发送成功前按退避时间重试。"""
+
+    __tablename__ = "notification_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    agent_key: Mapped[str] = mapped_column(String(50), default="investment", nullable=False)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)  # article / digest / alert
+    ref_id: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 文章或预警 id
+    dedup_key: Mapped[str] = mapped_column(String(100), nullable=False)
+    channel: Mapped[str] = mapped_column(String(50), nullable=False)
+    title: Mapped[str] = mapped_column(String(500), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    url: Mapped[str | None] = mapped_column(String(2000), nullable=True)
+    markdown: Mapped[bool] = mapped_column(Boolean, default=False)
+    importance: Mapped[int] = mapped_column(Integer, default=0)
+    group_key: Mapped[str | None] = mapped_column(String(50), nullable=True)  # 合并推送的分组
+    status: Mapped[str] = mapped_column(String(20), default="pending")  # pending / sent / dead
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    # 可发送的时间：领取后顺延一个租约，失败后按退避时间顺延
+    available_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("dedup_key", "channel", name="uq_outbox_dedup_channel"),
+        Index("ix_outbox_status_available", "status", "available_at"),
+        Index("ix_outbox_kind_ref", "kind", "ref_id"),
+    )
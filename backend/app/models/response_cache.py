@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import String, Text, DateTime, LargeBinary, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ResponseCacheEntry(Base):
+    """接口响应缓存的落盘副本（RESPONSE_CACHE_PERSIST 开启时使用），进程重启后仍可命中。"""
+
+    __tablename__ = "response_cache"
+
+    cache_key: Mapped[str] = mapped_column(String(500), primary_key=True)
+    tags: Mapped[str] = mapped_column(Text, nullable=False)  # 以空格分隔并首尾补空格，便于 LIKE 匹配
+    etag: Mapped[str] = mapped_column(String(64), nullable=False)
+    body: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_response_cache_expires_at", "expires_at"),
+    )
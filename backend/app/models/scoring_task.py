@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import String, DateTime, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class ScoringTask(Base):
+    """待评分文章队列。所有采集路径入库时写入，评分完成后删除。"""
+
+    __tablename__ = "scoring_queue"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    article_id: Mapped[int] = mapped_column(Integer, unique=True, nullable=False)
+    agent_key: Mapped[str] = mapped_column(String(50), default="investment", nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, default=0)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    enqueued_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    # 可被领取的时间：领取后顺延一个租约，失败后按退避时间顺延
+    available_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_scoring_queue_agent_available", "agent_key", "available_at"),
+    )
@@ -50,6 +50,15 @@ DEFAULT_SETTINGS = [
     {"key": "ai_api_base", "value": "https://api.openai.com/v1", "category": "ai", "label": "AI API Base URL", "description": "接口地址（选择预设服务商时自动填充）", "field_type": "text"},
     {"key": "ai_model", "value": "gpt-4o-mini", "category": "ai", "label": "AI 模型", "description": "模型名称", "field_type": "text"},
     {"key": "ai_api_format", "value": "openai", "category": "ai", "label": "API 格式", "description": "openai（兼容 OpenAI 格式）或 anthropic（兼容 Anthropic 格式，支持 MiniMax 等）", "field_type": "text"},
+    {"key": "ai_max_concurrency", "value": "4", "category": "ai", "label": "AI 最大并发请求数", "description": "同一服务商同时在途的 AI 请求上限，批量评分等任务会并发使用", "field_type": "number"},
+    {"key": "ai_fallback_providers", "value": "", "category": "ai", "label": "备用 AI 服务商", "description": "逗号分隔的预设服务商（如 deepseek,dashscope），主服务商限流或故障时按顺序切换", "field_type": "text"},
+    {"key": "ai_fallback_api_keys", "value": "{}", "category": "ai", "label": "备用服务商 API Key", "description": "JSON 对象，如 {\"deepseek\": \"sk-...\"}", "field_type": "password"},
+    {"key": "scoring_throughput", "value": "100", "category": "ai", "label": "每分钟评分上限", "description": "评分队列每分钟最多消费的文章数，采集高峰时积压的文章按优先级依次评分", "field_type": "number"},
+    {"key": "prescore_enabled", "value": "true", "category": "ai", "label": "启用本地预评分", "description": "用关键词规则识别明显低价值的文章（社区闲聊、招聘、推广等），直接给低分而不调用 AI", "field_type": "boolean"},
+    {"key": "prescore_min_confidence", "value": "0.8", "category": "ai", "label": "本地预评分置信度阈值", "description": "规则把握度达到该值（0-1）才在本地定分，否则交给 AI", "field_type": "number"},
+    {"key": "prescore_max_importance", "value": "1", "category": "ai", "label": "本地预评分最高分", "description": "本地规则最多只给到该重要度，更高分一律交给 AI", "field_type": "number"},
+    {"key": "prescore_audit_rate", "value": "0.05", "category": "ai", "label": "本地预评分抽检比例", "description": "本地判定的文章中按该比例抽样交给 AI 复核，用于统计规则准确率", "field_type": "number"},
+    {"key": "ai_daily_token_budgets", "value": "{}", "category": "ai", "label": "每日 Token 预算", "description": "JSON 对象，按 agent 限制每日 token 用量，如 {\"investment\": 500000}；用尽后推特摘要、CS2 预测等低优先级任务暂停到次日", "field_type": "json"},
     # --- 数据源配置 ---
     {"key": "source_rss_enabled", "value": "true", "category": "sources", "label": "启用 RSS 源", "description": "从财经 RSS 源采集新闻", "field_type": "boolean"},
     {"key": "source_rss_feeds", "value": "[]", "category": "sources", "label": "RSS 源列表", "description": "JSON 格式的 RSS 源配置", "field_type": "json"},
@@ -70,6 +79,10 @@ DEFAULT_SETTINGS = [
     {"key": "push_important_immediately", "value": "true", "category": "push_strategy", "label": "重要新闻立即推送", "description": "重要度 >= 3 的新闻立即推送", "field_type": "boolean"},
     {"key": "push_digest_interval", "value": "30", "category": "push_strategy", "label": "摘要推送间隔（分钟）", "description": "汇总推送的时间间隔", "field_type": "number"},
     {"key": "push_morning_report", "value": "true", "category": "push_strategy", "label": "推送早间日报", "description": "每日 07:30 推送市场早报", "field_type": "boolean"},
+    {"key": "push_coalesce_seconds", "value": "120", "category": "push_strategy", "label": "快讯合并窗口（秒）", "description": "窗口内同一分类的单篇推送合并为一条消息发送，0 表示逐条立即推送；重要度 5 的新闻和预警不受影响", "field_type": "number"},
+    {"key": "push_coalesce_overrides", "value": "{}", "category": "push_strategy", "label": "各渠道合并窗口", "description": "按渠道覆盖合并窗口，如 {\"QQ\": 600, \"Telegram\": 0}", "field_type": "json"},
+    {"key": "burst_detection_enabled", "value": "true", "category": "push_strategy", "label": "突发检测预警", "description": "按来源、分类、关键词统计入库速率，明显高于基线时立即生成预警并推送（不依赖 AI 评分）", "field_type": "boolean"},
+    {"key": "burst_z_threshold", "value": "4", "category": "push_strategy", "label": "突发检测灵敏度", "description": "当前 10 分钟文章数超过基线多少个标准差时触发，数值越大越不敏感", "field_type": "number"},
     {"key": "push_evening_report", "value": "true", "category": "push_strategy", "label": "推送晚间日报", "description": "每日 22:00 推送市场晚报", "field_type": "boolean"},
     # --- 推特追踪配置 ---
     {"key": "twitter_enabled", "value": "false", "category": "twitter", "label": "启用推特追踪", "description": "通过 twikit 直接采集推特博主的原始推文", "field_type": "boolean"},
@@ -1,10 +1,38 @@
 from abc import ABC, abstractmethod
+from typing import Optional
+
+import httpx
+
+# 各渠道共用一个连接池，避免每条消息重新建连
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=30)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 class Notifier(ABC):
     name: str = "unknown"
     enabled_key: str = ""
 
+    def rate_limits(self) -> list[tuple[str, int, float]]:
+        """[(作用域, 次数, 秒)]：作用域相同的渠道共享额度。"""
+        return []
+
+    def daily_quota(self) -> Optional[tuple[str, int]]:
+        """(作用域, 每日条数)，无限制时为 None。"""
+        return None
+
     @abstractmethod
     async def send(self, title: str, content: str, url: str = "") -> bool:
         ...
@@ -0,0 +1,152 @@
+"""推送分发：各渠道并发发送，渠道内按消息顺序逐条发送并受各自的限流约束。
+
+- 限流器按作用域共享（如同一个 Telegram Bot 的全局额度、同一个 chat 的额度），
+  渠道对象因设置变化重建后额度仍然连续
+- 每日额度用尽的渠道直接跳过（记为失败），不阻塞其他渠道；发送前预占额度，发送失败或被取消时退回
+- 返回每条消息在每个渠道上的结果，由调用方在数据库会话外统一回写
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Optional
+
+from app.notifiers.base import Notifier
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowLimiter:
+    """period 秒内最多 limit 次；额度不足时按请求顺序等待。"""
+
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+        self._stamps: deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._stamps and now - self._stamps[0] >= self.period:
+                    self._stamps.popleft()
+                if len(self._stamps) < self.limit:
+                    self._stamps.append(now)
+                    return
+                await asyncio.sleep(self.period - (now - self._stamps[0]))
+
+
+class DailyQuota:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._day: Optional[date] = None
+        self._used = 0
+
+    def take(self) -> bool:
+        today = date.today()
+        if self._day != today:
+            self._day, self._used = today, 0
+        if self._used >= self.limit:
+            return False
+        self._used += 1
+        return True
+
+    def refund(self) -> None:
+        """退回当天 take() 预占的一次额度（跨天后已清零，无需退回）。"""
+        if self._day == date.today() and self._used > 0:
+            self._used -= 1
+
+
+_limiters: dict[str, SlidingWindowLimiter] = {}
+_quotas: dict[str, DailyQuota] = {}
+
+
+def _limiter(scope: str, limit: int, period: float) -> SlidingWindowLimiter:
+    limiter = _limiters.get(scope)
+    if limiter is None or (limiter.limit, limiter.period) != (limit, period):
+        limiter = _limiters[scope] = SlidingWindowLimiter(limit, period)
+    return limiter
+
+
+def _quota(scope: str, limit: int) -> DailyQuota:
+    quota = _quotas.get(scope)
+    if quota is None or quota.limit != limit:
+        quota = _quotas[scope] = DailyQuota(limit)
+    return quota
+
+
+@dataclass
+class Message:
+    key: Any  # 回写用的标识，如文章 id、预警 id
+    title: str
+    content: str
+    url: str = ""
+    markdown: bool = False
+    importance: int = 0
+    group: Optional[str] = None  # 合并推送时的分组，如文章分类
+
+
+@dataclass
+class Delivery:
+    key: Any
+    channel: str
+    ok: bool
+    error: Optional[str] = None
+    latency_ms: int = 0
+
+
+async def _deliver(notifier: Notifier, message: Message) -> Delivery:
+    quota = notifier.daily_quota()
+    daily = _quota(quota[0], quota[1]) if quota else None
+    if daily and not daily.take():
+        return Delivery(message.key, notifier.name, False, "daily quota exhausted")
+
+    ok = False
+    try:
+        for scope, limit, period in notifier.rate_limits():
+            await _limiter(scope, limit, period).acquire()
+        started = time.monotonic()
+        try:
+            if message.markdown:
+                ok = await notifier.send_markdown(message.title, message.content)
+            else:
+                ok = await notifier.send(message.title, message.content, message.url)
+            error = None if ok else "rejected"
+        except Exception as e:
+            ok, error = False, str(e) or type(e).__name__
+        latency = int((time.monotonic() - started) * 1000)
+    finally:
+        if daily and not ok:
+            daily.refund()
+    if not ok:
+        logger.error(f"Push via {notifier.name} failed: {error}")
+    return Delivery(message.key, notifier.name, bool(ok), error, latency)
+
+
+async def _run_channel(notifier: Notifier, messages: list[Message]) -> list[Delivery]:
+    return [await _deliver(notifier, message) for message in messages]
+
+
+async def dispatch_batches(batches: list[tuple[Notifier, list[Message]]]) -> list[Delivery]:
+    """各渠道发送各自的消息列表：渠道间并发，同一渠道内保持顺序。"""
+    batches = [(n, m) for n, m in batches if m]
+    if not batches:
+        return []
+    results = await asyncio.gather(*(_run_channel(n, m) for n, m in batches))
+    deliveries = [d for channel in results for d in channel]
+    failed = sum(1 for d in deliveries if not d.ok)
+    logger.info(f"Dispatched {len(deliveries)} deliveries to {len(batches)} channels ({failed} failed)")
+    return deliveries
+
+
+async def dispatch(messages: list[Message], notifiers: list[Notifier]) -> list[Delivery]:
+    """同一批消息发往所有渠道。"""
+    return await dispatch_batches([(n, messages) for n in notifiers])
+
+
+def delivered_keys(deliveries: list[Delivery]) -> set:
+    """至少一个渠道发送成功的消息。"""
+    return {d.key for d in deliveries if d.ok}
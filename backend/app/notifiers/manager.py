@@ -1,64 +1,99 @@
+import asyncio
+import json
 import logging
 from datetime import datetime, timedelta
+from typing import Optional
 
-from sqlalchemy import select, desc
+from sqlalchemy import and_, desc, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import async_session
 from app.models.article import Article
 from app.models.alert import Alert
-from app.models.setting import SystemSetting
+from app.models.notification import NotificationDelivery
 from app.notifiers.base import Notifier
+from app.notifiers import outbox
+from app.notifiers.dispatcher import Delivery, Message, dispatch_batches
 from app.notifiers.telegram import TelegramNotifier
 from app.notifiers.wechat import WeChatNotifier
 from app.notifiers.qq import QQNotifier
+from app.platform.settings_cache import settings_cache
+from app.skills.keywords import tokenize
 
 logger = logging.getLogger(__name__)
 
 
-async def _get_setting(session: AsyncSession, key: str) -> str:
-    result = await session.execute(
-        select(SystemSetting).where(SystemSetting.key == key)
-    )
-    s = result.scalar_one_or_none()
-    return s.value if s else ""
+NOTIFIER_SETTING_KEYS = (
+    "telegram_enabled", "telegram_bot_token", "telegram_chat_id",
+    "wechat_enabled", "pushplus_token",
+    "qq_enabled", "qmsg_key",
+)
 
+# 已启用的通知渠道，仅在上述设置变化时重建
+_notifiers: Optional[list[Notifier]] = None
 
-async def _get_enabled_notifiers(session: AsyncSession) -> list[Notifier]:
+
+def _reset_notifiers(_changed: set[str]) -> None:
+    global _notifiers
+    _notifiers = None
+
+
+settings_cache.subscribe(NOTIFIER_SETTING_KEYS, _reset_notifiers)
+
+
+def _build_notifiers(settings: dict) -> list[Notifier]:
     notifiers: list[Notifier] = []
 
-    if await _get_setting(session, "telegram_enabled") == "true":
-        token = await _get_setting(session, "telegram_bot_token")
-        chat_id = await _get_setting(session, "telegram_chat_id")
+    if settings.get("telegram_enabled") == "true":
+        token = settings.get("telegram_bot_token")
+        chat_id = settings.get("telegram_chat_id")
         if token and chat_id:
             notifiers.append(TelegramNotifier(token, chat_id))
 
-    if await _get_setting(session, "wechat_enabled") == "true":
-        token = await _get_setting(session, "pushplus_token")
+    if settings.get("wechat_enabled") == "true":
+        token = settings.get("pushplus_token")
         if token:
             notifiers.append(WeChatNotifier(token))
 
-    if await _get_setting(session, "qq_enabled") == "true":
-        key = await _get_setting(session, "qmsg_key")
+    if settings.get("qq_enabled") == "true":
+        key = settings.get("qmsg_key")
         if key:
             notifiers.append(QQNotifier(key))
 
     return notifiers
 
 
+async def _get_enabled_notifiers(session: AsyncSession) -> list[Notifier]:
+    global _notifiers
+    await settings_cache.refresh(session)
+    if _notifiers is None:
+        _notifiers = _build_notifiers(await settings_cache.get_many(NOTIFIER_SETTING_KEYS, session=session))
+    return list(_notifiers)
+
+
+DRAIN_BATCH = 100
+DRAIN_POLL_SECONDS = 15.0
+DIGEST_SLOT_MINUTES = 30
+DEFAULT_COALESCE_SECONDS = 120
+CLUSTER_MIN_SHARED_TERMS = 2  # 标题共享至少这么多关键词视为同一事件的报道
+
+
 async def push_important_news():
-    """Push important unpushed articles.
+    """Queue important articles for push.
 
     规则：
     - category=ai_industry 的文章 importance >= 2 即推（降低阈值，避免漏掉 IPO/融资）
     - 其他 category 保持 importance >= 3
+
+    文章写入发件箱（每个启用的渠道一行）后由 outbox_drainer 投递；
+    is_pushed 在至少一个渠道送达后才置为 True。
     """
-    from sqlalchemy import or_, and_
     async with async_session() as session:
         notifiers = await _get_enabled_notifiers(session)
         if not notifiers:
             return
 
+        queued = select(NotificationDelivery.ref_id).where(NotificationDelivery.kind == "article")
         result = await session.execute(
             select(Article)
             .where(Article.agent_key == "investment")
@@ -69,43 +104,51 @@ async def push_important_news():
                     and_(Article.category == "ai_industry", Article.importance >= 2),
                 )
             )
+            .where(Article.id.not_in(queued))
             .order_by(desc(Article.importance))
             .limit(10)
         )
         articles = result.scalars().all()
+        if not articles:
+            return
 
+        messages = []
         for article in articles:
             level_emoji = {5: "🚨", 4: "⚠️", 3: "📢", 2: "🤖"}.get(article.importance, "📰")
             prefix = "🤖 [AI快讯] " if article.category == "ai_industry" else ""
-            title = f"{level_emoji} {prefix}{article.title}"
-            content = article.summary or article.title
-
-            for notifier in notifiers:
-                try:
-                    await notifier.send(title, content, article.url)
-                except Exception as e:
-                    logger.error(f"Push via {notifier.name} failed: {e}")
-
-            article.is_pushed = True
+            messages.append(Message(
+                key=article.id,
+                title=f"{level_emoji} {prefix}{article.title}",
+                content=article.summary or article.title,
+                url=article.url,
+                importance=article.importance,
+                group=article.category or "general",
+            ))
+        queued_count = await outbox.enqueue(session, "article", messages, [n.name for n in notifiers])
+        await session.commit()
 
-        if articles:
-            await session.commit()
-            logger.info(f"Pushed {len(articles)} important articles")
+    outbox_drainer.kick()
+    logger.info(f"Queued {len(articles)} important articles ({queued_count} deliveries)")
 
 
 async def push_news_digest():
-    """Push a digest of recent news."""
+    """Queue a digest of the previous complete 30-minute slot.
+
+    按固定时段汇总，与单篇推送互不影响；同一时段只入队一次。
+    """
+    now = datetime.now()
+    slot_end = now.replace(minute=now.minute - now.minute % DIGEST_SLOT_MINUTES, second=0, microsecond=0)
+    slot_start = slot_end - timedelta(minutes=DIGEST_SLOT_MINUTES)
     async with async_session() as session:
         notifiers = await _get_enabled_notifiers(session)
         if not notifiers:
             return
 
-        since = datetime.now() - timedelta(minutes=30)
         result = await session.execute(
             select(Article)
             .where(Article.agent_key == "investment")
-            .where(Article.is_pushed == False)  # noqa: E712
-            .where(Article.fetched_at >= since)
+            .where(Article.fetched_at >= slot_start)
+            .where(Article.fetched_at < slot_end)
             .order_by(desc(Article.importance))
             .limit(20)
         )
@@ -117,22 +160,23 @@ async def push_news_digest():
         for a in articles:
             emoji = "🔴" if a.importance >= 3 else "🔵"
             lines.append(f"{emoji} {a.title}")
-        digest = "\n".join(lines)
-
-        for notifier in notifiers:
-            try:
-                await notifier.send_markdown("新闻摘要", digest)
-            except Exception as e:
-                logger.error(f"Digest push via {notifier.name} failed: {e}")
-
-        for a in articles:
-            a.is_pushed = True
+        digest = Message(key=f"{slot_start:%Y%m%d%H%M}", title="新闻摘要", content="\n".join(lines), markdown=True)
+        queued_count = await outbox.enqueue(session, "digest", [digest], [n.name for n in notifiers])
         await session.commit()
-        logger.info(f"Pushed digest with {len(articles)} articles")
+
+    if queued_count:
+        outbox_drainer.kick()
+        logger.info(f"Queued digest with {len(articles)} articles")
 
 
 async def push_alert(alert: Alert):
-    """Push a single alert to all channels."""
+    """Queue a single alert for all channels and wake the drainer."""
+    try:
+        from app.api.ws import broadcast_alert
+        await broadcast_alert(alert.to_dict())
+    except Exception as e:
+        logger.debug(f"WebSocket broadcast skipped: {e}")
+
     async with async_session() as session:
         notifiers = await _get_enabled_notifiers(session)
         if not notifiers:
@@ -141,10 +185,166 @@ async def push_alert(alert: Alert):
         emoji = {"critical": "🚨", "high": "⚠️", "medium": "📢", "low": "ℹ️"}.get(
             alert.level, "📢"
         )
-        title = f"{emoji} 预警: {alert.title}"
+        message = Message(key=alert.id, title=f"{emoji} 预警: {alert.title}", content=alert.description)
+        await outbox.enqueue(session, "alert", [message], [n.name for n in notifiers], agent_key=alert.agent_key)
+        await session.commit()
+    outbox_drainer.kick()
+
+
+async def _coalesce_windows(notifiers: dict[str, Notifier], session: AsyncSession) -> dict[str, float]:
+    """各渠道的合并窗口（秒）：push_coalesce_seconds 为默认值，push_coalesce_overrides 按渠道名覆盖。"""
+    default, overrides = float(DEFAULT_COALESCE_SECONDS), {}
+    try:
+        values = await settings_cache.get_many(
+            ["push_coalesce_seconds", "push_coalesce_overrides"], session=session
+        )
+        if values.get("push_coalesce_seconds"):
+            default = float(values["push_coalesce_seconds"])
+        if values.get("push_coalesce_overrides"):
+            overrides = {k: float(v) for k, v in json.loads(values["push_coalesce_overrides"]).items()}
+    except Exception as e:
+        logger.warning(f"Invalid push coalescing settings, using defaults: {e}")
+    return {name: max(overrides.get(name, default), 0.0) for name in notifiers}
+
+
+def _cluster(rows: list[NotificationDelivery]) -> list[list[NotificationDelivery]]:
+    """同一分类内按标题关键词重叠贪心聚类，每簇按重要度排序，首条为代表。"""
+    clusters: list[tuple[set[str], list[NotificationDelivery]]] = []
+    for row in sorted(rows, key=lambda r: (-r.importance, r.id)):
+        terms = set(tokenize(row.title))
+        for cluster_terms, members in clusters:
+            if len(cluster_terms & terms) >= CLUSTER_MIN_SHARED_TERMS:
+                members.append(row)
+                cluster_terms |= terms
+                break
+        else:
+            clusters.append((terms, [row]))
+    return [members for _, members in clusters]
+
+
+def _coalesce(rows: list[NotificationDelivery]) -> list[tuple[Message, list[int]]]:
+    """把同一渠道领取到的消息合并为待发送列表，返回 (消息, 对应的发件箱行 id)。
+
+    可合并的文章按分类各合成一条；其余消息（摘要、预警、重要度 5 的文章）逐条发送。
+    """
+    batch: list[tuple[Message, list[int]]] = []
+    groups: dict[str, list[NotificationDelivery]] = {}
+    for row in rows:
+        if outbox.coalescible(row):
+            groups.setdefault(row.group_key or "general", []).append(row)
+        else:
+            batch.append((outbox.to_message(row), [row.id]))
+
+    for group, members in groups.items():
+        if len(members) == 1:
+            batch.append((outbox.to_message(members[0]), [members[0].id]))
+            continue
+        lines = []
+        for cluster in _cluster(members):
+            lead = cluster[0]
+            line = f"• {lead.title}"
+            if len(cluster) > 1:
+                line += f"（另有 {len(cluster) - 1} 条相关报道）"
+            if lead.url:
+                line += f"\n  {lead.url}"
+            lines.append(line)
+        message = Message(
+            key=f"merged:{members[0].id}",
+            title=f"📢 {group} · {len(members)} 条快讯",
+            content="\n\n".join(lines),
+            importance=max(m.importance for m in members),
+            group=group,
+        )
+        batch.append((message, [m.id for m in members]))
+    return batch
+
+
+async def drain_outbox(limit: int = DRAIN_BATCH) -> int:
+    """投递一批到期的发件箱消息，返回本次处理的条数。
+
+    领取与回写各用一个短会话，发送期间不持有数据库会话。
+    普通文章在各渠道的合并窗口内暂缓领取，窗口结束后按分类合并发送。
+    """
+    async with async_session() as session:
+        notifiers = {n.name: n for n in await _get_enabled_notifiers(session)}
+        if not notifiers:
+            return 0
+        hold = await _coalesce_windows(notifiers, session)
+        rows = await outbox.claim(session, notifiers, limit, hold=hold)
+        await session.commit()
+    if not rows:
+        return 0
+
+    by_channel: dict[str, list[NotificationDelivery]] = {}
+    for row in rows:
+        by_channel.setdefault(row.channel, []).append(row)
+    batches = []
+    members: dict[tuple[str, object], list[int]] = {}
+    for channel, channel_rows in by_channel.items():
+        messages = []
+        if hold[channel] <= 0:
+            coalesced = [(outbox.to_message(row), [row.id]) for row in channel_rows]
+        else:
+            coalesced = _coalesce(channel_rows)
+        for message, row_ids in coalesced:
+            messages.append(message)
+            members[(channel, message.key)] = row_ids
+        batches.append((notifiers[channel], messages))
+    sent = await dispatch_batches(batches)
+    # 合并消息的结果展开到其包含的每一行
+    deliveries = [
+        Delivery(row_id, d.channel, d.ok, d.error, d.latency_ms)
+        for d in sent
+        for row_id in members[(d.channel, d.key)]
+    ]
+
+    async with async_session() as session:
+        delivered = await outbox.record_results(session, deliveries)
+        for kind, model in (("article", Article), ("alert", Alert)):
+            ids = {ref_id for k, ref_id in delivered if k == kind}
+            if ids:
+                await session.execute(update(model).where(model.id.in_(ids)).values(is_pushed=True))
+        await session.commit()
+    return len(rows)
+
+
+class OutboxDrainer:
+    """后台投递任务：有新消息入队时立即唤醒，否则每 DRAIN_POLL_SECONDS 秒检查一次到期的重试。"""
+
+    def __init__(self, poll_seconds: float = DRAIN_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
 
-        for notifier in notifiers:
+    def kick(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
             try:
-                await notifier.send(title, alert.description)
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                # 积压时连续投递，直到不足一批
+                while await drain_outbox() >= DRAIN_BATCH:
+                    pass
             except Exception as e:
-                logger.error(f"Alert push via {notifier.name} failed: {e}")
+                logger.error(f"Outbox drain error: {e}")
+
+
+outbox_drainer = OutboxDrainer()
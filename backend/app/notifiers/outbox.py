@@ -0,0 +1,196 @@
+"""推送发件箱：消息先在业务事务中写入 notification_outbox（每个渠道一行），再由后台任务投递。
+
+- 同一消息在同一渠道只入队一次（dedup_key + channel 唯一），投递语义为每渠道至少一次
+- 发送失败按指数退避重试，超过 MAX_ATTEMPTS 转为 dead，保留以便排查
+- 领取时顺延租约，进程崩溃后租约到期重新投递
+"""
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.notification import NotificationDelivery
+from app.notifiers.dispatcher import Delivery, Message
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 8
+BASE_BACKOFF_SECONDS = 30  # 30s、1m、2m … 最长 MAX_BACKOFF_SECONDS
+MAX_BACKOFF_SECONDS = 3600
+SENT_RETENTION_DAYS = 7
+DEAD_RETENTION_DAYS = 30
+CRITICAL_IMPORTANCE = 5
+
+
+def dedup_key(kind: str, key) -> str:
+    return f"{kind}:{key}"
+
+
+async def enqueue(
+    session: AsyncSession,
+    kind: str,
+    messages: Iterable[Message],
+    channels: Iterable[str],
+    agent_key: str = "investment",
+) -> int:
+    """在调用方事务中为每条消息 × 每个渠道写一行；已入队的组合跳过。Message.key 为文章/预警 id 或摘要时段。"""
+    messages = list(messages)
+    channels = list(channels)
+    if not messages or not channels:
+        return 0
+    keys = {dedup_key(kind, m.key): m for m in messages}
+    existing = set((await session.execute(
+        select(NotificationDelivery.dedup_key, NotificationDelivery.channel)
+        .where(NotificationDelivery.dedup_key.in_(keys))
+    )).all())
+
+    now = datetime.now()
+    count = 0
+    for key, message in keys.items():
+        for channel in channels:
+            if (key, channel) in existing:
+                continue
+            session.add(NotificationDelivery(
+                agent_key=agent_key,
+                kind=kind,
+                ref_id=message.key if isinstance(message.key, int) else None,
+                dedup_key=key,
+                channel=channel,
+                title=message.title[:500],
+                content=message.content,
+                url=message.url or None,
+                markdown=message.markdown,
+                importance=message.importance,
+                group_key=message.group,
+                created_at=now,
+                available_at=now,
+            ))
+            count += 1
+    return count
+
+
+def coalescible(row: NotificationDelivery) -> bool:
+    """可合并推送的消息：普通文章（重要度 5 的文章、预警和摘要立即发送）。"""
+    return row.kind == "article" and row.importance < CRITICAL_IMPORTANCE
+
+
+async def claim(
+    session: AsyncSession,
+    channels: Iterable[str],
+    limit: int,
+    hold: Optional[dict[str, float]] = None,
+) -> list[NotificationDelivery]:
+    """按入队顺序领取已到期的投递，并顺延租约。只领取当前启用的渠道。
+
+    hold 为各渠道的合并窗口（秒）：渠道内最早一条可合并的消息入队未满窗口时，
+    该渠道的可合并消息暂不领取，等窗口结束后一起领取。
+    """
+    now = datetime.now()
+    result = await session.execute(
+        select(NotificationDelivery)
+        .where(NotificationDelivery.status == "pending")
+        .where(NotificationDelivery.available_at <= now)
+        .where(NotificationDelivery.channel.in_(list(channels)))
+        .order_by(NotificationDelivery.id)
+        .limit(limit)
+    )
+    rows = list(result.scalars().all())
+    if hold:
+        oldest: dict[str, datetime] = {}
+        for row in rows:
+            if coalescible(row):
+                oldest[row.channel] = min(oldest.get(row.channel, row.created_at), row.created_at)
+        waiting = {
+            channel for channel, first in oldest.items()
+            if hold.get(channel, 0) > 0 and first > now - timedelta(seconds=hold[channel])
+        }
+        rows = [r for r in rows if not (coalescible(r) and r.channel in waiting)]
+    lease_until = now + timedelta(seconds=LEASE_SECONDS)
+    for row in rows:
+        row.available_at = lease_until
+    return rows
+
+
+def to_message(row: NotificationDelivery) -> Message:
+    return Message(
+        key=row.id, title=row.title, content=row.content, url=row.url or "", markdown=row.markdown,
+        importance=row.importance, group=row.group_key,
+    )
+
+
+async def record_results(session: AsyncSession, deliveries: Iterable[Delivery]) -> set[tuple[str, int]]:
+    """回写投递结果（Delivery.key 为发件箱行 id），返回本次送达的 (kind, ref_id)。"""
+    results = {d.key: d for d in deliveries}
+    if not results:
+        return set()
+    now = datetime.now()
+    delivered: set[tuple[str, int]] = set()
+    rows = (await session.execute(
+        select(NotificationDelivery).where(NotificationDelivery.id.in_(results))
+    )).scalars().all()
+    for row in rows:
+        outcome = results[row.id]
+        row.attempts += 1
+        if outcome.ok:
+            row.status = "sent"
+            row.sent_at = now
+            row.last_error = None
+            if row.ref_id is not None:
+                delivered.add((row.kind, row.ref_id))
+        elif row.attempts >= MAX_ATTEMPTS:
+            row.status = "dead"
+            row.last_error = (outcome.error or "")[:500]
+            logger.warning(f"Outbox gave up on {row.dedup_key} via {row.channel} after {row.attempts} attempts")
+        else:
+            row.last_error = (outcome.error or "")[:500]
+            backoff = min(BASE_BACKOFF_SECONDS * 2 ** (row.attempts - 1), MAX_BACKOFF_SECONDS)
+            row.available_at = now + timedelta(seconds=backoff)
+    return delivered
+
+
+async def purge(session: AsyncSession) -> None:
+    now = datetime.now()
+    await session.execute(
+        delete(NotificationDelivery)
+        .where(NotificationDelivery.status != "dead")
+        .where(NotificationDelivery.created_at < now - timedelta(days=SENT_RETENTION_DAYS))
+    )
+    await session.execute(
+        delete(NotificationDelivery)
+        .where(NotificationDelivery.created_at < now - timedelta(days=DEAD_RETENTION_DAYS))
+    )
+
+
+async def outbox_stats(session: AsyncSession, agent_key: Optional[str] = None) -> dict:
+    """各渠道待发送 / 已发送 / 放弃的条数，以及最久未发出的消息等待时长。"""
+    now = datetime.now()
+    pending = NotificationDelivery.status == "pending"
+    query = (
+        select(
+            NotificationDelivery.channel,
+            func.count(NotificationDelivery.id).filter(pending),
+            func.count(NotificationDelivery.id).filter(NotificationDelivery.status == "sent"),
+            func.count(NotificationDelivery.id).filter(NotificationDelivery.status == "dead"),
+            func.count(NotificationDelivery.id).filter(pending, NotificationDelivery.attempts > 0),
+            func.min(NotificationDelivery.created_at).filter(pending),
+        )
+        .group_by(NotificationDelivery.channel)
+    )
+    if agent_key:
+        query = query.where(NotificationDelivery.agent_key == agent_key)
+
+    channels = {}
+    for channel, waiting, sent, dead, retrying, oldest in (await session.execute(query)).all():
+        channels[channel] = {
+            "pending": waiting,
+            "retrying": retrying,
+            "sent": sent,
+            "dead": dead,
+            "oldest_pending_at": oldest.isoformat() if oldest else None,
+            "lag_seconds": int((now - oldest).total_seconds()) if oldest else 0,
+        }
+    return {"channels": channels}
@@ -1,8 +1,6 @@
 import logging
 
-import httpx
-
-from app.notifiers.base import Notifier
+from app.notifiers.base import Notifier, get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +14,13 @@ class QQNotifier(Notifier):
     def __init__(self, key: str):
         self.key = key
 
+    def rate_limits(self) -> list[tuple[str, int, float]]:
+        # Qmsg 免费版限制发送频率，过快的消息会被丢弃
+        return [(f"qmsg:{self.key[-8:]}", 1, 2.0)]
+
+    def daily_quota(self) -> tuple[str, int]:
+        return (f"qmsg:{self.key[-8:]}", 300)
+
     async def send(self, title: str, content: str, url: str = "") -> bool:
         msg = f"【{title}】\n{content}"
         if url:
@@ -27,16 +32,16 @@ class QQNotifier(Notifier):
 
     async def _push(self, msg: str) -> bool:
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.post(
-                    f"https://qmsg.zendee.cn/send/{self.key}",
-                    data={"msg": msg[:1500]},
-                )
-                data = resp.json()
-                if data.get("success"):
-                    return True
-                logger.error(f"Qmsg error: {data}")
-                return False
+            client = get_http_client()
+            resp = await client.post(
+                f"https://qmsg.zendee.cn/send/{self.key}",
+                data={"msg": msg[:1500]},
+            )
+            data = resp.json()
+            if data.get("success"):
+                return True
+            logger.error(f"Qmsg error: {data}")
+            return False
         except Exception as e:
             logger.error(f"Qmsg error: {e}")
             return False
@@ -1,8 +1,6 @@
 import logging
 
-import httpx
-
-from app.notifiers.base import Notifier
+from app.notifiers.base import Notifier, get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +14,11 @@ class TelegramNotifier(Notifier):
         self.chat_id = chat_id
         self.api_base = f"https://api.telegram.org/bot{bot_token}"
 
+    def rate_limits(self) -> list[tuple[str, int, float]]:
+        # Bot API：每个 bot 约 30 条/秒，同一个 chat 约 1 条/秒
+        bot = self.bot_token.split(":", 1)[0]
+        return [(f"telegram:{bot}", 30, 1.0), (f"telegram:{bot}:{self.chat_id}", 1, 1.0)]
+
     async def send(self, title: str, content: str, url: str = "") -> bool:
         text = f"*{self._escape(title)}*\n\n{self._escape(content)}"
         if url:
@@ -28,20 +31,20 @@ class TelegramNotifier(Notifier):
 
     async def _send_message(self, text: str, parse_mode: str = "Markdown") -> bool:
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.post(
-                    f"{self.api_base}/sendMessage",
-                    json={
-                        "chat_id": self.chat_id,
-                        "text": text[:4096],
-                        "parse_mode": parse_mode,
-                        "disable_web_page_preview": False,
-                    },
-                )
-                if resp.status_code == 200 and resp.json().get("ok"):
-                    return True
-                logger.error(f"Telegram send failed: {resp.text[:200]}")
-                return False
+            client = get_http_client()
+            resp = await client.post(
+                f"{self.api_base}/sendMessage",
+                json={
+                    "chat_id": self.chat_id,
+                    "text": text[:4096],
+                    "parse_mode": parse_mode,
+                    "disable_web_page_preview": False,
+                },
+            )
+            if resp.status_code == 200 and resp.json().get("ok"):
+                return True
+            logger.error(f"Telegram send failed: {resp.text[:200]}")
+            return False
         except Exception as e:
             logger.error(f"Telegram error: {e}")
             return False
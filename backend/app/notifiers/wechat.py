@@ -1,8 +1,6 @@
 import logging
 
-import httpx
-
-from app.notifiers.base import Notifier
+from app.notifiers.base import Notifier, get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +14,14 @@ class WeChatNotifier(Notifier):
     def __init__(self, token: str):
         self.token = token
 
+    def rate_limits(self) -> list[tuple[str, int, float]]:
+        # PushPlus 对同一 token 的请求频率有限制，超出会被临时封禁，取保守值
+        return [(f"pushplus:{self.token[-8:]}", 10, 60.0)]
+
+    def daily_quota(self) -> tuple[str, int]:
+        # 普通用户每日 200 条
+        return (f"pushplus:{self.token[-8:]}", 200)
+
     async def send(self, title: str, content: str, url: str = "") -> bool:
         body = content
         if url:
@@ -27,21 +33,21 @@ class WeChatNotifier(Notifier):
 
     async def _push(self, title: str, content: str, template: str = "txt") -> bool:
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.post(
-                    "https://www.pushplus.plus/send",
-                    json={
-                        "token": self.token,
-                        "title": title[:100],
-                        "content": content,
-                        "template": template,
-                    },
-                )
-                data = resp.json()
-                if data.get("code") == 200:
-                    return True
-                logger.error(f"PushPlus error: {data}")
-                return False
+            client = get_http_client()
+            resp = await client.post(
+                "https://www.pushplus.plus/send",
+                json={
+                    "token": self.token,
+                    "title": title[:100],
+                    "content": content,
+                    "template": template,
+                },
+            )
+            data = resp.json()
+            if data.get("code") == 200:
+                return True
+            logger.error(f"PushPlus error: {data}")
+            return False
         except Exception as e:
             logger.error(f"PushPlus error: {e}")
             return False
@@ -1,12 +1,19 @@
+from app.platform.call_context import current_scope, scoped_stream, usage_scope
 from app.platform.config import ScopedConfigService
 from app.platform.manifest import AgentManifest
 from app.platform.registry import AgentRegistry, agent_registry
 from app.platform.scheduler import SchedulerKernel
+from app.platform.settings_cache import SettingsCache, settings_cache
 
 __all__ = [
     "AgentManifest",
     "AgentRegistry",
     "SchedulerKernel",
     "ScopedConfigService",
+    "SettingsCache",
     "agent_registry",
+    "current_scope",
+    "scoped_stream",
+    "settings_cache",
+    "usage_scope",
 ]
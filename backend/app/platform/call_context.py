@@ -0,0 +1,48 @@
+"""调用上下文标签（agent_key / job / skill / priority），经 contextvars 向下传递，
+asyncio.gather 派生的子任务自动继承。LLM 用量计量据此归属每次调用。
+
+usage_scope 不能跨越异步生成器的 yield（两次迭代可能在不同的 Context 中执行，reset 会抛出
+ValueError，标签也会泄漏给调用方）；生成器内的流式调用用 scoped_stream 包装。
+"""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TypeVar
+
+T = TypeVar("T")
+
+_scope: ContextVar[dict] = ContextVar("call_scope", default={})
+
+
+@contextmanager
+def usage_scope(**tags: str | None) -> Iterator[dict]:
+    """在当前上下文叠加标签；priority="low" 表示预算用尽时可降级。"""
+    merged = {**_scope.get(), **{k: v for k, v in tags.items() if v is not None}}
+    token = _scope.set(merged)
+    try:
+        yield merged
+    finally:
+        _scope.reset(token)
+
+
+async def scoped_stream(stream: AsyncIterator[T], **tags: str | None) -> AsyncIterator[T]:
+    """逐项转发 stream，每次推进（及关闭）都在 usage_scope(**tags) 内执行，yield 时不持有标签。"""
+    try:
+        while True:
+            with usage_scope(**tags):
+                try:
+                    item = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+            yield item
+    finally:
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            with usage_scope(**tags):
+                await aclose()
+
+
+def current_scope() -> dict:
+    return _scope.get()
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.setting import SystemSetting
+from app.platform.settings_cache import SettingsCache, settings_cache
 
 
 class ScopedConfigService:
+    def __init__(self, cache: SettingsCache | None = None):
+        self._cache = cache or settings_cache
+
     @staticmethod
     def namespaced_key(agent_key: str, key: str) -> str:
         return f"{agent_key}.{key}"
@@ -19,11 +25,18 @@ class ScopedConfigService:
         default: str | None = None,
     ) -> str | None:
         namespaced = self.namespaced_key(agent_key, key)
-        result = await session.execute(
-            select(SystemSetting).where(SystemSetting.key == namespaced)
-        )
-        setting = result.scalar_one_or_none()
-        return setting.value if setting else default
+        return await self._cache.get(namespaced, default, session=session)
+
+    async def get_many(
+        self,
+        session: AsyncSession,
+        agent_key: str,
+        keys: Iterable[str],
+    ) -> dict[str, str | None]:
+        """批量读取 agent 命名空间下的配置，返回 {未加前缀的 key: value}。"""
+        namespaced = {self.namespaced_key(agent_key, k): k for k in keys}
+        values = await self._cache.get_many(namespaced, session=session)
+        return {namespaced[nk]: v for nk, v in values.items()}
 
     async def list_namespace(
         self,
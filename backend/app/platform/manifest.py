@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any
 
@@ -11,6 +11,7 @@ if TYPE_CHECKING:
 
 
 JobRegistrar = Callable[["SchedulerKernel"], None]
+AgentInitializer = Callable[[], Awaitable[Any]]
 
 
 @dataclass(slots=True)
@@ -21,3 +22,4 @@ class AgentManifest:
     router: APIRouter | None = None
     job_registrar: JobRegistrar | None = None
     builtin_skills: list[dict[str, Any]] = field(default_factory=list)
+    initializer: AgentInitializer | None = None
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import importlib
+import logging
+
 from app.platform.manifest import AgentManifest
 
+logger = logging.getLogger(__name__)
+
 
 class AgentRegistry:
     def __init__(self):
         self._agents: dict[str, AgentManifest] = {}
+        # agent_key -> "package.module:register_func"，首次 load/get 时才 import
+        self._loaders: dict[str, str] = {}
 
     def register(self, manifest: AgentManifest) -> AgentManifest:
         existing = self._agents.get(manifest.key)
@@ -14,12 +21,39 @@ class AgentRegistry:
         self._agents[manifest.key] = manifest
         return manifest
 
-    def get(self, agent_key: str) -> AgentManifest:
+    def register_lazy(self, agent_key: str, loader_path: str) -> None:
+        """登记一个延迟加载的 agent；loader 为 register_xxx_agent(registry) 的导入路径。"""
+        self._loaders.setdefault(agent_key, loader_path)
+
+    def load(self, agent_key: str) -> AgentManifest:
         manifest = self._agents.get(agent_key)
-        if manifest is None:
+        if manifest is not None:
+            return manifest
+        loader_path = self._loaders.get(agent_key)
+        if loader_path is None:
             raise KeyError(f"Agent '{agent_key}' is not registered")
+        module_name, func_name = loader_path.split(":", 1)
+        register_func = getattr(importlib.import_module(module_name), func_name)
+        manifest = register_func(self)
+        logger.info(f"Agent loaded: {agent_key}")
         return manifest
 
+    def load_enabled(self, agent_keys: list[str]) -> list[AgentManifest]:
+        """按顺序加载启用的 agent；未知 key 记录警告后跳过。"""
+        loaded: list[AgentManifest] = []
+        for key in agent_keys:
+            if key not in self._agents and key not in self._loaders:
+                logger.warning(f"Enabled agent '{key}' is unknown, skipping")
+                continue
+            loaded.append(self.load(key))
+        return loaded
+
+    def get(self, agent_key: str) -> AgentManifest:
+        return self.load(agent_key)
+
+    def available_keys(self) -> list[str]:
+        return list(dict.fromkeys([*self._agents, *self._loaders]))
+
     def list_agents(self) -> list[AgentManifest]:
         return list(self._agents.values())
 
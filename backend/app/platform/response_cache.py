@@ -0,0 +1,254 @@
+"""接口响应缓存：读多写少的仪表盘类接口按 路由 + 查询参数 缓存序列化后的响应体。
+
+- 进程内 LRU（条数上限 + TTL），可选落盘到 SQLite（RESPONSE_CACHE_PERSIST），进程重启后仍可命中
+- 每条缓存带标签（如 articles:investment、cs2:prices），入库 / 评分 / 拉价等写入方提交后
+  调用 invalidate(tag)，下一次读取重新计算
+- 响应带 ETag（gzip 压缩时带 -gzip 后缀），客户端带 If-None-Match 且内容未变时返回 304，两种形式都认
+- 其他进程的写入通知不到本进程的内存缓存，由 TTL 兜底
+"""
+import functools
+import hashlib
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.sqlite import insert
+
+from app.config import settings
+from app.database import async_session
+from app.models.response_cache import ResponseCacheEntry
+from app.platform.serialization import GZIP_ETAG_SUFFIX, FastJSONResponse, dumps, gzip_etag, should_gzip
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = "private, no-cache"  # 浏览器每次带 If-None-Match 回源校验
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "tags", "expires_at")
+
+    def __init__(self, body: bytes, tags: frozenset[str], expires_at: float, etag: Optional[str] = None):
+        self.body = body
+        self.tags = tags
+        self.expires_at = expires_at  # time.monotonic()
+        self.etag = etag or f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def make_cache_key(request: Request) -> str:
+    """路由 + 排序后的查询参数；agent 由路径或 agent_key 等参数体现。"""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {
+        t.strip().removeprefix("W/").replace(f'{GZIP_ETAG_SUFFIX}"', '"') for t in if_none_match.split(",")
+    }
+    return "*" in candidates or etag in candidates
+
+
+def _tags_text(tags: Iterable[str]) -> str:
+    return f" {' '.join(sorted(tags))} "
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, ttl_seconds: int, session_factory=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory  # None 时只用内存
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        # 标签失效次数；计算期间标签被失效则结果可能已过时，不写入缓存
+        self._versions: dict[str, int] = {}
+        self._generation = 0  # clear() 递增
+        self.hits = 0
+        self.misses = 0
+
+    def _version(self, tags: Iterable[str]) -> tuple[int, ...]:
+        return (self._generation, *(self._versions.get(t, 0) for t in sorted(tags)))
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            del self._entries[key]
+        if self.session_factory is not None:
+            entry = await self._load(key)
+            if entry is not None:
+                self._remember(key, entry)
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    async def put(
+        self,
+        key: str,
+        body: bytes,
+        tags: Iterable[str],
+        ttl_seconds: Optional[int] = None,
+        version: Optional[tuple[int, ...]] = None,
+    ) -> CachedResponse:
+        """写入缓存；version 为开始计算前的 _version(tags)，之后标签被失效则只返回不缓存。"""
+        tags = frozenset(tags)
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        entry = CachedResponse(body, tags, time.monotonic() + ttl)
+        if version is not None and version != self._version(tags):
+            return entry
+        self._remember(key, entry)
+        if self.session_factory is not None:
+            await self._store(key, entry, ttl)
+        return entry
+
+    async def invalidate(self, *tags: str) -> None:
+        """写入方提交后调用；不会抛出异常，可直接放在任务流程中。"""
+        targets = set(tags)
+        for tag in targets:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+        for key in [k for k, e in self._entries.items() if e.tags & targets]:
+            del self._entries[key]
+        if self.session_factory is None or not targets:
+            return
+        try:
+            async with self.session_factory() as session:
+                await session.execute(delete(ResponseCacheEntry).where(
+                    or_(*(ResponseCacheEntry.tags.contains(f" {t} ") for t in targets))
+                ))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Response cache invalidation failed for {sorted(targets)}: {e}")
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._generation += 1
+        if self.session_factory is None:
+            return
+        try:
+            async with self.session_factory() as session:
+                await session.execute(delete(ResponseCacheEntry))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Response cache clear failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persist": self.session_factory is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    async def _load(self, key: str) -> Optional[CachedResponse]:
+        now = datetime.now()
+        try:
+            async with self.session_factory() as session:
+                row = (await session.execute(
+                    select(ResponseCacheEntry).where(ResponseCacheEntry.cache_key == key)
+                )).scalar_one_or_none()
+        except Exception as e:
+            logger.error(f"Response cache load failed: {e}")
+            return None
+        if row is None or row.expires_at <= now:
+            return None
+        remaining = (row.expires_at - now).total_seconds()
+        return CachedResponse(row.body, frozenset(row.tags.split()), time.monotonic() + remaining, row.etag)
+
+    async def _store(self, key: str, entry: CachedResponse, ttl_seconds: int) -> None:
+        now = datetime.now()
+        values = {
+            "cache_key": key,
+            "tags": _tags_text(entry.tags),
+            "etag": entry.etag,
+            "body": entry.body,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=ttl_seconds),
+        }
+        stmt = insert(ResponseCacheEntry).values(values)
+        try:
+            async with self.session_factory() as session:
+                await session.execute(delete(ResponseCacheEntry).where(ResponseCacheEntry.expires_at <= now))
+                await session.execute(stmt.on_conflict_do_update(
+                    index_elements=["cache_key"],
+                    set_={k: stmt.excluded[k] for k in values if k != "cache_key"},
+                ))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Response cache store failed: {e}")
+
+    async def serve(
+        self,
+        request: Request,
+        tags: Iterable[str],
+        compute: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[int] = None,
+    ) -> Response:
+        key = make_cache_key(request)
+        entry = await self.get(key)
+        status = "HIT"
+        if entry is None:
+            version = self._version(tags)
+            content = await compute()
+            if isinstance(content, FastJSONResponse) and content.status_code == 200:
+                body = content.body
+            elif isinstance(content, Response):
+                return content
+            else:
+                body = dumps(content)
+            entry = await self.put(key, body, tags, ttl_seconds, version)
+            status = "MISS"
+        headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL, "X-Cache": status}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            if should_gzip(entry.body, request.scope):
+                headers["ETag"] = gzip_etag(entry.etag)  # 与 200 响应中该表示的 ETag 一致
+            return Response(status_code=304, headers=headers)
+        return FastJSONResponse(entry.body, headers=headers)
+
+    def cached(self, *tags: str, ttl_seconds: Optional[int] = None):
+        """路由装饰器，写在 @router.get 之下。
+
+        依赖（鉴权、session）照常解析，命中时跳过函数体直接返回缓存的响应体；
+        不经路由直接调用（如测试）时等同于原函数。
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            async def wrapper(*args, _cache_request: Optional[Request] = None, **kwargs):
+                if _cache_request is None:
+                    return await func(*args, **kwargs)
+                return await self.serve(_cache_request, tags, lambda: func(*args, **kwargs), ttl_seconds)
+
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter("_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            ])
+            return wrapper
+
+        return decorator
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    session_factory=async_session if settings.RESPONSE_CACHE_PERSIST else None,
+)
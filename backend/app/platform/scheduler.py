@@ -1,13 +1,29 @@
 from __future__ import annotations
 
+import functools
+import inspect
 from collections.abc import Callable
 from typing import Any
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
+from app.platform.call_context import usage_scope
 from app.platform.manifest import AgentManifest
 
 
+def _tag_usage(agent_key: str, job_name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """任务内的 LLM 调用自动带上 agent/job 标签，用于用量计量和预算。"""
+    if not inspect.iscoroutinefunction(func):
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with usage_scope(agent_key=agent_key, job=job_name):
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
 class SchedulerKernel:
     def __init__(self, scheduler: AsyncIOScheduler | None = None):
         self.scheduler = scheduler or AsyncIOScheduler()
@@ -21,7 +37,7 @@ class SchedulerKernel:
         **kwargs: Any,
     ) -> None:
         job_id = f"{agent_key}:{job_name}"
-        self.scheduler.add_job(func, trigger, id=job_id, replace_existing=True, **kwargs)
+        self.scheduler.add_job(_tag_usage(agent_key, job_name, func), trigger, id=job_id, replace_existing=True, **kwargs)
 
     def register_agent(self, manifest: AgentManifest) -> None:
         if manifest.job_registrar is not None:
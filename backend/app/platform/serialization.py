@@ -0,0 +1,93 @@
+"""JSON 快速序列化：orjson（未安装时退回标准库 json），以及直接输出 bytes 的响应类。
+
+FastAPI 对路由返回的 dict/list 会先整体走一遍 jsonable_encoder 再序列化；列表类接口直接
+返回 FastJSONResponse 可跳过这一步。datetime/date 由 orjson 原生输出，格式与 isoformat() 一致。
+较大的响应体在客户端支持时压缩为 gzip；此时强 ETag 加上 -gzip 后缀，与未压缩的表示区分。
+"""
+import dataclasses
+import gzip
+import json
+from datetime import date, datetime
+from typing import Any, Mapping, Optional
+
+from fastapi.encoders import jsonable_encoder
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+GZIP_MIN_BYTES = 4096
+GZIP_LEVEL = 5
+GZIP_ETAG_SUFFIX = "-gzip"
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _accepts_gzip(scope: Scope) -> bool:
+    for name, value in scope.get("headers") or ():
+        if name == b"accept-encoding":
+            return b"gzip" in value
+    return False
+
+
+def should_gzip(body: bytes, scope: Scope) -> bool:
+    return len(body) >= GZIP_MIN_BYTES and _accepts_gzip(scope)
+
+
+def gzip_etag(etag: str) -> str:
+    """压缩后的表示用不同的强 ETag；弱 ETag 原样返回。"""
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}{GZIP_ETAG_SUFFIX}"'
+
+
+class FastJSONResponse(Response):
+    """content 为已序列化的 bytes 时原样输出（如响应缓存）。"""
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        super().__init__(content, status_code, headers, self.media_type, background)
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if "content-encoding" not in self.headers and should_gzip(self.body, scope):
+            self.body = gzip.compress(self.body, GZIP_LEVEL)
+            self.headers["content-encoding"] = "gzip"
+            self.headers["content-length"] = str(len(self.body))
+            self.headers.add_vary_header("Accept-Encoding")
+            if "etag" in self.headers:
+                self.headers["etag"] = gzip_etag(self.headers["etag"])
+        await super().__call__(scope, receive, send)
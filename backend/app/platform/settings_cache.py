@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.setting import SystemSetting
+
+logger = logging.getLogger(__name__)
+
+SettingsListener = Callable[[set[str]], None]
+
+DEFAULT_TTL_SECONDS = 60.0
+
+
+class SettingsCache:
+    """进程内 SystemSetting 缓存。
+
+    - 一次查询加载全部 key/value，之后的读取都是内存查找
+    - 写入方（设置 API 等）提交后调用 invalidate()，下一次读取重新加载
+    - TTL 兜底：其他进程/手工改库的变更最迟 ttl_seconds 后生效
+    - subscribe(keys, cb)：重新加载后只有这些 key 的值真的变了才回调，
+      供派生状态（AI 配置、通知渠道列表）按需重建
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._values: dict[str, str | None] = {}
+        self._loaded_at: float | None = None
+        # invalidate() 递增；加载期间被失效则不把结果标记为新鲜
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._listeners: list[tuple[frozenset[str], SettingsListener]] = []
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    @staticmethod
+    async def _fetch(session: AsyncSession) -> dict[str, str | None]:
+        rows = (await session.execute(
+            select(SystemSetting.agent_key, SystemSetting.key, SystemSetting.value)
+        )).all()
+        values: dict[str, str | None] = {}
+        for agent_key, key, value in rows:
+            # 同名 key 以全局（agent_key 为空）记录为准
+            if agent_key is None or key not in values:
+                values[key] = value
+        return values
+
+    async def refresh(self, session: AsyncSession | None = None) -> None:
+        """缓存过期时重新加载；新鲜时为空操作。可传入已有 session 复用连接。"""
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            generation = self._generation
+            if session is not None:
+                values = await self._fetch(session)
+            else:
+                async with async_session() as own_session:
+                    values = await self._fetch(own_session)
+            previous = self._values
+            self._values = values
+            if generation == self._generation:
+                self._loaded_at = time.monotonic()
+
+        changed = {
+            k for k in previous.keys() | values.keys()
+            if previous.get(k) != values.get(k)
+        }
+        if changed:
+            self._notify(changed)
+
+    def invalidate(self) -> None:
+        """标记缓存过期；下一次读取时重新加载并通知发生变化的 key。"""
+        self._generation += 1
+        self._loaded_at = None
+
+    async def get(
+        self,
+        key: str,
+        default: str | None = None,
+        session: AsyncSession | None = None,
+    ) -> str | None:
+        await self.refresh(session)
+        return self._values.get(key, default)
+
+    async def get_many(
+        self,
+        keys: Iterable[str],
+        session: AsyncSession | None = None,
+    ) -> dict[str, str | None]:
+        """批量读取；不存在的 key 不出现在结果中。"""
+        await self.refresh(session)
+        return {k: self._values[k] for k in keys if k in self._values}
+
+    def subscribe(self, keys: Iterable[str], listener: SettingsListener) -> Callable[[], None]:
+        entry = (frozenset(keys), listener)
+        self._listeners.append(entry)
+
+        def unsubscribe() -> None:
+            if entry in self._listeners:
+                self._listeners.remove(entry)
+
+        return unsubscribe
+
+    def _notify(self, changed: set[str]) -> None:
+        for keys, listener in list(self._listeners):
+            hit = changed & keys
+            if not hit:
+                continue
+            try:
+                listener(hit)
+            except Exception as e:
+                logger.error(f"Settings listener failed for {sorted(hit)}: {e}")
+
+
+settings_cache = SettingsCache()
@@ -0,0 +1,140 @@
+"""跨进程事件通道：broadcast_news 发布到这里，由每个进程把事件推送给自己的 WebSocket 客户端。
+
+- memory：单进程（默认），直接交给本进程的 broadcaster
+- sqlite：事件写入 ws_events，由数据库分配全局递增的 seq；每个进程轮询新事件并推送，
+  多个 uvicorn worker 或独立的任务进程共用同一个数据库即可，无需外部服务
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import DateTime, String, func, insert, literal, select
+
+from app.config import settings
+from app.database import async_session
+from app.models.broadcast_event import BroadcastEvent
+from app.realtime.broadcaster import Broadcaster, broadcaster, split_by_agent
+from app.realtime.replay import Event
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 0.5
+POLL_BATCH = 500
+
+
+class InProcessBackplane:
+    def __init__(self, target: Broadcaster):
+        self.broadcaster = target
+
+    async def publish(self, event_type: str, data: Any, policy: str = "keep", agent_key: Optional[str] = None) -> None:
+        self.broadcaster.publish(event_type, data, policy, agent_key)
+
+    async def start(self) -> None:
+        await self.broadcaster.start()
+
+    async def stop(self) -> None:
+        await self.broadcaster.stop()
+
+
+class SQLiteBackplane:
+    """发布只入内存队列并唤醒后台任务，由后台任务批量写入并轮询，发布方不等待数据库。"""
+
+    def __init__(self, target: Broadcaster, session_factory, poll_seconds: float = POLL_SECONDS):
+        self.broadcaster = target
+        self.session_factory = session_factory
+        self.poll_seconds = poll_seconds
+        self.cursor = 0
+        self._pending: list[tuple[str, Optional[str], str, str]] = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, event_type: str, data: Any, policy: str = "keep", agent_key: Optional[str] = None) -> None:
+        for agent, payload in split_by_agent(data, agent_key):
+            self._pending.append((event_type, agent, policy, json.dumps(payload, ensure_ascii=False, default=str)))
+        self._wake.set()
+
+    async def start(self) -> None:
+        await self.broadcaster.start()
+        async with self.session_factory() as session:
+            self.cursor = (await session.execute(select(func.max(BroadcastEvent.seq)))).scalar() or 0
+        # seq 由数据库分配，本进程的补发缓冲从当前最新事件开始
+        self.broadcaster.seq = self.broadcaster.replay.floor = self.cursor
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self._write()
+        except Exception as e:
+            logger.error(f"Backplane flush failed: {e}")
+        await self.broadcaster.stop()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self._write()
+                await self._poll()
+            except Exception as e:
+                logger.error(f"Backplane error: {e}")
+
+    async def _write(self) -> None:
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        async with self.session_factory() as session:
+            for event_type, agent, policy, data in rows:
+                # 在同一条语句内取 max(seq)+1，写锁保证各进程分配的 seq 严格递增；
+                # 下限取毫秒时间戳，旧事件被清理后 seq 也不会回退
+                next_seq = func.max(func.coalesce(func.max(BroadcastEvent.seq), 0) + 1, int(time.time() * 1000))
+                await session.execute(
+                    insert(BroadcastEvent).from_select(
+                        ["seq", "event_type", "agent_key", "policy", "data", "created_at"],
+                        select(
+                            next_seq,
+                            literal(event_type, String),
+                            literal(agent, String),
+                            literal(policy, String),
+                            literal(data, String),
+                            literal(datetime.now(), DateTime),
+                        ),
+                    )
+                )
+            await session.commit()
+
+    async def _poll(self) -> None:
+        while True:
+            async with self.session_factory() as session:
+                rows = (await session.execute(
+                    select(BroadcastEvent)
+                    .where(BroadcastEvent.seq > self.cursor)
+                    .order_by(BroadcastEvent.seq)
+                    .limit(POLL_BATCH)
+                )).scalars().all()
+            for row in rows:
+                self.broadcaster.deliver(Event.from_row(row))
+                self.cursor = row.seq
+            if len(rows) < POLL_BATCH:
+                return
+
+
+def _build_backplane():
+    if settings.WS_BACKPLANE == "sqlite":
+        return SQLiteBackplane(broadcaster, async_session)
+    return InProcessBackplane(broadcaster)
+
+
+backplane = _build_backplane()
@@ -0,0 +1,348 @@
+"""WebSocket 广播：每批消息只序列化一次，由各客户端自己的发送任务从有界队列中逐帧发送。
+
+- publish 是同步调用，只做一次序列化和入队，入库任务不会被任何客户端拖住
+- 队列满时按帧的策略腾出空间：merge 把积压的同类帧合并成一条"已跳过 N 条"的提示帧，
+  drop 丢弃最旧的同类帧（没有同类帧时丢弃新帧），keep 的帧不丢弃
+- 腾不出空间或单帧发送超时的慢客户端被断开（1013），由前端自行重连
+- 事件只投给订阅了该类型和 agent 的客户端；客户端另有条件时，按筛选结果相同的客户端分组，每组序列化一次
+- 每个事件带 seq 并进入补发缓冲（app.realtime.replay），重连的客户端凭 last_seq 补发缺失部分
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi import WebSocket
+
+from app.config import settings
+from app.database import async_session
+from app.realtime.replay import Event, EventSpill, ReplayBuffer, encode
+from app.realtime.subscriptions import Subscription, SubscriptionIndex
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 64
+SEND_TIMEOUT_SECONDS = 10.0
+REPLAY_BUFFER_SIZE = 1000
+MAX_REPLAY_FRAMES = 48  # 补发超过这么多帧时改为通知客户端整体刷新
+CLOSE_TRY_AGAIN_LATER = 1013
+
+# merge 策略下积压帧合并后的提示帧类型；前端收到后整体刷新
+SKIPPED_TYPES = {"new_articles": "articles_skipped"}
+
+
+@dataclass(frozen=True)
+class Frame:
+    """已序列化的一帧，在所有客户端队列间共享，不可修改。"""
+
+    type: str
+    text: str
+    policy: str = "keep"  # keep / merge / drop
+    count: int = 1  # 帧内的条数，合并时累加
+    seq: Optional[int] = None
+
+
+class ClientQueue:
+    def __init__(self, websocket: WebSocket, maxsize: int = QUEUE_SIZE, send_timeout: float = SEND_TIMEOUT_SECONDS):
+        self.websocket = websocket
+        self.maxsize = maxsize
+        self.send_timeout = send_timeout
+        self.frames: deque[Frame] = deque()
+        self.dropped = 0
+        self.cursor = 0  # 已入队的最大 seq，补发与实时推送重叠时去重
+        self.closed = False
+        self._close_code = 1000
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, frame: Frame) -> bool:
+        """入队；队列已满且无法按策略腾出空间时返回 False。"""
+        if self.closed:
+            return False
+        if frame.seq is not None:
+            if frame.seq <= self.cursor:
+                return True
+            self.cursor = frame.seq
+        if len(self.frames) >= self.maxsize:
+            if frame.policy == "merge":
+                return self._merge(frame)
+            if frame.policy == "drop":
+                self.dropped += 1
+                if not self._remove_oldest(frame.type):
+                    return True  # 没有可丢的同类帧，丢弃新帧
+            else:
+                return False
+        self.frames.append(frame)
+        self._wake.set()
+        return True
+
+    def _remove_oldest(self, frame_type: str) -> bool:
+        for i, queued in enumerate(self.frames):
+            if queued.type == frame_type:
+                del self.frames[i]
+                return True
+        return False
+
+    def _merge(self, frame: Frame) -> bool:
+        skipped_type = SKIPPED_TYPES.get(frame.type, f"{frame.type}_skipped")
+        merged = [f for f in self.frames if f.type in (frame.type, skipped_type)]
+        if not merged:
+            return False
+        count = sum(f.count for f in merged) + frame.count
+        self.frames = deque(f for f in self.frames if f.type not in (frame.type, skipped_type))
+        self.frames.append(Frame(
+            skipped_type, encode(skipped_type, {"count": count}, frame.seq), "merge", count, frame.seq,
+        ))
+        self.dropped += len(merged) + 1
+        self._wake.set()
+        return True
+
+    def rewind(self, seq: int) -> None:
+        """丢弃已入队的事件帧，从 seq 之后重新入队（补发前调用，保证顺序）。"""
+        self.frames = deque(f for f in self.frames if f.seq is None)
+        self.cursor = seq
+
+    def evict(self) -> None:
+        """断开慢客户端：清空队列，由发送任务关闭连接。"""
+        self.closed = True
+        self._close_code = CLOSE_TRY_AGAIN_LATER
+        self.frames.clear()
+        self._wake.set()
+
+    async def stop(self) -> None:
+        """连接已由对端关闭时停止发送任务。"""
+        self.closed = True
+        self.frames.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        try:
+            while not self.closed:
+                if not self.frames:
+                    self._wake.clear()
+                    await self._wake.wait()
+                    continue
+                frame = self.frames.popleft()
+                await asyncio.wait_for(self.websocket.send_text(frame.text), self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"WebSocket client too slow (send > {self.send_timeout}s), disconnecting")
+            self.closed = True
+            self._close_code = CLOSE_TRY_AGAIN_LATER
+        except Exception as e:
+            logger.debug(f"WebSocket send failed: {e}")
+            self.closed = True
+        try:
+            await self.websocket.close(code=self._close_code)
+        except Exception:
+            pass
+
+
+def split_by_agent(data: Any, agent_key: Optional[str] = None) -> list[tuple[Optional[str], Any]]:
+    """列表按条目的 agent_key 拆成多个事件，便于按 agent 建索引；单个对象取自身的 agent_key。"""
+    if isinstance(data, list):
+        groups: dict[Optional[str], list] = {}
+        for item in data:
+            groups.setdefault(agent_key or item.get("agent_key"), []).append(item)
+        return list(groups.items())
+    return [(agent_key or (data.get("agent_key") if isinstance(data, dict) else None), data)]
+
+
+class Broadcaster:
+    def __init__(
+        self,
+        queue_size: int = QUEUE_SIZE,
+        send_timeout: float = SEND_TIMEOUT_SECONDS,
+        replay_size: int = REPLAY_BUFFER_SIZE,
+        spill: Optional[EventSpill] = None,
+    ):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.clients: set[ClientQueue] = set()
+        self.index = SubscriptionIndex()
+        self.evicted = 0
+        self.seq = int(time.time() * 1000)
+        self.replay = ReplayBuffer(replay_size, floor=self.seq)
+        self.spill = spill
+
+    async def start(self) -> None:
+        """启用落盘时接续磁盘上的 seq，并启动后台写入。"""
+        if self.spill is None:
+            return
+        try:
+            last = await self.spill.last_seq()
+        except Exception as e:
+            logger.warning(f"WebSocket event spill unavailable: {e}")
+            self.spill = None
+            return
+        if last > self.seq:
+            self.seq = self.replay.floor = last
+        self.spill.start()
+
+    async def stop(self) -> None:
+        if self.spill is not None:
+            await self.spill.stop()
+
+    def connect(self, websocket: WebSocket) -> ClientQueue:
+        client = ClientQueue(websocket, self.queue_size, self.send_timeout)
+        client.start()
+        self.clients.add(client)
+        self.index.assign(client, Subscription())
+        logger.info(f"WebSocket client connected. Total: {len(self.clients)}")
+        return client
+
+    async def disconnect(self, client: ClientQueue) -> None:
+        self.clients.discard(client)
+        self.index.remove(client)
+        await client.stop()
+        logger.info(f"WebSocket client disconnected. Total: {len(self.clients)}")
+
+    def subscribe(self, client: ClientQueue, subscription: Subscription) -> None:
+        if client in self.clients:
+            self.index.assign(client, subscription)
+
+    def send(self, client: ClientQueue, event_type: str, data: Any) -> None:
+        """只发给单个客户端（如订阅确认）。"""
+        self._put(client, Frame(event_type, encode(event_type, data)))
+
+    def publish(self, event_type: str, data: Any, policy: str = "keep", agent_key: Optional[str] = None) -> int:
+        """分配 seq、记录事件并按订阅放入各客户端队列，不等待发送；返回入队的客户端数。
+
+        data 为列表时按条目筛选，agent_key 缺省取各条目自身的 agent_key（不同 agent 的条目分成多个事件）。
+        """
+        queued: set[ClientQueue] = set()
+        for agent, payload in split_by_agent(data, agent_key):
+            self.seq += 1
+            event = Event(self.seq, event_type, agent, payload, policy)
+            if self.spill is not None:
+                self.spill.add(event)
+            queued |= self._record(event)
+        return len(queued)
+
+    def deliver(self, event: Event) -> int:
+        """推送已由跨进程通道分配 seq 并落盘的事件。"""
+        self.seq = max(self.seq, event.seq)
+        return len(self._record(event))
+
+    def _record(self, event: Event) -> set[ClientQueue]:
+        self.replay.append(event)
+        return self._fan_out(event)
+
+    def _fan_out(self, event: Event) -> set[ClientQueue]:
+        frames: dict[Optional[tuple[int, ...]], Frame] = {}
+        queued = set()
+        for client in self.index.match(event.type, event.agent_key):
+            picked = self._select(self.index.get(client), event)
+            if picked == ():
+                continue
+            frame = frames.get(picked)
+            if frame is None:
+                frame = frames[picked] = self._frame(event, picked)
+            if self._put(client, frame):
+                queued.add(client)
+        return queued
+
+    @staticmethod
+    def _select(subscription: Subscription, event: Event) -> Optional[tuple[int, ...]]:
+        """订阅选中的条目下标；None 表示整个事件，() 表示不相关。"""
+        if not subscription.filters_items:
+            return None
+        if isinstance(event.data, list):
+            return tuple(i for i, item in enumerate(event.data) if subscription.accepts(item))
+        if isinstance(event.data, dict) and not subscription.accepts(event.data):
+            return ()
+        return None
+
+    @staticmethod
+    def _frame(event: Event, picked: Optional[tuple[int, ...]]) -> Frame:
+        if picked is None or len(picked) == event.count:
+            return Frame(event.type, event.encode(), event.policy, event.count, event.seq)
+        selected = [event.data[i] for i in picked]
+        return Frame(event.type, event.encode(selected), event.policy, len(selected), event.seq)
+
+    async def resume(self, client: ClientQueue, last_seq: int) -> None:
+        """补发 last_seq 之后、该客户端订阅范围内的事件；无法补齐或缺口过大时改发 resync。"""
+        if last_seq > self.seq:
+            self._resync(client)
+            return
+        earlier: list[Event] = []
+        floor = self.replay.floor
+        if not self.replay.covers(last_seq):
+            loaded = None
+            if self.spill is not None:
+                try:
+                    loaded = await self.spill.load(last_seq, floor, MAX_REPLAY_FRAMES * 4)
+                except Exception as e:
+                    logger.warning(f"WebSocket replay from spill failed: {e}")
+            # 读取期间缓冲又向前滚动，中间的事件可能不在已读取的范围内
+            if loaded is None or self.replay.floor != floor:
+                self._resync(client)
+                return
+            earlier = loaded
+        if client not in self.clients:
+            return
+
+        subscription = self.index.get(client)
+        frames = []
+        for event in earlier + self.replay.since(last_seq):
+            if not self.index.interested(subscription, event.type, event.agent_key):
+                continue
+            picked = self._select(subscription, event)
+            if picked != ():
+                frames.append(self._frame(event, picked))
+            if len(frames) > MAX_REPLAY_FRAMES:
+                self._resync(client)
+                return
+        client.rewind(last_seq)
+        for frame in frames:
+            if not self._put(client, frame):
+                return
+        logger.debug(f"Replayed {len(frames)} WebSocket frames after seq {last_seq}")
+
+    def _resync(self, client: ClientQueue) -> None:
+        """客户端缺失的事件无法补齐：通知其整体刷新，并从当前 seq 继续推送。"""
+        client.rewind(self.seq)
+        self.send(client, "resync", {"seq": self.seq})
+
+    def _put(self, client: ClientQueue, frame: Frame) -> bool:
+        if client.put(frame):
+            return True
+        self.clients.discard(client)
+        self.index.remove(client)
+        if not client.closed:
+            self.evicted += 1
+            logger.warning(f"Evicting slow WebSocket client ({len(client.frames)} frames queued)")
+            client.evict()
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self.clients),
+            "subscriptions": len(self.index),
+            "queued": sum(len(c.frames) for c in self.clients),
+            "dropped": sum(c.dropped for c in self.clients),
+            "evicted": self.evicted,
+            "seq": self.seq,
+            "replay_buffered": len(self.replay),
+        }
+
+
+broadcaster = Broadcaster(
+    replay_size=settings.WS_REPLAY_BUFFER,
+    # sqlite 事件通道本身就把事件写入 ws_events，补发时同样从中读取
+    spill=(
+        EventSpill(async_session, settings.WS_REPLAY_RETENTION_HOURS)
+        if settings.WS_REPLAY_SPILL or settings.WS_BACKPLANE == "sqlite" else None
+    ),
+)
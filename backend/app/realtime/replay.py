@@ -0,0 +1,161 @@
+"""WebSocket 补发：每个广播事件带单调递增的 seq，保留在有界环形缓冲中，可选落盘到 SQLite。
+
+客户端重连时带上 last_seq，只补发其后的事件；能否补齐由"已丢弃的最大 seq"（floor）判断：
+last_seq >= floor 说明其后的事件都还在。seq 以进程启动时的毫秒时间戳为起点，
+重启后不会与旧 seq 重叠；未落盘时重启前的 last_seq 一律低于新的 floor，需整体刷新。
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import delete, func, select
+
+from app.models.broadcast_event import BroadcastEvent
+
+logger = logging.getLogger(__name__)
+
+SPILL_FLUSH_SECONDS = 1.0
+SPILL_PURGE_SECONDS = 600
+
+
+class Event:
+    __slots__ = ("seq", "type", "agent_key", "data", "policy", "_text")
+
+    def __init__(self, seq: int, event_type: str, agent_key: Optional[str], data: Any, policy: str = "keep"):
+        self.seq = seq
+        self.type = event_type
+        self.agent_key = agent_key
+        self.data = data
+        self.policy = policy
+        self._text: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: BroadcastEvent) -> "Event":
+        return cls(row.seq, row.event_type, row.agent_key, json.loads(row.data), row.policy)
+
+    @property
+    def count(self) -> int:
+        return len(self.data) if isinstance(self.data, list) else 1
+
+    def encode(self, data: Any = None) -> str:
+        """序列化为一帧；data 为筛选后的子集，缺省为完整事件（结果缓存，供多个客户端共享）。"""
+        if data is not None and data is not self.data:
+            return encode(self.type, data, self.seq)
+        if self._text is None:
+            self._text = encode(self.type, self.data, self.seq)
+        return self._text
+
+
+def encode(event_type: str, data: Any, seq: Optional[int] = None) -> str:
+    frame = {"type": event_type, "data": data} if seq is None else {"type": event_type, "seq": seq, "data": data}
+    return json.dumps(frame, ensure_ascii=False, default=str)
+
+
+class ReplayBuffer:
+    def __init__(self, size: int, floor: int):
+        self.size = size
+        self.floor = floor  # 已不在缓冲中的最大 seq
+        self._events: deque[Event] = deque()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def append(self, event: Event) -> None:
+        self._events.append(event)
+        while len(self._events) > self.size:
+            self.floor = self._events.popleft().seq
+
+    def covers(self, seq: int) -> bool:
+        return seq >= self.floor
+
+    def since(self, seq: int) -> list[Event]:
+        return [e for e in self._events if e.seq > seq]
+
+
+class EventSpill:
+    """把事件批量写入 ws_events，保留 retention_hours 小时。写入在后台进行，不阻塞广播。"""
+
+    def __init__(self, session_factory, retention_hours: int = 24):
+        self.session_factory = session_factory
+        self.retention = timedelta(hours=retention_hours)
+        self._pending: list[BroadcastEvent] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, event: Event) -> None:
+        if self._task is None:
+            return  # 未启动（如测试或启动失败）时不积压
+        self._pending.append(BroadcastEvent(
+            seq=event.seq,
+            event_type=event.type,
+            agent_key=event.agent_key,
+            policy=event.policy,
+            data=json.dumps(event.data, ensure_ascii=False, default=str),
+            created_at=datetime.now(),
+        ))
+
+    async def last_seq(self) -> int:
+        async with self.session_factory() as session:
+            return (await session.execute(select(func.max(BroadcastEvent.seq)))).scalar() or 0
+
+    async def load(self, after: int, upto: int, limit: int) -> Optional[list[Event]]:
+        """读取 (after, upto] 的事件；磁盘上已不完整（早于保留期）时返回 None。"""
+        await self.flush()
+        async with self.session_factory() as session:
+            oldest = (await session.execute(select(func.min(BroadcastEvent.seq)))).scalar()
+            if oldest is None or after < oldest:
+                return None
+            rows = (await session.execute(
+                select(BroadcastEvent)
+                .where(BroadcastEvent.seq > after, BroadcastEvent.seq <= upto)
+                .order_by(BroadcastEvent.seq)
+                .limit(limit)
+            )).scalars().all()
+        return [Event.from_row(r) for r in rows]
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        async with self.session_factory() as session:
+            session.add_all(rows)
+            await session.commit()
+
+    async def purge(self) -> None:
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(BroadcastEvent).where(BroadcastEvent.created_at < datetime.now() - self.retention)
+            )
+            await session.commit()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"WebSocket event spill flush failed: {e}")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_purge = loop.time()
+        while True:
+            await asyncio.sleep(SPILL_FLUSH_SECONDS)
+            try:
+                await self.flush()
+                if loop.time() >= next_purge:
+                    await self.purge()
+                    next_purge = loop.time() + SPILL_PURGE_SECONDS
+            except Exception as e:
+                logger.error(f"WebSocket event spill error: {e}")
@@ -0,0 +1,138 @@
+"""WebSocket 订阅：客户端发送 {"type": "subscribe", ...} 声明关心的事件，服务端按 (事件类型, agent) 建索引，
+每个事件只与可能感兴趣的客户端做细粒度匹配。
+
+未发送订阅的客户端沿用旧行为：接收所有 agent 的新文章和预警；CS2 价格与预测需显式订阅。
+"""
+from collections import defaultdict
+from collections.abc import Hashable, Iterable
+from dataclasses import dataclass
+from typing import Optional
+
+ALL = "*"
+
+# 可订阅的事件类型
+TOPICS = frozenset({"new_articles", "new_alert", "cs2_price_ticks", "cs2_predictions"})
+DEFAULT_TOPICS = frozenset({"new_articles", "new_alert"})
+MAX_FILTER_VALUES = 200
+
+
+def _values(payload: dict, key: str, cast=str) -> Optional[frozenset]:
+    raw = payload.get(key)
+    if raw is None or raw == []:
+        return None
+    if not isinstance(raw, list):
+        raw = [raw]
+    if len(raw) > MAX_FILTER_VALUES:
+        raise ValueError(f"too many values for {key} (max {MAX_FILTER_VALUES})")
+    try:
+        return frozenset(cast(v) for v in raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid value for {key}")
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """各条件为 None 表示不限；条件只作用于带有该字段的事件（如 min_importance 不影响 CS2 价格）。"""
+
+    topics: frozenset[str] = DEFAULT_TOPICS
+    agent_keys: Optional[frozenset[str]] = None
+    categories: Optional[frozenset[str]] = None
+    sources: Optional[frozenset[str]] = None
+    min_importance: int = 0
+    item_ids: Optional[frozenset[int]] = None  # CS2 饰品
+
+    @classmethod
+    def parse(cls, payload: dict) -> "Subscription":
+        """解析客户端的订阅消息，非法时抛出 ValueError。"""
+        topics = _values(payload, "topics") or DEFAULT_TOPICS
+        unknown = topics - TOPICS
+        if unknown:
+            raise ValueError(f"unknown topics: {', '.join(sorted(unknown))}")
+        try:
+            min_importance = int(payload.get("min_importance") or 0)
+        except (TypeError, ValueError):
+            raise ValueError("invalid value for min_importance")
+        return cls(
+            topics=topics,
+            agent_keys=_values(payload, "agent_keys"),
+            categories=_values(payload, "categories"),
+            sources=_values(payload, "sources"),
+            min_importance=min_importance,
+            item_ids=_values(payload, "item_ids", int),
+        )
+
+    @property
+    def filters_items(self) -> bool:
+        return bool(self.categories or self.sources or self.min_importance or self.item_ids)
+
+    def accepts(self, item: dict) -> bool:
+        if self.categories is not None and "category" in item and item["category"] not in self.categories:
+            return False
+        if self.sources is not None and "source" in item and item["source"] not in self.sources:
+            return False
+        if self.min_importance and "importance" in item and (item["importance"] or 0) < self.min_importance:
+            return False
+        if self.item_ids is not None and "item_id" in item and item["item_id"] not in self.item_ids:
+            return False
+        return True
+
+    def to_dict(self) -> dict:
+        def listed(values):
+            return sorted(values) if values is not None else None
+
+        return {
+            "topics": sorted(self.topics),
+            "agent_keys": listed(self.agent_keys),
+            "categories": listed(self.categories),
+            "sources": listed(self.sources),
+            "min_importance": self.min_importance,
+            "item_ids": listed(self.item_ids),
+        }
+
+
+class SubscriptionIndex:
+    """(事件类型, agent_key) → 客户端；不限 agent 的订阅登记在 ALL 下。"""
+
+    def __init__(self):
+        self._index: dict[tuple[str, str], set[Hashable]] = defaultdict(set)
+        self._subscriptions: dict[Hashable, Subscription] = {}
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def get(self, client: Hashable) -> Optional[Subscription]:
+        return self._subscriptions.get(client)
+
+    def assign(self, client: Hashable, subscription: Subscription) -> None:
+        self.remove(client)
+        self._subscriptions[client] = subscription
+        for key in self._keys(subscription):
+            self._index[key].add(client)
+
+    def remove(self, client: Hashable) -> None:
+        subscription = self._subscriptions.pop(client, None)
+        if subscription is None:
+            return
+        for key in self._keys(subscription):
+            clients = self._index.get(key)
+            if clients is not None:
+                clients.discard(client)
+                if not clients:
+                    del self._index[key]
+
+    def match(self, event_type: str, agent_key: Optional[str]) -> set[Hashable]:
+        matched = set(self._index.get((event_type, ALL), ()))
+        if agent_key:
+            matched |= self._index.get((event_type, agent_key), set())
+        return matched
+
+    @staticmethod
+    def interested(subscription: Subscription, event_type: str, agent_key: Optional[str]) -> bool:
+        return event_type in subscription.topics and (
+            subscription.agent_keys is None or agent_key in subscription.agent_keys
+        )
+
+    @staticmethod
+    def _keys(subscription: Subscription) -> Iterable[tuple[str, str]]:
+        agents = subscription.agent_keys or (ALL,)
+        return [(topic, agent) for topic in subscription.topics for agent in agents]
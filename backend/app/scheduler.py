@@ -2,15 +2,23 @@ import logging
 from datetime import datetime, timedelta
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy import select, delete
+from sqlalchemy import delete
 
 from app.database import async_session
 from app.models.article import Article
-from app.models.setting import SystemSetting
+from app.models.llm_usage import LLMUsage
+from app.models.sentiment import SentimentSnapshot
+from app.ai.usage import usage_meter, usage_scope
+from app.platform.response_cache import response_cache
+from app.platform.settings_cache import settings_cache
 from app.sources.manager import fetch_all_sources
 from app.sources.twitter import TwitterSource
+from app.skills import rollup
+from app.skills.scoring_queue import purge_orphans
+from app.skills.sentiment import sentiment_aggregator, SNAPSHOT_INTERVAL_MINUTES
 from app.skills.engine import run_importance_scoring, generate_daily_report, run_anomaly_detection, generate_twitter_digest
 from app.notifiers.manager import push_important_news, push_news_digest
+from app.notifiers.outbox import purge as purge_outbox
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +27,8 @@ scheduler = AsyncIOScheduler()
 
 async def _get_interval(key: str, default: int) -> int:
     try:
-        async with async_session() as session:
-            result = await session.execute(
-                select(SystemSetting).where(SystemSetting.key == key)
-            )
-            s = result.scalar_one_or_none()
-            return int(s.value) if s and s.value else default
+        value = await settings_cache.get(key)
+        return int(value) if value else default
     except Exception:
         return default
 
@@ -40,6 +44,13 @@ async def job_fetch_news():
         logger.error(f"News fetch job error: {e}")
 
 
+async def job_score_queue():
+    try:
+        await run_importance_scoring()
+    except Exception as e:
+        logger.error(f"Scoring queue job error: {e}")
+
+
 async def job_push_important():
     try:
         await push_important_news()
@@ -61,6 +72,13 @@ async def job_anomaly_check():
         logger.error(f"Anomaly check job error: {e}")
 
 
+async def job_sentiment_snapshot():
+    try:
+        await sentiment_aggregator.emit("investment")
+    except Exception as e:
+        logger.error(f"Sentiment snapshot job error: {e}")
+
+
 async def job_morning_report():
     try:
         await generate_daily_report("morning")
@@ -78,19 +96,35 @@ async def job_evening_report():
 async def job_cleanup():
     try:
         async with async_session() as session:
-            cutoff = datetime.now() - timedelta(days=30)
+            # 按整点截止，与小时汇总的删除范围一致
+            cutoff = rollup.hour_of(datetime.now() - timedelta(days=30))
             await session.execute(
                 delete(Article).where(Article.fetched_at < cutoff)
             )
+            await rollup.purge(session, cutoff)
+            await purge_orphans(session)
+            await purge_outbox(session)
+            await session.execute(
+                delete(LLMUsage).where(LLMUsage.created_at < datetime.now() - timedelta(days=90))
+            )
+            await session.execute(
+                delete(SentimentSnapshot).where(SentimentSnapshot.snapshot_time < datetime.now() - timedelta(days=90))
+            )
             await session.commit()
-            logger.info("Cleaned up old articles")
+        # 跨 agent 的清理，整体清空
+        await response_cache.clear()
+        logger.info("Cleaned up old articles")
     except Exception as e:
         logger.error(f"Cleanup job error: {e}")
 
 
 async def job_twitter_digest():
     try:
-        await generate_twitter_digest()
+        if await usage_meter.budget_exhausted("investment"):
+            logger.info("Twitter digest deferred: daily token budget exhausted")
+            return
+        with usage_scope(priority="low"):
+            await generate_twitter_digest()
     except Exception as e:
         logger.error(f"Twitter digest job error: {e}")
 
@@ -119,9 +153,11 @@ async def job_fetch_twitter():
 
 def start_scheduler():
     scheduler.add_job(job_fetch_news, "interval", minutes=15, id="fetch_news", replace_existing=True)
+    scheduler.add_job(job_score_queue, "interval", minutes=1, id="score_queue", replace_existing=True)
     scheduler.add_job(job_push_important, "interval", minutes=5, id="push_important", replace_existing=True)
     scheduler.add_job(job_push_digest, "interval", minutes=30, id="push_digest", replace_existing=True)
     scheduler.add_job(job_anomaly_check, "interval", minutes=10, id="anomaly_check", replace_existing=True)
+    scheduler.add_job(job_sentiment_snapshot, "interval", minutes=SNAPSHOT_INTERVAL_MINUTES, id="sentiment_snapshot", replace_existing=True)
     scheduler.add_job(job_morning_report, "cron", hour=7, minute=30, id="morning_report", replace_existing=True)
     scheduler.add_job(job_evening_report, "cron", hour=22, minute=0, id="evening_report", replace_existing=True)
     scheduler.add_job(job_cleanup, "cron", hour=3, minute=0, id="cleanup", replace_existing=True)
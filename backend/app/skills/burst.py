@@ -0,0 +1,411 @@
+"""突发检测：入库时按 来源 / 分类 / 关键词 统计每 BUCKET_MINUTES 分钟的文章数，
+用 EWMA 维护各序列的均值与方差，当前时段数量的 z 值超过阈值即生成预警并立即推送。
+
+- 不依赖 LLM 评分，AI 关闭时同样工作
+- 文章按发布时间归入时段（缺失时用抓取时间），断线后补抓的积压文章不会挤进同一时段
+- 同一事件的多个关键词合并为一条预警，文章已被来源 / 分类突增覆盖的关键词不再单独预警
+- 同一序列每小时至多一条预警：指纹 burst:<agent>:<维度>:<值>:<小时>，去重为一次索引查询；
+  合并的关键词预警以 z 值最高的词为值，同一小时内与已发预警有共同关键词的不再预警
+- 进程启动后首次使用某 agent 时按时间顺序回放最近 24 小时的文章建立基线（不预警）
+"""
+import asyncio
+import hashlib
+import logging
+import math
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.alert import Alert
+from app.models.article import Article
+from app.platform.response_cache import response_cache
+from app.platform.settings_cache import settings_cache
+from app.skills.keywords import article_terms
+
+logger = logging.getLogger(__name__)
+
+BUCKET_MINUTES = 10
+ALPHA = 0.05  # EWMA 平滑系数，约等于最近 20 个时段（3 小时左右）的平均
+WARMUP_BUCKETS = 12  # 序列至少观测 2 小时后才参与检测
+MAX_GAP_BUCKETS = 144  # 长时间无数据时最多补入的空时段数
+MAX_SERIES = 5000  # 关键词序列按最近更新淘汰
+MAX_KEYWORD_ALERTS = 3  # 每批入库最多生成的关键词预警
+SAMPLE_ARTICLES = 10
+HIGH_ZSCORE = 8.0  # z 值达到该值时预警级别为 high
+REPLAY_HOURS = 24
+
+DEFAULT_BURST_CONFIG = {"enabled": True, "z_threshold": 4.0}
+# 各维度触发所需的最少文章数，避免低基数序列的噪声
+MIN_COUNTS = {"source": 5, "category": 8, "keyword": 4}
+DIMENSION_LABELS = {"source": "来源", "category": "分类", "keyword": "关键词"}
+
+
+@dataclass
+class _Series:
+    bucket: datetime
+    mean: float = 0.0
+    var: float = 0.0
+    seen: int = 0
+    count: int = 0
+    article_ids: list[int] = field(default_factory=list)
+
+    def _fold(self, value: float) -> None:
+        if self.seen == 0:
+            self.mean = value
+            self.seen = 1
+            return
+        diff = value - self.mean
+        incr = ALPHA * diff
+        self.mean += incr
+        self.var = (1 - ALPHA) * (self.var + diff * incr)
+        self.seen += 1
+
+    def advance(self, bucket: datetime, bucket_minutes: int) -> None:
+        """进入新时段：上一时段的计数并入基线，中间没有文章的时段按 0 并入。"""
+        if bucket <= self.bucket:
+            return
+        gap = int((bucket - self.bucket).total_seconds() // (bucket_minutes * 60))
+        self._fold(self.count)
+        for _ in range(min(gap - 1, MAX_GAP_BUCKETS)):
+            self._fold(0)
+        self.bucket = bucket
+        self.count = 0
+        self.article_ids = []
+
+    def zscore(self) -> float:
+        # 低均值序列近似泊松分布，标准差至少取 sqrt(max(均值, 1))
+        std = max(math.sqrt(self.var), math.sqrt(max(self.mean, 1.0)))
+        return (self.count - self.mean) / std
+
+
+@dataclass
+class Burst:
+    agent_key: str
+    dimension: str
+    value: str
+    count: int
+    baseline: float
+    std: float
+    zscore: float
+    bucket: datetime
+    article_ids: list[int]
+    terms: list[str] = field(default_factory=list)  # 合并的关键词
+    label: str = ""  # 合并后的展示名称，只用于标题与描述，不参与指纹
+
+    @property
+    def fingerprint(self) -> str:
+        hour = _hour_key(self.bucket)
+        raw = f"{self.agent_key}:{self.dimension}:{self.value}:{hour}"
+        return "burst:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:32]
+
+
+async def get_burst_config() -> dict:
+    config = dict(DEFAULT_BURST_CONFIG)
+    try:
+        values = await settings_cache.get_many(["burst_detection_enabled", "burst_z_threshold"])
+        if "burst_detection_enabled" in values:
+            config["enabled"] = values["burst_detection_enabled"] == "true"
+        if values.get("burst_z_threshold"):
+            config["z_threshold"] = float(values["burst_z_threshold"])
+    except Exception:
+        return dict(DEFAULT_BURST_CONFIG)
+    return config
+
+
+class BurstDetector:
+    def __init__(self, bucket_minutes: int = BUCKET_MINUTES, max_series: int = MAX_SERIES):
+        self.bucket_minutes = bucket_minutes
+        self.max_series = max_series
+        self._series: OrderedDict[tuple[str, str, str], _Series] = OrderedDict()
+        # 各 agent 最早观测到的时段：之后才出现的序列视为此前一直为 0
+        self._origin: dict[str, datetime] = {}
+        self._loaded: set[str] = set()
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._pushes: set[asyncio.Task] = set()
+
+    def _bucket(self, ts: datetime) -> datetime:
+        if ts.tzinfo is not None:
+            ts = ts.astimezone().replace(tzinfo=None)
+        minute = ts.minute - ts.minute % self.bucket_minutes
+        return ts.replace(minute=minute, second=0, microsecond=0)
+
+    def _count(self, agent_key: str, article_id: Optional[int], ts: datetime, keys: Iterable[tuple[str, str]]) -> list[tuple[str, str, str]]:
+        bucket = self._bucket(ts)
+        origin = self._origin.setdefault(agent_key, bucket)
+        touched = []
+        for dimension, value in keys:
+            key = (agent_key, dimension, value)
+            series = self._series.get(key)
+            if series is None:
+                history = int((bucket - origin).total_seconds() // (self.bucket_minutes * 60))
+                series = self._series[key] = _Series(bucket=bucket, seen=max(history, 0))
+            else:
+                if bucket < series.bucket:
+                    continue  # 补抓的较早文章：所属时段已并入基线
+                self._series.move_to_end(key)
+                series.advance(bucket, self.bucket_minutes)
+            series.count += 1
+            if article_id is not None and len(series.article_ids) < SAMPLE_ARTICLES:
+                series.article_ids.append(article_id)
+            touched.append(key)
+        while len(self._series) > self.max_series:
+            self._series.popitem(last=False)
+        return touched
+
+    @staticmethod
+    def _keys(source: Optional[str], category: Optional[str], title: Optional[str], summary: Optional[str]) -> list[tuple[str, str]]:
+        keys = []
+        if source:
+            keys.append(("source", source))
+        if category:
+            keys.append(("category", category))
+        keys.extend(("keyword", term) for term in sorted(article_terms(title, summary)))
+        return keys
+
+    async def ensure_loaded(self, agent_key: str, skip_ids: Iterable[int] = ()) -> None:
+        if agent_key in self._loaded:
+            return
+        lock = self._locks.setdefault(agent_key, asyncio.Lock())
+        async with lock:
+            if agent_key in self._loaded:
+                return
+            skip = set(skip_ids)
+            try:
+                async with async_session() as session:
+                    rows = (await session.execute(
+                        select(
+                            Article.id, Article.published_at, Article.fetched_at,
+                            Article.source, Article.category, Article.title, Article.summary,
+                        )
+                        .where(Article.agent_key == agent_key)
+                        .where(Article.fetched_at >= datetime.now() - timedelta(hours=REPLAY_HOURS))
+                    )).all()
+            except Exception as e:
+                logger.warning(f"Burst baseline replay for {agent_key} failed: {e}")
+                rows = []
+            now = datetime.now()
+            timed = sorted(
+                ((_event_time(row.published_at, row.fetched_at, now), row) for row in rows if row.id not in skip),
+                key=lambda pair: pair[0],
+            )
+            for ts, row in timed:
+                self._count(agent_key, row.id, ts, self._keys(row.source, row.category, row.title, row.summary))
+            self._loaded.add(agent_key)
+            logger.info(f"Burst baselines for {agent_key} replayed from {len(rows)} articles")
+
+    def detect(self, agent_key: str, articles: Iterable[Article], z_threshold: float) -> list[Burst]:
+        """计入一批文章，返回当前时段超过阈值的序列（每个序列至多一条）。"""
+        now = datetime.now()
+        articles = list(articles)
+        timed = sorted(
+            ((_event_time(a.published_at, a.fetched_at, now), a) for a in articles), key=lambda pair: pair[0],
+        )
+        touched: dict[tuple[str, str, str], None] = {}
+        for ts, article in timed:
+            keys = self._keys(article.source, article.category, article.title, article.summary)
+            for key in self._count(agent_key, article.id, ts, keys):
+                touched[key] = None
+
+        bursts: list[Burst] = []
+        for key in touched:
+            series = self._series.get(key)
+            if series is None or series.seen < WARMUP_BUCKETS:
+                continue
+            _, dimension, value = key
+            if series.count < MIN_COUNTS[dimension]:
+                continue
+            z = series.zscore()
+            if z < z_threshold:
+                continue
+            bursts.append(Burst(
+                agent_key=agent_key, dimension=dimension, value=value, count=series.count,
+                baseline=series.mean, std=math.sqrt(series.var), zscore=z,
+                bucket=series.bucket, article_ids=list(series.article_ids),
+            ))
+
+        structural = [b for b in bursts if b.dimension != "keyword"]
+        covered = {i for b in structural for i in b.article_ids}
+        titles = {a.id: a.title for a in articles if a.title}
+        keywords = _merge_keywords([b for b in bursts if b.dimension == "keyword"], covered, titles)
+        return structural + keywords[:MAX_KEYWORD_ALERTS]
+
+    async def observe(self, agent_key: str, articles: Iterable[Article]) -> list[Alert]:
+        """入库后调用：检测突发并写入预警，随后在后台推送。"""
+        articles = list(articles)
+        config = await get_burst_config()
+        if not config["enabled"] or not articles:
+            return []
+        await self.ensure_loaded(agent_key, skip_ids=[a.id for a in articles])
+        bursts = self.detect(agent_key, articles, config["z_threshold"])
+        if not bursts:
+            return []
+
+        titles = {a.id: a.title for a in articles}
+        async with async_session() as session:
+            fingerprints = [b.fingerprint for b in bursts]
+            existing = set((await session.execute(
+                select(Alert.fingerprint).where(Alert.fingerprint.in_(fingerprints))
+            )).scalars().all())
+            raised = await _raised_keyword_terms(session, agent_key) if any(b.terms for b in bursts) else {}
+            alerts = []
+            for burst in bursts:
+                if burst.fingerprint in existing:
+                    continue
+                if burst.terms:
+                    hour_terms = raised.setdefault(_hour_key(burst.bucket), [])
+                    if any(terms & set(burst.terms) for terms in hour_terms):
+                        continue  # 同一事件本小时已预警（新增的关键词改变了 z 值最高的词）
+                    hour_terms.append(set(burst.terms))
+                alerts.append(_to_alert(burst, titles))
+            if not alerts:
+                return []
+            session.add_all(alerts)
+            await session.commit()
+        await response_cache.invalidate(f"alerts:{agent_key}")
+
+        logger.info(f"Burst detector raised {len(alerts)} alerts for {agent_key}")
+        task = asyncio.create_task(_push_alerts(alerts))
+        self._pushes.add(task)
+        task.add_done_callback(self._pushes.discard)
+        return alerts
+
+    def reset(self) -> None:
+        self._series.clear()
+        self._origin.clear()
+        self._loaded.clear()
+
+
+def _hour_key(bucket: datetime) -> str:
+    return bucket.strftime("%Y%m%d%H")
+
+
+async def _raised_keyword_terms(session: AsyncSession, agent_key: str) -> dict[str, list[set[str]]]:
+    """最近发出的关键词预警：按所属小时列出各自的关键词集合。"""
+    rows = (await session.execute(
+        select(Alert.trigger_data)
+        .where(Alert.agent_key == agent_key)
+        .where(Alert.skill_name == "burst_detector")
+        .where(Alert.created_at >= datetime.utcnow() - timedelta(hours=2))
+    )).scalars().all()
+    raised: dict[str, list[set[str]]] = {}
+    for data in rows:
+        if data and data.get("dimension") == "keyword" and data.get("bucket_start"):
+            hour = _hour_key(datetime.fromisoformat(data["bucket_start"]))
+            raised.setdefault(hour, []).append(set(data.get("terms") or [data["value"]]))
+    return raised
+
+
+def _event_time(published_at: Optional[datetime], fetched_at: Optional[datetime], now: datetime) -> datetime:
+    """文章所属时段的时间：发布时间，限制在 [抓取时间 - REPLAY_HOURS, 抓取时间] 内；缺失时用抓取时间。"""
+    fetched = _naive(fetched_at or now)
+    if published_at is None:
+        return fetched
+    return min(max(_naive(published_at), fetched - timedelta(hours=REPLAY_HOURS)), fetched)
+
+
+def _naive(ts: datetime) -> datetime:
+    return ts.astimezone().replace(tzinfo=None) if ts.tzinfo is not None else ts
+
+
+def _merge_keywords(bursts: list[Burst], covered: set[int], titles: dict[int, str]) -> list[Burst]:
+    """同一事件的标题会拆出多个关键词（如“美联”“联储”“降息”）：文章重叠的关键词突增合并为一条，
+    以样例标题中被这些关键词连续覆盖的最长片段命名；文章全部已在来源 / 分类突增中的丢弃。按 z 值降序返回。"""
+    groups: list[tuple[set[int], list[Burst]]] = []
+    for burst in sorted(bursts, key=lambda b: -b.zscore):
+        ids = set(burst.article_ids)
+        if ids <= covered:
+            continue
+        members = [burst]
+        for group in [g for g in groups if g[0] & ids]:
+            groups.remove(group)
+            ids |= group[0]
+            members = group[1] + members
+        groups.append((ids, members))
+
+    merged = []
+    for _, members in groups:
+        members.sort(key=lambda b: -b.zscore)
+        top = members[0]
+        terms = [b.value for b in members]
+        article_ids = list(dict.fromkeys(i for b in members for i in b.article_ids))[:SAMPLE_ARTICLES]
+        name = _run_name(terms, [titles[i] for i in article_ids if i in titles]) or top.value
+        merged.append(replace(top, label=name, article_ids=article_ids, terms=terms))
+    return sorted(merged, key=lambda b: -b.zscore)
+
+
+def _run_name(terms: list[str], titles: list[str]) -> Optional[str]:
+    """标题中被 terms 连续覆盖的最长片段（英文词之间的单个空格视为连续）。"""
+    best = ""
+    for title in titles:
+        text = title.lower()
+        if len(text) != len(title):
+            title = text
+        covered = [False] * len(text)
+        for term in terms:
+            start = text.find(term)
+            while start != -1:
+                covered[start:start + len(term)] = [True] * len(term)
+                start = text.find(term, start + 1)
+        for i in range(1, len(text) - 1):
+            if text[i] == " " and covered[i - 1] and covered[i + 1]:
+                covered[i] = True
+        run = 0
+        for end, hit in enumerate(covered + [False]):
+            if hit:
+                run += 1
+                continue
+            if run > len(best):
+                best = title[end - run:end].strip()
+            run = 0
+    return best or None
+
+
+def _to_alert(burst: Burst, titles: dict[int, str]) -> Alert:
+    label = DIMENSION_LABELS[burst.dimension]
+    name = burst.label or burst.value
+    window_end = burst.bucket + timedelta(minutes=BUCKET_MINUTES)
+    samples = [titles[i] for i in burst.article_ids if i in titles][:5]
+    description = (
+        f"{label}「{name}」{burst.bucket:%H:%M}-{window_end:%H:%M} 出现 {burst.count} 篇文章，"
+        f"基线约 {burst.baseline:.1f} 篇/{BUCKET_MINUTES} 分钟（z={burst.zscore:.1f}）"
+    )
+    if samples:
+        description += "\n" + "\n".join(f"- {t}" for t in samples)
+    return Alert(
+        agent_key=burst.agent_key,
+        level="high" if burst.zscore >= HIGH_ZSCORE else "medium",
+        title=f"{label}突增：{name}",
+        description=description,
+        skill_name="burst_detector",
+        fingerprint=burst.fingerprint,
+        trigger_data={
+            "dimension": burst.dimension,
+            "value": burst.value,
+            "count": burst.count,
+            "baseline": round(burst.baseline, 2),
+            "std": round(burst.std, 2),
+            "zscore": round(burst.zscore, 2),
+            "bucket_start": burst.bucket.isoformat(),
+            "bucket_minutes": BUCKET_MINUTES,
+            "article_ids": burst.article_ids,
+            **({"terms": burst.terms, "label": burst.label} if burst.terms else {}),
+        },
+    )
+
+
+async def _push_alerts(alerts: list[Alert]) -> None:
+    from app.notifiers.manager import push_alert
+
+    for alert in alerts:
+        try:
+            await push_alert(alert)
+        except Exception as e:
+            logger.error(f"Burst alert push failed: {e}")
+
+
+burst_detector = BurstDetector()
@@ -1,16 +1,26 @@
+import asyncio
+import hashlib
 import json
 import logging
+import re
 from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
 
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.ai.client import chat_completion_json, chat_completion
+from app.ai.batching import AdaptiveBatcher, estimate_tokens
+from app.ai.client import ai_configured, chat_completion_json, chat_completion, chat_completion_stream, get_model_limits
+from app.ai.usage import scoped_stream, usage_scope
 from app.database import async_session
 from app.models.article import Article
 from app.models.alert import Alert
 from app.models.report import DailyReport
 from app.models.sentiment import SentimentSnapshot
+from app.platform.response_cache import response_cache
+from app.skills import prescorer, rollup, scoring_queue, summarizer
+from app.skills.sentiment import sentiment_aggregator
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +46,14 @@ AI 行业特殊规则（category=ai_industry 时应用以下加权）：
 {"results": [{"index": 1, "importance": 0-5, "sentiment": "bullish/bearish/neutral", "tags": ["标签"], "reason": "≤20字理由"}, ...]}
 注意：reason 限 20 字以内，tags 最多 3 个。"""
 
-BATCH_SIZE = 10  # 每批文章数，可按需调整
+BATCH_SIZE = 10  # 初始每批文章数，运行中按模型自适应调整
+MAX_BATCH_SIZE = 30
+SCORE_OUTPUT_TOKENS_PER_ITEM = 200
+
+# 日报/推特摘要：资讯量不超过阈值时单个 prompt 直接生成，否则分块摘要后汇总
+DIRECT_REPORT_ARTICLES = 30
+MAX_REPORT_ARTICLES = 400
+DIRECT_DIGEST_TWEETS = 60
 
 
 _TECH_SCORING_SYSTEM_PROMPT = """你是 AI/前沿技术资讯分析专家。请对以下技术资讯按重要度评分（关注 AI 行业 + 开源社区 + 大厂技术发布）。
@@ -73,7 +90,7 @@ async def _score_batch(articles: list[Article], agent_key: str = "investment") -
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": f"请评分以下 {len(articles)} 条资讯：\n\n{articles_text}"},
     ]
-    result = await chat_completion_json(messages, max_tokens=200 * len(articles))
+    result = await chat_completion_json(messages, max_tokens=SCORE_OUTPUT_TOKENS_PER_ITEM * len(articles))
     if not result or not isinstance(result.get("results"), list):
         return {}
 
@@ -86,87 +103,215 @@ async def _score_batch(articles: list[Article], agent_key: str = "investment") -
     return out
 
 
-async def run_importance_scoring(agent_key: str = "investment"):
-    """批量评分最近 24h 内未评分的文章，每批 BATCH_SIZE 篇合并为一次 API 调用。"""
+async def _save_analyses(analyses: dict[int, dict]) -> int:
+    """把一批评分结果写回数据库，使用独立的短会话。"""
+    if not analyses:
+        return 0
     async with async_session() as session:
-        since = datetime.now() - timedelta(hours=24)
-        q = (
-            select(Article)
-            .where(Article.agent_key == agent_key)
-            .where(Article.fetched_at >= since)
-            .where(Article.ai_analysis == None)  # noqa: E711
-            .order_by(desc(Article.fetched_at))
-            .limit(50)
+        before = (await session.execute(
+            select(Article.id, Article.agent_key, Article.fetched_at, Article.source, Article.category, Article.importance)
+            .where(Article.id.in_(analyses))
+        )).all()
+        for article_id, analysis in analyses.items():
+            await session.execute(
+                update(Article)
+                .where(Article.id == article_id)
+                .values(
+                    importance=int(analysis.get("importance", 0)),
+                    sentiment=analysis.get("sentiment"),
+                    ai_analysis=analysis,
+                    tags=",".join(analysis.get("tags", [])),
+                )
+            )
+        await rollup.record_importance(
+            session, [(row, int(analyses[row.id].get("importance", 0))) for row in before]
         )
-        result = await session.execute(q)
-        articles = result.scalars().all()
-        if not articles:
+        await session.commit()
+    await response_cache.invalidate(*{f"articles:{row.agent_key}" for row in before})
+    return len(analyses)
+
+
+async def _score_and_save(
+    batch: list[Article],
+    agent_key: str,
+    verdicts: Optional[dict[int, prescorer.PreScore]] = None,
+) -> dict[int, dict]:
+    """LLM 评分并写回一批，返回 {article.id: analysis}。附带本地预评分结论用于准确率统计。"""
+    analyses = await _score_batch(batch, agent_key=agent_key)
+    for article_id, analysis in analyses.items():
+        analysis["scored_by"] = "llm"
+        if verdicts and article_id in verdicts:
+            analysis["prescore"] = verdicts[article_id].to_dict()
+    await _save_analyses(analyses)
+    return analyses
+
+
+async def _prescore_locally(articles: list[Article]) -> tuple[list[Article], dict[int, prescorer.PreScore], dict[int, dict]]:
+    """本地预评分：有把握的低分直接写回（抽样的除外）。
+
+    返回 (需交给 LLM 的文章, 各文章的预评分结论, 本地评分结果 {article.id: analysis})。
+    """
+    config = await prescorer.get_prescore_config()
+    if not config["enabled"]:
+        return articles, {}, {}
+
+    verdicts = {a.id: prescorer.prescore_article(a, config) for a in articles}
+    local: dict[int, dict] = {}
+    remaining: list[Article] = []
+    for article in articles:
+        verdict = verdicts[article.id]
+        if not verdict.escalate and not prescorer.should_audit(config["audit_rate"]):
+            local[article.id] = prescorer.local_analysis(verdict)
+        else:
+            remaining.append(article)
+    await _save_analyses(local)
+    return remaining, verdicts, local
+
+
+def _article_tokens(article: Article) -> int:
+    return 20 + estimate_tokens(f"{article.title}{article.source}{article.category}{article.summary or ''}")
+
+
+scoring_batcher: AdaptiveBatcher[Article, dict] = AdaptiveBatcher(
+    "importance scoring",
+    default_size=BATCH_SIZE,
+    max_size=MAX_BATCH_SIZE,
+    output_tokens_per_item=SCORE_OUTPUT_TOKENS_PER_ITEM,
+    prompt_overhead_tokens=max(map(estimate_tokens, (_SCORING_SYSTEM_PROMPT, _TECH_SCORING_SYSTEM_PROMPT))) + 100,
+)
+
+
+_scoring_locks: dict[str, asyncio.Lock] = {}
+
+
+async def run_importance_scoring(agent_key: str = "investment", limit: Optional[int] = None):
+    """消费评分队列：按优先级领取至多 limit（默认 scoring_throughput）篇文章，
+    由 scoring_batcher 按 token 预算合并成若干次 API 调用。
+
+    各批并发提交（在途数量由 AI 客户端按服务商限流），每批完成即写回；
+    LLM 请求期间不持有数据库会话。结果不全的批次拆半重试，仍未评上的文章退避后重试。
+    AI 未配置时不领取任务；整轮没有任何结果（服务商不可用）时归还任务，不计重试次数。
+    """
+    lock = _scoring_locks.setdefault(agent_key, asyncio.Lock())
+    if lock.locked():
+        logger.info(f"Scoring for {agent_key} already running, skip")
+        return
+    async with lock:
+        if not await ai_configured():
+            logger.info("AI not configured, scoring queue left untouched")
+            return
+        limit = limit or await scoring_queue.get_throughput()
+        await sentiment_aggregator.ensure_loaded(agent_key)
+        async with async_session() as session:
+            await scoring_queue.enqueue_unscored(session, agent_key, since=datetime.now() - timedelta(hours=24))
+            tasks = await scoring_queue.claim_tasks(session, agent_key, limit)
+            article_ids = [t.article_id for t in tasks]
+            rows = (await session.execute(
+                select(Article).where(Article.id.in_(article_ids))
+            )).scalars().all() if article_ids else []
+            await session.commit()
+        scoring_queue.mark_drained()
+        if not article_ids:
             logger.info("No articles to score")
             return
 
-        scored = 0
-        # 分批处理
-        for i in range(0, len(articles), BATCH_SIZE):
-            batch = articles[i: i + BATCH_SIZE]
-            try:
-                analyses = await _score_batch(batch, agent_key=agent_key)
-            except Exception as e:
-                logger.error(f"Batch scoring failed (batch {i // BATCH_SIZE + 1}): {e}")
-                analyses = {}
-
-            for article in batch:
-                analysis = analyses.get(article.id)
-                if analysis:
-                    article.importance = int(analysis.get("importance", 0))
-                    article.sentiment = analysis.get("sentiment")
-                    article.ai_analysis = analysis
-                    article.tags = ",".join(analysis.get("tags", []))
-                    scored += 1
-
-        if scored > 0:
+        # 保持领取时的优先级顺序；已删除或已评分的文章直接出队
+        by_id = {a.id: a for a in rows if a.ai_analysis is None}
+        articles = [by_id[i] for i in article_ids if i in by_id]
+        to_llm, verdicts, local = await _prescore_locally(articles)
+        with usage_scope(agent_key=agent_key, skill="importance_scoring"):
+            analyses = await scoring_batcher.run(
+                to_llm,
+                call=lambda batch: _score_and_save(batch, agent_key, verdicts),
+                key=lambda a: a.id,
+                estimate=_article_tokens,
+                **await get_model_limits(),
+            ) if to_llm else {}
+        scored = set(analyses) | set(local)
+
+        unscored = set(by_id) - scored
+        async with async_session() as session:
+            await scoring_queue.complete_tasks(session, scored | (set(article_ids) - set(by_id)))
+            if to_llm and not analyses:
+                logger.warning(f"No scoring results for {len(unscored)} articles, provider unavailable; requeued")
+                await scoring_queue.release_tasks(session, unscored)
+            else:
+                await scoring_queue.fail_tasks(session, unscored)
             await session.commit()
-        logger.info(f"Scored {scored}/{len(articles)} articles in {-(-len(articles) // BATCH_SIZE)} batches")
+        logger.info(f"Scored {len(scored)}/{len(articles)} articles ({len(local)} by local rules)")
 
+        results = {**local, **analyses}
+        try:
+            await sentiment_aggregator.observe(agent_key, [(a, results[a.id]) for a in articles if a.id in results])
+        except Exception as e:
+            logger.error(f"Sentiment aggregation failed: {e}")
 
-async def generate_daily_report(report_type: str = "morning", agent_key: str = "investment"):
-    """Generate a daily market report using AI."""
-    async with async_session() as session:
-        # 去重检查必须在 LLM 调用之前，避免浪费 token
-        today = datetime.now().date()
-        existing = await session.execute(
-            select(DailyReport)
-            .where(DailyReport.agent_key == agent_key)
-            .where(DailyReport.report_type == report_type)
-            .where(DailyReport.report_date == today)
-        )
-        existing_report = existing.scalar_one_or_none()
-        if existing_report:
-            logger.info(f"{report_type} report already exists for {today}, skipping LLM call")
-            return existing_report
 
-        since = datetime.now() - timedelta(hours=24 if report_type == "morning" else 12)
-        result = await session.execute(
-            select(Article)
-            .where(Article.agent_key == agent_key)
-            .where(Article.fetched_at >= since)
-            .where(Article.importance >= 2)
-            .order_by(desc(Article.importance), desc(Article.published_at))
-            .limit(30)
-        )
-        articles = result.scalars().all()
-        if not articles:
-            logger.info("No articles to generate report from")
-            return
+async def _find_report(session: AsyncSession, agent_key: str, report_type: str, report_date) -> Optional[DailyReport]:
+    result = await session.execute(
+        select(DailyReport)
+        .where(DailyReport.agent_key == agent_key)
+        .where(DailyReport.report_type == report_type)
+        .where(DailyReport.report_date == report_date)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _load_report_articles(session: AsyncSession, report_type: str, agent_key: str) -> list[Article]:
+    """日报时间窗口内的全部重要资讯，按重要度排序。"""
+    since = datetime.now() - timedelta(hours=24 if report_type == "morning" else 12)
+    result = await session.execute(
+        select(Article)
+        .where(Article.agent_key == agent_key)
+        .where(Article.fetched_at >= since)
+        .where(Article.importance >= 2)
+        .order_by(desc(Article.importance), desc(Article.published_at))
+        .limit(MAX_REPORT_ARTICLES)
+    )
+    return list(result.scalars().all())
+
+
+def _news_line(a: Article) -> str:
+    return f"- [{a.source}] {a.title} (重要度:{a.importance}, 情绪:{a.sentiment or '未知'})"
+
+
+def _report_chunk_messages(chunk: summarizer.Chunk) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "你是资讯编辑。请把以下同一分类的资讯压缩为 3-6 条要点（Markdown 列表），"
+                "每条一句话，保留主体、关键数字和影响判断，重要度高的放前面。只输出要点。"
+            ),
+        },
+        {"role": "user", "content": f"分类：{chunk.group}\n" + "\n".join(_news_line(a) for a in chunk.items)},
+    ]
+
+
+async def _report_news_text(articles: list[Article], agent_key: str) -> str:
+    """资讯不多时直接列出；超过 DIRECT_REPORT_ARTICLES 条时按分类分块摘要后汇总。"""
+    if len(articles) <= DIRECT_REPORT_ARTICLES:
+        return "最近的重要资讯：\n" + "\n".join(_news_line(a) for a in articles)
+
+    groups: dict[str, list[Article]] = {}
+    for a in articles:
+        groups.setdefault(a.category or "general", []).append(a)
+    chunks = summarizer.make_chunks(f"daily_report:{agent_key}", groups)
+    summaries = summarizer.merge_by_group(await summarizer.summarize_chunks(chunks, _report_chunk_messages))
+    sections = "\n\n".join(f"### {group}\n" + "\n".join(parts) for group, parts in summaries.items())
+    return f"最近的重要资讯（共 {len(articles)} 条，已按分类汇总要点）：\n\n{sections}"
 
-        news_text = "\n".join(
-            f"- [{a.source}] {a.title} (重要度:{a.importance}, 情绪:{a.sentiment or '未知'})"
-            for a in articles
-        )
 
-        # 按 agent 选择日报标签和 prompt
-        if agent_key == "tech_info":
-            report_label = "AI/前沿技术日报"
-            system_prompt = f"""你是一位 AI/前沿技术分析师。请基于以下技术资讯生成{report_label}。
+async def _daily_report_messages(
+    articles: list[Article], report_type: str, agent_key: str,
+) -> tuple[list[dict], str]:
+    """构建日报 prompt，返回 (messages, 日报名称)。"""
+    news_text = await _report_news_text(articles, agent_key)
+
+    # 按 agent 选择日报标签和 prompt
+    if agent_key == "tech_info":
+        report_label = "AI/前沿技术日报"
+        system_prompt = f"""你是一位 AI/前沿技术分析师。请基于以下技术资讯生成{report_label}。
 
 # 输出要求
 用 Markdown 格式，包含以下部分（顺序固定）：
@@ -192,9 +337,9 @@ HackerNews / 推特上有讨论价值的技术文章、实践经验、争议话
 - 中文撰写，专业但不堆术语
 - 每条都要有"为什么这件事重要"的判断，不要只罗列标题
 - 整体 600-1000 字"""
-        else:
-            report_label = "早间市场日报" if report_type == "morning" else "晚间市场日报"
-            system_prompt = f"""你是一个专业的投研分析 Agent。请基于以下新闻生成{report_label}。
+    else:
+        report_label = "早间市场日报" if report_type == "morning" else "晚间市场日报"
+        system_prompt = f"""你是一个专业的投研分析 Agent。请基于以下新闻生成{report_label}。
 
 要求：
 1. 用 Markdown 格式输出
@@ -206,27 +351,94 @@ HackerNews / 推特上有讨论价值的技术文章、实践经验、争议话
 3. 语言专业但易懂，适合投资者快速阅读
 4. 用中文撰写"""
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"最近的重要资讯：\n{news_text}"},
-        ]
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": news_text},
+    ]
+    return messages, report_label
 
-        content = await chat_completion(messages, max_tokens=3000, temperature=0.4)
-        if not content:
-            return
 
-        report = DailyReport(
-            agent_key=agent_key,
-            report_type=report_type,
-            report_date=today,
-            title=f"{today.isoformat()} {report_label}",
-            content=content,
-            key_events=[a.to_dict() for a in articles[:8]],
-        )
+async def _save_report(report: DailyReport) -> DailyReport:
+    """写入报告；同一天同类型的报告已被其他任务写入时返回已有的那份。"""
+    async with async_session() as session:
         session.add(report)
-        await session.commit()
-        logger.info(f"Generated {report_type} report for {today}")
-        return report
+        try:
+            await session.commit()
+            await response_cache.invalidate("reports")
+            return report
+        except IntegrityError:
+            await session.rollback()
+            existing = await _find_report(session, report.agent_key, report.report_type, report.report_date)
+            return existing or report
+
+
+async def generate_daily_report(report_type: str = "morning", agent_key: str = "investment", hedge: bool = False):
+    """Generate a daily market report using AI. hedge=True 用于手动触发，降低尾延迟。"""
+    today = datetime.now().date()
+    async with async_session() as session:
+        # 去重检查必须在 LLM 调用之前，避免浪费 token
+        existing_report = await _find_report(session, agent_key, report_type, today)
+        if existing_report:
+            logger.info(f"{report_type} report already exists for {today}, skipping LLM call")
+            return existing_report
+        articles = await _load_report_articles(session, report_type, agent_key)
+    if not articles:
+        logger.info("No articles to generate report from")
+        return
+
+    with usage_scope(agent_key=agent_key, skill="daily_report"):
+        messages, report_label = await _daily_report_messages(articles, report_type, agent_key)
+        content = await chat_completion(messages, max_tokens=3000, temperature=0.4, hedge=hedge)
+    if not content:
+        return
+
+    report = await _save_report(DailyReport(
+        agent_key=agent_key,
+        report_type=report_type,
+        report_date=today,
+        title=f"{today.isoformat()} {report_label}",
+        content=content,
+        key_events=[a.to_dict() for a in articles[:8]],
+    ))
+    logger.info(f"Generated {report_type} report for {today}")
+    return report
+
+
+async def stream_daily_report(report_type: str = "morning", agent_key: str = "investment") -> AsyncIterator[dict]:
+    """流式生成日报：逐段产出 delta 事件，生成完毕后落库并产出 done 事件（内容为报告）。"""
+    today = datetime.now().date()
+    async with async_session() as session:
+        existing_report = await _find_report(session, agent_key, report_type, today)
+        if existing_report:
+            yield {"event": "done", **existing_report.to_dict()}
+            return
+        articles = await _load_report_articles(session, report_type, agent_key)
+    if not articles:
+        yield {"event": "error", "detail": "近期没有足够的重要资讯，无法生成日报"}
+        return
+
+    parts: list[str] = []
+    with usage_scope(agent_key=agent_key, skill="daily_report"):
+        messages, report_label = await _daily_report_messages(articles, report_type, agent_key)
+    stream = chat_completion_stream(messages, max_tokens=3000, temperature=0.4)
+    async for text in scoped_stream(stream, agent_key=agent_key, skill="daily_report"):
+        parts.append(text)
+        yield {"event": "delta", "text": text}
+    content = "".join(parts)
+    if not content:
+        yield {"event": "error", "detail": "日报生成失败，请检查 AI 配置"}
+        return
+
+    report = await _save_report(DailyReport(
+        agent_key=agent_key,
+        report_type=report_type,
+        report_date=today,
+        title=f"{today.isoformat()} {report_label}",
+        content=content,
+        key_events=[a.to_dict() for a in articles[:8]],
+    ))
+    logger.info(f"Generated {report_type} report for {today} (streamed)")
+    yield {"event": "done", **report.to_dict()}
 
 
 def _extract_handle(title: str) -> str:
@@ -236,7 +448,53 @@ def _extract_handle(title: str) -> str:
     return "unknown"
 
 
-async def generate_twitter_digest() -> bool:
+def _tweet_text(a: Article) -> str:
+    return (a.content or a.summary or a.title)[:300]
+
+
+def _tweet_chunk_messages(chunk: summarizer.Chunk) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "你是投研助手。请从以下同一位博主的推文中提炼 3-5 条核心观点（Markdown 列表），"
+                "保留具体标的、数字和多空倾向，中文，只输出观点。"
+            ),
+        },
+        {"role": "user", "content": f"@{chunk.group} 的推文：\n" + "\n".join(f"- {_tweet_text(a)}" for a in chunk.items)},
+    ]
+
+
+async def _twitter_digest_messages(handle_map: dict[str, list[Article]], total: int) -> list[dict]:
+    """推文不多时直接列出（每位博主最多 15 条）；否则先按博主分块提炼观点再汇总。"""
+    if total <= DIRECT_DIGEST_TWEETS:
+        handles_text = ""
+        for handle, tweets in handle_map.items():
+            handles_text += f"\n### @{handle}\n"
+            handles_text += "\n".join(f"- {_tweet_text(t)}" for t in tweets[:15])
+        user_content = f"今日追踪博主推文（最近24小时）：\n{handles_text}"
+    else:
+        chunks = summarizer.make_chunks("twitter_digest", handle_map)
+        summaries = summarizer.merge_by_group(await summarizer.summarize_chunks(chunks, _tweet_chunk_messages))
+        handles_text = "\n".join(f"\n### @{handle}\n" + "\n".join(parts) for handle, parts in summaries.items())
+        user_content = f"今日追踪博主观点摘要（最近24小时，共 {total} 条推文）：\n{handles_text}"
+
+    return [
+        {
+            "role": "system",
+            "content": (
+                "你是投研助手。请根据以下追踪博主的推文，生成结构化的观点日报。\n"
+                "格式要求（严格按 Markdown）：\n"
+                "- 每位博主用二级标题（## @handle），列出 3-5 条核心观点（bullet）\n"
+                "- 最后加 ## 综合主题，总结所有博主的共同信号和分歧点\n"
+                "- 语言：中文，简洁专业"
+            ),
+        },
+        {"role": "user", "content": user_content},
+    ]
+
+
+async def generate_twitter_digest(hedge: bool = False) -> bool:
     """生成 Twitter 博主观点日报，存入 daily_reports 表（report_type='twitter_digest'）。"""
     async with async_session() as session:
         since = datetime.now() - timedelta(hours=24)
@@ -254,32 +512,13 @@ async def generate_twitter_digest() -> bool:
         return False
 
     # 按 handle 分组（从 title "@handle: ..." 提取）
-    handle_map: dict[str, list[str]] = {}
+    handle_map: dict[str, list[Article]] = {}
     for a in articles:
-        handle = _extract_handle(a.title)
-        content = a.content or a.summary or a.title
-        handle_map.setdefault(handle, []).append(content)
-
-    handles_text = ""
-    for handle, tweets in handle_map.items():
-        handles_text += f"\n### @{handle}\n"
-        handles_text += "\n".join(f"- {t[:300]}" for t in tweets[:15])
-
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "你是投研助手。请根据以下追踪博主的推文，生成结构化的观点日报。\n"
-                "格式要求（严格按 Markdown）：\n"
-                "- 每位博主用二级标题（## @handle），列出 3-5 条核心观点（bullet）\n"
-                "- 最后加 ## 综合主题，总结所有博主的共同信号和分歧点\n"
-                "- 语言：中文，简洁专业"
-            ),
-        },
-        {"role": "user", "content": f"今日追踪博主推文（最近24小时）：\n{handles_text}"},
-    ]
+        handle_map.setdefault(_extract_handle(a.title), []).append(a)
 
-    content = await chat_completion(messages, max_tokens=2000, temperature=0.4)
+    with usage_scope(agent_key="investment", skill="twitter_digest"):
+        messages = await _twitter_digest_messages(handle_map, len(articles))
+        content = await chat_completion(messages, max_tokens=2000, temperature=0.4, hedge=hedge)
     if not content:
         logger.warning("Twitter digest: AI returned empty content")
         return False
@@ -307,13 +546,23 @@ async def generate_twitter_digest() -> bool:
             )
             session.add(report)
         await session.commit()
+    await response_cache.invalidate("reports")
 
     logger.info(f"Twitter digest generated: {len(handle_map)} handles, {len(articles)} tweets")
     return True
 
 
+def _title_fingerprint(title: str) -> str:
+    """同一标题（忽略大小写、空白与标点）被多个来源转载时只预警一次。"""
+    normalized = re.sub(r"[\W_]+", "", (title or "").lower())
+    return "title:" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:32]
+
+
 async def run_anomaly_detection(agent_key: str = "investment"):
-    """Check for anomalies based on recent high-importance news."""
+    """Check for anomalies based on recent high-importance news.
+
+    速率突发由 app.skills.burst 在入库时检测；这里补充 AI 评为高重要度的单篇资讯。
+    """
     async with async_session() as session:
         since = datetime.now() - timedelta(hours=1)
         result = await session.execute(
@@ -327,12 +576,24 @@ async def run_anomaly_detection(agent_key: str = "investment"):
         if not critical_articles:
             return
 
+        fingerprints = {article.id: _title_fingerprint(article.title) for article in critical_articles}
+        existing = set((await session.execute(
+            select(Alert.fingerprint).where(Alert.fingerprint.in_(set(fingerprints.values())))
+        )).scalars().all())
+        # 升级前写入的预警没有指纹，仍按标题判断
+        legacy_titles = set((await session.execute(
+            select(Alert.title)
+            .where(Alert.fingerprint.is_(None))
+            .where(Alert.is_active == True)  # noqa: E712
+            .where(Alert.title.in_({article.title for article in critical_articles}))
+        )).scalars().all())
+
+        new_alerts = []
         for article in critical_articles:
-            existing = await session.execute(
-                select(Alert).where(Alert.title == article.title).where(Alert.is_active == True)  # noqa: E712
-            )
-            if existing.scalar_one_or_none():
+            fingerprint = fingerprints[article.id]
+            if fingerprint in existing or article.title in legacy_titles:
                 continue
+            existing.add(fingerprint)
 
             level = "critical" if article.importance >= 5 else "high"
             alert = Alert(
@@ -341,8 +602,21 @@ async def run_anomaly_detection(agent_key: str = "investment"):
                 title=article.title,
                 description=f"来源: {article.source}\n{article.summary or ''}",
                 skill_name="anomaly_detector",
+                fingerprint=fingerprint,
+                trigger_data={"article_id": article.id, "importance": article.importance},
                 suggestion=article.ai_analysis.get("reason") if article.ai_analysis else None,
             )
             session.add(alert)
+            new_alerts.append(alert)
 
         await session.commit()
+    if new_alerts:
+        await response_cache.invalidate(f"alerts:{agent_key}")
+
+    if new_alerts:
+        try:
+            from app.api.ws import broadcast_alert
+            for alert in new_alerts:
+                await broadcast_alert(alert.to_dict())
+        except Exception as e:
+            logger.debug(f"WebSocket broadcast skipped: {e}")
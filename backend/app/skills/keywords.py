@@ -0,0 +1,294 @@
+"""流式热词提取：入库时对标题/摘要分词，按 agent × 分类 × 小时写入 Space-Saving 热门项摘要。
+
+- 分词：英文按单词（全大写的短词视为代码/缩写保留原样），中文无分词库，按连续汉字取二元组
+- 每个小时段一个容量固定的 Space-Saving 摘要，内存上界 = 容量 × 小时段数 × 分类数
+- 查询时合并窗口内各小时段得到 Top-K，结果按 (数据版本, 当前小时段) 缓存，
+  没有新文章且未跨小时时直接返回缓存
+- 每篇文章内同一个词只计一次（按出现文章数统计热度）
+- 排名前把首尾相接、计数相近的汉字二元组拼回完整的词（美联 + 联储 → 美联储）
+"""
+import asyncio
+import logging
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+
+from app.database import async_session
+from app.models.article import Article
+
+logger = logging.getLogger(__name__)
+
+WINDOW_HOURS = 24
+RECENT_HOURS = 3  # 计算升温幅度时的「最近」时段
+SKETCH_CAPACITY = 200  # 每个小时段保留的词数
+TOP_CACHE_SIZE = 50
+SUMMARY_CHARS = 300
+MERGE_RATIO = 0.8  # 相邻二元组计数之比不低于该值时视为同一个词的片段
+MAX_RUN_CHARS = 8
+ALL = "*"  # agent 全部分类
+
+_EN_WORD = re.compile(r"[A-Za-z][A-Za-z0-9+#&.\-]*[A-Za-z0-9+#]|[A-Za-z]")
+_CJK_RUN = re.compile(r"[一-鿿]+")
+
+_EN_STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have he her his how i if in into is it
+its just may more most new no not now of on one or our out over says said she so than that the their them then
+there these they this to up us was we were what when where which while who why will with would you your after
+amid about all also any back before being both during each first get gets got here last make many much next only
+other own same should some still such through under until very via vs week year years day today report reports
+""".split())
+
+# 高频但不表达主题的汉字二元组
+_CJK_STOP_BIGRAMS = frozenset("""
+我们 他们 你们 表示 今日 今天 目前 已经 可能 进行 以及 没有 一个 记者 报道 消息 今年 这个 那个 就是 因为 如果 但是 可以
+对于 其中 相关 方面 问题 情况 通过 同时 之后 之前 据悉 认为 指出 称为 不是 还是 这些 那些 什么 如何 为何 个月 日电
+""".split())
+_CJK_STOP_CHARS = frozenset("的了是在和与及或等也将已对为把被从就都而并这那其之于着")
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    tokens: list[str] = []
+    for word in _EN_WORD.findall(text):
+        word = word.rstrip(".-&")
+        if len(word) < 2:
+            continue
+        if word.isupper() and len(word) <= 6:
+            tokens.append(word)  # BTC、ETF、AI 等保持原样
+        elif word.lower() not in _EN_STOPWORDS:
+            tokens.append(word.lower())
+    for run in _CJK_RUN.findall(text):
+        for i in range(len(run) - 1):
+            bigram = run[i:i + 2]
+            if bigram in _CJK_STOP_BIGRAMS or bigram[0] in _CJK_STOP_CHARS or bigram[1] in _CJK_STOP_CHARS:
+                continue
+            tokens.append(bigram)
+    return tokens
+
+
+def _is_cjk_bigram(term: str) -> bool:
+    return len(term) == 2 and _CJK_RUN.fullmatch(term) is not None
+
+
+def merge_runs(counts: dict[str, int]) -> dict[str, tuple[int, list[str]]]:
+    """把首尾相接、计数相近的汉字二元组拼成较长的词，返回 词 -> (计数, 组成的原始词)。
+
+    拼接后的计数取各片段的最小值（同时包含全部片段的文章数不会更多）；其他词原样保留。
+    """
+    by_first: dict[str, list[str]] = {}
+    by_last: dict[str, list[str]] = {}
+    for term in counts:
+        if _is_cjk_bigram(term):
+            by_first.setdefault(term[0], []).append(term)
+            by_last.setdefault(term[1], []).append(term)
+
+    def close(a: int, b: int) -> bool:
+        return min(a, b) >= MERGE_RATIO * max(a, b)
+
+    def pick(candidates: list[str], count: int, used: set[str]) -> Optional[str]:
+        fits = [t for t in candidates if t not in used and close(counts[t], count)]
+        return max(fits, key=counts.__getitem__) if fits else None
+
+    used: set[str] = set()
+    merged: dict[str, tuple[int, list[str]]] = {}
+    for term in sorted(counts, key=lambda t: -counts[t]):
+        if term in used:
+            continue
+        used.add(term)
+        parts, run, count = [term], term, counts[term]
+        if _is_cjk_bigram(term):
+            while len(run) < MAX_RUN_CHARS and (nxt := pick(by_first.get(run[-1], []), count, used)):
+                used.add(nxt)
+                parts.append(nxt)
+                run += nxt[1]
+                count = min(count, counts[nxt])
+            while len(run) < MAX_RUN_CHARS and (prev := pick(by_last.get(run[0], []), count, used)):
+                used.add(prev)
+                parts.insert(0, prev)
+                run = prev[0] + run
+                count = min(count, counts[prev])
+        if run in merged:
+            continue
+        merged[run] = (count, parts)
+    return merged
+
+
+def article_terms(title: Optional[str], summary: Optional[str]) -> set[str]:
+    return set(tokenize(title)) | set(tokenize((summary or "")[:SUMMARY_CHARS]))
+
+
+class SpaceSaving:
+    """Space-Saving 热门项摘要：最多保留 capacity 个词，计数偏大不超过被替换词的计数。
+
+    按计数分桶（stream-summary），淘汰时直接取最小计数桶里最早进入的词，
+    最小计数随增量单调上移，每次 add 为 O(n)（n 为增量，通常为 1）而不是 O(capacity)。
+    """
+
+    def __init__(self, capacity: int = SKETCH_CAPACITY):
+        self.capacity = capacity
+        self.counts: dict[str, int] = {}
+        self._buckets: dict[int, dict[str, None]] = {}  # 计数 -> 该计数的词（按进入顺序）
+        self._min = 0
+
+    def _place(self, term: str, old: int, new: int) -> None:
+        if old:
+            bucket = self._buckets[old]
+            del bucket[term]
+            if not bucket:
+                del self._buckets[old]
+        self._buckets.setdefault(new, {})[term] = None
+        self.counts[term] = new
+        if not self._min or new < self._min:
+            self._min = new
+        while self._min not in self._buckets:
+            self._min += 1
+
+    def add(self, term: str, n: int = 1) -> None:
+        old = self.counts.get(term)
+        if old is not None:
+            self._place(term, old, old + n)
+        elif len(self.counts) < self.capacity:
+            self._place(term, 0, n)
+        else:
+            floor = self._min
+            bucket = self._buckets[floor]
+            victim = next(iter(bucket))
+            del bucket[victim]
+            del self.counts[victim]
+            if not bucket:
+                del self._buckets[floor]
+            self._place(term, 0, floor + n)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class KeywordTracker:
+    def __init__(self, window_hours: int = WINDOW_HOURS, capacity: int = SKETCH_CAPACITY):
+        self.window = timedelta(hours=window_hours)
+        self.capacity = capacity
+        # (agent_key, category) -> {小时段: 摘要}；category=ALL 为 agent 全部分类
+        self._sketches: dict[tuple[str, str], dict[datetime, SpaceSaving]] = {}
+        self._versions: dict[tuple[str, str], int] = {}
+        self._cache: dict[tuple[str, str, int], tuple[int, datetime, list[tuple[str, int]]]] = {}
+        self._loaded: set[str] = set()
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _hour(ts: datetime) -> datetime:
+        if ts.tzinfo is not None:
+            ts = ts.astimezone().replace(tzinfo=None)
+        return ts.replace(minute=0, second=0, microsecond=0)
+
+    def _add(self, agent_key: str, category: Optional[str], ts: Optional[datetime], terms: Iterable[str], now: datetime) -> None:
+        ts = ts or now
+        if ts < now - self.window:
+            return
+        hour = self._hour(ts)
+        terms = list(terms)
+        for key in ((agent_key, ALL), (agent_key, category or "general")):
+            sketch = self._sketches.setdefault(key, {}).setdefault(hour, SpaceSaving(self.capacity))
+            for term in terms:
+                sketch.add(term)
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    async def ensure_loaded(self, agent_key: str, skip_ids: Iterable[int] = ()) -> None:
+        """进程内首次使用某 agent 时从数据库回填窗口；skip_ids 为调用方随后会自行并入的文章。"""
+        if agent_key in self._loaded:
+            return
+        lock = self._locks.setdefault(agent_key, asyncio.Lock())
+        async with lock:
+            if agent_key in self._loaded:
+                return
+            now = datetime.now()
+            skip = set(skip_ids)
+            try:
+                async with async_session() as session:
+                    rows = (await session.execute(
+                        select(Article.id, Article.category, Article.fetched_at, Article.title, Article.summary)
+                        .where(Article.agent_key == agent_key)
+                        .where(Article.fetched_at >= now - self.window)
+                    )).all()
+            except Exception as e:
+                logger.warning(f"Keyword window warm-up for {agent_key} failed: {e}")
+                rows = []
+            for article_id, category, fetched_at, title, summary in rows:
+                if article_id not in skip:
+                    self._add(agent_key, category, fetched_at, article_terms(title, summary), now)
+            self._loaded.add(agent_key)
+            logger.info(f"Keyword window for {agent_key} warmed up with {len(rows)} articles")
+
+    async def observe(self, agent_key: str, articles: Iterable[Article]) -> int:
+        """并入一批新入库的文章。"""
+        articles = list(articles)
+        await self.ensure_loaded(agent_key, skip_ids=[a.id for a in articles])
+        now = datetime.now()
+        for article in articles:
+            self._add(agent_key, article.category, article.fetched_at, article_terms(article.title, article.summary), now)
+        return len(articles)
+
+    def _expire(self, key: tuple[str, str], now: datetime) -> dict[datetime, SpaceSaving]:
+        buckets = self._sketches.get(key, {})
+        cutoff = self._hour(now - self.window)
+        for hour in [h for h in buckets if h <= cutoff]:
+            del buckets[hour]
+        return buckets
+
+    async def top(
+        self,
+        agent_key: str,
+        category: Optional[str] = None,
+        hours: Optional[int] = None,
+        limit: int = 20,
+    ) -> list[dict]:
+        """窗口内 Top-K 热词。recent 为最近 RECENT_HOURS 小时的出现次数，
+        trend 为最近时段的频率相对整个窗口平均频率的倍数。"""
+        await self.ensure_loaded(agent_key)
+        now = datetime.now()
+        hours = max(1, min(hours or int(self.window.total_seconds() // 3600), int(self.window.total_seconds() // 3600)))
+        key = (agent_key, category or ALL)
+        current = self._hour(now)
+        version = self._versions.get(key, 0)
+        cached = self._cache.get((*key, hours))
+        if cached and cached[0] == version and cached[1] == current:
+            top = cached[2]
+        else:
+            buckets = self._expire(key, now)
+            since = current - timedelta(hours=hours - 1)
+            merged: Counter = Counter()
+            for hour, sketch in buckets.items():
+                if hour >= since:
+                    merged.update(sketch.counts)
+            runs = merge_runs(merged)
+            ranked = sorted(runs.items(), key=lambda item: -item[1][0])[:TOP_CACHE_SIZE]
+            recent_since = current - timedelta(hours=min(RECENT_HOURS, hours) - 1)
+            recent_buckets = [s for h, s in buckets.items() if h >= recent_since]
+            top = [
+                (term, count, min(sum(s.counts.get(p, 0) for s in recent_buckets) for p in parts))
+                for term, (count, parts) in ranked
+            ]
+            self._cache[(*key, hours)] = (version, current, top)
+
+        recent_hours = min(RECENT_HOURS, hours)
+        return [
+            {
+                "term": term,
+                "count": count,
+                "recent": recent,
+                "trend": round((recent / recent_hours) / (count / hours), 2) if count else 0.0,
+            }
+            for term, count, recent in top[:limit]
+        ]
+
+    def reset(self) -> None:
+        self._sketches.clear()
+        self._versions.clear()
+        self._cache.clear()
+        self._loaded.clear()
+
+
+keyword_tracker = KeywordTracker()
@@ -0,0 +1,168 @@
+"""本地预评分：关键词 + 规则，在调用 LLM 之前识别明显低价值的文章。
+
+只有「有把握的低分」在本地定分；命中高潜力关键词或把握不足的文章交给 LLM。
+一小部分本地判定的文章会抽样送 LLM 复核，用于统计规则相对 LLM 的准确率。
+"""
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.article import Article
+from app.platform.settings_cache import settings_cache
+
+# 社区讨论类来源，绝大多数是闲聊/求助，LLM 打分几乎都是 0-1
+LOW_VALUE_SOURCES: dict[str, float] = {
+    "V2EX": 0.6,
+    "Linux.do": 0.6,
+}
+
+LOW_VALUE_PATTERNS: list[tuple[re.Pattern, float, str]] = [
+    (re.compile(r"招聘|内推|求职|简历|面试|hiring|who is hiring", re.I), 0.3, "招聘"),
+    (re.compile(r"请问|求助|求推荐|有没有|怎么办|如何选择|大家觉得|\?$|？$"), 0.25, "求助"),
+    (re.compile(r"闲聊|吐槽|水一贴|分享一下|日常|摸鱼|晒", re.I), 0.25, "闲聊"),
+    (re.compile(r"抽奖|福利|优惠码|邀请码|推广|广告|返利|拼车", re.I), 0.35, "推广"),
+    (re.compile(r"出售|转让|求购|二手|出闲置", re.I), 0.35, "交易"),
+    (re.compile(r"教程|入门|新手|tutorial|beginner", re.I), 0.15, "教程"),
+]
+
+# 命中任一即交给 LLM，避免漏掉重要新闻
+HIGH_POTENTIAL_PATTERN = re.compile(
+    r"央行|美联储|\bFed\b|FOMC|降息|加息|降准|利率决议|CPI|非农|GDP|"
+    r"暴跌|暴涨|熔断|崩盘|违约|破产|制裁|关税|战争|冲突|"
+    r"财报|业绩|并购|收购|上市|IPO|融资|估值|"
+    r"OpenAI|Anthropic|Claude|GPT|Gemini|DeepSeek|Qwen|Llama|Grok|xAI|DeepMind|MiniMax|智谱|月之暗面|"
+    r"发布|开源|release|launch|漏洞|CVE|"
+    r"比特币|Bitcoin|BTC|以太坊|ETH|ETF",
+    re.I,
+)
+
+DEFAULT_PRESCORE_CONFIG = {
+    "enabled": True,
+    "min_confidence": 0.8,
+    "max_importance": 1,
+    "audit_rate": 0.05,
+}
+
+
+@dataclass
+class PreScore:
+    importance: int
+    confidence: float
+    tags: list[str] = field(default_factory=list)
+    reason: str = ""
+    escalate: bool = True
+
+    def to_dict(self) -> dict:
+        return {
+            "importance": self.importance,
+            "confidence": round(self.confidence, 2),
+            "decision": "llm" if self.escalate else "local",
+        }
+
+
+def prescore(
+    title: str,
+    source: Optional[str],
+    summary: Optional[str] = None,
+    min_confidence: float = DEFAULT_PRESCORE_CONFIG["min_confidence"],
+    max_importance: int = DEFAULT_PRESCORE_CONFIG["max_importance"],
+) -> PreScore:
+    """纯函数：根据来源和关键词给出低分判定及把握度。"""
+    text = f"{title}\n{summary or ''}"
+    if HIGH_POTENTIAL_PATTERN.search(text):
+        return PreScore(importance=0, confidence=0.0, reason="命中高潜力关键词")
+
+    confidence = LOW_VALUE_SOURCES.get(source or "", 0.0)
+    tags: list[str] = []
+    for pattern, weight, tag in LOW_VALUE_PATTERNS:
+        if pattern.search(text):
+            confidence += weight
+            tags.append(tag)
+    confidence = min(confidence, 0.99)
+
+    # 多条低价值特征叠加时判 0 分，否则 1 分
+    importance = 0 if confidence >= 0.9 and len(tags) >= 2 else 1
+    importance = min(importance, max_importance)
+    escalate = confidence < min_confidence
+    reason = "规则：" + "/".join(tags) if tags else f"规则：{source} 社区讨论"
+    return PreScore(importance=importance, confidence=confidence, tags=tags[:3], reason=reason[:20], escalate=escalate)
+
+
+def prescore_article(article: Article, config: dict) -> PreScore:
+    return prescore(
+        article.title, article.source, article.summary,
+        min_confidence=config["min_confidence"], max_importance=config["max_importance"],
+    )
+
+
+def local_analysis(verdict: PreScore) -> dict:
+    """本地判定的 ai_analysis，结构与 LLM 返回一致，额外标注评分路径。"""
+    return {
+        "importance": verdict.importance,
+        "sentiment": "neutral",
+        "tags": verdict.tags,
+        "reason": verdict.reason,
+        "scored_by": "rule",
+        "prescore": verdict.to_dict(),
+    }
+
+
+def should_audit(audit_rate: float) -> bool:
+    return random.random() < audit_rate
+
+
+async def get_prescore_config() -> dict:
+    config = dict(DEFAULT_PRESCORE_CONFIG)
+    try:
+        values = await settings_cache.get_many([
+            "prescore_enabled", "prescore_min_confidence", "prescore_max_importance", "prescore_audit_rate",
+        ])
+        if "prescore_enabled" in values:
+            config["enabled"] = values["prescore_enabled"] == "true"
+        if values.get("prescore_min_confidence"):
+            config["min_confidence"] = float(values["prescore_min_confidence"])
+        if values.get("prescore_max_importance"):
+            config["max_importance"] = int(values["prescore_max_importance"])
+        if values.get("prescore_audit_rate"):
+            config["audit_rate"] = float(values["prescore_audit_rate"])
+    except Exception:
+        return dict(DEFAULT_PRESCORE_CONFIG)
+    return config
+
+
+async def prescore_report(
+    session: AsyncSession,
+    agent_key: Optional[str] = None,
+    days: int = 7,
+    max_importance: int = DEFAULT_PRESCORE_CONFIG["max_importance"],
+) -> dict:
+    """本地/LLM 评分占比，以及抽样复核得到的规则准确率
+    （规则判为低分的文章中，LLM 同样给出 <= max_importance 的比例）。"""
+    since = datetime.now() - timedelta(days=days)
+    scored_by = func.json_extract(Article.ai_analysis, "$.scored_by")
+    decision = func.json_extract(Article.ai_analysis, "$.prescore.decision")
+
+    base = select(func.count(Article.id)).where(Article.fetched_at >= since).where(Article.ai_analysis != None)  # noqa: E711
+    if agent_key:
+        base = base.where(Article.agent_key == agent_key)
+
+    local = await session.scalar(base.where(scored_by == "rule")) or 0
+    llm = await session.scalar(base.where(scored_by == "llm")) or 0
+    audited = base.where(scored_by == "llm").where(decision == "local")
+    audited_total = await session.scalar(audited) or 0
+    audited_correct = await session.scalar(audited.where(Article.importance <= max_importance)) or 0
+
+    total = local + llm
+    return {
+        "days": days,
+        "local_scored": local,
+        "llm_scored": llm,
+        "local_share": round(local / total, 3) if total else 0.0,
+        "audited": audited_total,
+        "precision": round(audited_correct / audited_total, 3) if audited_total else None,
+    }
@@ -0,0 +1,85 @@
+"""文章小时汇总（article_hourly_rollup）：在写文章的同一事务里增量更新，仪表盘按 (agent_key, hour) 范围读取，
+耗时只与时间范围有关，不随文章表增长。
+
+- 入库：按 小时 × 来源 × 分类 累加 count
+- 评分：重要度跨过 IMPORTANT_THRESHOLD 时调整 important_count
+- 清理：与文章按同一整点截止时间删除
+"""
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import delete, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.article_rollup import ArticleHourlyRollup
+
+IMPORTANT_THRESHOLD = 3
+
+
+def hour_of(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _key(article: Any) -> tuple[str, datetime, str, str]:
+    """article 为 Article 或带相同字段的查询行。"""
+    return (
+        article.agent_key,
+        hour_of(article.fetched_at or datetime.now()),
+        article.source or "",
+        article.category or "",
+    )
+
+
+async def _apply(session: AsyncSession, deltas: dict[tuple, list[int]]) -> None:
+    rows = [
+        {"agent_key": k[0], "hour": k[1], "source": k[2], "category": k[3], "count": c, "important_count": i}
+        for k, (c, i) in deltas.items()
+        if c or i
+    ]
+    if not rows:
+        return
+    stmt = insert(ArticleHourlyRollup).values(rows)
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=["agent_key", "hour", "source", "category"],
+        set_={
+            "count": ArticleHourlyRollup.count + stmt.excluded.count,
+            "important_count": ArticleHourlyRollup.important_count + stmt.excluded.important_count,
+        },
+    ))
+
+
+async def record_articles(session: AsyncSession, articles: Iterable[Any]) -> None:
+    """新入库的文章计入汇总，需在插入文章的同一事务中调用。"""
+    deltas: dict[tuple, list[int]] = {}
+    for article in articles:
+        entry = deltas.setdefault(_key(article), [0, 0])
+        entry[0] += 1
+        entry[1] += (article.importance or 0) >= IMPORTANT_THRESHOLD
+    await _apply(session, deltas)
+
+
+async def record_importance(session: AsyncSession, changes: Iterable[tuple[Any, int]]) -> None:
+    """评分写回后调整重要文章数；changes 为 (评分前的文章行, 新重要度)。"""
+    deltas: dict[tuple, list[int]] = {}
+    for article, importance in changes:
+        delta = int(importance >= IMPORTANT_THRESHOLD) - int((article.importance or 0) >= IMPORTANT_THRESHOLD)
+        if delta:
+            deltas.setdefault(_key(article), [0, 0])[1] += delta
+    await _apply(session, deltas)
+
+
+async def purge(session: AsyncSession, before: datetime) -> None:
+    await session.execute(delete(ArticleHourlyRollup).where(ArticleHourlyRollup.hour < before))
+
+
+async def rebuild(session: AsyncSession) -> None:
+    """从文章表整体重建（首次部署时回填）。hour 的格式与 SQLAlchemy 写入 SQLite 的 DateTime 一致。"""
+    await session.execute(delete(ArticleHourlyRollup))
+    await session.execute(text(
+        "INSERT INTO article_hourly_rollup (agent_key, hour, source, category, count, important_count) "
+        "SELECT agent_key, strftime('%Y-%m-%d %H:00:00.000000', fetched_at), COALESCE(source, ''), "
+        "COALESCE(category, ''), COUNT(*), SUM(CASE WHEN importance >= :threshold THEN 1 ELSE 0 END) "
+        "FROM articles WHERE fetched_at IS NOT NULL GROUP BY 1, 2, 3, 4"
+    ), {"threshold": IMPORTANT_THRESHOLD})
@@ -0,0 +1,213 @@
+"""评分队列：文章入库即排队，由各 agent 的定时任务按优先级持续消费。
+
+优先级 = 基础分 + 分类加权 + 来源加权 + 新鲜度；领取时再叠加排队时长，
+保证低优先级文章不会被持续涌入的高优先级文章饿死。
+
+AI 未配置时不领取；服务商整体不可用时归还任务、不计重试次数，避免故障期间把文章耗成死信。
+死信可通过 requeue_dead 重新排队。
+"""
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.article import Article
+from app.models.scoring_task import ScoringTask
+from app.platform.settings_cache import settings_cache
+
+logger = logging.getLogger(__name__)
+
+BASE_PRIORITY = 50
+CATEGORY_PRIORITY: dict[str, int] = {
+    "ai_industry": 30,
+    "ai": 15,
+    "crypto": 10,
+    "global": 10,
+    "a_stock": 10,
+    "twitter": 5,
+}
+# 按来源微调，例如 {"Reuters": 10}
+SOURCE_PRIORITY: dict[str, int] = {}
+FRESHNESS_WINDOW_HOURS = 24  # 发布 24h 内按新鲜度加分，越新越高
+AGING_PER_HOUR = 2  # 排队每满 1 小时提升的优先级
+
+LEASE_SECONDS = 600  # 领取后若进程崩溃，租约到期重新可领
+MAX_ATTEMPTS = 5
+DEAD_LETTER_AT = datetime(9999, 1, 1)  # 超过重试次数的任务不再领取，保留以便排查
+OUTAGE_RETRY_MINUTES = 2  # 服务商不可用时归还的任务在此之后重新可领
+DEFAULT_THROUGHPUT = 100
+
+# 进程内累计指标
+_metrics: dict = {"scored_total": 0, "failed_total": 0, "dead_total": 0, "last_drain_at": None}
+
+
+def compute_priority(
+    source: Optional[str],
+    category: Optional[str],
+    published_at: Optional[datetime],
+    now: Optional[datetime] = None,
+) -> int:
+    now = now or datetime.now()
+    priority = BASE_PRIORITY + CATEGORY_PRIORITY.get(category or "", 0) + SOURCE_PRIORITY.get(source or "", 0)
+    if published_at is None:
+        return priority + FRESHNESS_WINDOW_HOURS // 2
+    if published_at.tzinfo is not None:
+        published_at = published_at.astimezone().replace(tzinfo=None)
+    age_hours = max(0.0, (now - published_at).total_seconds() / 3600)
+    return priority + int(max(0.0, FRESHNESS_WINDOW_HOURS - age_hours))
+
+
+def enqueue_articles(session: AsyncSession, articles: Iterable[Article]) -> int:
+    """在调用方事务中为新文章排队；文章需已 flush 以获得 id。"""
+    now = datetime.now()
+    count = 0
+    for article in articles:
+        if article.ai_analysis is not None:
+            continue
+        session.add(ScoringTask(
+            article_id=article.id,
+            agent_key=article.agent_key,
+            priority=compute_priority(article.source, article.category, article.published_at, now),
+            enqueued_at=now,
+            available_at=now,
+        ))
+        count += 1
+    return count
+
+
+async def enqueue_unscored(session: AsyncSession, agent_key: str, since: datetime) -> int:
+    """兜底：把未经队列入库的未评分文章补进队列（升级前的存量数据等）。"""
+    queued = select(ScoringTask.article_id)
+    result = await session.execute(
+        select(Article)
+        .where(Article.agent_key == agent_key)
+        .where(Article.fetched_at >= since)
+        .where(Article.ai_analysis == None)  # noqa: E711
+        .where(Article.id.not_in(queued))
+    )
+    return enqueue_articles(session, result.scalars().all())
+
+
+async def claim_tasks(session: AsyncSession, agent_key: str, limit: int) -> list[ScoringTask]:
+    """按有效优先级领取最多 limit 个任务，并顺延租约。"""
+    now = datetime.now()
+    waited_hours = (func.julianday(now) - func.julianday(ScoringTask.enqueued_at)) * 24
+    result = await session.execute(
+        select(ScoringTask)
+        .where(ScoringTask.agent_key == agent_key)
+        .where(ScoringTask.available_at <= now)
+        .order_by((ScoringTask.priority + waited_hours * AGING_PER_HOUR).desc(), ScoringTask.id)
+        .limit(limit)
+    )
+    tasks = list(result.scalars().all())
+    lease_until = now + timedelta(seconds=LEASE_SECONDS)
+    for task in tasks:
+        task.available_at = lease_until
+    return tasks
+
+
+async def complete_tasks(session: AsyncSession, article_ids: Iterable[int]) -> None:
+    ids = list(article_ids)
+    if ids:
+        await session.execute(delete(ScoringTask).where(ScoringTask.article_id.in_(ids)))
+        _metrics["scored_total"] += len(ids)
+
+
+async def fail_tasks(session: AsyncSession, article_ids: Iterable[int]) -> None:
+    """评分失败：指数退避后重试，超过 MAX_ATTEMPTS 转为死信。"""
+    ids = list(article_ids)
+    if not ids:
+        return
+    now = datetime.now()
+    result = await session.execute(select(ScoringTask).where(ScoringTask.article_id.in_(ids)))
+    for task in result.scalars().all():
+        task.attempts += 1
+        if task.attempts >= MAX_ATTEMPTS:
+            task.available_at = DEAD_LETTER_AT
+            _metrics["dead_total"] += 1
+            logger.warning(f"Scoring gave up on article {task.article_id} after {task.attempts} attempts")
+        else:
+            task.available_at = now + timedelta(minutes=2 ** task.attempts)
+    _metrics["failed_total"] += len(ids)
+
+
+async def release_tasks(session: AsyncSession, article_ids: Iterable[int]) -> None:
+    """本轮没有拿到任何评分结果（服务商不可用）：归还任务，不计入重试次数。"""
+    ids = list(article_ids)
+    if ids:
+        await session.execute(
+            update(ScoringTask)
+            .where(ScoringTask.article_id.in_(ids))
+            .values(available_at=datetime.now() + timedelta(minutes=OUTAGE_RETRY_MINUTES))
+        )
+
+
+async def requeue_dead(session: AsyncSession, agent_key: Optional[str] = None) -> int:
+    """死信重新排队并清零重试次数，返回数量。"""
+    query = (
+        update(ScoringTask)
+        .where(ScoringTask.available_at >= DEAD_LETTER_AT)
+        .values(attempts=0, available_at=datetime.now())
+    )
+    if agent_key:
+        query = query.where(ScoringTask.agent_key == agent_key)
+    result = await session.execute(query)
+    return result.rowcount or 0
+
+
+async def purge_orphans(session: AsyncSession) -> None:
+    """删除文章已被清理的任务。"""
+    await session.execute(delete(ScoringTask).where(ScoringTask.article_id.not_in(select(Article.id))))
+
+
+async def get_throughput() -> int:
+    """每次消费最多领取的文章数（消费任务每分钟运行一次）。"""
+    try:
+        value = await settings_cache.get("scoring_throughput")
+        return max(1, int(value)) if value else DEFAULT_THROUGHPUT
+    except Exception:
+        return DEFAULT_THROUGHPUT
+
+
+def mark_drained() -> None:
+    _metrics["last_drain_at"] = datetime.now()
+
+
+async def queue_stats(session: AsyncSession, agent_key: Optional[str] = None) -> dict:
+    """队列深度与延迟指标，按 agent 分组。"""
+    now = datetime.now()
+    live = ScoringTask.available_at < DEAD_LETTER_AT
+    query = (
+        select(
+            ScoringTask.agent_key,
+            func.count(ScoringTask.id).filter(live),
+            func.count(ScoringTask.id).filter(live, ScoringTask.available_at <= now),
+            func.count(ScoringTask.id).filter(ScoringTask.available_at >= DEAD_LETTER_AT),
+            func.min(ScoringTask.enqueued_at).filter(live),
+        )
+        .group_by(ScoringTask.agent_key)
+    )
+    if agent_key:
+        query = query.where(ScoringTask.agent_key == agent_key)
+
+    agents = {}
+    for key, depth, ready, dead, oldest in (await session.execute(query)).all():
+        agents[key] = {
+            "depth": depth,
+            "ready": ready,
+            "dead": dead,
+            "oldest_enqueued_at": oldest.isoformat() if oldest else None,
+            "lag_seconds": int((now - oldest).total_seconds()) if oldest else 0,
+        }
+
+    last_drain_at = _metrics["last_drain_at"]
+    return {
+        "agents": agents,
+        "scored_total": _metrics["scored_total"],
+        "failed_total": _metrics["failed_total"],
+        "dead_total": _metrics["dead_total"],
+        "last_drain_at": last_drain_at.isoformat() if last_drain_at else None,
+    }
@@ -0,0 +1,212 @@
+"""市场情绪增量聚合：评分完成的文章即时并入按 agent / 分类的滚动窗口，定时输出 SentimentSnapshot。
+热词（top_keywords）取自 app.skills.keywords 的入库热词统计。
+
+窗口按 BUCKET_MINUTES 分段累加，过期分段从合计中减去，每篇文章只处理一次，
+生成快照时不再扫描文章表。进程启动后首次使用某 agent 时，从数据库回填一次窗口内已评分的文章。
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+
+from app.database import async_session
+from app.models.article import Article
+from app.models.sentiment import SentimentSnapshot
+from app.platform.response_cache import response_cache
+from app.skills.keywords import keyword_tracker
+
+logger = logging.getLogger(__name__)
+
+WINDOW_HOURS = 24
+BUCKET_MINUTES = 10
+TOP_KEYWORDS = 10
+SNAPSHOT_INTERVAL_MINUTES = 15
+
+
+@dataclass
+class _Tally:
+    bullish: float = 0.0
+    bearish: float = 0.0
+    neutral: float = 0.0
+    volume: int = 0
+
+    def add(self, other: "_Tally", sign: int = 1) -> None:
+        self.bullish += sign * other.bullish
+        self.bearish += sign * other.bearish
+        self.neutral += sign * other.neutral
+        self.volume += sign * other.volume
+
+    def score(self) -> int:
+        """0-100：50 为中性，按重要度加权的多空差占比偏移。"""
+        weight = self.bullish + self.bearish + self.neutral
+        if weight <= 0:
+            return 50
+        return round(50 + 50 * (self.bullish - self.bearish) / weight)
+
+
+class _Window:
+    """单个滚动窗口：分段计数 + 窗口合计。"""
+
+    def __init__(self):
+        self.buckets: dict[datetime, _Tally] = {}
+        self.total = _Tally()
+
+    def add(self, bucket: datetime, tally: _Tally) -> None:
+        self.buckets.setdefault(bucket, _Tally()).add(tally)
+        self.total.add(tally)
+
+    def expire(self, cutoff: datetime) -> None:
+        for bucket in [b for b in self.buckets if b < cutoff]:
+            self.total.add(self.buckets.pop(bucket), sign=-1)
+
+
+def score_label(score: int) -> str:
+    if score < 20:
+        return "extreme_fear"
+    if score < 40:
+        return "fear"
+    if score <= 60:
+        return "neutral"
+    if score <= 80:
+        return "greed"
+    return "extreme_greed"
+
+
+def _weight(importance: Optional[int]) -> float:
+    # 0 分文章也计入成交量，但几乎不影响情绪
+    return 0.2 if not importance else float(importance)
+
+
+def _as_tally(sentiment: Optional[str], importance: Optional[int]) -> _Tally:
+    tally = _Tally(volume=1)
+    weight = _weight(importance)
+    if sentiment == "bullish":
+        tally.bullish = weight
+    elif sentiment == "bearish":
+        tally.bearish = weight
+    else:
+        tally.neutral = weight
+    return tally
+
+
+class SentimentAggregator:
+    def __init__(self, window_hours: int = WINDOW_HOURS, bucket_minutes: int = BUCKET_MINUTES):
+        self.window = timedelta(hours=window_hours)
+        self.bucket_minutes = bucket_minutes
+        # agent_key -> {category: 窗口}；agent 总体窗口与分类窗口同时累加
+        self._categories: dict[str, dict[str, _Window]] = {}
+        self._overall: dict[str, _Window] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _bucket(self, ts: datetime) -> datetime:
+        if ts.tzinfo is not None:
+            ts = ts.astimezone().replace(tzinfo=None)
+        minute = ts.minute - ts.minute % self.bucket_minutes
+        return ts.replace(minute=minute, second=0, microsecond=0)
+
+    def _add(self, agent_key: str, category: Optional[str], ts: Optional[datetime], tally: _Tally, now: datetime) -> None:
+        ts = ts or now
+        if ts < now - self.window:
+            return
+        bucket = self._bucket(ts)
+        self._overall[agent_key].add(bucket, tally)
+        self._categories[agent_key].setdefault(category or "general", _Window()).add(bucket, tally)
+
+    async def ensure_loaded(self, agent_key: str) -> None:
+        """首次使用时回填窗口。评分流程须在写回结果之前调用，避免新结果被回填和增量重复计入。"""
+        if agent_key in self._overall:
+            return
+        lock = self._locks.setdefault(agent_key, asyncio.Lock())
+        async with lock:
+            if agent_key in self._overall:
+                return
+            now = datetime.now()
+            try:
+                async with async_session() as session:
+                    rows = (await session.execute(
+                        select(Article.category, Article.fetched_at, Article.sentiment, Article.importance)
+                        .where(Article.agent_key == agent_key)
+                        .where(Article.fetched_at >= now - self.window)
+                        .where(Article.ai_analysis != None)  # noqa: E711
+                    )).all()
+            except Exception as e:
+                logger.warning(f"Sentiment window warm-up for {agent_key} failed: {e}")
+                rows = []
+            self._overall[agent_key] = _Window()
+            self._categories[agent_key] = {}
+            for category, fetched_at, sentiment, importance in rows:
+                self._add(agent_key, category, fetched_at, _as_tally(sentiment, importance), now)
+            logger.info(f"Sentiment window for {agent_key} warmed up with {len(rows)} articles")
+
+    async def observe(self, agent_key: str, scored: Iterable[tuple[Article, dict]]) -> int:
+        """并入一批刚评分的文章（文章对象 + 评分结果）。"""
+        await self.ensure_loaded(agent_key)
+        now = datetime.now()
+        count = 0
+        for article, analysis in scored:
+            tally = _as_tally(analysis.get("sentiment"), analysis.get("importance"))
+            self._add(agent_key, article.category, article.fetched_at, tally, now)
+            count += 1
+        return count
+
+    async def snapshot(self, agent_key: str) -> SentimentSnapshot:
+        """按当前窗口生成快照（不落库）。"""
+        await self.ensure_loaded(agent_key)
+        now = datetime.now()
+        cutoff = self._bucket(now - self.window)
+        overall = self._overall[agent_key]
+        overall.expire(cutoff)
+        categories = {}
+        for category, window in sorted(self._categories[agent_key].items()):
+            window.expire(cutoff)
+            if window.total.volume <= 0:
+                continue
+            categories[category] = {
+                "score": window.total.score(),
+                "volume": window.total.volume,
+                "bullish": round(window.total.bullish, 1),
+                "bearish": round(window.total.bearish, 1),
+                "neutral": round(window.total.neutral, 1),
+            }
+
+        total = overall.total
+        score = total.score()
+        keywords = await keyword_tracker.top(agent_key, limit=TOP_KEYWORDS)
+        return SentimentSnapshot(
+            agent_key=agent_key,
+            snapshot_time=now,
+            overall_score=score,
+            label=score_label(score),
+            breakdown={
+                "window_hours": int(self.window.total_seconds() // 3600),
+                "bullish": round(total.bullish, 1),
+                "bearish": round(total.bearish, 1),
+                "neutral": round(total.neutral, 1),
+                "categories": categories,
+            },
+            news_volume=total.volume,
+            top_keywords=",".join(k["term"] for k in keywords) or None,
+        )
+
+    async def emit(self, agent_key: str) -> SentimentSnapshot:
+        snapshot = await self.snapshot(agent_key)
+        async with async_session() as session:
+            session.add(snapshot)
+            await session.commit()
+        await response_cache.invalidate(f"sentiment:{agent_key}")
+        logger.info(f"Sentiment snapshot {agent_key}: {snapshot.overall_score} ({snapshot.label}), {snapshot.news_volume} articles")
+        return snapshot
+
+    def reset(self, agent_key: Optional[str] = None) -> None:
+        if agent_key is None:
+            self._overall.clear()
+            self._categories.clear()
+        else:
+            self._overall.pop(agent_key, None)
+            self._categories.pop(agent_key, None)
+
+
+sentiment_aggregator = SentimentAggregator()
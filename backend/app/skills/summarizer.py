@@ -0,0 +1,102 @@
+"""分层摘要（map-reduce）：资讯量超出单个 prompt 时，先按分组切块并发摘要，再汇总成报告。
+
+- 分组内按入库时间切到固定的 6 小时时间段，再按 id 顺序每 CHUNK_SIZE 条一块。
+  切块边界不随报告时间窗口移动，晚报与早报重叠的时间段会得到完全相同的块
+- 每块摘要按 (用途, 分组, 文章 id 列表) 缓存，重复生成时只有新增或变化的块需要调用 LLM
+- 某块摘要失败时退回为标题列表，保证汇总时不丢资讯
+"""
+import asyncio
+import hashlib
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.ai.cache import llm_cache
+from app.ai.client import chat_completion
+from app.models.article import Article
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 20
+BUCKET_HOURS = 6
+CHUNK_SUMMARY_TOKENS = 500
+CHUNK_CACHE_TTL = 36 * 3600  # 覆盖早报/晚报/次日早报
+PROMPT_VERSION = "v1"  # 修改摘要 prompt 时递增，使旧缓存失效
+
+
+@dataclass
+class Chunk:
+    kind: str
+    group: str
+    items: list[Article]
+
+    @property
+    def key(self) -> str:
+        ids = ",".join(str(a.id) for a in self.items)
+        raw = f"{PROMPT_VERSION}|{self.kind}|{self.group}|{ids}"
+        return "chunk:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _bucket(article: Article) -> datetime:
+    ts = article.fetched_at or article.published_at or datetime.min
+    if ts.tzinfo is not None:
+        ts = ts.astimezone().replace(tzinfo=None)
+    return ts.replace(hour=ts.hour - ts.hour % BUCKET_HOURS, minute=0, second=0, microsecond=0)
+
+
+def make_chunks(kind: str, groups: dict[str, list[Article]], size: int = CHUNK_SIZE) -> list[Chunk]:
+    """按 分组 × 时间段 切块，块内按 id 排序。"""
+    chunks: list[Chunk] = []
+    for group in sorted(groups):
+        by_bucket: dict[datetime, list[Article]] = {}
+        for article in groups[group]:
+            by_bucket.setdefault(_bucket(article), []).append(article)
+        for bucket in sorted(by_bucket):
+            items = sorted(by_bucket[bucket], key=lambda a: a.id)
+            for i in range(0, len(items), size):
+                chunks.append(Chunk(kind, group, items[i:i + size]))
+    return chunks
+
+
+def _fallback(chunk: Chunk) -> str:
+    return "\n".join(f"- {a.title[:120]}" for a in chunk.items)
+
+
+async def _summarize(chunk: Chunk, build_messages: Callable[[Chunk], list[dict]]) -> tuple[str, bool]:
+    """返回 (摘要, 是否命中缓存)。"""
+    try:
+        cached = await llm_cache.get(chunk.key)
+    except Exception as e:
+        logger.warning(f"Chunk cache lookup failed: {e}")
+        cached = None
+    if cached:
+        return cached, True
+
+    content = await chat_completion(build_messages(chunk), max_tokens=CHUNK_SUMMARY_TOKENS, temperature=0.2)
+    if not content:
+        logger.warning(f"Chunk summary failed for {chunk.kind}/{chunk.group} ({len(chunk.items)} items), using titles")
+        return _fallback(chunk), False
+    try:
+        await llm_cache.set(chunk.key, chunk.kind, content, ttl_seconds=CHUNK_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Chunk cache store failed: {e}")
+    return content, False
+
+
+async def summarize_chunks(
+    chunks: list[Chunk],
+    build_messages: Callable[[Chunk], list[dict]],
+) -> list[tuple[Chunk, str]]:
+    """并发摘要所有块（并发度受 AI 客户端的服务商限流约束），按块顺序返回。"""
+    results = await asyncio.gather(*(_summarize(chunk, build_messages) for chunk in chunks))
+    reused = sum(1 for _, hit in results if hit)
+    logger.info(f"Summarized {len(chunks)} chunks ({reused} reused from cache)")
+    return [(chunk, summary) for chunk, (summary, _) in zip(chunks, results)]
+
+
+def merge_by_group(summaries: list[tuple[Chunk, str]]) -> dict[str, list[str]]:
+    merged: dict[str, list[str]] = {}
+    for chunk, summary in summaries:
+        merged.setdefault(chunk.group, []).append(summary.strip())
+    return merged
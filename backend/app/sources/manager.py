@@ -7,7 +7,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import async_session
 from app.models.article import Article
-from app.models.setting import SystemSetting
+from app.platform.response_cache import response_cache
+from app.platform.settings_cache import settings_cache
+from app.skills import rollup
+from app.skills.burst import burst_detector
+from app.skills.keywords import keyword_tracker
+from app.skills.scoring_queue import enqueue_articles
 from app.sources.base import NewsItem, NewsSource
 from app.sources.rss import RSSSource
 from app.sources.crypto import CryptoSource
@@ -27,18 +32,16 @@ ALL_SOURCES: list[NewsSource] = [
 async def _is_source_enabled(session: AsyncSession, key: str) -> bool:
     if not key:
         return True
-    result = await session.execute(
-        select(SystemSetting).where(SystemSetting.key == key)
-    )
-    setting = result.scalar_one_or_none()
-    if not setting:
+    value = await settings_cache.get(key, session=session)
+    if value is None:
         return True
-    return setting.value == "true"
+    return value == "true"
 
 
 async def _save_items(session: AsyncSession, items: list[NewsItem], agent_key: str = "investment") -> tuple[int, list[dict]]:
     saved = 0
     new_articles: list[dict] = []
+    added: list[Article] = []
     for item in items:
         if not item.title or not item.url:
             continue
@@ -62,10 +65,23 @@ async def _save_items(session: AsyncSession, items: list[NewsItem], agent_key: s
             importance=item.importance,
         )
         session.add(article)
+        added.append(article)
         saved += 1
 
     if saved > 0:
+        await session.flush()
+        enqueue_articles(session, added)
+        await rollup.record_articles(session, added)
         await session.commit()
+        await response_cache.invalidate(f"articles:{agent_key}")
+        try:
+            await keyword_tracker.observe(agent_key, added)
+        except Exception as e:
+            logger.warning(f"Keyword tracking failed: {e}")
+        try:
+            await burst_detector.observe(agent_key, added)
+        except Exception as e:
+            logger.error(f"Burst detection failed: {e}")
         result = await session.execute(
             select(Article).order_by(Article.id.desc()).limit(saved)
         )
@@ -2,11 +2,8 @@ import logging
 from datetime import datetime
 
 import httpx
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import async_session
-from app.models.setting import SystemSetting
+from app.platform.settings_cache import settings_cache
 from app.sources.base import NewsSource, NewsItem
 
 logger = logging.getLogger(__name__)
@@ -24,12 +21,7 @@ class NewsAPISource(NewsSource):
     enabled_key = "source_newsapi_enabled"
 
     async def _get_api_key(self) -> str:
-        async with async_session() as session:
-            result = await session.execute(
-                select(SystemSetting).where(SystemSetting.key == "source_newsapi_key")
-            )
-            s = result.scalar_one_or_none()
-            return s.value if s and s.value else ""
+        return await settings_cache.get("source_newsapi_key") or ""
 
     async def fetch(self) -> list[NewsItem]:
         api_key = await self._get_api_key()
@@ -2,7 +2,6 @@ import logging
 from datetime import datetime
 from time import mktime
 
-import feedparser
 import httpx
 
 from app.sources.base import NewsSource, NewsItem
@@ -204,6 +203,8 @@ class RSSSource(NewsSource):
         self.feeds = feeds or DEFAULT_RSS_FEEDS
 
     async def fetch(self) -> list[NewsItem]:
+        import feedparser  # 延迟导入：仅在真正采集 RSS 时加载
+
         items = []
         async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
             for feed_cfg in self.feeds:
@@ -3,10 +3,7 @@ import logging
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-from sqlalchemy import select
-
-from app.database import async_session
-from app.models.setting import SystemSetting
+from app.platform.settings_cache import settings_cache
 from app.sources.base import NewsSource, NewsItem
 
 logger = logging.getLogger(__name__)
@@ -17,15 +14,11 @@ _client = None  # global twikit client, reused across calls
 
 
 async def _get_twitter_config() -> dict:
-    async with async_session() as session:
-        keys = [
-            "twitter_enabled", "twitter_auth_username", "twitter_auth_email",
-            "twitter_auth_password", "twitter_handles",
-        ]
-        result = await session.execute(
-            select(SystemSetting).where(SystemSetting.key.in_(keys))
-        )
-        settings = {s.key: s.value for s in result.scalars().all()}
+    keys = [
+        "twitter_enabled", "twitter_auth_username", "twitter_auth_email",
+        "twitter_auth_password", "twitter_handles",
+    ]
+    settings = await settings_cache.get_many(keys)
 
     handles = []
     try:
@@ -0,0 +1,109 @@
+"""列表接口序列化基准：每页 200 条文章的 CPU 耗时，旧路径 vs 快速路径。
+
+用法：
+    cd backend && python tests/bench_serialization.py [--rounds 50]
+
+- 旧路径：select(Article) 加载 ORM 对象 → to_dict() → jsonable_encoder → JSONResponse.render
+- 快速路径：select(*ARTICLE_ROW_COLUMNS) 取列 → ArticleRow → FastJSONResponse（orjson）
+只统计进程 CPU 时间（time.process_time），不含 gzip 压缩；使用内存 SQLite，不访问业务库。
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from sqlalchemy import desc, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models.article import ARTICLE_ROW_COLUMNS, Article, ArticleRow  # noqa: E402
+from app.platform.serialization import FastJSONResponse  # noqa: E402
+
+PAGE_SIZE = 200
+
+
+def _seed_articles(n: int) -> list[Article]:
+    now = datetime.now()
+    return [
+        Article(
+            agent_key="investment", title=f"美联储官员讲话暗示年内降息路径 {i}", url=f"https://example.com/news/{i}",
+            source="rss", category="global", summary="市场关注通胀数据与就业报告。" * 12, content="正文内容。" * 600,
+            image_url=f"https://example.com/img/{i}.jpg",
+            published_at=now - timedelta(minutes=i, microseconds=i), fetched_at=now - timedelta(minutes=i),
+            importance=i % 5, sentiment=("bullish", "bearish", "neutral")[i % 3],
+            ai_analysis={
+                "importance": i % 5, "sentiment": "bullish", "reason": "利率预期变化影响风险资产定价" * 3,
+                "tags": ["美联储", "利率", "美股"], "impact": {"美股": "bullish", "美债": "bearish"},
+            },
+            tags="美联储,利率,美股",
+        )
+        for i in range(n)
+    ]
+
+
+async def _legacy_page(session: AsyncSession) -> bytes:
+    result = await session.execute(select(Article).order_by(desc(Article.fetched_at)).limit(PAGE_SIZE))
+    items = [a.to_dict() for a in result.scalars().all()]
+    session.expunge_all()
+    return JSONResponse(jsonable_encoder({"items": items, "total": PAGE_SIZE})).body
+
+
+async def _fast_page(session: AsyncSession) -> bytes:
+    result = await session.execute(select(*ARTICLE_ROW_COLUMNS).order_by(desc(Article.fetched_at)).limit(PAGE_SIZE))
+    items = [ArticleRow.from_row(row) for row in result.all()]
+    return FastJSONResponse({"items": items, "total": PAGE_SIZE}).body
+
+
+async def _measure(session: AsyncSession, page, rounds: int) -> tuple[float, int]:
+    size = len(await page(session))  # 预热（编译语句缓存）
+    start = time.process_time()
+    for _ in range(rounds):
+        await page(session)
+    return (time.process_time() - start) / rounds * 1000, size
+
+
+async def run(rounds: int) -> dict:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add_all(_seed_articles(PAGE_SIZE))
+        await session.commit()
+        session.expunge_all()
+        legacy_ms, legacy_bytes = await _measure(session, _legacy_page, rounds)
+        fast_ms, fast_bytes = await _measure(session, _fast_page, rounds)
+    await engine.dispose()
+    return {
+        "page_size": PAGE_SIZE,
+        "rounds": rounds,
+        "legacy_cpu_ms": round(legacy_ms, 2),
+        "fast_cpu_ms": round(fast_ms, 2),
+        "speedup": round(legacy_ms / fast_ms, 2) if fast_ms else None,
+        "legacy_bytes": legacy_bytes,
+        "fast_bytes": fast_bytes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    result = asyncio.run(run(parser.parse_args().rounds))
+    for key, value in result.items():
+        print(f"{key:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 """Shared fixtures for backend tests."""
 import asyncio
 import os
+from contextlib import ExitStack
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
 
 import pytest
 import pytest_asyncio
@@ -20,6 +23,58 @@ def event_loop():
     loop.close()
 
 
+@pytest_asyncio.fixture(autouse=True)
+async def _fresh_response_cache():
+    """接口响应缓存是进程级单例，每个用例从空缓存开始（用例直接写库，不经过失效钩子）。"""
+    from app.platform.response_cache import response_cache
+    await response_cache.clear()
+    yield
+
+
+@pytest.fixture
+def freeze_time():
+    """freeze_time(start, *modules)：替换这些模块中的 datetime，now() 返回时钟类的 current，改写即可推进时间。"""
+    with ExitStack() as stack:
+        def freeze(start: datetime, *modules):
+            class Clock(datetime):
+                current = start
+
+                @classmethod
+                def now(cls, tz=None):
+                    return cls.current
+
+            for module in modules:
+                stack.enter_context(patch.object(module, "datetime", Clock))
+            return Clock
+
+        yield freeze
+
+
+@pytest.fixture
+def fresh_batcher():
+    """隔离按模型学习到的评分批大小，并固定模型上限（不读取全局设置）。"""
+    import app.skills.engine as engine_module
+    from app.ai.batching import AdaptiveBatcher
+
+    limits = {"model": "test-model", "context_tokens": 128_000, "max_output_tokens": 8192}
+    batcher = AdaptiveBatcher(
+        "test scoring", default_size=engine_module.BATCH_SIZE,
+        max_size=engine_module.MAX_BATCH_SIZE, output_tokens_per_item=200,
+    )
+    with patch.object(engine_module, "get_model_limits", AsyncMock(return_value=limits)), \
+            patch.object(engine_module, "scoring_batcher", batcher):
+        yield batcher
+
+
+@pytest.fixture
+def ai_enabled():
+    """评分任务在 AI 未配置时直接跳过；用例中视为已配置（LLM 调用由用例自行替换）。"""
+    import app.skills.engine as engine_module
+
+    with patch.object(engine_module, "ai_configured", AsyncMock(return_value=True)) as configured:
+        yield configured
+
+
 @pytest_asyncio.fixture
 async def db_session():
     """Provide a clean async DB session with all tables created."""
@@ -42,6 +97,13 @@ async def db_session():
     from app.models.cs2_price import CS2PriceSnapshot  # noqa: F401
     from app.models.cs2_prediction import CS2Prediction  # noqa: F401
     from app.models.cs2_watchlist import CS2Watchlist  # noqa: F401
+    from app.models.llm_cache import LLMCacheEntry  # noqa: F401
+    from app.models.scoring_task import ScoringTask  # noqa: F401
+    from app.models.llm_usage import LLMUsage  # noqa: F401
+    from app.models.notification import NotificationDelivery  # noqa: F401
+    from app.models.broadcast_event import BroadcastEvent  # noqa: F401
+    from app.models.article_rollup import ArticleHourlyRollup  # noqa: F401
+    from app.models.response_cache import ResponseCacheEntry  # noqa: F401
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -52,3 +114,17 @@ async def db_session():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
     await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def file_session(tmp_path):
+    """文件库会话及其 session 工厂，用于多个并发会话的场景（内存库共享单连接，无法模拟）。"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", echo=False)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with session_factory() as session:
+        yield session, session_factory
+
+    await engine.dispose()
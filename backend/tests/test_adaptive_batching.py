@@ -0,0 +1,90 @@
+"""自适应批处理：token 预算切批、部分结果拆半重试、故障时停止拆分、按模型学习批大小。"""
+import pytest
+
+from app.ai.batching import AdaptiveBatcher, estimate_tokens
+
+LIMITS = {"model": "m", "context_tokens": 100_000, "max_output_tokens": 4000}
+
+
+def _batcher(**kw) -> AdaptiveBatcher:
+    params = {"default_size": 10, "max_size": 20, "output_tokens_per_item": 100, "prompt_overhead_tokens": 0}
+    params.update(kw)
+    return AdaptiveBatcher("test", **params)
+
+
+def test_estimate_tokens_counts_cjk_per_char():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("央行降息") == 4
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_plan_respects_size_output_and_context_limits():
+    batcher = _batcher()
+    items = list(range(25))
+    assert [len(b) for b in batcher.plan(items, "m", 100_000, 4000, lambda _: 10)] == [10, 10, 5]
+    # 输出上限 500 token / 每条 100 → 每批最多 5 条
+    assert [len(b) for b in batcher.plan(items, "m", 100_000, 500, lambda _: 10)] == [5] * 5
+    # 上下文扣除输出后只剩 1000 token，每条 300 → 每批 3 条
+    assert [len(b) for b in batcher.plan(items[:7], "m", 2000, 4000, lambda _: 300)] == [3, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_partial_result_retries_only_missing_items():
+    batcher = _batcher()
+    calls: list[list[int]] = []
+
+    async def call(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            return {i: "ok" for i in batch[:6]}  # 只返回了前 6 条
+        return {i: "ok" for i in batch}
+
+    results = await batcher.run(list(range(10)), call, key=lambda i: i, estimate=lambda _: 10, **LIMITS)
+    assert set(results) == set(range(10))
+    assert sorted(map(sorted, calls[1:])) == [[6, 7], [8, 9]]
+
+
+@pytest.mark.asyncio
+async def test_unparseable_response_bisects_down_to_bad_item():
+    batcher = _batcher()
+
+    async def call(batch):
+        return {} if 3 in batch else {i: "ok" for i in batch}
+
+    results = await batcher.run(list(range(8)), call, key=lambda i: i, estimate=lambda _: 10, **LIMITS)
+    assert set(results) == set(range(8)) - {3}
+
+
+@pytest.mark.asyncio
+async def test_provider_outage_stops_splitting():
+    batcher = _batcher()
+    calls = 0
+
+    async def call(batch):
+        nonlocal calls
+        calls += 1
+        raise RuntimeError("503")
+
+    results = await batcher.run(list(range(10)), call, key=lambda i: i, estimate=lambda _: 10, **LIMITS)
+    assert results == {}
+    assert calls == 3  # 整批 + 两个半批，之后不再继续拆
+
+
+@pytest.mark.asyncio
+async def test_batch_size_learned_per_model():
+    batcher = _batcher(default_size=4, max_size=6)
+
+    async def ok(batch):
+        return {i: "ok" for i in batch}
+
+    for _ in range(3):
+        await batcher.run(list(range(10)), ok, key=lambda i: i, estimate=lambda _: 10, **LIMITS)
+    assert batcher.batch_size("m") == 6  # 成功后逐步增大，封顶 max_size
+
+    async def truncated(batch):
+        return {i: "ok" for i in batch[: len(batch) // 2]}
+
+    await batcher.run(list(range(6)), truncated, key=lambda i: i, estimate=lambda _: 10, **LIMITS)
+    assert batcher.batch_size("m") < 6
+    assert batcher.batch_size("other-model") == 4
+    assert batcher.stats()["m"]["success_rate"] < 1
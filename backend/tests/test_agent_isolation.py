@@ -219,3 +219,17 @@ class TestAgentRegistry:
         reg = AgentRegistry()
         with pytest.raises(KeyError):
             reg.get("nonexistent_agent")
+
+    def test_lazy_registry_loads_only_enabled_agents(self):
+        from app.platform.registry import AgentRegistry
+        from app.agents import register_builtin_agents
+
+        reg = register_builtin_agents(AgentRegistry())
+        assert reg.list_agents() == []
+        assert set(reg.available_keys()) == {"investment", "tech_info", "cs2_market"}
+
+        loaded = reg.load_enabled(["cs2_market", "unknown_agent"])
+        assert [a.key for a in loaded] == ["cs2_market"]
+        assert [a.key for a in reg.list_agents()] == ["cs2_market"]
+        # get() 对已登记但未加载的 agent 触发按需加载
+        assert reg.get("tech_info").key == "tech_info"
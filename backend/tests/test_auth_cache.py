@@ -0,0 +1,78 @@
+"""认证：get_current_user 短 TTL 用户缓存及失效，密码哈希在线程池中执行。"""
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select
+
+import app.auth as auth
+from app.auth import (
+    create_access_token,
+    get_current_user,
+    hash_password,
+    hash_password_async,
+    verify_password_async,
+)
+from app.models.user import User
+
+
+@pytest.fixture(autouse=True)
+def _clear_user_cache():
+    auth.invalidate_user_cache()
+    yield
+    auth.invalidate_user_cache()
+
+
+def _credentials(username: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token(username))
+
+
+async def _add_user(session, username="alice", is_active=True) -> User:
+    user = User(username=username, hashed_password=hash_password("secret1"), is_active=is_active)
+    session.add(user)
+    await session.commit()
+    return user
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_served_from_cache(db_session):
+    await _add_user(db_session)
+    creds = _credentials("alice")
+
+    first = await get_current_user(creds, db_session)
+    with patch.object(db_session, "execute", side_effect=AssertionError("should hit cache")):
+        second = await get_current_user(creds, db_session)
+    assert second.id == first.id
+    assert second.username == "alice"
+
+
+@pytest.mark.asyncio
+async def test_cache_expires_after_ttl(db_session):
+    await _add_user(db_session)
+    creds = _credentials("alice")
+    with patch.object(auth, "USER_CACHE_TTL_SECONDS", 0):
+        await get_current_user(creds, db_session)
+        assert auth._get_cached_user("alice") is None
+
+
+@pytest.mark.asyncio
+async def test_disabling_user_invalidates_cache(db_session):
+    await _add_user(db_session)
+    creds = _credentials("alice")
+    await get_current_user(creds, db_session)
+
+    row = (await db_session.execute(select(User).where(User.username == "alice"))).scalar_one()
+    row.is_active = False
+    await db_session.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(creds, db_session)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_async_password_helpers_roundtrip():
+    hashed = await hash_password_async("secret1")
+    assert await verify_password_async("secret1", hashed)
+    assert not await verify_password_async("wrong", hashed)
@@ -0,0 +1,206 @@
+"""WebSocket 广播：一次序列化、发布不阻塞、慢客户端积压合并与断开；按订阅筛选；断线补发；跨进程分发。"""
+import asyncio
+import json
+
+import pytest
+
+from app.realtime.broadcaster import CLOSE_TRY_AGAIN_LATER, Broadcaster
+from app.realtime.backplane import SQLiteBackplane
+from app.realtime.replay import EventSpill
+from app.realtime.subscriptions import Subscription
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent: list[str] = []
+        self.closed_with = None
+
+    async def send_text(self, text: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_with = code
+
+
+@pytest.mark.asyncio
+async def test_publish_serializes_once_and_never_waits():
+    hub = Broadcaster()
+    fast, slow = FakeSocket(), FakeSocket(delay=5)
+    clients = [hub.connect(fast), hub.connect(slow)]
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    assert hub.publish("new_articles", [{"id": 1}, {"id": 2}]) == 2
+    assert loop.time() - started < 0.05
+    # 两个客户端共享同一个已序列化的帧
+    assert clients[0].frames[0] is clients[1].frames[0]
+    await asyncio.sleep(0.01)
+
+    [frame] = map(json.loads, fast.sent)
+    assert frame == {"type": "new_articles", "seq": hub.seq, "data": [{"id": 1}, {"id": 2}]}
+    assert slow.sent == []
+    for client in clients:
+        await hub.disconnect(client)
+    assert not hub.clients
+
+
+@pytest.mark.asyncio
+async def test_backlog_is_merged_and_stuck_client_is_evicted():
+    hub = Broadcaster(queue_size=3, send_timeout=0.2)
+    stuck, fast = FakeSocket(delay=60), FakeSocket()
+    client = hub.connect(stuck)
+    hub.connect(fast)
+
+    hub.publish("new_articles", [{"id": 0}], policy="merge")
+    await asyncio.sleep(0)  # stuck 的发送任务取走第一帧后卡住
+    for i in range(1, 6):
+        hub.publish("new_articles", [{"id": i}, {"id": i + 100}], policy="merge")
+        await asyncio.sleep(0.005)
+
+    # 队列满时积压的文章帧合并为一条提示帧
+    types = [json.loads(f.text)["type"] for f in client.frames]
+    assert types == ["articles_skipped", "new_articles"]
+    assert json.loads(client.frames[0].text)["data"] == {"count": 8}
+
+    # 队列被不可丢弃的帧占满时断开该客户端，其他客户端不受影响
+    for i in range(3):
+        hub.publish("new_alert", {"id": i})
+        await asyncio.sleep(0.005)
+    assert client not in hub.clients and hub.evicted == 1
+    await asyncio.sleep(0.3)
+    assert stuck.closed_with == CLOSE_TRY_AGAIN_LATER
+    assert len(fast.sent) == 9
+
+
+@pytest.mark.asyncio
+async def test_send_timeout_disconnects_client():
+    hub = Broadcaster(send_timeout=0.05)
+    slow = FakeSocket(delay=1)
+    client = hub.connect(slow)
+    hub.publish("new_alert", {"id": 1})
+    await asyncio.sleep(0.1)
+
+    assert client.closed and slow.closed_with == CLOSE_TRY_AGAIN_LATER
+    # 下一次发布时移出客户端列表
+    assert hub.publish("new_alert", {"id": 2}) == 0 and not hub.clients
+
+
+@pytest.mark.asyncio
+async def test_events_reach_only_matching_subscriptions():
+    hub = Broadcaster()
+    everything, important, cs2 = FakeSocket(), FakeSocket(), FakeSocket()
+    hub.connect(everything)
+    hub.subscribe(hub.connect(important), Subscription.parse({"agent_keys": ["investment"], "min_importance": 3}))
+    hub.subscribe(hub.connect(cs2), Subscription.parse({
+        "topics": ["cs2_price_ticks", "new_alert"], "agent_keys": "cs2_market", "item_ids": [1],
+    }))
+
+    articles = [
+        {"id": 1, "agent_key": "investment", "importance": 1},
+        {"id": 2, "agent_key": "investment", "importance": 4},
+        {"id": 3, "agent_key": "tech_info", "importance": 5},
+    ]
+    assert hub.publish("new_articles", articles) == 2
+    ticks = [{"item_id": 1, "price": 9.5}, {"item_id": 2, "price": 3}]
+    assert hub.publish("cs2_price_ticks", ticks, agent_key="cs2_market") == 1
+    assert hub.publish("new_alert", {"id": 7, "agent_key": "investment"}) == 2
+    await asyncio.sleep(0.01)
+
+    def received(socket):
+        return [(m["type"], [d["id"] for d in m["data"]] if isinstance(m["data"], list) else m["data"].get("id"))
+                for m in map(json.loads, socket.sent)]
+
+    assert received(everything) == [("new_articles", [1, 2]), ("new_articles", [3]), ("new_alert", 7)]
+    assert received(important) == [("new_articles", [2]), ("new_alert", 7)]
+    assert [json.loads(m)["data"] for m in cs2.sent] == [[{"item_id": 1, "price": 9.5}]]
+
+
+def test_subscription_rejects_unknown_topics():
+    with pytest.raises(ValueError):
+        Subscription.parse({"topics": ["everything"]})
+    assert Subscription.parse({}).topics == {"new_articles", "new_alert"}
+
+
+def _received(socket):
+    return [(m["type"], m.get("seq"), m["data"]) for m in map(json.loads, socket.sent)]
+
+
+@pytest.mark.asyncio
+async def test_resume_replays_missed_events_or_asks_for_resync():
+    hub = Broadcaster(replay_size=3)
+    hub.publish("new_alert", {"id": 1, "agent_key": "investment"})
+    seen = hub.seq
+    hub.publish("new_alert", {"id": 2, "agent_key": "tech_info"})
+    hub.publish("new_alert", {"id": 3, "agent_key": "investment"})
+
+    socket = FakeSocket()
+    client = hub.connect(socket)
+    hub.subscribe(client, Subscription.parse({"agent_keys": ["investment"]}))
+    await hub.resume(client, seen)
+    hub.publish("new_alert", {"id": 4, "agent_key": "investment"})
+    await asyncio.sleep(0.01)
+    assert [(t, data["id"]) for t, _, data in _received(socket)] == [("new_alert", 3), ("new_alert", 4)]
+
+    # 缓冲只保留最近 3 个事件，再来一个之后 seen 之后的事件不再完整
+    hub.publish("new_alert", {"id": 5, "agent_key": "investment"})
+    stale = FakeSocket()
+    await hub.resume(hub.connect(stale), seen)
+    await asyncio.sleep(0.01)
+    assert _received(stale) == [("resync", None, {"seq": hub.seq})]
+
+
+@pytest.mark.asyncio
+async def test_resume_across_restart_from_spilled_events(file_session):
+    _, factory = file_session
+    before = Broadcaster(spill=EventSpill(factory))
+    await before.start()
+    for i in range(3):
+        before.publish("new_articles", [{"id": i, "agent_key": "investment", "category": "macro" if i else "stocks"}])
+    first = before.seq - 2
+    await before.stop()
+
+    after = Broadcaster(spill=EventSpill(factory))
+    await after.start()
+    assert after.seq >= before.seq
+    socket = FakeSocket()
+    client = after.connect(socket)
+    after.subscribe(client, Subscription.parse({"categories": ["macro"]}))
+    await after.resume(client, first)
+    await asyncio.sleep(0.01)
+    await after.stop()
+
+    assert [(seq, [a["id"] for a in data]) for _, seq, data in _received(socket)] == [
+        (first + 1, [1]), (first + 2, [2]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backplane_fans_out_to_every_worker(file_session):
+    _, factory = file_session
+    workers = [SQLiteBackplane(Broadcaster(spill=EventSpill(factory)), factory, poll_seconds=0.02) for _ in range(2)]
+    sockets = [FakeSocket(), FakeSocket()]
+    for worker, socket in zip(workers, sockets):
+        await worker.start()
+        worker.broadcaster.connect(socket)
+
+    await workers[0].publish("new_alert", {"id": 1, "agent_key": "investment"})
+    await workers[1].publish("new_articles", [{"id": 2, "agent_key": "investment"}, {"id": 3, "agent_key": "tech_info"}])
+    await asyncio.sleep(0.2)
+
+    # 两个进程的客户端收到相同的事件，seq 由数据库统一分配
+    received = [_received(socket) for socket in sockets]
+    assert received[0] == received[1]
+    assert sorted(t for t, _, _ in received[0]) == ["new_alert", "new_articles", "new_articles"]
+    seqs = [seq for _, seq, _ in received[0]]
+    assert seqs == sorted(set(seqs))
+
+    # 重连到另一个 worker 也能按 seq 补发
+    late = FakeSocket()
+    client = workers[1].broadcaster.connect(late)
+    await workers[1].broadcaster.resume(client, seqs[0])
+    await asyncio.sleep(0.01)
+    assert [seq for _, seq, _ in _received(late)] == seqs[1:]
+    for worker in workers:
+        await worker.stop()
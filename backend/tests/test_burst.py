@@ -0,0 +1,155 @@
+"""突发检测：EWMA 基线、预热期不预警、新出现的关键词合并、补抓按发布时间分时段、指纹去重、入库即推送。"""
+from datetime import datetime, timedelta
+from typing import Optional
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select
+
+import app.skills.burst as burst_module
+import app.skills.engine as engine_module
+from app.models.alert import Alert
+from app.models.article import Article
+from app.skills.burst import BurstDetector
+
+START = datetime(2026, 3, 2, 8, 0)
+
+
+def _article(i: int, minutes: float, source: str = "rss-a", title: str = "", category: str = "crypto",
+             published: Optional[float] = None) -> Article:
+    return Article(id=i, agent_key="investment", title=title or f"note{i}", url=f"u{i}", source=source,
+                   category=category, fetched_at=START + timedelta(minutes=minutes),
+                   published_at=START + timedelta(minutes=published) if published is not None else None)
+
+
+def _baseline(detector: BurstDetector, hours: int = 3) -> int:
+    """每 10 分钟 1 篇，返回下一个可用 id。"""
+    for i in range(hours * 6):
+        assert detector.detect("investment", [_article(i + 1, i * 10)], z_threshold=4) == []
+    return hours * 6 + 1
+
+
+def test_burst_on_source_and_new_keyword():
+    detector = BurstDetector()
+    next_id = _baseline(detector)
+    spike = [
+        _article(next_id + i, 180 + i, title=f"交易所暂停提币 {i}")
+        for i in range(7)
+    ]
+    spread = [
+        _article(next_id + 10 + i, 181 + i, source=f"site-{i}", title=f"美联储官员暗示年内降息 {i}", category="macro")
+        for i in range(5)
+    ]
+    bursts = {(b.dimension, b.value): b for b in detector.detect("investment", spike + spread, z_threshold=4)}
+
+    source = bursts[("source", "rss-a")]
+    assert source.count == 7 and source.baseline == pytest.approx(1.0, abs=0.2)
+    assert source.article_ids == [a.id for a in spike]
+    # 从未出现过的关键词按此前一直为 0 处理，同样可以触发；同一事件的二元词合并为一条，
+    # 以标题中连续命中的片段命名；“交易所暂停提币”的文章已在来源突增中，不再单独预警
+    keywords = [b for b in bursts.values() if b.dimension == "keyword"]
+    assert len(keywords) == 1
+    assert keywords[0].label == "美联储官员暗示年内降息"
+    assert {"联储", "降息"} <= set(keywords[0].terms)
+    assert keywords[0].article_ids == [a.id for a in spread]
+    # 分类数量未达到最少文章数
+    assert ("category", "crypto") not in bursts
+
+
+def test_catch_up_fetch_is_bucketed_by_published_at():
+    def steady(detector: BurstDetector, with_published: bool) -> set[tuple[str, str]]:
+        # 4 小时内每 15 分钟 2 篇，随后断开 1 小时，恢复后一次补抓 8 篇积压文章
+        for step in range(16):
+            minutes = step * 15
+            batch = [_article(step * 2 + k + 1, minutes, published=minutes if with_published else None) for k in range(2)]
+            assert detector.detect("investment", batch, z_threshold=4) == []
+        backlog = [
+            _article(100 + k, 300, published=240 + k * 7.5 if with_published else None)
+            for k in range(8)
+        ]
+        return {(b.dimension, b.value) for b in detector.detect("investment", backlog, z_threshold=4)}
+
+    # 按发布时间分散回各自时段，不构成突增
+    assert steady(BurstDetector(), with_published=True) == set()
+    # 缺少发布时间时退回抓取时间，积压文章挤进同一时段
+    assert ("source", "rss-a") in steady(BurstDetector(), with_published=False)
+
+
+def test_no_alerts_before_warmup():
+    detector = BurstDetector()
+    burst = [_article(i, 5) for i in range(1, 20)]
+    assert detector.detect("investment", burst, z_threshold=4) == []
+
+
+@pytest.mark.asyncio
+async def test_observe_raises_alert_once_and_pushes(file_session):
+    db_session, factory = file_session
+    detector = BurstDetector()
+    next_id = _baseline(detector)
+    detector._loaded.add("investment")
+
+    first = [_article(next_id + i, 180 + i) for i in range(6)]
+    more = [_article(next_id + 10 + i, 186 + i, category="global") for i in range(3)]
+    push = AsyncMock()
+    with patch.object(burst_module, "async_session", factory), \
+            patch.object(burst_module, "_push_alerts", push):
+        alerts = await detector.observe("investment", first)
+        # 同一小时内持续突增：指纹相同，不重复预警
+        again = await detector.observe("investment", more)
+        for task in list(detector._pushes):
+            await task
+
+    assert [a.title for a in alerts] == ["来源突增：rss-a"]
+    assert again == []
+    saved = (await db_session.execute(select(Alert))).scalars().all()
+    assert len(saved) == 1 and saved[0].skill_name == "burst_detector"
+    assert saved[0].trigger_data["dimension"] == "source" and saved[0].trigger_data["count"] == 6
+    assert saved[0].fingerprint.startswith("burst:")
+    push.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_growing_keyword_story_alerts_once_per_hour(file_session):
+    db_session, factory = file_session
+    detector = BurstDetector()
+    next_id = _baseline(detector)
+    detector._loaded.add("investment")
+
+    def story(offset: int, minutes: int, title: str, n: int) -> list[Article]:
+        return [
+            _article(next_id + offset + i, minutes, source=f"site-{i}", title=f"{title} {i}", category=f"c{i}")
+            for i in range(n)
+        ]
+
+    with patch.object(burst_module, "async_session", factory), \
+            patch.object(burst_module, "_push_alerts", AsyncMock()):
+        first = await detector.observe("investment", story(0, 181, "美联储表态", 5))
+        # 同一小时内同一事件继续发酵：新增“降息”，z 值最高的词和展示名称都变了
+        again = await detector.observe("investment", story(10, 185, "联储降息", 8))
+
+    assert [a.title for a in first] == ["关键词突增：美联储表态"]
+    assert again == []
+    saved = (await db_session.execute(select(Alert))).scalars().all()
+    assert len(saved) == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_anomaly_alerts_dedup_by_fingerprint(file_session):
+    db_session, factory = file_session
+    db_session.add_all([
+        Article(agent_key="investment", title="央行意外加息", url="u1", source="s", fetched_at=datetime.now(), importance=5),
+        # 其他来源转载同一标题（仅空白与标点不同）
+        Article(agent_key="investment", title="央行 意外加息！", url="u2", source="t", fetched_at=datetime.now(), importance=5),
+        # 升级前已有同标题预警（无指纹）
+        Article(agent_key="investment", title="原油大跌", url="u3", source="s", fetched_at=datetime.now(), importance=4),
+        Alert(agent_key="investment", level="high", title="原油大跌", description="", skill_name="anomaly_detector"),
+    ])
+    await db_session.commit()
+
+    with patch.object(engine_module, "async_session", factory):
+        await engine_module.run_anomaly_detection()
+        await engine_module.run_anomaly_detection()
+
+    alerts = (await db_session.execute(select(Alert).order_by(Alert.id))).scalars().all()
+    assert [a.title for a in alerts] == ["原油大跌", "央行意外加息"]
+    assert alerts[1].level == "critical" and alerts[1].fingerprint.startswith("title:")
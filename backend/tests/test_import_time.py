@@ -0,0 +1,74 @@
+"""启动耗时回归：`python -X importtime -c "import app.main"` 不得超过预算。
+
+预算可通过环境变量 IMPORT_TIME_BUDGET_MS 调整（慢速 CI 机器可放宽）。
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+IMPORT_TIME_BUDGET_MS = int(os.environ.get("IMPORT_TIME_BUDGET_MS", "2000"))
+RUNS = 3
+
+# 只应在首次使用时加载的重型/可选依赖，以及应由 ENABLED_AGENTS 按需加载的 agent 包
+DEFERRED_MODULES = {
+    "feedparser",
+    "twikit",
+    "bs4",
+    "lxml",
+    "app.scheduler",
+    "app.agents.investment",
+    "app.agents.tech_info",
+    "app.agents.cs2_market",
+}
+
+
+def _run_importtime() -> tuple[int, set[str]]:
+    """返回 (app.main 累计耗时 µs, 被 import 的模块集合)。"""
+    env = {**os.environ, "DATABASE_URL": "sqlite+aiosqlite:///:memory:"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    cumulative_us = None
+    modules: set[str] = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        name = parts[2]
+        modules.add(name)
+        if name == "app.main":
+            cumulative_us = int(parts[1])
+    assert cumulative_us is not None, "app.main not found in -X importtime output"
+    return cumulative_us, modules
+
+
+def test_heavy_dependencies_are_deferred():
+    _, modules = _run_importtime()
+    leaked = sorted(
+        m for m in modules
+        if any(m == d or m.startswith(d + ".") for d in DEFERRED_MODULES)
+    )
+    assert not leaked, f"imported at startup but should be lazy: {leaked}"
+
+
+@pytest.mark.skipif(IMPORT_TIME_BUDGET_MS <= 0, reason="import-time budget disabled")
+def test_app_main_import_time_within_budget():
+    # 取多次运行的最小值，排除磁盘缓存冷启动等噪声
+    best_us = min(_run_importtime()[0] for _ in range(RUNS))
+    best_ms = best_us / 1000
+    assert best_ms <= IMPORT_TIME_BUDGET_MS, (
+        f"import app.main took {best_ms:.0f}ms, budget is {IMPORT_TIME_BUDGET_MS}ms"
+    )
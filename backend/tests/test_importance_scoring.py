@@ -0,0 +1,93 @@
+"""重要度评分：批次并发执行、逐批写回、失败拆批，以及 AI 客户端按服务商限制在途请求数。"""
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+
+import app.ai.client as client_module
+import app.skills.engine as engine_module
+from app.models.article import Article
+
+
+pytestmark = pytest.mark.usefixtures("fresh_batcher", "ai_enabled")
+
+
+async def _seed_articles(session, n: int):
+    session.add_all([
+        Article(agent_key="investment", title=f"T{i}", url=f"u{i}", source="s", fetched_at=datetime.now())
+        for i in range(n)
+    ])
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_batches_scored_concurrently_and_written_back(file_session):
+    db_session, factory = file_session
+    await _seed_articles(db_session, 25)
+    in_flight = 0
+    peak = 0
+
+    async def fake_score_batch(articles, agent_key="investment"):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return {a.id: {"importance": 3, "sentiment": "neutral", "tags": ["x"]} for a in articles}
+
+    with patch.object(engine_module, "async_session", factory), \
+            patch.object(engine_module, "_score_batch", fake_score_batch):
+        await engine_module.run_importance_scoring("investment")
+
+    assert peak == 3  # 25 篇 = 3 批，全部同时在途
+    db_session.expire_all()
+    rows = (await db_session.execute(select(Article))).scalars().all()
+    assert all(a.importance == 3 and a.tags == "x" and a.ai_analysis for a in rows)
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_split_without_blocking_others(file_session):
+    db_session, factory = file_session
+    await _seed_articles(db_session, 20)
+    calls = 0
+
+    async def flaky_score_batch(articles, agent_key="investment"):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("provider down")
+        return {a.id: {"importance": 2, "sentiment": "neutral", "tags": []} for a in articles}
+
+    with patch.object(engine_module, "async_session", factory), \
+            patch.object(engine_module, "_score_batch", flaky_score_batch):
+        await engine_module.run_importance_scoring("investment")
+
+    db_session.expire_all()
+    scored = (await db_session.execute(select(Article).where(Article.ai_analysis != None))).scalars().all()  # noqa: E711
+    # 失败的 10 篇拆成 5+5 重试，另一批不受影响
+    assert len(scored) == 20
+    assert calls == 4
+
+
+@pytest.mark.asyncio
+async def test_provider_semaphore_caps_in_flight_requests():
+    config = {"api_base": "https://p.example/v1", "max_concurrency": 2}
+    in_flight = 0
+    peak = 0
+
+    async def call():
+        nonlocal in_flight, peak
+        async with client_module._provider_semaphore(config):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    with patch.dict(client_module._provider_limits, clear=True):
+        await asyncio.gather(*(call() for _ in range(6)))
+        assert peak == 2
+        # 其他服务商不共享额度
+        other = client_module._provider_semaphore({"api_base": "https://q.example/v1", "max_concurrency": 2})
+        assert other is not client_module._provider_semaphore(config)
@@ -0,0 +1,95 @@
+"""流式热词：中英混合分词、Space-Saving 容量上界、按小时段合并的滑动窗口与缓存、入库回填不重复计数。"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+import app.skills.keywords as keywords_module
+from app.models.article import Article
+from app.skills.keywords import KeywordTracker, SpaceSaving, merge_runs, tokenize
+
+NOW = datetime(2026, 3, 2, 12, 30)
+
+
+@pytest.fixture
+def clock(freeze_time):
+    return freeze_time(NOW, keywords_module)
+
+
+def _article(i: int, title: str, hours: float = 0, category: str = "crypto") -> Article:
+    return Article(id=i, agent_key="investment", title=title, url=f"u{i}", source="s",
+                   category=category, fetched_at=NOW - timedelta(hours=hours))
+
+
+def test_tokenize_mixed_text():
+    tokens = tokenize("美联储宣布降息，BTC ETF inflows surge to record")
+    assert {"美联", "联储", "降息", "BTC", "ETF", "inflows", "surge", "record"} <= set(tokens)
+    assert "to" not in tokens
+    # 含虚词的二元组被过滤
+    assert not any("的" in t for t in tokenize("市场的情绪"))
+
+
+def test_space_saving_is_bounded():
+    sketch = SpaceSaving(capacity=3)
+    for term in ["a"] * 5 + ["b"] * 3 + ["c", "d", "e"]:
+        sketch.add(term)
+    assert len(sketch) == 3
+    assert sketch.counts["a"] == 5 and sketch.counts["b"] == 3
+    # 每次淘汰最小计数里最早进入的词，新词继承其计数 + 1
+    assert sketch.counts["e"] == 3 and "c" not in sketch.counts and "d" not in sketch.counts
+    sketch.add("f")
+    assert "b" not in sketch.counts and sketch.counts["e"] == 3 and sketch.counts["f"] == 4
+
+
+def test_merge_runs_joins_adjacent_bigrams():
+    runs = merge_runs({"美联": 10, "联储": 9, "降息": 10, "储备": 2, "ETF": 4})
+    assert runs["美联储"] == (9, ["美联", "联储"])
+    # 计数相差较大的片段不拼接
+    assert runs["储备"] == (2, ["储备"])
+    assert runs["降息"][0] == 10 and runs["ETF"][0] == 4
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_and_cache(clock):
+    tracker = KeywordTracker()
+    with patch.object(keywords_module, "async_session", side_effect=RuntimeError("no db")):
+        await tracker.observe("investment", [
+            _article(1, "比特币 ETF 获批", hours=20),
+            _article(2, "以太坊 ETF 申请", hours=10, category="global"),
+            _article(3, "比特币 突破新高", hours=1),
+            _article(4, "比特币 ETF 资金流入", hours=0),
+        ])
+        top = await tracker.top("investment", limit=5)
+        counts = {t["term"]: t for t in top}
+        assert counts["ETF"]["count"] == 3 and counts["比特币"]["count"] == 3
+        # 最近 3 小时出现 1 次，频率是窗口平均的 24/3/3 倍
+        assert counts["ETF"]["recent"] == 1 and counts["ETF"]["trend"] == 2.67
+        assert "以太坊" in {t["term"] for t in await tracker.top("investment", category="global")}
+
+        # 无新数据且未跨小时：直接返回缓存
+        with patch.object(keywords_module, "Counter", side_effect=AssertionError("recomputed")):
+            assert await tracker.top("investment", limit=5) == top
+
+        last_hours = await tracker.top("investment", hours=2)
+        assert {t["term"]: t["count"] for t in last_hours}["比特币"] == 2
+
+        # 5 小时后 20 小时前的文章出窗
+        clock.current = NOW + timedelta(hours=5)
+        counts = {t["term"]: t["count"] for t in await tracker.top("investment")}
+        assert counts["ETF"] == 2 and counts["比特币"] == 2
+
+
+@pytest.mark.asyncio
+async def test_ingest_warm_up_does_not_double_count(file_session, clock):
+    db_session, factory = file_session
+    old = _article(1, "黄金 避险 需求", hours=3)
+    new = _article(2, "黄金 创新高", hours=0)
+    db_session.add_all([old, new])
+    await db_session.commit()
+
+    tracker = KeywordTracker()
+    with patch.object(keywords_module, "async_session", factory):
+        # 新入库的文章已提交，回填时跳过，由本次 observe 计入
+        await tracker.observe("investment", [new])
+        counts = {t["term"]: t["count"] for t in await tracker.top("investment")}
+    assert counts["黄金"] == 2 and counts["避险"] == 1
@@ -0,0 +1,105 @@
+"""LLM 响应缓存：内容寻址 key、TTL、条数淘汰、命中率统计及 chat_completion 接入。"""
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select
+
+import app.ai.cache as cache_module
+import app.ai.client as client_module
+from app.ai.cache import LLMResponseCache, make_cache_key
+from app.models.llm_cache import LLMCacheEntry
+
+MESSAGES = [{"role": "user", "content": "分析一下"}]
+AI_CONFIG = {
+    "name": "openai",
+    "enabled": True,
+    "api_key": "k",
+    "api_base": "https://api.example.com/v1",
+    "model": "gpt-4o-mini",
+    "api_format": "openai",
+}
+
+
+@pytest.fixture
+def use_test_db(db_session):
+    @asynccontextmanager
+    async def fake_session():
+        yield db_session
+
+    with patch.object(cache_module, "async_session", fake_session):
+        yield db_session
+
+
+def test_cache_key_is_stable_and_content_sensitive():
+    key = make_cache_key("m", MESSAGES, 0.3, 100, "openai")
+    assert key == make_cache_key("m", [dict(MESSAGES[0])], 0.3, 100, "openai")
+    assert key != make_cache_key("m2", MESSAGES, 0.3, 100, "openai")
+    assert key != make_cache_key("m", MESSAGES, 0.4, 100, "openai")
+    assert key != make_cache_key("m", MESSAGES, 0.3, 100, "openai", {"type": "json_object"})
+    # 同名模型在不同服务商 / 接口地址上不共用缓存
+    routed = make_cache_key("m", MESSAGES, 0.3, 100, "openai", provider="openai", api_base="https://api.openai.com/v1")
+    assert routed != make_cache_key("m", MESSAGES, 0.3, 100, "openai", provider="deepseek", api_base="https://api.openai.com/v1")
+    assert routed != make_cache_key("m", MESSAGES, 0.3, 100, "openai", provider="openai", api_base="https://proxy.example.com/v1")
+    assert routed == make_cache_key("m", MESSAGES, 0.3, 100, "openai", provider="openai", api_base="https://api.openai.com/v1/")
+
+
+@pytest.mark.asyncio
+async def test_get_set_and_expiry(use_test_db):
+    cache = LLMResponseCache(ttl_seconds=3600, max_entries=10)
+    assert await cache.get("k1") is None
+
+    await cache.set("k1", "m", "hello")
+    assert await cache.get("k1") == "hello"
+
+    await cache.set("k2", "m", "stale", ttl_seconds=0)
+    assert await cache.get("k2") is None
+
+    stats = await cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_eviction_drops_least_recently_used(use_test_db):
+    cache = LLMResponseCache(ttl_seconds=3600, max_entries=2)
+    await cache.set("a", "m", "A")
+    await cache.set("b", "m", "B")
+    # 让 a 比 b 更久未使用
+    row = (await use_test_db.execute(select(LLMCacheEntry).where(LLMCacheEntry.cache_key == "a"))).scalar_one()
+    row.last_used_at = datetime.utcnow() - timedelta(hours=1)
+    await use_test_db.commit()
+
+    await cache.set("c", "m", "C")
+    keys = set((await use_test_db.execute(select(LLMCacheEntry.cache_key))).scalars().all())
+    assert keys == {"b", "c"}
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_served_from_cache_and_bypassable(use_test_db):
+    cache = LLMResponseCache(ttl_seconds=3600, max_entries=10)
+    call = AsyncMock(return_value='{"ok": true}')
+    with patch.object(client_module, "llm_cache", cache), \
+            patch.object(client_module, "_get_ai_config", AsyncMock(return_value=dict(AI_CONFIG))), \
+            patch.object(client_module, "_call_openai_format", call):
+        assert await client_module.chat_completion_json(MESSAGES) == {"ok": True}
+        assert await client_module.chat_completion_json(MESSAGES) == {"ok": True}
+        assert call.await_count == 1
+
+        await client_module.chat_completion_json(MESSAGES, use_cache=False)
+        assert call.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_unparseable_json_is_not_cached(use_test_db):
+    cache = LLMResponseCache(ttl_seconds=3600, max_entries=10)
+    call = AsyncMock(return_value="not json")
+    with patch.object(client_module, "llm_cache", cache), \
+            patch.object(client_module, "_get_ai_config", AsyncMock(return_value=dict(AI_CONFIG))), \
+            patch.object(client_module, "_call_openai_format", call):
+        assert await client_module.chat_completion_json(MESSAGES) is None
+        assert await client_module.chat_completion_json(MESSAGES) is None
+    assert call.await_count == 2
+    assert (await cache.stats())["entries"] == 0
@@ -0,0 +1,145 @@
+"""LLM 用量计量：调用打标签记录 token、每日汇总、按 agent 预算降级低优先级调用。"""
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select
+
+import app.ai.client as client_module
+import app.ai.usage as usage_module
+from app.ai.usage import UsageMeter, daily_usage, scoped_stream, usage_scope
+from app.models.llm_usage import LLMUsage
+from app.platform.call_context import current_scope
+from app.platform.scheduler import _tag_usage
+
+MESSAGES = [{"role": "user", "content": "分析一下"}]
+AI_CONFIG = {
+    "name": "openai",
+    "enabled": True,
+    "api_key": "k",
+    "api_base": "https://api.example.com/v1",
+    "model": "gpt-4o-mini",
+    "api_format": "openai",
+}
+
+
+@pytest.fixture
+def meter(db_session):
+    @asynccontextmanager
+    async def fake_session():
+        yield db_session
+
+    meter = UsageMeter()
+    with patch.object(usage_module, "async_session", fake_session), \
+            patch.object(client_module, "usage_meter", meter), \
+            patch.object(client_module, "_get_ai_config", AsyncMock(return_value=dict(AI_CONFIG))), \
+            patch.object(client_module, "_cache_lookup", AsyncMock(return_value=None)), \
+            patch.object(client_module, "_cache_store", AsyncMock()):
+        yield meter
+
+
+async def fake_call(config, messages, temperature, max_tokens, response_format, usage=None):
+    usage.update(prompt_tokens=120, completion_tokens=30)
+    return "ok"
+
+
+@pytest.mark.asyncio
+async def test_call_recorded_with_scope_tags(meter, db_session):
+    with patch.object(client_module, "_call_openai_format", fake_call):
+        with usage_scope(agent_key="investment", job="morning_report"), usage_scope(skill="daily_report"):
+            assert await client_module.chat_completion(MESSAGES) == "ok"
+    assert await meter.flush() == 1
+
+    row = (await db_session.execute(select(LLMUsage))).scalar_one()
+    assert (row.agent_key, row.job, row.skill, row.provider) == ("investment", "morning_report", "daily_report", "openai")
+    assert (row.prompt_tokens, row.completion_tokens, row.outcome, row.estimated) == (120, 30, "ok", False)
+    assert await meter.tokens_used_today("investment") == 150
+
+
+@pytest.mark.asyncio
+async def test_scoped_stream_does_not_hold_scope_across_yields():
+    seen = []
+
+    async def stream():
+        for text in ("a", "b"):
+            seen.append(current_scope().get("skill"))
+            yield text
+        seen.append(current_scope().get("skill"))
+
+    async def report():
+        async for text in scoped_stream(stream(), skill="daily_report"):
+            yield text
+
+    gen = report()
+    assert await gen.__anext__() == "a"
+    assert current_scope() == {}  # 标签不泄漏到调用方
+    # 如 SSE 响应：后续推进与关闭发生在另一个 Context 中
+    ctx = contextvars.copy_context()
+    assert await asyncio.get_running_loop().create_task(gen.__anext__(), context=ctx) == "b"
+    await asyncio.get_running_loop().create_task(gen.aclose(), context=contextvars.copy_context())
+    assert seen == ["daily_report", "daily_report"]
+
+
+@pytest.mark.asyncio
+async def test_low_priority_calls_degrade_when_budget_exhausted(meter, db_session):
+    db_session.add(LLMUsage(agent_key="investment", prompt_tokens=900, completion_tokens=200, outcome="ok"))
+    await db_session.commit()
+    call = AsyncMock(return_value="ok")
+    with patch.object(client_module, "_call_openai_format", call), \
+            patch.object(meter, "get_budgets", AsyncMock(return_value={"investment": 1000})):
+        with usage_scope(agent_key="investment", priority="low"):
+            assert await client_module.chat_completion(MESSAGES) is None
+        with usage_scope(agent_key="investment"):
+            assert await client_module.chat_completion(MESSAGES) == "ok"
+        with usage_scope(agent_key="cs2_market", priority="low"):
+            assert await client_module.chat_completion(MESSAGES) == "ok"
+    assert call.await_count == 2
+
+    await meter.flush()
+    outcomes = (await db_session.execute(select(LLMUsage.outcome).where(LLMUsage.id > 1))).scalars().all()
+    assert sorted(outcomes) == ["budget_exceeded", "ok", "ok"]
+
+
+@pytest.mark.asyncio
+async def test_daily_usage_aggregates(db_session):
+    now = datetime.now()
+    db_session.add_all([
+        LLMUsage(created_at=now, agent_key="investment", skill="importance_scoring",
+                 prompt_tokens=100, completion_tokens=20, latency_ms=1000, outcome="ok"),
+        LLMUsage(created_at=now, agent_key="investment", skill="importance_scoring",
+                 prompt_tokens=50, completion_tokens=0, latency_ms=3000, outcome="error"),
+        LLMUsage(created_at=now, agent_key="investment", skill="importance_scoring", outcome="cache_hit"),
+        LLMUsage(created_at=now - timedelta(days=30), agent_key="investment", skill="importance_scoring",
+                 prompt_tokens=999, outcome="ok"),
+    ])
+    await db_session.commit()
+
+    rows = await daily_usage(db_session, days=7)
+    assert rows == [{
+        "date": now.date().isoformat(),
+        "agent_key": "investment",
+        "skill": "importance_scoring",
+        "calls": 3,
+        "prompt_tokens": 150,
+        "completion_tokens": 20,
+        "total_tokens": 170,
+        "errors": 1,
+        "cache_hits": 1,
+        "budget_exceeded": 0,
+        "avg_latency_ms": 1000,
+    }]
+
+
+@pytest.mark.asyncio
+async def test_scheduled_jobs_are_tagged():
+    seen = {}
+
+    async def job():
+        seen.update(usage_module.current_scope())
+
+    await _tag_usage("cs2_market", "generate_predictions", job)()
+    assert seen == {"agent_key": "cs2_market", "job": "generate_predictions"}
+    assert usage_module.current_scope() == {}
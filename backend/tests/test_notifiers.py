@@ -0,0 +1,249 @@
+"""推送分发：渠道间并发、渠道内保序、限流与每日额度；发件箱按渠道投递、退避重试与送达回写；合并窗口。"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select, update
+
+import app.notifiers.dispatcher as dispatcher_module
+import app.notifiers.manager as manager_module
+import app.notifiers.outbox as outbox_module
+from app.models.alert import Alert
+from app.models.article import Article
+from app.models.notification import NotificationDelivery
+from app.notifiers.base import Notifier
+from app.notifiers.dispatcher import Message, SlidingWindowLimiter, delivered_keys, dispatch
+
+
+class FakeNotifier(Notifier):
+    def __init__(self, name: str, delay: float = 0.0, fail: set = frozenset(), limits=(), quota=None):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.limits = list(limits)
+        self.quota = quota
+        self.sent: list[str] = []
+
+    def rate_limits(self):
+        return self.limits
+
+    def daily_quota(self):
+        return self.quota
+
+    async def send(self, title: str, content: str, url: str = "") -> bool:
+        await asyncio.sleep(self.delay)
+        if title in self.fail:
+            return False
+        self.sent.append(title)
+        return True
+
+    async def send_markdown(self, title: str, markdown: str) -> bool:
+        return await self.send(title, markdown)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_limits():
+    with patch.dict(dispatcher_module._limiters, clear=True), patch.dict(dispatcher_module._quotas, clear=True):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_channels_run_concurrently_and_keep_order():
+    channels = [FakeNotifier(f"c{i}", delay=0.05) for i in range(3)]
+    messages = [Message(i, f"t{i}", "body") for i in range(4)]
+
+    started = time.monotonic()
+    deliveries = await dispatch(messages, channels)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.4  # 串行需要 12 × 0.05 秒
+    assert all(c.sent == ["t0", "t1", "t2", "t3"] for c in channels)
+    assert len(deliveries) == 12 and all(d.ok for d in deliveries)
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_limiter_spaces_sends():
+    limiter = SlidingWindowLimiter(2, 0.1)
+    started = time.monotonic()
+    for _ in range(5):
+        await limiter.acquire()
+    # 第 3、5 次各需等待一个窗口
+    assert time.monotonic() - started >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_shared_scope_limits_and_daily_quota():
+    # 两个渠道对象共享同一作用域（如设置变更后重建的同一个 bot）
+    a = FakeNotifier("a", limits=[("bot", 1, 0.05)])
+    b = FakeNotifier("b", limits=[("bot", 1, 0.05)], quota=("b", 2))
+    messages = [Message(i, f"t{i}", "x") for i in range(3)]
+
+    started = time.monotonic()
+    deliveries = await dispatch(messages, [a, b])
+    assert time.monotonic() - started >= 0.2  # 共 5 次发送，每 0.05 秒一次
+
+    skipped = [d for d in deliveries if not d.ok]
+    assert [(d.channel, d.key, d.error) for d in skipped] == [("b", 2, "daily quota exhausted")]
+    assert delivered_keys(deliveries) == {0, 1, 2}
+
+
+@pytest.mark.asyncio
+async def test_failed_send_refunds_daily_quota():
+    c = FakeNotifier("c", fail={"t0", "t1"}, quota=("c", 2))
+    messages = [Message(i, f"t{i}", "x") for i in range(4)]
+
+    deliveries = await dispatch(messages, [c])
+    # 前两条发送失败退回额度，后两条仍可发送
+    assert [(d.key, d.ok, d.error) for d in deliveries] == [
+        (0, False, "rejected"), (1, False, "rejected"), (2, True, None), (3, True, None),
+    ]
+    assert not dispatcher_module._quotas["c"].take()
+
+
+async def _seed(session, titles, **kw):
+    session.add_all([
+        Article(agent_key="investment", title=title, url=f"u{i}", source="s", importance=4, fetched_at=datetime.now(), **kw)
+        for i, title in enumerate(titles)
+    ])
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_outbox_delivers_per_channel_and_retries_failures(file_session):
+    db_session, factory = file_session
+    await _seed(db_session, ["降准", "加息"])
+
+    tg = FakeNotifier("tg", fail={"⚠️ 加息"})
+    qq = FakeNotifier("qq", fail={"⚠️ 加息"})
+    with patch.object(manager_module, "async_session", factory), \
+            patch.object(manager_module, "DEFAULT_COALESCE_SECONDS", 0), \
+            patch.object(manager_module, "_get_enabled_notifiers", AsyncMock(return_value=[tg, qq])):
+        await manager_module.push_important_news()
+        # 已入队的文章不会重复入队
+        await manager_module.push_important_news()
+        assert await manager_module.drain_outbox() == 4
+        # 失败的投递退避中，暂不重试
+        assert await manager_module.drain_outbox() == 0
+
+        db_session.expire_all()
+        rows = {a.title: a.is_pushed for a in (await db_session.execute(select(Article))).scalars().all()}
+        # 所有渠道都失败的文章保持未推送
+        assert rows == {"降准": True, "加息": False}
+
+        # 退避到期后只重试失败的渠道；tg 恢复后送达
+        await db_session.execute(update(NotificationDelivery).values(available_at=datetime.now()))
+        await db_session.commit()
+        tg.fail = set()
+        assert await manager_module.drain_outbox() == 2
+
+    assert tg.sent == ["⚠️ 降准", "⚠️ 加息"] and qq.sent == ["⚠️ 降准"]
+    deliveries = (await db_session.execute(select(NotificationDelivery))).scalars().all()
+    states = {(d.dedup_key.split(":")[0], d.channel, d.status, d.attempts) for d in deliveries}
+    assert ("article", "qq", "pending", 2) in states and ("article", "tg", "sent", 2) in states
+    db_session.expire_all()
+    assert all(a.is_pushed for a in (await db_session.execute(select(Article))).scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_goes_dead_after_max_attempts(file_session):
+    db_session, factory = file_session
+    alert = Alert(agent_key="investment", level="high", title="异动", description="d")
+    db_session.add(alert)
+    await db_session.commit()
+
+    down = FakeNotifier("down", fail={"⚠️ 预警: 异动"})
+    with patch.object(manager_module, "async_session", factory), \
+            patch.object(manager_module, "_get_enabled_notifiers", AsyncMock(return_value=[down])):
+        await manager_module.push_alert(alert)
+        for _ in range(outbox_module.MAX_ATTEMPTS):
+            await db_session.execute(update(NotificationDelivery).values(available_at=datetime.now()))
+            await db_session.commit()
+            await manager_module.drain_outbox()
+
+    row = (await db_session.execute(select(NotificationDelivery))).scalar_one()
+    assert row.status == "dead" and row.attempts == outbox_module.MAX_ATTEMPTS and row.last_error == "rejected"
+    await db_session.refresh(alert)
+    assert alert.is_pushed is False
+
+
+@pytest.mark.asyncio
+async def test_digest_includes_already_pushed_articles(file_session):
+    db_session, factory = file_session
+    slot = datetime.now().replace(second=0, microsecond=0) - timedelta(minutes=30)
+    slot = slot.replace(minute=slot.minute - slot.minute % 30)
+    db_session.add_all([
+        Article(agent_key="investment", title="已单独推送", url="u1", source="s", importance=4,
+                fetched_at=slot + timedelta(minutes=1), is_pushed=True),
+        Article(agent_key="investment", title="普通资讯", url="u2", source="s", importance=1,
+                fetched_at=slot + timedelta(minutes=2)),
+    ])
+    await db_session.commit()
+
+    tg = FakeNotifier("tg")
+    with patch.object(manager_module, "async_session", factory), \
+            patch.object(manager_module, "_get_enabled_notifiers", AsyncMock(return_value=[tg])):
+        await manager_module.push_news_digest()
+        await manager_module.push_news_digest()  # 同一时段只入队一次
+        await manager_module.drain_outbox()
+
+    assert tg.sent == ["新闻摘要"]
+    row = (await db_session.execute(select(NotificationDelivery))).scalar_one()
+    assert "已单独推送" in row.content and "普通资讯" in row.content
+
+
+@pytest.mark.asyncio
+async def test_coalescing_window_merges_articles_per_channel(file_session):
+    db_session, factory = file_session
+    db_session.add_all([
+        Article(agent_key="investment", title=title, url=f"u{i}", source="s", importance=importance,
+                category=category, fetched_at=datetime.now())
+        for i, (title, importance, category) in enumerate([
+            ("Fed signals rate cut in September", 4, "macro"),
+            ("Fed rate cut odds jump after CPI", 3, "macro"),
+            ("Oil prices slide on OPEC output", 3, "macro"),
+            ("Chip stocks rally", 3, "tech"),
+            ("Market crash halts trading", 5, "macro"),
+        ])
+    ])
+    await db_session.commit()
+
+    tg = FakeNotifier("tg")
+    qq = FakeNotifier("qq")
+    with patch.object(manager_module, "async_session", factory), \
+            patch.object(manager_module, "_get_enabled_notifiers", AsyncMock(return_value=[tg, qq])):
+        await manager_module.push_important_news()
+        # 窗口内只发送重要度 5 的文章，其余暂缓
+        assert await manager_module.drain_outbox() == 2
+        assert tg.sent == qq.sent == ["🚨 Market crash halts trading"]
+
+        # 窗口结束后每个渠道按分类各发一条
+        await db_session.execute(
+            update(NotificationDelivery).values(created_at=datetime.now() - timedelta(minutes=5))
+        )
+        await db_session.commit()
+        assert await manager_module.drain_outbox() == 8
+
+    assert tg.sent[1:] == qq.sent[1:] == ["📢 macro · 3 条快讯", "📢 Chip stocks rally"]
+    rows = (await db_session.execute(select(NotificationDelivery))).scalars().all()
+    assert all(r.status == "sent" and r.attempts == 1 for r in rows)
+    db_session.expire_all()
+    assert all(a.is_pushed for a in (await db_session.execute(select(Article))).scalars().all())
+
+
+def test_coalesce_clusters_related_titles():
+    rows = [
+        NotificationDelivery(id=i, kind="article", channel="tg", title=title, content="", url=f"u{i}",
+                             importance=importance, group_key="macro")
+        for i, (title, importance) in enumerate([
+            ("Fed rate cut odds jump after CPI", 3),
+            ("Fed signals rate cut in September", 4),
+            ("Oil prices slide on OPEC output", 3),
+        ])
+    ]
+    [(message, ids)] = manager_module._coalesce(rows)
+    assert sorted(ids) == [0, 1, 2]
+    lines = message.content.split("\n\n")
+    assert lines[0].startswith("• Fed signals rate cut in September（另有 1 条相关报道）")
+    assert lines[1] == "• Oil prices slide on OPEC output\n  u2"
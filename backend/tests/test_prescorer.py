@@ -0,0 +1,79 @@
+"""本地预评分：规则判定、跳过 LLM 调用、抽检准确率统计。"""
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select
+
+import app.skills.engine as engine_module
+from app.ai.batching import AdaptiveBatcher
+from app.models.article import Article
+from app.skills import prescorer
+
+CONFIG = dict(prescorer.DEFAULT_PRESCORE_CONFIG)
+
+
+def test_prescore_rules():
+    help_post = prescorer.prescore("请问大家现在用什么机械键盘？", "V2EX")
+    assert not help_post.escalate
+    assert help_post.importance <= 1 and "求助" in help_post.tags
+
+    # 社区来源但命中高潜力关键词，仍交给 LLM
+    assert prescorer.prescore("美联储宣布降息 25 个基点", "V2EX").escalate
+    # 普通来源的普通标题没有把握，交给 LLM
+    assert prescorer.prescore("某公司季度经营情况", "Reuters").escalate
+
+
+@pytest.mark.asyncio
+async def test_local_verdicts_skip_llm(file_session, ai_enabled):
+    db_session, factory = file_session
+    db_session.add_all([
+        Article(agent_key="investment", title="出闲置显示器，有没有人要？", url="u1", source="V2EX", fetched_at=datetime.now()),
+        Article(agent_key="investment", title="OpenAI 发布新模型", url="u2", source="V2EX", fetched_at=datetime.now()),
+    ])
+    await db_session.commit()
+    llm_titles: list[str] = []
+
+    async def fake_score_batch(articles, agent_key="investment"):
+        llm_titles.extend(a.title for a in articles)
+        return {a.id: {"importance": 4, "sentiment": "neutral", "tags": []} for a in articles}
+
+    limits = {"model": "m", "context_tokens": 128_000, "max_output_tokens": 8192}
+    batcher = AdaptiveBatcher("test", default_size=10, max_size=30, output_tokens_per_item=200)
+    with patch.object(engine_module, "async_session", factory), \
+            patch.object(engine_module, "_score_batch", fake_score_batch), \
+            patch.object(engine_module, "get_model_limits", AsyncMock(return_value=limits)), \
+            patch.object(engine_module, "scoring_batcher", batcher), \
+            patch.object(prescorer, "get_prescore_config", AsyncMock(return_value=CONFIG)), \
+            patch.object(prescorer, "should_audit", return_value=False):
+        await engine_module.run_importance_scoring("investment")
+
+    assert llm_titles == ["OpenAI 发布新模型"]
+    db_session.expire_all()
+    rows = {a.url: a for a in (await db_session.execute(select(Article))).scalars().all()}
+    assert rows["u1"].ai_analysis["scored_by"] == "rule" and rows["u1"].importance <= 1
+    assert rows["u2"].ai_analysis["scored_by"] == "llm" and rows["u2"].importance == 4
+
+
+@pytest.mark.asyncio
+async def test_prescore_report_precision(db_session):
+    def analysis(scored_by, decision, importance):
+        return {"importance": importance, "scored_by": scored_by,
+                "prescore": {"importance": 1, "confidence": 0.9, "decision": decision}}
+
+    rows = [
+        ("rule", "local", 1), ("rule", "local", 0),
+        ("llm", "local", 1), ("llm", "local", 0), ("llm", "local", 3),  # 抽检：2/3 判对
+        ("llm", "llm", 4),
+    ]
+    db_session.add_all([
+        Article(agent_key="investment", title=f"T{i}", url=f"u{i}", source="V2EX", fetched_at=datetime.now(),
+                importance=imp, ai_analysis=analysis(by, decision, imp))
+        for i, (by, decision, imp) in enumerate(rows)
+    ])
+    await db_session.commit()
+
+    report = await prescorer.prescore_report(db_session, "investment")
+    assert report["local_scored"] == 2 and report["llm_scored"] == 4
+    assert report["local_share"] == round(2 / 6, 3)
+    assert report["audited"] == 3 and report["precision"] == round(2 / 3, 3)
@@ -0,0 +1,109 @@
+"""AI 服务商路由：429/5xx 故障切换、单服务商退避重试、冷却排序、p95 对冲请求、备用服务商配置解析。"""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+import app.ai.router as router_module
+from app.ai.client import _build_ai_config
+from app.ai.router import ProviderError, ProviderRouter
+
+PRIMARY = {"name": "openai", "api_base": "https://a/v1", "max_concurrency": 4}
+BACKUP = {"name": "deepseek", "api_base": "https://b/v1", "max_concurrency": 4}
+
+
+def _router() -> ProviderRouter:
+    return ProviderRouter(lambda _config: asyncio.Semaphore(4), max_rounds=3, backoff=(2, 5, 15))
+
+
+@pytest.mark.asyncio
+async def test_fails_over_on_429_without_backoff():
+    router = _router()
+    calls: list[str] = []
+
+    async def attempt(config):
+        calls.append(config["name"])
+        if config["name"] == "openai":
+            raise ProviderError(429, "rate limited")
+        return "ok"
+
+    with patch("asyncio.sleep", AsyncMock()) as sleep:
+        assert await router.call([PRIMARY, BACKUP], attempt) == "ok"
+    assert calls == ["openai", "deepseek"]
+    sleep.assert_not_awaited()
+
+    # 限流的服务商进入冷却，下次先走健康的
+    assert [c["name"] for c in router.order([PRIMARY, BACKUP])] == ["deepseek", "openai"]
+
+
+@pytest.mark.asyncio
+async def test_single_provider_retries_with_backoff():
+    router = _router()
+    responses = [ProviderError(503), ProviderError(502), "ok"]
+
+    async def attempt(_config):
+        r = responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+    with patch("asyncio.sleep", AsyncMock()) as sleep:
+        assert await router.call([PRIMARY], attempt) == "ok"
+    assert [c.args[0] for c in sleep.await_args_list] == [2, 5]
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_error_does_not_loop():
+    router = _router()
+    attempt = AsyncMock(side_effect=ProviderError(401, "bad key"))
+    with patch("asyncio.sleep", AsyncMock()) as sleep:
+        assert await router.call([PRIMARY], attempt) is None
+    assert attempt.await_count == 1
+    sleep.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_returns_faster_backup():
+    router = _router()
+    primary_cancelled = False
+
+    async def attempt(config):
+        nonlocal primary_cancelled
+        if config["name"] == "openai":
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                primary_cancelled = True
+                raise
+            return "slow"
+        return "fast"
+
+    with patch.object(router_module, "DEFAULT_HEDGE_DELAY", 0.05):
+        assert await router.call([PRIMARY, BACKUP], attempt, hedge=True) == "fast"
+    await asyncio.sleep(0)
+    assert primary_cancelled
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_when_primary_within_p95():
+    router = _router()
+    for _ in range(router_module.MIN_LATENCY_SAMPLES):
+        router.stats_for("openai").record_success(1.0)
+    attempt = AsyncMock(return_value="ok")
+
+    assert await router.call([PRIMARY, BACKUP], attempt, hedge=True) == "ok"
+    assert attempt.await_count == 1
+    assert router.hedge_delay("openai") == 1.0
+    assert router.stats_for("openai").to_dict()["p95_latency"] is not None
+
+
+def test_fallback_providers_parsed_from_settings():
+    config = _build_ai_config({
+        "ai_provider": "openai",
+        "ai_api_key": "k",
+        "ai_fallback_providers": "deepseek, openai, unknown, dashscope",
+        "ai_fallback_api_keys": '{"deepseek": "dk", "openai": "dup"}',
+    })
+    # 与主服务商重复、未知或未配置 key 的被忽略
+    assert [f["name"] for f in config["fallbacks"]] == ["deepseek"]
+    assert config["fallbacks"][0]["api_base"] == "https://api.deepseek.com/v1"
@@ -0,0 +1,101 @@
+"""接口响应缓存：命中与 ETag/304、入库后按标签失效、计算期间失效不写入、LRU 上限与 SQLite 落盘。"""
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.articles import router as articles_router
+from app.auth import get_current_user
+from app.database import get_session
+from app.platform.response_cache import ResponseCache
+from app.sources.base import NewsItem
+from app.sources.manager import _save_items
+
+
+@pytest.mark.asyncio
+async def test_cached_endpoint_hits_revalidates_and_invalidates(db_session):
+    app = FastAPI()
+    app.include_router(articles_router, prefix="/api/articles")
+
+    async def override_get_session():
+        yield db_session
+
+    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_current_user] = lambda: None
+
+    await _save_items(db_session, [NewsItem(title="a", url="u1", source="s", category="global")])
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get("/api/articles/categories")
+        assert first.headers["x-cache"] == "MISS"
+        assert first.json() == [{"category": "global", "count": 1}]
+        etag = first.headers["etag"]
+
+        second = await client.get("/api/articles/categories")
+        assert second.headers["x-cache"] == "HIT"
+        assert second.content == first.content
+
+        not_modified = await client.get("/api/articles/categories", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+        # 入库提交后 articles:investment 失效，下一次读取重新计算
+        await _save_items(db_session, [NewsItem(title="b", url="u2", source="s", category="global")])
+        fresh = await client.get("/api/articles/categories", headers={"If-None-Match": etag})
+        assert fresh.status_code == 200
+        assert fresh.headers["x-cache"] == "MISS"
+        assert fresh.json() == [{"category": "global", "count": 2}]
+        assert fresh.headers["etag"] != etag
+
+        # 其他 agent 的入库不影响投研缓存
+        await _save_items(db_session, [NewsItem(title="c", url="u3", source="s")], agent_key="tech_info")
+        assert (await client.get("/api/articles/categories")).headers["x-cache"] == "HIT"
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_compute_is_not_cached():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    version = cache._version(["cs2:prices"])
+    await cache.invalidate("cs2:prices")
+    await cache.put("k", b"[]", ["cs2:prices"], version=version)
+    assert await cache.get("k") is None
+
+    for key in ("a", "b", "c"):
+        await cache.put(key, b"{}", ["cs2:prices"])
+    assert await cache.get("a") is None  # 超过上限淘汰最久未用
+    assert (await cache.get("c")).body == b"{}"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_persistence_survives_restart_and_invalidation(file_session):
+    _, factory = file_session
+    await ResponseCache(10, 60, factory).put("/api/x?", b'{"v":1}', ["macro:indicators"])
+
+    restarted = ResponseCache(10, 60, factory)
+    entry = await restarted.get("/api/x?")
+    assert entry is not None and entry.body == b'{"v":1}'
+
+    await restarted.invalidate("macro:indicators")
+    assert await ResponseCache(10, 60, factory).get("/api/x?") is None
+
+
+@pytest.mark.asyncio
+async def test_gzip_response_etag_differs_and_revalidates():
+    cache = ResponseCache(max_entries=4, ttl_seconds=60)
+    app = FastAPI()
+
+    @app.get("/big")
+    @cache.cached("macro:indicators")
+    async def big():
+        return [{"i": i, "text": "x" * 40} for i in range(200)]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        plain = await client.get("/big", headers={"Accept-Encoding": "identity"})
+        zipped = await client.get("/big", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in plain.headers
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert zipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+
+        # 两种形式都能协商出 304
+        for etag in (plain.headers["etag"], zipped.headers["etag"]):
+            revalidated = await client.get("/big", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+            assert revalidated.status_code == 304
+            assert revalidated.headers["etag"] == zipped.headers["etag"]
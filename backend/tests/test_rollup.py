@@ -0,0 +1,90 @@
+"""文章小时汇总：入库/评分增量维护与整体重建一致，仪表盘统计只读汇总表。"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+
+import app.skills.engine as engine_module
+from app.agents.tech_info.routes import tech_dashboard
+from app.api.dashboard import get_overview, get_stats
+from app.models.article import Article
+from app.models.article_rollup import ArticleHourlyRollup
+from app.skills import rollup
+from app.sources.base import NewsItem
+from app.sources.manager import _save_items
+
+
+async def _snapshot(session) -> set[tuple]:
+    rows = (await session.execute(select(
+        ArticleHourlyRollup.agent_key, ArticleHourlyRollup.hour, ArticleHourlyRollup.source,
+        ArticleHourlyRollup.category, ArticleHourlyRollup.count, ArticleHourlyRollup.important_count,
+    ))).all()
+    return {tuple(r) for r in rows if r[4] or r[5]}
+
+
+@pytest.mark.asyncio
+async def test_incremental_rollup_matches_rebuild(file_session):
+    session, factory = file_session
+    items = [
+        NewsItem(title="a", url="u1", source="s1", category="global", importance=4),
+        NewsItem(title="b", url="u2", source="s1", category="global"),
+        NewsItem(title="c", url="u3", source="s2", category="china"),
+    ]
+    await _save_items(session, items)
+    await _save_items(session, [NewsItem(title="d", url="u4", source="s2")], agent_key="tech_info")
+
+    ids = {a.title: a.id for a in (await session.execute(select(Article))).scalars()}
+    with patch.object(engine_module, "async_session", factory):
+        await engine_module._save_analyses({ids["a"]: {"importance": 1}, ids["c"]: {"importance": 5}})
+
+    session.expire_all()
+    incremental = await _snapshot(session)
+    assert sum(r[4] for r in incremental) == 4
+    assert {(r[2], r[5]) for r in incremental if r[0] == "investment"} == {("s1", 0), ("s2", 1)}
+
+    await rollup.rebuild(session)
+    await session.commit()
+    assert await _snapshot(session) == incremental
+
+
+@pytest.mark.asyncio
+async def test_dashboard_stats_read_rollup(db_session):
+    now = datetime.now()
+    db_session.add_all([
+        Article(agent_key="investment", title="t1", url="u1", source="s1", category="global",
+                importance=3, fetched_at=now),
+        Article(agent_key="investment", title="t2", url="u2", source="s1", category="china",
+                importance=1, fetched_at=now),
+        Article(agent_key="investment", title="t3", url="u3", source="s2", category="global",
+                fetched_at=now - timedelta(days=3)),
+        Article(agent_key="tech_info", title="t4", url="u4", source="hn", importance=4, fetched_at=now),
+        Article(agent_key="tech_info", title="t5", url="u5", source="gh", fetched_at=now - timedelta(days=2)),
+    ])
+    await db_session.flush()
+    await rollup.rebuild(db_session)
+    await db_session.commit()
+
+    overview = await get_overview(session=db_session, _=None)
+    assert overview["today_articles"] == 2
+    assert overview["important_today"] == 1
+    assert overview["category_breakdown"] == {"global": 1, "china": 1}
+
+    stats = await get_stats(session=db_session, _=None)
+    assert stats["total_articles"] == 3
+    assert stats["sources"] == [{"source": "s1", "count": 2}, {"source": "s2", "count": 1}]
+    assert len(stats["hourly_volume"]) == 24
+    assert stats["hourly_volume"][-1] == {"hour": now.strftime("%H:00"), "count": 2}
+
+    tech = await tech_dashboard(session=db_session, _user=None)
+    assert tech == {
+        "total_articles": 2,
+        "articles_24h": 1,
+        "high_importance_24h": 1,
+        "top_sources": [{"source": "hn", "count": 1}],
+    }
+
+    # 清理按整点截止，汇总同步删除
+    await rollup.purge(db_session, rollup.hour_of(now - timedelta(days=1)))
+    await db_session.commit()
+    assert (await get_stats(session=db_session, _=None))["total_articles"] == 2
@@ -0,0 +1,171 @@
+"""评分队列：入库即排队、按优先级领取、失败退避与死信、AI 不可用时不耗尽重试、死信重新排队、指标，以及超过旧 50 篇窗口的积压消费。"""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select, update
+
+import app.ai.client as client_module
+import app.skills.engine as engine_module
+from app.models.article import Article
+from app.models.scoring_task import ScoringTask
+from app.skills import scoring_queue
+from app.sources.base import NewsItem
+from app.sources.manager import _save_items
+
+
+pytestmark = pytest.mark.usefixtures("fresh_batcher", "ai_enabled")
+
+
+def test_priority_prefers_ai_industry_and_fresh_news():
+    now = datetime.now()
+    fresh_ai = scoring_queue.compute_priority("s", "ai_industry", now, now)
+    fresh_global = scoring_queue.compute_priority("s", "global", now, now)
+    stale_global = scoring_queue.compute_priority("s", "global", now - timedelta(days=2), now)
+    assert fresh_ai > fresh_global > stale_global
+
+
+@pytest.mark.asyncio
+async def test_save_items_enqueues_and_claim_orders_by_priority(db_session):
+    now = datetime.now()
+    items = [
+        NewsItem(title="old", url="u1", source="s", category="global", published_at=now - timedelta(days=3)),
+        NewsItem(title="ai", url="u2", source="s", category="ai_industry", published_at=now),
+        NewsItem(title="new", url="u3", source="s", category="global", published_at=now),
+    ]
+    saved, _ = await _save_items(db_session, items)
+    assert saved == 3
+
+    tasks = await scoring_queue.claim_tasks(db_session, "investment", limit=10)
+    titles = [(await db_session.get(Article, t.article_id)).title for t in tasks]
+    assert titles == ["ai", "new", "old"]
+
+    # 已领取的任务在租约内不会被再次领取
+    assert await scoring_queue.claim_tasks(db_session, "investment", limit=10) == []
+
+
+@pytest.mark.asyncio
+async def test_failures_back_off_then_dead_letter(db_session):
+    article = Article(agent_key="investment", title="t", url="u", source="s", fetched_at=datetime.now())
+    db_session.add(article)
+    await db_session.flush()
+    scoring_queue.enqueue_articles(db_session, [article])
+    await db_session.commit()
+
+    for _ in range(scoring_queue.MAX_ATTEMPTS):
+        await scoring_queue.fail_tasks(db_session, [article.id])
+    await db_session.commit()
+
+    task = (await db_session.execute(select(ScoringTask))).scalar_one()
+    assert task.attempts == scoring_queue.MAX_ATTEMPTS
+    assert task.available_at == scoring_queue.DEAD_LETTER_AT
+
+    stats = await scoring_queue.queue_stats(db_session)
+    assert stats["agents"]["investment"]["depth"] == 0
+    assert stats["agents"]["investment"]["dead"] == 1
+
+
+@pytest.mark.asyncio
+async def test_requeue_dead_letters(db_session):
+    article = Article(agent_key="investment", title="t", url="u", source="s", fetched_at=datetime.now())
+    db_session.add(article)
+    await db_session.flush()
+    scoring_queue.enqueue_articles(db_session, [article])
+    for _ in range(scoring_queue.MAX_ATTEMPTS):
+        await scoring_queue.fail_tasks(db_session, [article.id])
+
+    assert await scoring_queue.requeue_dead(db_session, "tech_info") == 0
+    assert await scoring_queue.requeue_dead(db_session, "investment") == 1
+    await db_session.commit()
+    task = (await db_session.execute(select(ScoringTask))).scalar_one()
+    assert task.attempts == 0
+    assert [t.article_id for t in await scoring_queue.claim_tasks(db_session, "investment", limit=10)] == [article.id]
+
+
+async def _run_consumer_rounds(db_session, rounds: int) -> None:
+    """连续运行消费任务，每轮之前让退避 / 租约到期（模拟时间流逝）。"""
+    for _ in range(rounds):
+        await db_session.execute(update(ScoringTask).values(available_at=datetime.now()))
+        await db_session.commit()
+        await engine_module.run_importance_scoring("investment")
+
+
+@pytest.mark.asyncio
+async def test_ai_disabled_or_down_does_not_dead_letter(file_session):
+    db_session, factory = file_session
+    db_session.add_all([
+        Article(agent_key="investment", title=f"T{i}", url=f"u{i}", source="s", fetched_at=datetime.now())
+        for i in range(2)
+    ])
+    await db_session.commit()
+
+    ai_config = {"enabled": False, "api_key": ""}
+    provider_up = False
+
+    async def fake_score_batch(batch, agent_key="investment"):
+        if not provider_up:
+            return {}  # 服务商全部失败时 chat_completion_json 返回 None
+        return {a.id: {"importance": 3, "sentiment": "neutral", "tags": []} for a in batch}
+
+    with patch.object(engine_module, "async_session", factory), \
+            patch.object(engine_module, "_score_batch", fake_score_batch), \
+            patch.object(engine_module, "ai_configured", client_module.ai_configured), \
+            patch.object(client_module, "_get_ai_config", AsyncMock(side_effect=lambda: dict(ai_config))):
+        # AI 关闭：不领取任务
+        await _run_consumer_rounds(db_session, scoring_queue.MAX_ATTEMPTS + 1)
+        # 已配置但服务商不可用：归还任务，不计重试次数
+        ai_config.update(enabled=True, api_key="k")
+        await _run_consumer_rounds(db_session, scoring_queue.MAX_ATTEMPTS + 1)
+        tasks = (await db_session.execute(select(ScoringTask))).scalars().all()
+        assert len(tasks) == 2 and all(t.attempts == 0 for t in tasks)
+
+        provider_up = True
+        await _run_consumer_rounds(db_session, 1)
+
+    db_session.expire_all()
+    importances = (await db_session.execute(select(Article.importance))).scalars().all()
+    assert importances == [3, 3]
+    assert (await db_session.execute(select(ScoringTask))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_queue_stats_reports_depth_and_lag(db_session):
+    article = Article(agent_key="tech_info", title="t", url="u", source="s", fetched_at=datetime.now())
+    db_session.add(article)
+    await db_session.flush()
+    db_session.add(ScoringTask(
+        article_id=article.id, agent_key="tech_info", priority=50,
+        enqueued_at=datetime.now() - timedelta(minutes=10), available_at=datetime.now(),
+    ))
+    await db_session.commit()
+
+    stats = await scoring_queue.queue_stats(db_session, "tech_info")
+    agent = stats["agents"]["tech_info"]
+    assert agent["depth"] == 1 and agent["ready"] == 1
+    assert 590 <= agent["lag_seconds"] <= 700
+
+
+@pytest.mark.asyncio
+async def test_drain_consumes_backlog_beyond_old_window(file_session):
+    db_session, factory = file_session
+    old = datetime.now() - timedelta(hours=30)
+    db_session.add_all([
+        Article(agent_key="investment", title=f"T{i}", url=f"u{i}", source="s", fetched_at=old)
+        for i in range(120)
+    ])
+    await db_session.flush()
+    articles = (await db_session.execute(select(Article))).scalars().all()
+    scoring_queue.enqueue_articles(db_session, articles)
+    await db_session.commit()
+
+    async def fake_score_batch(batch, agent_key="investment"):
+        return {a.id: {"importance": 2, "sentiment": "neutral", "tags": []} for a in batch}
+
+    with patch.object(engine_module, "async_session", factory), \
+            patch.object(engine_module, "_score_batch", fake_score_batch):
+        await engine_module.run_importance_scoring("investment", limit=200)
+
+    db_session.expire_all()
+    unscored = (await db_session.execute(select(Article).where(Article.ai_analysis == None))).scalars().all()  # noqa: E711
+    assert unscored == []
+    assert (await db_session.execute(select(ScoringTask))).scalars().all() == []
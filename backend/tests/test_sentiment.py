@@ -0,0 +1,113 @@
+"""市场情绪增量聚合：启动回填、评分后增量并入、过期时段出窗、评分流程接入。"""
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select
+
+import app.skills.engine as engine_module
+import app.skills.keywords as keywords_module
+import app.skills.sentiment as sentiment_module
+from app.models.article import Article
+from app.models.sentiment import SentimentSnapshot
+from app.skills.keywords import KeywordTracker
+from app.skills.sentiment import SentimentAggregator
+
+NOW = datetime(2026, 3, 2, 12, 0)
+
+
+@pytest.fixture
+def clock(freeze_time):
+    return freeze_time(NOW, sentiment_module, keywords_module)
+
+
+@pytest.fixture(autouse=True)
+def tracker():
+    tracker = KeywordTracker()
+    with patch.object(sentiment_module, "keyword_tracker", tracker):
+        yield tracker
+
+
+def _article(i: int, category: str = "crypto", minutes: int = 0, **kw) -> Article:
+    return Article(
+        id=i, agent_key="investment", title=kw.pop("title", f"新闻{i}"), url=f"u{i}", source="s",
+        category=category, fetched_at=NOW - timedelta(minutes=minutes), **kw,
+    )
+
+
+@pytest.mark.asyncio
+async def test_warm_up_then_incremental_snapshot(file_session, clock):
+    db_session, factory = file_session
+    db_session.add_all([
+        _article(1, minutes=30, importance=4, sentiment="bullish", title="BTC ETF 获批", ai_analysis={"importance": 4}),
+        _article(2, "global", minutes=90, importance=2, sentiment="bearish", tags="美联储", ai_analysis={"importance": 2}),
+        _article(3, minutes=10),  # 未评分，不计入
+        _article(4, minutes=60 * 30, importance=5, sentiment="bearish", ai_analysis={"importance": 5}),  # 窗口外
+    ])
+    await db_session.commit()
+
+    agg = SentimentAggregator()
+    with patch.object(sentiment_module, "async_session", factory), \
+            patch.object(keywords_module, "async_session", factory):
+        await agg.observe("investment", [
+            (_article(5, minutes=5, title="BTC 走强"), {"importance": 4, "sentiment": "bullish", "tags": ["BTC"]}),
+        ])
+        snapshot = await agg.emit("investment")
+
+    # 多头权重 8，空头 2：50 + 50 * 6 / 10
+    assert snapshot.overall_score == 80 and snapshot.label == "greed"
+    assert snapshot.news_volume == 3
+    # 热词来自入库统计（按标题分词），不依赖评分标签
+    assert "ETF" in snapshot.top_keywords.split(",")
+    assert snapshot.breakdown["categories"]["crypto"] == {
+        "score": 100, "volume": 2, "bullish": 8.0, "bearish": 0.0, "neutral": 0.0,
+    }
+    assert snapshot.breakdown["categories"]["global"]["score"] == 0
+    saved = (await db_session.execute(select(SentimentSnapshot))).scalar_one()
+    assert saved.agent_key == "investment" and saved.overall_score == 80
+
+
+@pytest.mark.asyncio
+async def test_expired_buckets_leave_window(clock):
+    agg = SentimentAggregator(window_hours=1)
+    with patch.object(sentiment_module, "async_session", side_effect=RuntimeError("no db")), \
+            patch.object(keywords_module, "async_session", side_effect=RuntimeError("no db")):
+        await agg.observe("investment", [
+            (_article(1, minutes=50), {"importance": 5, "sentiment": "bearish", "tags": ["暴跌"]}),
+            (_article(2, minutes=5), {"importance": 1, "sentiment": "bullish", "tags": ["BTC"]}),
+        ])
+        before = await agg.snapshot("investment")
+        clock.current = NOW + timedelta(minutes=20)
+        after = await agg.snapshot("investment")
+
+    assert before.news_volume == 2 and before.label == "extreme_fear"
+    assert after.news_volume == 1 and after.overall_score == 100
+
+
+@pytest.mark.asyncio
+async def test_scoring_feeds_aggregator(file_session, ai_enabled):
+    db_session, factory = file_session
+    db_session.add_all([
+        Article(agent_key="investment", title=f"T{i}", url=f"u{i}", source="s", category="crypto",
+                fetched_at=datetime.now())
+        for i in range(3)
+    ])
+    await db_session.commit()
+
+    async def fake_score_batch(articles, agent_key="investment"):
+        return {a.id: {"importance": 3, "sentiment": "bearish", "tags": ["x"]} for a in articles}
+
+    agg = SentimentAggregator()
+    limits = {"model": "test-model", "context_tokens": 128_000, "max_output_tokens": 8192}
+    with patch.object(engine_module, "async_session", factory), \
+            patch.object(sentiment_module, "async_session", factory), \
+            patch.object(keywords_module, "async_session", factory), \
+            patch.object(engine_module, "sentiment_aggregator", agg), \
+            patch.object(engine_module, "get_model_limits", AsyncMock(return_value=limits)), \
+            patch.object(engine_module, "_score_batch", fake_score_batch):
+        await engine_module.run_importance_scoring("investment")
+        snapshot = await agg.snapshot("investment")
+
+    # 回填发生在首次并入之前，刚评分的文章不会被重复计数
+    assert snapshot.news_volume == 3
+    assert snapshot.overall_score == 0
@@ -0,0 +1,103 @@
+"""快速序列化：轻量行输出与 to_dict() 一致、大响应 gzip、标准库退路。"""
+import json
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+
+from app.api.articles import router as articles_router
+from app.api.bookmarks import router as bookmarks_router
+from app.api.macro import router as macro_router
+from app.auth import get_current_user
+from app.database import get_session
+from app.models.article import ARTICLE_ROW_COLUMNS, Article, ArticleRow
+from app.models.bookmark import ArticleBookmark
+from app.models.macro_indicator import MacroDataPoint
+from app.models.user import User
+from app.platform import serialization
+
+
+def _articles(n: int) -> list[Article]:
+    now = datetime.now().replace(microsecond=0)
+    return [
+        Article(
+            agent_key="investment", title=f"标题 {i}", url=f"https://example.com/{i}", source="rss",
+            category="global", summary="摘要" * 50, content="正文" * 500,
+            published_at=now - timedelta(minutes=i, microseconds=i * 7),
+            fetched_at=now - timedelta(minutes=i),
+            importance=i % 5, sentiment="bullish" if i % 2 else None,
+            ai_analysis={"importance": i % 5, "reason": "原因", "tags": ["a", "b"]} if i % 3 else None,
+            tags="a,b" if i % 3 else None,
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_article_row_matches_to_dict(db_session):
+    db_session.add_all(_articles(12))
+    await db_session.commit()
+
+    expected = [a.to_dict() for a in (await db_session.execute(select(Article).order_by(Article.id))).scalars()]
+    rows = (await db_session.execute(select(*ARTICLE_ROW_COLUMNS).order_by(Article.id))).all()
+    fast = json.loads(serialization.dumps([ArticleRow.from_row(r) for r in rows]))
+    assert fast == jsonable_encoder(expected)
+
+    # 未安装 orjson 时退回标准库，输出相同
+    with patch.object(serialization, "orjson", None):
+        assert json.loads(serialization.dumps([ArticleRow.from_row(r) for r in rows])) == fast
+
+
+@pytest.mark.asyncio
+async def test_list_endpoints_use_fast_path_and_gzip(db_session):
+    user = User(username="u", hashed_password="x")
+    db_session.add(user)
+    db_session.add_all(_articles(200))
+    db_session.add_all([
+        MacroDataPoint(series_id="UNRATE", data_date=date(2024, 1, 1), value=3.9, fetched_at=datetime.now()),
+        MacroDataPoint(series_id="UNRATE", data_date=date(2024, 2, 1), value=4.1, mom=0.2, fetched_at=datetime.now()),
+    ])
+    await db_session.flush()
+    db_session.add(ArticleBookmark(article_id=1, user_id=user.id, note="n", tags=["重要"]))
+    await db_session.commit()
+
+    app = FastAPI()
+    app.include_router(articles_router, prefix="/api/articles")
+    app.include_router(bookmarks_router, prefix="/api/bookmarks")
+    app.include_router(macro_router, prefix="/api/macro")
+
+    async def override_get_session():
+        yield db_session
+
+    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        page = await client.get("/api/articles/", params={"page_size": 200})
+        assert page.headers["content-encoding"] == "gzip"
+        data = page.json()
+        assert data["total"] == 200 and len(data["items"]) == 200
+        article = await db_session.get(Article, data["items"][0]["id"])
+        assert data["items"][0] == jsonable_encoder(article.to_dict())
+
+        # 小响应不压缩
+        small = await client.get("/api/articles/", params={"page_size": 1})
+        assert "content-encoding" not in small.headers
+
+        bookmarks = (await client.get("/api/bookmarks/", params={"tag": "重要"})).json()
+        assert bookmarks["total"] == 1
+        item = bookmarks["items"][0]
+        assert item["tags"] == ["重要"] and item["note"] == "n"
+        assert item["article"] == jsonable_encoder((await db_session.get(Article, 1)).to_dict())
+
+        indicators = {i["series_id"]: i for i in (await client.get("/api/macro/indicators")).json()}
+        assert indicators["UNRATE"]["latest_date"] == "2024-02-01"
+        assert indicators["UNRATE"]["trend"] == "up"
+        assert indicators["UNRATE"]["history"] == [
+            {"data_date": "2024-01-01", "value": 3.9}, {"data_date": "2024-02-01", "value": 4.1},
+        ]
+        assert indicators["M2SL"]["history"] == []
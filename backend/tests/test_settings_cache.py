@@ -0,0 +1,104 @@
+"""SettingsCache：单次加载、失效重载、按 key 变更通知、ScopedConfigService 批量读取。"""
+import pytest
+from sqlalchemy import select
+
+from app.models.setting import SystemSetting
+from app.platform.config import ScopedConfigService
+from app.platform.settings_cache import SettingsCache
+
+
+async def _seed(session, **values):
+    for key, value in values.items():
+        session.add(SystemSetting(key=key, value=value))
+    await session.commit()
+
+
+async def _set(session, key, value):
+    row = (await session.execute(select(SystemSetting).where(SystemSetting.key == key))).scalar_one()
+    row.value = value
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_get_and_get_many_from_single_load(db_session):
+    await _seed(db_session, ai_model="gpt-4o-mini", telegram_enabled="true")
+    cache = SettingsCache()
+
+    assert await cache.get("ai_model", session=db_session) == "gpt-4o-mini"
+    assert await cache.get("missing", "fallback", session=db_session) == "fallback"
+    many = await cache.get_many(["ai_model", "telegram_enabled", "missing"], session=db_session)
+    assert many == {"ai_model": "gpt-4o-mini", "telegram_enabled": "true"}
+
+
+@pytest.mark.asyncio
+async def test_values_are_cached_until_invalidated(db_session):
+    await _seed(db_session, ai_model="a")
+    cache = SettingsCache()
+    assert await cache.get("ai_model", session=db_session) == "a"
+
+    await _set(db_session, "ai_model", "b")
+    assert await cache.get("ai_model", session=db_session) == "a"  # 仍是缓存值
+
+    cache.invalidate()
+    assert await cache.get("ai_model", session=db_session) == "b"
+
+
+@pytest.mark.asyncio
+async def test_ttl_expiry_reloads(db_session):
+    await _seed(db_session, ai_model="a")
+    cache = SettingsCache(ttl_seconds=0)
+    assert await cache.get("ai_model", session=db_session) == "a"
+    await _set(db_session, "ai_model", "b")
+    assert await cache.get("ai_model", session=db_session) == "b"
+
+
+@pytest.mark.asyncio
+async def test_subscribers_notified_only_for_changed_keys(db_session):
+    await _seed(db_session, ai_model="a", qq_enabled="false")
+    cache = SettingsCache()
+    ai_events: list[set[str]] = []
+    qq_events: list[set[str]] = []
+    cache.subscribe(["ai_model", "ai_api_key"], ai_events.append)
+    cache.subscribe(["qq_enabled"], qq_events.append)
+    await cache.refresh(db_session)
+    ai_events.clear()
+    qq_events.clear()
+
+    await _set(db_session, "ai_model", "b")
+    cache.invalidate()
+    await cache.refresh(db_session)
+
+    assert ai_events == [{"ai_model"}]
+    assert qq_events == []
+
+    # 无变化的重载不触发回调
+    cache.invalidate()
+    await cache.refresh(db_session)
+    assert ai_events == [{"ai_model"}]
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_stops_notifications(db_session):
+    await _seed(db_session, ai_model="a")
+    cache = SettingsCache()
+    events: list[set[str]] = []
+    unsubscribe = cache.subscribe(["ai_model"], events.append)
+    await cache.refresh(db_session)
+    unsubscribe()
+    events.clear()
+
+    await _set(db_session, "ai_model", "b")
+    cache.invalidate()
+    await cache.refresh(db_session)
+    assert events == []
+
+
+@pytest.mark.asyncio
+async def test_scoped_config_get_many_strips_namespace(db_session):
+    await _seed(db_session, **{"cs2_market.buff_pages": "3", "cs2_market.platform": "buff"})
+    service = ScopedConfigService(cache=SettingsCache())
+
+    assert await service.get(db_session, "cs2_market", "buff_pages") == "3"
+    assert await service.get(db_session, "cs2_market", "missing", "x") == "x"
+    many = await service.get_many(db_session, "cs2_market", ["buff_pages", "platform", "missing"])
+    assert many == {"buff_pages": "3", "platform": "buff"}
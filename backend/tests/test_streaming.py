@@ -0,0 +1,133 @@
+"""流式生成：OpenAI/Anthropic SSE 解析、首 token 前切换服务商、日报流式生成后落库、SSE 编码。"""
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+import app.ai.client as client_module
+import app.skills.engine as engine_module
+from app.ai.router import ProviderError, ProviderRouter
+from app.ai.usage import UsageMeter
+from app.api.sse import _encode
+from app.models.article import Article
+from app.models.report import DailyReport
+
+MESSAGES = [{"role": "system", "content": "s"}, {"role": "user", "content": "u"}]
+PRIMARY = {"name": "openai", "api_key": "k", "api_base": "https://a.example/v1", "model": "m", "api_format": "openai"}
+BACKUP = {"name": "deepseek", "api_key": "k", "api_base": "https://b.example/v1", "model": "m", "api_format": "openai"}
+
+
+def _mock_client(body: str, status: int = 200):
+    real = httpx.AsyncClient
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(status, content=body.encode("utf-8"), headers={"content-type": "text/event-stream"})
+
+    return lambda **kwargs: real(transport=httpx.MockTransport(handler))
+
+
+async def _collect(gen) -> list:
+    return [item async for item in gen]
+
+
+@pytest.mark.asyncio
+async def test_openai_stream_parsing():
+    body = "".join(
+        f"data: {json.dumps(e)}\n\n" for e in [
+            {"choices": [{"delta": {"role": "assistant"}}]},
+            {"choices": [{"delta": {"content": "你好"}}]},
+            {"choices": [{"delta": {"content": "，世界"}}]},
+            {"choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": 4}},
+        ]
+    ) + "data: [DONE]\n\n"
+    usage: dict = {}
+    with patch.object(client_module.httpx, "AsyncClient", _mock_client(body)):
+        chunks = await _collect(client_module._stream_openai_format(PRIMARY, MESSAGES, 0.3, 100, None, usage))
+    assert chunks == ["你好", "，世界"]
+    assert usage == {"prompt_tokens": 12, "completion_tokens": 4}
+
+
+@pytest.mark.asyncio
+async def test_anthropic_stream_parsing():
+    events = [
+        {"type": "message_start", "message": {"usage": {"input_tokens": 20}}},
+        {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+        {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "市场"}},
+        {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "概览"}},
+        {"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": 7}},
+        {"type": "message_stop"},
+    ]
+    body = "".join(f"event: {e['type']}\ndata: {json.dumps(e)}\n\n" for e in events)
+    usage: dict = {}
+    config = {**PRIMARY, "api_format": "anthropic"}
+    with patch.object(client_module.httpx, "AsyncClient", _mock_client(body)):
+        chunks = await _collect(client_module._stream_anthropic_format(config, MESSAGES, 0.3, 100, usage))
+    assert chunks == ["市场", "概览"]
+    assert usage == {"prompt_tokens": 20, "completion_tokens": 7}
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_token():
+    async def fake_stream(config, messages, temperature, max_tokens, response_format, usage):
+        if config["name"] == "openai":
+            raise ProviderError(503, "overloaded")
+        for text in ["a", "b"]:
+            yield text
+
+    store = AsyncMock()
+    router = ProviderRouter(client_module._provider_semaphore)
+    with patch.object(client_module, "_get_ai_config", AsyncMock(return_value={**PRIMARY, "enabled": True, "fallbacks": [BACKUP]})), \
+            patch.object(client_module, "_stream_openai_format", fake_stream), \
+            patch.object(client_module, "_cache_lookup", AsyncMock(return_value=None)), \
+            patch.object(client_module, "_cache_store", store), \
+            patch.object(client_module, "provider_router", router), \
+            patch.object(client_module, "usage_meter", UsageMeter()):
+        chunks = await _collect(client_module.chat_completion_stream(MESSAGES))
+
+    assert chunks == ["a", "b"]
+    assert store.await_args.args[2] == "ab"
+    health = {s["name"]: s for s in router.stats()}
+    assert health["openai"]["errors"] == 1 and health["deepseek"]["errors"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_daily_report_saves_on_completion(db_session):
+    db_session.add(Article(agent_key="investment", title="央行降准", url="u1", source="s",
+                           fetched_at=datetime.now(), importance=4))
+    await db_session.commit()
+
+    @asynccontextmanager
+    async def fake_session():
+        yield db_session
+
+    async def fake_stream(messages, **kwargs):
+        for text in ["## 市场", "概览"]:
+            yield text
+
+    with patch.object(engine_module, "async_session", fake_session), \
+            patch.object(engine_module, "chat_completion_stream", fake_stream):
+        events = await _collect(engine_module.stream_daily_report("morning"))
+        # 当日已生成，再次请求直接返回已有报告
+        again = await _collect(engine_module.stream_daily_report("morning"))
+
+    assert [e["event"] for e in events] == ["delta", "delta", "done"]
+    assert events[-1]["content"] == "## 市场概览"
+    saved = (await db_session.execute(select(DailyReport))).scalar_one()
+    assert saved.content == "## 市场概览" and events[-1]["id"] == saved.id
+    assert [e["event"] for e in again] == ["done"]
+
+
+@pytest.mark.asyncio
+async def test_sse_encoding_reports_errors():
+    async def events():
+        yield {"event": "delta", "text": "部分"}
+        raise RuntimeError("boom")
+
+    frames = await _collect(_encode(events()))
+    assert frames[0] == "event: start\ndata: {}\n\n"
+    assert frames[1] == 'event: delta\ndata: {"text": "部分"}\n\n'
+    assert frames[2].startswith("event: error\n") and "boom" in frames[2]
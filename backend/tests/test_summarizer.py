@@ -0,0 +1,94 @@
+"""分层摘要：切块边界稳定、块摘要按文章 id 缓存复用、日报/推特摘要走 map-reduce。"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+import app.ai.cache as cache_module
+import app.skills.engine as engine_module
+import app.skills.summarizer as summarizer_module
+from app.ai.cache import LLMResponseCache
+from app.models.article import Article
+
+BASE = datetime(2026, 3, 2, 0, 0)
+
+
+def _article(i: int, category: str = "global", hours: float = 0, **kw) -> Article:
+    return Article(
+        id=i, agent_key="investment", title=kw.pop("title", f"新闻{i}"), url=f"u{i}", source="s",
+        category=category, importance=3, fetched_at=BASE + timedelta(hours=hours), **kw,
+    )
+
+
+@pytest.fixture
+def chunk_cache(file_session):
+    # 块摘要并发读写缓存，需要独立连接
+    _, factory = file_session
+    cache = LLMResponseCache(ttl_seconds=3600, max_entries=1000)
+    with patch.object(cache_module, "async_session", factory), \
+            patch.object(summarizer_module, "llm_cache", cache):
+        yield cache
+
+
+def test_chunk_boundaries_do_not_depend_on_window():
+    articles = [_article(i, hours=i * 0.5) for i in range(1, 49)]  # 24 小时，每半小时一条
+    morning = summarizer_module.make_chunks("r", {"global": articles})
+    # 只覆盖后 12 小时的窗口
+    evening = summarizer_module.make_chunks("r", {"global": [a for a in articles if a.fetched_at >= BASE + timedelta(hours=12)]})
+
+    assert all(len(c.items) <= summarizer_module.CHUNK_SIZE for c in morning)
+    assert {c.key for c in evening} <= {c.key for c in morning}
+
+
+@pytest.mark.asyncio
+async def test_report_map_reduce_reuses_cached_chunks(chunk_cache):
+    mapped: list[str] = []
+
+    async def fake_map(messages, **kwargs):
+        mapped.append(messages[1]["content"].split("\n", 1)[0])
+        return f"- 要点 {len(mapped)}"
+
+    day = [_article(i, "global" if i % 2 else "crypto", hours=i * 0.3) for i in range(1, 41)]
+    with patch.object(summarizer_module, "chat_completion", fake_map):
+        text = await engine_module._report_news_text(day, "investment")
+        first_calls = len(mapped)
+        # 追加新时间段的资讯：已有的块直接复用缓存
+        later = day + [_article(i, "global", hours=20) for i in range(41, 44)]
+        text2 = await engine_module._report_news_text(later, "investment")
+
+    assert "### crypto" in text and "### global" in text and "共 40 条" in text
+    assert first_calls >= 2
+    assert len(mapped) == first_calls + 1  # 只有新增的那一块需要摘要
+    assert "共 43 条" in text2
+
+
+@pytest.mark.asyncio
+async def test_small_report_uses_single_prompt(chunk_cache):
+    async def fail_map(messages, **kwargs):
+        raise AssertionError("should not summarize chunks")
+
+    with patch.object(summarizer_module, "chat_completion", fail_map):
+        text = await engine_module._report_news_text([_article(1), _article(2)], "investment")
+    assert text.startswith("最近的重要资讯：\n- [s] 新闻1")
+
+
+@pytest.mark.asyncio
+async def test_twitter_digest_summarizes_per_handle(chunk_cache):
+    seen: list[str] = []
+
+    async def fake_map(messages, **kwargs):
+        seen.append(messages[1]["content"].split(" ", 1)[0])
+        return None if "@bob" in messages[1]["content"] else "- 看多 BTC"
+
+    handle_map = {
+        "alice": [_article(i, "twitter", hours=i * 0.1, title=f"@alice: t{i}", content=f"alice {i}") for i in range(1, 41)],
+        "bob": [_article(i, "twitter", hours=i * 0.1, title=f"@bob: t{i}", content=f"bob {i}") for i in range(41, 71)],
+    }
+    with patch.object(summarizer_module, "chat_completion", fake_map):
+        messages = await engine_module._twitter_digest_messages(handle_map, 70)
+
+    assert sorted(set(seen)) == ["@alice", "@bob"]
+    user = messages[1]["content"]
+    assert "### @alice\n- 看多 BTC" in user
+    # 摘要失败的博主退回为推文标题，不丢内容
+    assert "@bob: t41" in user
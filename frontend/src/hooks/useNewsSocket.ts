@@ -2,10 +2,23 @@ import { useEffect, useRef, useCallback } from 'react'
 
 type EventHandler = (data: unknown) => void
 
-export function useNewsSocket(handlers: Record<string, EventHandler>) {
+export interface NewsSubscription {
+  topics?: string[]
+  agent_keys?: string[]
+  categories?: string[]
+  sources?: string[]
+  min_importance?: number
+  item_ids?: number[]
+}
+
+export function useNewsSocket(handlers: Record<string, EventHandler>, subscription?: NewsSubscription) {
   const wsRef = useRef<WebSocket | null>(null)
   const handlersRef = useRef(handlers)
   handlersRef.current = handlers
+  const subscriptionRef = useRef(subscription)
+  subscriptionRef.current = subscription
+  // 收到的最后一个事件 seq，重连时据此补发断线期间的事件
+  const lastSeqRef = useRef<number | null>(null)
 
   const connect = useCallback(() => {
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:'
@@ -14,9 +27,24 @@ export function useNewsSocket(handlers: Record<string, EventHandler>) {
     const ws = new WebSocket(wsUrl)
     wsRef.current = ws
 
+    ws.onopen = () => {
+      if (subscriptionRef.current || lastSeqRef.current) {
+        ws.send(JSON.stringify({
+          type: 'subscribe',
+          ...subscriptionRef.current,
+          last_seq: lastSeqRef.current ?? undefined,
+        }))
+      }
+    }
+
     ws.onmessage = (event) => {
       try {
         const msg = JSON.parse(event.data)
+        if (typeof msg.seq === 'number') {
+          lastSeqRef.current = msg.seq
+        } else if (msg.type === 'resync' || (msg.type === 'subscribed' && lastSeqRef.current === null)) {
+          lastSeqRef.current = msg.data.seq
+        }
         const handler = handlersRef.current[msg.type]
         if (handler) handler(msg.data)
       } catch {
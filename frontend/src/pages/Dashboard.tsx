@@ -86,9 +86,11 @@ export default function Dashboard() {
   }
 
   useNewsSocket({
-    new_article: () => load(),
+    new_articles: () => load(),
+    articles_skipped: () => load(),
     new_alert: () => load(),
-  })
+    resync: () => load(),
+  }, { agent_keys: ['investment'] })
 
   useEffect(() => {
     load()